@@ -1,13 +1,21 @@
 import os
 import logging
-from fastapi import APIRouter, Depends, HTTPException, status, Request, UploadFile, File, Form, Query
-from fastapi.responses import JSONResponse
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, status, Request, UploadFile, File, Form, Query
+from fastapi.responses import JSONResponse, Response
 from sqlalchemy.orm import Session
 from database import get_db
 from auth_utils import get_current_user
+from feed_service import feed_query, feed_version, hydrate_feed, add_like, remove_like, record_comment
+from timeline_service import fan_out_post, link_timelines
+from graph_service import record_connection
+from connection_service import connect_users, find_connection, find_pending_request
+from media_service import build_post_variants
+from http_cache_utils import make_etag, conditional_response
+from pagination_utils import keyset_paginate, keyset_filter
+from upload_utils import save_uploads, discard_uploads, IMAGE_TYPES, VIDEO_TYPES, CERTIFICATE_TYPES
 from models import User, Post, Comment, Connection, FriendRequest
 from datetime import datetime
-import uuid
+from typing import Optional
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -62,27 +70,50 @@ async def get_users(
 # Posts API
 @router.get("/posts")
 async def get_posts(
+    request: Request,
+    response: Response,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_db),
+    limit: int = Query(50, ge=1, le=100),
+    offset: int = Query(0, ge=0),
+    cursor: Optional[str] = Query(None, description="Opaque cursor from the X-Next-Cursor header; pass an empty value for the first page")
 ):
-    """Get all posts for the home feed"""
+    """Get all posts for the home feed (304 when If-None-Match is current)
+
+    In cursor mode the cursor for the next page is returned in the
+    X-Next-Cursor header (absent on the last page).
+    """
     try:
-        # Get posts from all users, ordered by creation date
-        posts = db.query(Post).order_by(Post.created_at.desc()).limit(50).all()
+        # Get posts from all users with their authors, ordered by creation date
+        query = feed_query(db)
+        keys = [(Post.created_at, True), (Post.id, True)]
+        ordered = query.order_by(Post.created_at.desc(), Post.id.desc())
+        if cursor is not None:
+            # One extra row, as keyset_paginate reads, so the next-cursor header is covered too
+            window = (ordered.filter(keyset_filter(keys, cursor)) if cursor else ordered).limit(limit + 1)
+        else:
+            window = ordered.offset(offset).limit(limit)
+        # The body carries the viewer's likes, so the tag is per viewer
+        etag = make_etag(feed_version(db, window), current_user.id, limit, offset, cursor)
+        not_modified = conditional_response(request, response, etag)
+        if not_modified:
+            return not_modified
+        
+        if cursor is not None:
+            rows, next_cursor = keyset_paginate(
+                query, keys, limit, cursor or None,
+                row_key=lambda row: [row[0].created_at, row[0].id]
+            )
+            if next_cursor:
+                response.headers["X-Next-Cursor"] = next_cursor
+        else:
+            rows = window.all()
+        items = hydrate_feed(db, rows, current_user.id)
         
         # Format posts for frontend
         formatted_posts = []
-        for post in posts:
-            # Get user info
-            user = db.query(User).filter(User.id == post.user_id).first()
-            if not user:
-                continue
-                
-            # Get comments count
-            comments_count = db.query(Comment).filter(Comment.post_id == post.id).count()
-            
-            # Get likes count (placeholder for now)
-            likes_count = 0  # Will implement like system later
+        for item in items:
+            post, user = item["post"], item["author"]
             shares_count = 0  # Will implement share system later
             
             formatted_post = {
@@ -90,6 +121,8 @@ async def get_posts(
                 "content": post.content,
                 "post_type": post.post_type,
                 "image_path": post.image_path,
+                "image_srcset": item["image_variants"]["webp"]["srcset"] if item["image_variants"] else None,
+                "image_variants": item["image_variants"],
                 "video_path": post.video_path,
                 "certificate_path": post.certificate_path,
                 "created_at": post.created_at.isoformat(),
@@ -101,8 +134,8 @@ async def get_posts(
                     "company": user.company,
                     "profile_image_url": user.get_profile_image_url()
                 },
-                "likes_count": likes_count,
-                "comments_count": comments_count,
+                "likes_count": item["likes_count"],
+                "comments_count": item["comments_count"],
                 "shares_count": shares_count
             }
             formatted_posts.append(formatted_post)
@@ -110,9 +143,11 @@ async def get_posts(
         return {
             "success": True,
             "posts": formatted_posts,
-            "user_liked_posts": []  # Will implement like system later
+            "user_liked_posts": [item["post"].id for item in items if item["is_liked"]]
         }
         
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error getting posts: {e}")
         raise HTTPException(
@@ -122,6 +157,7 @@ async def get_posts(
 
 @router.post("/posts")
 async def create_post(
+    background_tasks: BackgroundTasks,
     content: str = Form(...),
     post_type: str = Form("general"),
     image: UploadFile = File(None),
@@ -139,77 +175,13 @@ async def create_post(
                 detail="Post content cannot be empty"
             )
         
-        # Handle image upload if provided
-        image_path = None
-        if image:
-            # Validate file type
-            if not image.content_type.startswith('image/'):
-                raise HTTPException(
-                    status_code=status.HTTP_400_BAD_REQUEST,
-                    detail="Only image files are allowed for image upload"
-                )
-            
-            # Generate unique filename
-            file_extension = os.path.splitext(image.filename)[1]
-            filename = f"{uuid.uuid4()}{file_extension}"
-            image_path = filename
-            
-            # Save file
-            file_path = os.path.join(UPLOADS_DIR, filename)
-            with open(file_path, "wb") as buffer:
-                content_data = await image.read()
-                buffer.write(content_data)
-        
-        # Handle video upload if provided
-        video_path = None
-        if video:
-            # Validate file type
-            if not video.content_type.startswith('video/'):
-                raise HTTPException(
-                    status_code=status.HTTP_400_BAD_REQUEST,
-                    detail="Only video files are allowed for video upload"
-                )
-            
-            # Generate unique filename
-            file_extension = os.path.splitext(video.filename)[1]
-            filename = f"{uuid.uuid4()}{file_extension}"
-            video_path = filename
-            
-            # Save file
-            file_path = os.path.join(UPLOADS_DIR, filename)
-            with open(file_path, "wb") as buffer:
-                content_data = await video.read()
-                buffer.write(content_data)
-        
-        # Handle certificate upload if provided
-        certificate_path = None
-        if certificate:
-            # Validate file type (PDF, DOC, DOCX, images)
-            allowed_certificate_types = [
-                'application/pdf',
-                'application/msword',
-                'application/vnd.openxmlformats-officedocument.wordprocessingml.document',
-                'image/jpeg',
-                'image/png',
-                'image/gif'
-            ]
-            
-            if certificate.content_type not in allowed_certificate_types:
-                raise HTTPException(
-                    status_code=status.HTTP_400_BAD_REQUEST,
-                    detail="Only PDF, DOC, DOCX, and image files are allowed for certificates"
-                )
-            
-            # Generate unique filename
-            file_extension = os.path.splitext(certificate.filename)[1]
-            filename = f"{uuid.uuid4()}{file_extension}"
-            certificate_path = filename
-            
-            # Save file
-            file_path = os.path.join(UPLOADS_DIR, filename)
-            with open(file_path, "wb") as buffer:
-                content_data = await certificate.read()
-                buffer.write(content_data)
+        # Uploads are streamed to disk in chunks; type comes from the file's magic bytes
+        paths = await save_uploads(UPLOADS_DIR, {
+            "image": (image or None, IMAGE_TYPES),
+            "video": (video or None, VIDEO_TYPES),
+            "certificate": (certificate or None, CERTIFICATE_TYPES),
+        })
+        image_path, video_path, certificate_path = paths["image"], paths["video"], paths["certificate"]
         
         # Create post
         new_post = Post(
@@ -223,8 +195,15 @@ async def create_post(
         )
         
         db.add(new_post)
-        db.commit()
+        try:
+            db.commit()
+        except Exception:
+            discard_uploads(UPLOADS_DIR, paths.values())
+            raise
         db.refresh(new_post)
+        background_tasks.add_task(fan_out_post, new_post.id)
+        if image_path:
+            background_tasks.add_task(build_post_variants, new_post.id)
         
         logger.info(f"User {current_user.username} created post {new_post.id} with type {post_type}")
         
@@ -263,7 +242,9 @@ async def like_post(
                 detail="Post not found"
             )
         
-        # For now, just return success (like system will be implemented later)
+        add_like(db, post_id, current_user.id)
+        db.commit()
+        
         return {
             "success": True,
             "message": "Post liked successfully"
@@ -294,7 +275,9 @@ async def unlike_post(
                 detail="Post not found"
             )
         
-        # For now, just return success (like system will be implemented later)
+        remove_like(db, post_id, current_user.id)
+        db.commit()
+        
         return {
             "success": True,
             "message": "Post unliked successfully"
@@ -326,13 +309,14 @@ async def get_post_comments(
                 detail="Post not found"
             )
         
-        # Get comments
-        comments = db.query(Comment).filter(Comment.post_id == post_id).order_by(Comment.created_at.desc()).limit(20).all()
+        # Get comments with their authors in one joined query
+        comments = db.query(Comment, User).join(User, Comment.user_id == User.id).filter(
+            Comment.post_id == post_id
+        ).order_by(Comment.created_at.desc(), Comment.id.desc()).limit(20).all()
         
         # Format comments
         formatted_comments = []
-        for comment in comments:
-            user = db.query(User).filter(User.id == comment.user_id).first()
+        for comment, user in comments:
             if user:
                 formatted_comments.append({
                     "id": comment.id,
@@ -396,8 +380,9 @@ async def create_comment(
         )
         
         db.add(new_comment)
+        db.flush()
+        record_comment(db, post_id)
         db.commit()
-        db.refresh(new_comment)
         
         logger.info(f"User {current_user.username} commented on post {post_id}")
         
@@ -451,22 +436,15 @@ async def send_connection_request(
                 detail="Cannot send connection request to yourself"
             )
         
-        # Check if connection request already exists
-        existing_request = db.query(FriendRequest).filter(
-            (FriendRequest.sender_id == current_user.id) & (FriendRequest.receiver_id == receiver_id)
-        ).first()
-        
-        if existing_request:
+        # Check if connection request already exists (either direction)
+        if find_pending_request(db, current_user.id, receiver_id):
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail="Connection request already sent"
             )
         
         # Check if already connected
-        existing_connection = db.query(Connection).filter(
-            ((Connection.user_id == current_user.id) & (Connection.connected_user_id == receiver_id)) |
-            ((Connection.user_id == receiver_id) & (Connection.connected_user_id == current_user.id))
-        ).first()
+        existing_connection = find_connection(db, current_user.id, receiver_id, 'accepted')
         
         if existing_connection:
             raise HTTPException(
@@ -576,14 +554,9 @@ async def accept_connection_request(
         friend_request.updated_at = datetime.now()
         
         # Create connection
-        new_connection = Connection(
-            user_id=friend_request.sender_id,
-            connected_user_id=friend_request.receiver_id,
-            status="accepted",
-            created_at=datetime.now()
-        )
-        
-        db.add(new_connection)
+        connect_users(db, friend_request.sender_id, friend_request.receiver_id)
+        link_timelines(db, friend_request.sender_id, friend_request.receiver_id)
+        record_connection(db, friend_request.sender_id, friend_request.receiver_id)
         db.commit()
         
         logger.info(f"User {current_user.username} accepted connection request from {friend_request.sender_id}")
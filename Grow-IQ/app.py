@@ -15,12 +15,26 @@ from database_enhanced import (
     init_database, 
     check_database_health,
     cleanup_database,
+    start_replica_refresher,
     get_db
 )
 from sqlalchemy.orm import Session
+from feed_service import start_counter_reconciler, stop_counter_reconciler, ensure_engagement_score_schema, ensure_post_updated_at_schema
+from media_service import VARIANTS_DIR, VARIANTS_URL
+from avatar_service import process_avatar, save_avatar, remove_avatar, avatar_urls, shutdown_avatar_pool
+from http_cache_utils import ImmutableStaticFiles
+from suggestion_service import start_suggestion_refresher, stop_suggestion_refresher
+from graph_service import start_graph_index_build
+from connection_service import ensure_edge_schema, ensure_connection_counter_schema
+from search_service import ensure_user_search_index, ensure_job_search_index
+from typeahead_service import start_typeahead_builder, stop_typeahead_builder
+from search_history_service import start_search_history, stop_search_history
+from skill_service import ensure_skill_catalog, user_skill_names
+from job_token_service import ensure_job_token_index, normalize_tokens, top_matching_jobs
 from models import User, ResumeTestResult, ResumeathonParticipant
 from auth_utils import get_current_user
 from security import SecurityMiddleware
+from upload_utils import RequestBodyLimitMiddleware
 from logging_config import app_logger, security_logger, performance_logger
 from pydantic import BaseModel
 import speech_recognition as sr
@@ -31,7 +45,7 @@ import wave
 import audioop
 import re
 from sqlalchemy.orm import Session
-from typing import List, Tuple, Optional, Dict, Set
+from typing import List, Optional, Dict
 
 # Configure logging
 logger = app_logger
@@ -80,12 +94,56 @@ async def lifespan(app: FastAPI):
         logger.error(f"Failed to create database tables: {e}")
         raise
     
+    # Keep the local read snapshot fresh (no-op unless SQLITE_READ_SNAPSHOT is enabled)
+    start_replica_refresher()
+    
+    # Older SQLite databases predate posts.updated_at (added first: rescoring bumps it)
+    # and posts.engagement_score...
+    ensure_post_updated_at_schema()
+    ensure_engagement_score_schema()
+    
+    # ...the canonical connection pair columns (duplicates are only removed by migrate_edge_pairs.py)...
+    ensure_edge_schema()
+    
+    # ...the users connection counters...
+    ensure_connection_counter_schema()
+    
+    # ...and the users and jobs full-text search indexes
+    ensure_user_search_index()
+    ensure_job_search_index()
+    
+    # Seed the skills catalog and backfill user/job skills the first time it is empty
+    ensure_skill_catalog()
+    
+    # Build the job token inverted index used by recommendations the first time it is empty
+    ensure_job_token_index()
+    
+    # Periodically repair drift in the denormalized post like/comment counters
+    start_counter_reconciler()
+    
+    # Build the in-memory social graph off the event loop; requests use SQL until it is ready
+    start_graph_index_build()
+    
+    # Recompute expired or invalidated people-you-may-know lists
+    start_suggestion_refresher()
+    
+    # Build the shared typeahead index file and republish it after profile edits
+    start_typeahead_builder()
+    
+    # Restore popular and recent searches, then batch-write the search log in the background
+    start_search_history()
+    
     logger.info("Qrow IQ application started successfully")
     
     yield
     
     # Shutdown
     logger.info("Shutting down Qrow IQ application...")
+    stop_counter_reconciler()
+    stop_suggestion_refresher()
+    stop_typeahead_builder()
+    stop_search_history()
+    shutdown_avatar_pool()
     cleanup_database()
 
 # Create FastAPI app
@@ -100,6 +158,9 @@ app = FastAPI(
 # Add security middleware
 app.add_middleware(SecurityMiddleware)
 
+# Refuse oversized request bodies before they are read or spooled
+app.add_middleware(RequestBodyLimitMiddleware)
+
 # Add trusted host middleware for production
 # Note: Disabled for Render deployment - Render uses dynamic hostnames
 # If you need this, add your Render domain to ALLOWED_HOSTS environment variable
@@ -136,6 +197,10 @@ if os.path.isdir(FRONTEND_ASSETS_DIR):
     app.mount("/assets", StaticFiles(directory=FRONTEND_ASSETS_DIR), name="frontend_assets")
     logger.info(f"Mounted frontend assets from {FRONTEND_ASSETS_DIR} at /assets")
 
+# Image variants have content-hashed names; mounted ahead of /static so they get immutable caching
+os.makedirs(VARIANTS_DIR, exist_ok=True)
+app.mount(VARIANTS_URL, ImmutableStaticFiles(directory=VARIANTS_DIR), name="media_variants")
+
 # Mount static files with absolute path
 app.mount("/static", StaticFiles(directory=os.path.join(BASE_DIR, "static")), name="static")
 
@@ -1016,6 +1081,9 @@ async def update_profile(request: Request):
         logger.error(f"Error updating profile: {e}")
         return {"success": False, "message": str(e)}
 
+# Size limit for /api/upload-profile-picture
+PROFILE_PICTURE_MAX_SIZE = 2 * 1024 * 1024
+
 @app.post("/api/upload-profile-picture")
 async def upload_profile_picture(request: Request):
     """
@@ -1024,8 +1092,8 @@ async def upload_profile_picture(request: Request):
     Features:
     - Secure file validation
     - File size limits (2MB)
-    - MIME type validation
-    - Filename sanitization
+    - Type detection from magic bytes
+    - 64/128/400px variants rendered in the shared avatar process pool
     - Cloud storage ready
     - Comprehensive error handling
     """
@@ -1063,31 +1131,29 @@ async def upload_profile_picture(request: Request):
                 content={"success": False, "message": "No file uploaded", "code": "NO_FILE"}
             )
         
-        # Handle UploadFile properly - read content to get size
-        file_content = await file.read()
-        file_size = len(file_content)
-        
-        # File validation
-        validation_result = await validate_profile_picture(file, file_size, file_content)
-        if not validation_result["valid"]:
+        # Read at most one byte past the limit so oversized uploads are not buffered whole
+        file_content = await file.read(PROFILE_PICTURE_MAX_SIZE + 1)
+        if not file_content:
             return JSONResponse(
                 status_code=400,
-                content={"success": False, "message": validation_result["message"], "code": validation_result["code"]}
+                content={"success": False, "message": "File is empty", "code": "EMPTY_FILE"}
             )
         
-        # Generate secure filename
-        filename = generate_secure_filename(file.filename)
-        
-        # Save file to storage (pass content directly)
-        storage_result = await save_profile_picture(file_content, filename)
-        if not storage_result["success"]:
+        # Validate, decode and resize in the shared avatar process pool
+        try:
+            variants = await process_avatar(file_content, max_size=PROFILE_PICTURE_MAX_SIZE)
+        except HTTPException as e:
+            code = "FILE_TOO_LARGE" if e.status_code == 413 else "INVALID_IMAGE"
             return JSONResponse(
-                status_code=500,
-                content={"success": False, "message": storage_result["message"], "code": "STORAGE_ERROR"}
+                status_code=400,
+                content={"success": False, "message": e.detail, "code": code}
             )
         
+        file_url = await save_avatar(user_id, variants)
+        filename = os.path.basename(file_url)
+        
         # Update database
-        db_result = await update_user_profile_picture(user_id, storage_result["file_url"])
+        db_result = await update_user_profile_picture(user_id, file_url)
         if not db_result["success"]:
             return JSONResponse(
                 status_code=500,
@@ -1099,7 +1165,8 @@ async def upload_profile_picture(request: Request):
             content={
                 "success": True,
                 "message": "Profile picture uploaded successfully",
-                "file_url": storage_result["file_url"],
+                "file_url": file_url,
+                "avatar_urls": avatar_urls(file_url),
                 "filename": filename
             }
         )
@@ -1113,100 +1180,6 @@ async def upload_profile_picture(request: Request):
             content={"success": False, "message": "Internal server error", "code": "INTERNAL_ERROR"}
         )
 
-async def validate_profile_picture(file, file_size: int, file_content: bytes) -> dict:
-    """Validate uploaded profile picture file"""
-    try:
-        # Check file size (2MB limit)
-        if file_size > 2 * 1024 * 1024:
-            return {"valid": False, "message": "File size must be less than 2MB", "code": "FILE_TOO_LARGE"}
-        
-        if file_size == 0:
-            return {"valid": False, "message": "File is empty", "code": "EMPTY_FILE"}
-        
-        # Check MIME type
-        allowed_mimes = ['image/jpeg', 'image/jpg', 'image/png', 'image/webp']
-        content_type = file.content_type or ''
-        if content_type and content_type not in allowed_mimes:
-            return {"valid": False, "message": "Only JPG, PNG, and WebP images are allowed", "code": "INVALID_TYPE"}
-        
-        # Check file extension
-        allowed_extensions = ['.jpg', '.jpeg', '.png', '.webp']
-        file_extension = os.path.splitext(file.filename or '')[1].lower()
-        if file_extension not in allowed_extensions:
-            return {"valid": False, "message": "Invalid file extension", "code": "INVALID_EXTENSION"}
-        
-        # Validate actual image content using magic bytes
-        if file_content:
-            # Check JPEG
-            if file_content[:3] == b'\xff\xd8\xff':
-                pass  # Valid JPEG
-            # Check PNG
-            elif file_content[:8] == b'\x89PNG\r\n\x1a\n':
-                pass  # Valid PNG
-            # Check WebP
-            elif file_content[:4] == b'RIFF' and file_content[8:12] == b'WEBP':
-                pass  # Valid WebP
-            else:
-                return {"valid": False, "message": "File is not a valid image", "code": "INVALID_IMAGE"}
-        
-        return {"valid": True, "message": "File validation passed", "code": "VALID"}
-        
-    except Exception as e:
-        logger.error(f"File validation error: {e}")
-        import traceback
-        traceback.print_exc()
-        return {"valid": False, "message": "File validation failed", "code": "VALIDATION_ERROR"}
-
-def generate_secure_filename(original_filename: str) -> str:
-    """Generate a secure, unique filename"""
-    import uuid
-    import re
-    
-    # Remove any path components and get just the filename
-    filename = os.path.basename(original_filename)
-    
-    # Remove any non-alphanumeric characters except dots and hyphens
-    filename = re.sub(r'[^a-zA-Z0-9.-]', '', filename)
-    
-    # Generate unique identifier
-    unique_id = str(uuid.uuid4())
-    
-    # Get file extension
-    file_extension = os.path.splitext(filename)[1].lower()
-    
-    # Create secure filename: timestamp_uuid.extension
-    timestamp = int(time.time())
-    secure_filename = f"{timestamp}_{unique_id}{file_extension}"
-    
-    return secure_filename
-
-async def save_profile_picture(file_content: bytes, filename: str) -> dict:
-    """Save profile picture to storage (local or cloud)"""
-    try:
-        # For now, save to local storage
-        # In production, you can easily switch to S3 or other cloud storage
-        
-        upload_dir = os.path.join(BASE_DIR, "static", "uploads", "profile_pictures")
-        os.makedirs(upload_dir, exist_ok=True)
-        
-        file_path = os.path.join(upload_dir, filename)
-        
-        # Save file - write content directly to disk
-        with open(file_path, "wb") as buffer:
-            buffer.write(file_content)
-        
-        # Generate file URL
-        file_url = f"/static/uploads/profile_pictures/{filename}"
-        
-        logger.info(f"Profile picture saved successfully: {file_url}")
-        return {"success": True, "file_url": file_url, "message": "File saved successfully"}
-        
-    except Exception as e:
-        logger.error(f"Error saving profile picture: {e}")
-        import traceback
-        traceback.print_exc()
-        return {"success": False, "message": f"Failed to save file: {str(e)}"}
-
 async def update_user_profile_picture(user_id: int, file_url: str) -> dict:
     """Update user's profile picture in database"""
     try:
@@ -1219,10 +1192,12 @@ async def update_user_profile_picture(user_id: int, file_url: str) -> dict:
             db.close()
             return {"success": False, "message": "User not found"}
         
-        # Update profile picture
+        # Update profile picture, then drop the previous one's files
+        old_pic = user.profile_pic
         user.update_profile_pic(file_url)
         db.commit()
         db.close()
+        remove_avatar(old_pic)
         
         logger.info(f"Profile picture updated for user {user_id}: {file_url}")
         return {"success": True, "message": "Profile picture updated in database"}
@@ -1748,46 +1723,12 @@ async def redirect_signup():
 
 # ---------------- Job Recommendations ----------------
 
-def _normalize_tokens(text: str) -> Set[str]:
-    if not text:
-        return set()
-    # Keep alphanumerics and spaces, lowercase, split
-    cleaned = re.sub(r"[^a-zA-Z0-9+.# ]+", " ", text.lower())
-    tokens = {t for t in (tok.strip() for tok in cleaned.replace("/", " ").replace(",", " ").split()) if t}
-    # Common stopwords to reduce noise
-    stop = {"and","or","the","a","an","to","of","in","for","with","on","at","by","from","as","is","are","be","this","that"}
-    return {t for t in tokens if t not in stop and len(t) > 1}
-
-def _parse_user_skills(skills_field: Optional[str]) -> Set[str]:
-    if not skills_field:
-        return set()
-    try:
-        import json
-        data = json.loads(skills_field)
-        if isinstance(data, list):
-            return {s.strip().lower() for s in data if isinstance(s, str)}
-        if isinstance(data, dict):
-            return {str(k).strip().lower() for k, v in data.items() if v}
-    except Exception:
-        pass
-    # Fallback: comma/semicolon separated
-    parts = re.split(r"[,;\n]+", skills_field)
-    return {p.strip().lower() for p in parts if p.strip()}
-
-def _job_tokens(job) -> Set[str]:
-    fields = [getattr(job, 'title', ''), getattr(job, 'requirements', ''), getattr(job, 'description', ''), getattr(job, 'location', ''), getattr(job, 'job_type', '')]
-    joined = " \n ".join([f for f in fields if f])
-    return _normalize_tokens(joined)
-
-def _score_job(user_skill_tokens: Set[str], job_tokens: Set[str]) -> float:
-    if not user_skill_tokens or not job_tokens:
-        return 0.0
-    inter = user_skill_tokens & job_tokens
-    if not inter:
+def _score_job(overlap: int, user_token_count: int, job_token_count: int) -> float:
+    if not overlap:
         return 0.0
     # Jaccard-like with a small boost for exact skill matches
-    jacc = len(inter) / len(user_skill_tokens | job_tokens)
-    boost = min(0.5, len(inter) * 0.05)
+    jacc = overlap / (user_token_count + job_token_count - overlap)
+    boost = min(0.5, overlap * 0.05)
     return round(jacc + boost, 4)
 
 @app.get("/api/jobs/recommendations")
@@ -1798,7 +1739,7 @@ async def get_job_recommendations(
 ):
     """Return top-N active job recommendations for the current user based on profile skills."""
     try:
-        from models import User, Job
+        from models import User
         # Identify user from session cookie (mirrors other endpoints' pattern)
         session_token = request.cookies.get("session_token")
         user: Optional[User] = None
@@ -1814,22 +1755,13 @@ async def get_job_recommendations(
         if not user:
             raise HTTPException(status_code=401, detail="Authentication required")
 
-        user_skills = _parse_user_skills(getattr(user, 'skills', None))
+        user_skills = normalize_tokens(",".join(user_skill_names(db, user.id)))
         # Include inferred tokens from title/industry to improve recall
-        user_skills |= _normalize_tokens((user.title or "") + " " + (user.industry or ""))
-
-        # Fetch active jobs
-        jobs: List[Job] = db.query(Job).filter(Job.is_active == True).all()
-        scored: List[Tuple[float, Job]] = []
-        for job in jobs:
-            jt = _job_tokens(job)
-            score = _score_job(user_skills, jt)
-            if score > 0:
-                scored.append((score, job))
-
-        # Sort by score desc, then recency
-        scored.sort(key=lambda x: (x[0], getattr(x[1], 'posted_at', None) or 0), reverse=True)
-        top = scored[: max(1, min(50, limit))]
+        user_skills |= normalize_tokens((user.title or "") + " " + (user.industry or ""))
+
+        # Score only the active jobs sharing a token with the user (job_tokens inverted index);
+        # best score first, then recency
+        top = top_matching_jobs(db, user_skills, _score_job, max(1, min(50, limit)))
         results = []
         for score, job in top:
             jd = job.to_dict()
@@ -0,0 +1,156 @@
+"""
+Avatar service for Qrow IQ
+Decodes and resizes profile pictures in a process pool, off the event loop.
+JPEGs are decoded at a reduced scale (draft mode) and every avatar size is
+produced from that single decode.
+"""
+
+import io
+import os
+import uuid
+import asyncio
+import logging
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Dict, Optional
+
+import aiofiles
+from fastapi import HTTPException
+from PIL import Image, ImageOps
+
+from config import settings
+from upload_utils import sniff_content_type
+
+logger = logging.getLogger(__name__)
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+AVATAR_DIR = os.path.join(BASE_DIR, "static", "uploads", "profile_pics")
+AVATAR_URL = "/static/uploads/profile_pics"
+DEFAULT_AVATAR_URL = "/static/uploads/default-avatar.svg"
+
+# Square sizes written for every avatar, largest first; the largest is the stored profile_pic
+AVATAR_SIZES = (400, 128, 64)
+AVATAR_MAX_FILE_SIZE = 5 * 1024 * 1024
+AVATAR_TYPES = {"image/jpeg", "image/png", "image/gif", "image/webp"}
+
+_pool: Optional[ProcessPoolExecutor] = None
+
+
+def render_avatar_variants(data: bytes) -> Dict[int, bytes]:
+    """Center-crop an image to a square and encode it as JPEG at every AVATAR_SIZES size.
+
+    Runs in a worker process. Sources smaller than a size are not upscaled.
+    """
+    largest = AVATAR_SIZES[0]
+    with Image.open(io.BytesIO(data)) as img:
+        # For JPEGs, libjpeg decodes at 1/2, 1/4 or 1/8 scale while both sides stay >= largest
+        img.draft("RGB", (largest, largest))
+        img = ImageOps.exif_transpose(img)
+        img.load()
+
+    if img.mode in ("RGBA", "LA") or (img.mode == "P" and "transparency" in img.info):
+        img = img.convert("RGBA")
+        background = Image.new("RGB", img.size, (255, 255, 255))
+        background.paste(img, mask=img.getchannel("A"))
+        img = background
+    else:
+        img = img.convert("RGB")
+
+    side = min(img.size)
+    left, top = (img.width - side) // 2, (img.height - side) // 2
+    img = img.crop((left, top, left + side, top + side))
+
+    variants = {}
+    for size in AVATAR_SIZES:
+        # Each size is resized from the previous one, so the work shrinks as it goes
+        if img.width > size:
+            img = img.resize((size, size), Image.LANCZOS)
+        output = io.BytesIO()
+        img.save(output, format="JPEG", quality=88, optimize=True, progressive=size == largest)
+        variants[size] = output.getvalue()
+    return variants
+
+
+def _get_pool() -> ProcessPoolExecutor:
+    global _pool
+    if _pool is None:
+        # The pool starts lazily, after the app's background threads; forking
+        # then could copy a lock held by one of them, so workers come from a
+        # clean forkserver (spawn where that is unavailable)
+        method = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+        _pool = ProcessPoolExecutor(max_workers=settings.AVATAR_WORKERS,
+                                    mp_context=multiprocessing.get_context(method))
+    return _pool
+
+
+def shutdown_avatar_pool():
+    """Stop the worker processes (called on application shutdown)"""
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None
+
+
+async def process_avatar(data: bytes, max_size: int = AVATAR_MAX_FILE_SIZE) -> Dict[int, bytes]:
+    """Validate an uploaded avatar and render its sizes in the process pool.
+
+    Returns {size: jpeg_bytes}. Raises 413 when the file is larger than
+    max_size and 400 when it is empty, not an allowed image type, or cannot
+    be decoded.
+    """
+    global _pool
+    if len(data) > max_size:
+        raise HTTPException(status_code=413, detail=f"Image too large (max {max_size // (1024 * 1024)}MB)")
+    if sniff_content_type(data[:512]) not in AVATAR_TYPES:
+        raise HTTPException(status_code=400, detail="Invalid file type. Use JPG, PNG, GIF, or WebP")
+
+    try:
+        if settings.AVATAR_WORKERS <= 0:
+            return await asyncio.to_thread(render_avatar_variants, data)
+        loop = asyncio.get_running_loop()
+        try:
+            return await loop.run_in_executor(_get_pool(), render_avatar_variants, data)
+        except BrokenProcessPool:
+            # A worker died (e.g. killed for memory); start a fresh pool and retry once
+            logger.warning("Avatar process pool broke, restarting it")
+            _pool = None
+            return await loop.run_in_executor(_get_pool(), render_avatar_variants, data)
+    except Exception as e:
+        logger.error(f"Avatar processing error: {e}")
+        raise HTTPException(status_code=400, detail="Invalid image file")
+
+
+async def save_avatar(user_id: int, variants: Dict[int, bytes]) -> str:
+    """Write rendered variants to AVATAR_DIR and return the URL of the largest"""
+    os.makedirs(AVATAR_DIR, exist_ok=True)
+    stem = f"profile_{user_id}_{uuid.uuid4().hex}"
+    for size, content in variants.items():
+        async with aiofiles.open(os.path.join(AVATAR_DIR, f"{stem}-{size}.jpg"), "wb") as out:
+            await out.write(content)
+    return f"{AVATAR_URL}/{stem}-{AVATAR_SIZES[0]}.jpg"
+
+
+def avatar_urls(profile_pic: Optional[str]) -> Dict[int, str]:
+    """URL of every avatar size for a stored profile_pic; older single-file avatars map every size to the one file"""
+    url = profile_pic or DEFAULT_AVATAR_URL
+    suffix = f"-{AVATAR_SIZES[0]}.jpg"
+    if url.startswith(AVATAR_URL) and url.endswith(suffix):
+        stem = url[:-len(suffix)]
+        return {size: f"{stem}-{size}.jpg" for size in AVATAR_SIZES}
+    return {size: url for size in AVATAR_SIZES}
+
+
+def remove_avatar(profile_pic: Optional[str]):
+    """Delete the files behind a stored profile_pic (all sizes); the default avatar is kept"""
+    if not profile_pic or profile_pic == DEFAULT_AVATAR_URL or not profile_pic.startswith("/static/uploads/"):
+        return
+    uploads_dir = os.path.join(BASE_DIR, "static", "uploads")
+    for url in set(avatar_urls(profile_pic).values()):
+        path = os.path.normpath(os.path.join(BASE_DIR, url.lstrip("/")))
+        if not path.startswith(uploads_dir + os.sep):
+            continue
+        try:
+            os.remove(path)
+        except OSError:
+            pass  # Already gone or not removable
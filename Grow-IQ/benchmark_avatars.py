@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+Avatar processing benchmark
+Compares the old inline avatar path (full decode + 800px LANCZOS thumbnail)
+with avatar_service (draft-mode decode, 400/128/64px in one pass) on
+phone-sized JPEGs, and measures event-loop stalls while uploads are processed
+"""
+import io
+import os
+import sys
+import time
+import asyncio
+import argparse
+
+# Add the current directory to Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from PIL import Image, ImageFilter
+
+from config import settings
+import avatar_service
+from avatar_service import render_avatar_variants, process_avatar
+
+PHONE_SIZES = [(4032, 3024), (4000, 3000), (3024, 4032)]
+
+
+def make_phone_photo(size):
+    """Noisy, blurred gradient so the JPEG compresses like a real photo"""
+    small = Image.effect_noise((size[0] // 8, size[1] // 8), 60).convert("RGB")
+    img = small.resize(size, Image.BICUBIC).filter(ImageFilter.GaussianBlur(2))
+    output = io.BytesIO()
+    img.save(output, "JPEG", quality=92)
+    return output.getvalue()
+
+
+def legacy_process(data):
+    """The previous profile_api_routes path: full decode, thumbnail to 800px, one JPEG"""
+    image = Image.open(io.BytesIO(data)).convert("RGB")
+    image.thumbnail((800, 800), Image.Resampling.LANCZOS)
+    output = io.BytesIO()
+    image.save(output, format="JPEG", quality=90, optimize=True)
+    return output.getvalue()
+
+
+def time_per_call(fn, photos, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for data in photos:
+            fn(data)
+    return (time.perf_counter() - start) / (repeat * len(photos)) * 1000
+
+
+async def max_loop_stall(handler, photos):
+    """Process every photo concurrently while a ticker measures the longest event-loop gap"""
+    stall = 0.0
+    running = True
+
+    async def ticker():
+        nonlocal stall
+        last = time.perf_counter()
+        while running:
+            await asyncio.sleep(0.001)
+            now = time.perf_counter()
+            stall = max(stall, now - last)
+            last = now
+
+    tick = asyncio.create_task(ticker())
+    start = time.perf_counter()
+    await asyncio.gather(*[handler(data) for data in photos])
+    elapsed = time.perf_counter() - start
+    running = False
+    await tick
+    return elapsed * 1000, stall * 1000
+
+
+async def inline_handler(data):
+    legacy_process(data)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--photos", type=int, default=6)
+    parser.add_argument("--repeat", type=int, default=2)
+    args = parser.parse_args()
+
+    print("📸 Avatar Processing Benchmark")
+    print("=" * 40)
+    photos = [make_phone_photo(PHONE_SIZES[i % len(PHONE_SIZES)]) for i in range(args.photos)]
+    print(f"{len(photos)} photos, avg {sum(map(len, photos)) / len(photos) / 1024:.0f} KB, "
+          f"{settings.AVATAR_WORKERS} avatar workers, {os.cpu_count()} CPUs")
+
+    legacy_ms = time_per_call(legacy_process, photos, args.repeat)
+    service_ms = time_per_call(render_avatar_variants, photos, args.repeat)
+    print(f"legacy (full decode, 1 size):   {legacy_ms:8.1f} ms/photo")
+    print(f"avatar_service (draft, 3 sizes): {service_ms:8.1f} ms/photo  ({legacy_ms / service_ms:.1f}x)")
+
+    inline_total, inline_stall = asyncio.run(max_loop_stall(inline_handler, photos))
+    try:
+        asyncio.run(process_avatar(photos[0], max_size=len(photos[0])))  # warm the pool
+        pool_total, pool_stall = asyncio.run(
+            max_loop_stall(lambda data: process_avatar(data, max_size=len(data)), photos)
+        )
+    finally:
+        avatar_service.shutdown_avatar_pool()
+    print(f"inline in handler:  {inline_total:8.1f} ms total, longest event-loop stall {inline_stall:7.1f} ms")
+    print(f"process pool:       {pool_total:8.1f} ms total, longest event-loop stall {pool_stall:7.1f} ms")
+    print("✅ Benchmark complete")
+
+
+if __name__ == "__main__":
+    main()
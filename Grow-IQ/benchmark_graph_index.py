@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Social graph index benchmark
+Builds graph_service's in-memory index for a synthetic network (default 100k
+users, 2M connections) and times mutual-connection queries against the
+per-row SQL the connection routes used before
+"""
+import os
+import sys
+import time
+import random
+import sqlite3
+import argparse
+import tracemalloc
+
+# Add the current directory to Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from graph_service import SocialGraphIndex
+
+
+def synthetic_edges(users, edges, seed=42):
+    """Skewed random graph: low ids are picked far more often, giving a few large hubs"""
+    rng = random.Random(seed)
+    for _ in range(edges):
+        a = int(users * rng.random() ** 2) + 1
+        b = rng.randrange(1, users + 1)
+        yield a, b
+
+
+def timed(fn, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result = fn()
+    return (time.perf_counter() - start) / repeat * 1000, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--users", type=int, default=100_000)
+    parser.add_argument("--edges", type=int, default=2_000_000)
+    parser.add_argument("--page", type=int, default=20)
+    parser.add_argument("--no-sql", action="store_true", help="skip the SQLite per-row baseline")
+    args = parser.parse_args()
+
+    print("🕸️  Social Graph Index Benchmark")
+    print("=" * 40)
+    edges = list(synthetic_edges(args.users, args.edges))
+
+    tracemalloc.start()
+    start = time.perf_counter()
+    index = SocialGraphIndex.from_edges(edges)
+    build_s = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    resident = sum(sys.getsizeof(a) for a in index._adjacency.values()) + sys.getsizeof(index._adjacency)
+    print(f"{index.user_count} users, {index.edge_count} connections")
+    print(f"build: {build_s:.2f}s, index size {resident / 2**20:.1f} MiB (peak during build {peak / 2**20:.1f} MiB)")
+
+    rng = random.Random(1)
+    average_degree = index.edge_count * 2 / index.user_count
+    viewers = {
+        "typical viewer": min(range(1000, 2000), key=lambda u: abs(index.degree(u) - average_degree)),
+        "hub viewer": max(range(1, 50), key=index.degree),
+    }
+    page = [rng.randrange(1, args.users + 1) for _ in range(args.page)]
+    batch = [rng.randrange(1, args.users + 1) for _ in range(1000)]
+
+    for label, viewer in viewers.items():
+        page_ms, _ = timed(lambda: index.mutual_counts(viewer, page), 50)
+        batch_ms, _ = timed(lambda: index.mutual_counts(viewer, batch), 10)
+        ids_ms, _ = timed(lambda: index.mutual_ids(viewer, page[0], limit=10), 200)
+        print(f"{label} (degree {index.degree(viewer)}): page of {args.page} {page_ms:.3f} ms, "
+              f"1000 candidates {batch_ms:.2f} ms, mutual list {ids_ms * 1000:.0f} µs")
+
+    a, b = viewers["typical viewer"], viewers["hub viewer"]
+    add_ms, _ = timed(lambda: (index.add_edge(a, b), index.remove_edge(a, b)), 200)
+    print(f"accept + remove update: {add_ms * 1000:.0f} µs")
+
+    if not args.no_sql:
+        conn = sqlite3.connect(":memory:")
+        conn.execute("CREATE TABLE connections (user_id INTEGER, connected_user_id INTEGER, status TEXT)")
+        conn.executemany("INSERT INTO connections VALUES (?, ?, 'accepted')", edges)
+        conn.execute("CREATE INDEX ix_conn_user ON connections (user_id, status, connected_user_id)")
+        sql = (
+            "SELECT count(*) FROM connections WHERE user_id = ? AND status = 'accepted' AND connected_user_id IN "
+            "(SELECT connected_user_id FROM connections WHERE user_id = ? AND status = 'accepted')"
+        )
+        for label, viewer in viewers.items():
+            sql_ms, _ = timed(lambda: [conn.execute(sql, (c, viewer)).fetchone() for c in page], 5)
+            print(f"{label} per-row SQL baseline: page of {args.page} {sql_ms:.2f} ms")
+    print("✅ Benchmark complete")
+
+
+if __name__ == "__main__":
+    main()
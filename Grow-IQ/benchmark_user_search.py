@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+User search benchmark
+Fills a temporary SQLite database with synthetic profiles (default 100k users),
+builds search_service's FTS5 index and times ranked full-text queries against
+the nine-column ILIKE scan the search route used before
+"""
+import os
+import sys
+import time
+import random
+import argparse
+import tempfile
+
+# Add the current directory to Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from sqlalchemy import create_engine, insert, or_, select
+from sqlalchemy.orm import Session
+
+from models import Base, User
+from search_service import ensure_user_search_index, user_search_matches
+
+FIRST = ["Ada", "Sam", "Lee", "Kim", "Pat", "Alex", "Maria", "Omar", "Priya", "Chen", "Lucas", "Fatima"]
+LAST = ["Smith", "Jones", "Park", "Garcia", "Khan", "Nguyen", "Brown", "Silva", "Patel", "Müller"]
+TITLES = ["Software Engineer", "Data Scientist", "Product Manager", "Designer", "DevOps Engineer",
+          "Marketing Lead", "Sales Manager", "Recruiter", "Analyst", "Frontend Developer"]
+COMPANIES = ["Acme", "Initech", "Globex", "Umbrella", "Hooli", "Stark", "Wayne", "Wonka", "Soylent", "Tyrell"]
+SKILLS = ["python", "sql", "react", "kubernetes", "figma", "excel", "rust", "go", "aws", "spark", "seo", "java"]
+INDUSTRIES = ["Technology", "Finance", "Healthcare", "Education", "Retail", "Media"]
+CITIES = ["London", "Berlin", "Toronto", "Bangalore", "Austin", "Lagos", "Sydney", "São Paulo"]
+
+QUERIES = ["python", "software engineer", "maria garcia", "kubernetes berlin", "design", "zzzz"]
+
+
+def synthetic_users(count, seed=42):
+    rng = random.Random(seed)
+    for i in range(1, count + 1):
+        first, last = rng.choice(FIRST), rng.choice(LAST)
+        yield {
+            "id": i, "username": f"{first.lower()}{i}", "email": f"user{i}@example.com",
+            "full_name": f"{first} {last}", "title": rng.choice(TITLES), "company": rng.choice(COMPANIES),
+            "skills": ", ".join(rng.sample(SKILLS, 4)), "industry": rng.choice(INDUSTRIES),
+            "location": rng.choice(CITIES), "education": "BSc Computer Science",
+            "bio": f"{rng.choice(TITLES)} who enjoys {rng.choice(SKILLS)} and {rng.choice(SKILLS)}",
+            "is_active": True,
+        }
+
+
+def ilike_query(query, limit):
+    """The pre-index search: every term ORed across nine columns, sorted by name"""
+    columns = [User.full_name, User.username, User.title, User.company, User.bio,
+               User.skills, User.industry, User.location, User.education]
+    statement = select(User.id).where(User.is_active == True)
+    for term in query.split():
+        statement = statement.where(or_(*[column.ilike(f"%{term}%") for column in columns]))
+    return statement.order_by(User.full_name, User.id).limit(limit)
+
+
+def fts_query(db, query, limit):
+    matches = user_search_matches(db, query)
+    return (
+        select(User.id).join(matches, matches.c.id == User.id)
+        .where(User.is_active == True).order_by(matches.c.rank, User.id).limit(limit)
+    )
+
+
+def timed(fn, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result = fn()
+    return (time.perf_counter() - start) / repeat * 1000, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--users", type=int, default=100_000)
+    parser.add_argument("--limit", type=int, default=20)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    print("🔎 User Search Benchmark")
+    print("=" * 40)
+    with tempfile.TemporaryDirectory() as directory:
+        engine = create_engine(f"sqlite:///{os.path.join(directory, 'search.db')}")
+        Base.metadata.create_all(engine)
+        rows = list(synthetic_users(args.users))
+        with engine.begin() as conn:
+            conn.execute(insert(User), rows)
+
+        start = time.perf_counter()
+        ensure_user_search_index(engine)
+        print(f"{args.users} users, index built in {time.perf_counter() - start:.2f}s")
+
+        with Session(engine) as db:
+            for query in QUERIES:
+                ilike_ms, _ = timed(lambda: db.execute(ilike_query(query, args.limit)).all(), args.repeat)
+                fts_ms, hits = timed(lambda: db.execute(fts_query(db, query, args.limit)).all(), args.repeat)
+                print(f"{query!r:22} ILIKE {ilike_ms:8.2f} ms   FTS5 bm25 {fts_ms:7.2f} ms   ({len(hits)} shown)")
+
+            start = time.perf_counter()
+            for user in db.scalars(select(User).where(User.id <= 1000)):
+                user.title = "Staff Engineer"
+            db.commit()
+            print(f"1000 profile edits with index sync: {(time.perf_counter() - start) * 1000:.0f} ms")
+        engine.dispose()
+    print("✅ Benchmark complete")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""
+Comment service for Qrow IQ
+Loads a page of threaded comments with their authors in one query and builds
+the reply tree in a single pass
+"""
+
+import logging
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from models import Comment, User
+from pagination_utils import keyset_filter, encode_cursor
+
+logger = logging.getLogger(__name__)
+
+# Threads are ordered oldest first, like a conversation
+THREAD_KEYS = [(Comment.created_at, False), (Comment.id, False)]
+
+
+def serialize_comment(comment: Comment, author: User) -> Dict[str, Any]:
+    return {
+        "id": comment.id,
+        "content": comment.content,
+        "created_at": comment.created_at.isoformat(),
+        "parent_comment_id": comment.parent_comment_id,
+        "author": {
+            "id": author.id,
+            "full_name": author.full_name,
+            "profile_image": author.profile_image
+        },
+        "replies": []
+    }
+
+
+def load_comment_threads(
+    db: Session,
+    post_id: int,
+    limit: int,
+    cursor: Optional[str] = None,
+) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+    """One page of top-level comments on a post, each with its full reply tree.
+
+    The page of roots (plus one to detect a next page), every descendant of
+    those roots and all authors come back from a single recursive query.
+    Returns (threads, next_cursor); next_cursor is None on the last page.
+    """
+    roots = (
+        select(Comment.id)
+        .where(Comment.post_id == post_id, Comment.parent_comment_id.is_(None))
+        .order_by(*[column.asc() for column, _ in THREAD_KEYS])
+        .limit(limit + 1)
+    )
+    if cursor:
+        roots = roots.where(keyset_filter(THREAD_KEYS, cursor))
+    roots = roots.subquery()
+
+    thread = select(roots.c.id).cte("thread", recursive=True)
+    thread = thread.union_all(
+        select(Comment.id).join(thread, Comment.parent_comment_id == thread.c.id)
+    )
+
+    rows = (
+        db.query(Comment, User)
+        .join(thread, Comment.id == thread.c.id)
+        .join(User, Comment.user_id == User.id)
+        .order_by(Comment.created_at.asc(), Comment.id.asc())
+        .all()
+    )
+
+    # Single pass: a reply may be seen before its parent node is filled in,
+    # so nodes are created on first reference and completed when reached
+    nodes: Dict[int, Dict[str, Any]] = {}
+    threads: List[Tuple[Comment, Dict[str, Any]]] = []
+    for comment, author in rows:
+        node = nodes.setdefault(comment.id, {"replies": []})
+        replies = node["replies"]
+        node.update(serialize_comment(comment, author))
+        node["replies"] = replies
+        if comment.parent_comment_id is None:
+            threads.append((comment, node))
+        else:
+            nodes.setdefault(comment.parent_comment_id, {"replies": []})["replies"].append(node)
+
+    next_cursor = None
+    if len(threads) > limit:
+        threads = threads[:limit]
+        last = threads[-1][0]
+        next_cursor = encode_cursor([last.created_at, last.id])
+    return [node for _, node in threads], next_cursor
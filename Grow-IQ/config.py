@@ -54,8 +54,64 @@ class Settings(BaseSettings):
     # Use absolute path relative to this file to ensure we use the correct DB
     _BASE_DIR = os.path.dirname(os.path.abspath(__file__))
     DATABASE_URL: str = os.getenv("DATABASE_URL", f"sqlite:///{os.path.join(_BASE_DIR, 'dashboard.db')}")
+    # Runtime files written by the app (indexes, snapshots); git-ignored, never part of the source tree
+    DATA_DIR: str = os.getenv("DATA_DIR", os.path.join(_BASE_DIR, "data"))
     DB_ECHO: bool = os.getenv("DB_ECHO", "false").lower() == "true"
-    
+    # Optional read replica for read-only GET handlers (analytics, feeds, search)
+    DATABASE_REPLICA_URL: str = os.getenv("DATABASE_REPLICA_URL", "")
+    # Fall back to the primary when the replica lags further behind than this
+    REPLICA_MAX_LAG_SECONDS: int = int(os.getenv("REPLICA_MAX_LAG_SECONDS", "60"))
+    # How often the replica lag is re-measured (avoids a lag query per request)
+    REPLICA_LAG_CHECK_SECONDS: int = int(os.getenv("REPLICA_LAG_CHECK_SECONDS", "5"))
+    # Local/test stand-in: serve reads from a periodically refreshed SQLite snapshot
+    SQLITE_READ_SNAPSHOT: bool = os.getenv("SQLITE_READ_SNAPSHOT", "false").lower() == "true"
+    REPLICA_SNAPSHOT_INTERVAL_SECONDS: int = int(os.getenv("REPLICA_SNAPSHOT_INTERVAL_SECONDS", "30"))
+    # How often post like/comment counters are checked against the source rows (0 disables)
+    ENGAGEMENT_RECONCILE_INTERVAL_SECONDS: int = int(os.getenv("ENGAGEMENT_RECONCILE_INTERVAL_SECONDS", "3600"))
+    # Engagement on a post counts half as much for ranking after this many hours
+    FEED_SCORE_HALF_LIFE_HOURS: float = float(os.getenv("FEED_SCORE_HALF_LIFE_HOURS", "72"))
+    # Authors with more connections than this are not fanned out; readers pull their posts on read
+    TIMELINE_FANOUT_MAX_CONNECTIONS: int = int(os.getenv("TIMELINE_FANOUT_MAX_CONNECTIONS", "5000"))
+    # Recent posts copied into a timeline when it is first built or a connection is accepted
+    TIMELINE_BACKFILL_POSTS: int = int(os.getenv("TIMELINE_BACKFILL_POSTS", "50"))
+    # How often each process rebuilds its in-memory connection graph from the database
+    GRAPH_INDEX_REFRESH_SECONDS: int = int(os.getenv("GRAPH_INDEX_REFRESH_SECONDS", "900"))
+    # Connections with more connections than this are skipped when collecting friends-of-friends
+    SUGGESTION_MAX_HUB_DEGREE: int = int(os.getenv("SUGGESTION_MAX_HUB_DEGREE", "5000"))
+    # How long a user's connection stats rollup is served from memory; commits that change
+    # their connections or requests invalidate it sooner in the same process
+    CONNECTION_STATS_CACHE_SECONDS: int = int(os.getenv("CONNECTION_STATS_CACHE_SECONDS", "300"))
+    # Precomputed "people you may know" lists: entries kept per user, age before a list is
+    # recomputed, and how often the background job looks for stale lists (0 disables it)
+    PYMK_LIST_SIZE: int = int(os.getenv("PYMK_LIST_SIZE", "50"))
+    PYMK_TTL_HOURS: int = int(os.getenv("PYMK_TTL_HOURS", "24"))
+    PYMK_REFRESH_INTERVAL_SECONDS: int = int(os.getenv("PYMK_REFRESH_INTERVAL_SECONDS", "600"))
+    # Attribute groups (e.g. everyone in one city) larger than this are too broad to suggest from
+    PYMK_MAX_BLOCK_SIZE: int = int(os.getenv("PYMK_MAX_BLOCK_SIZE", "2000"))
+    # Typeahead prefix index file shared by all workers on a host; a process republishes it at
+    # most this often after profiles change there (0 disables), and any worker rebuilds it once older than the max age
+    TYPEAHEAD_INDEX_PATH: str = os.getenv("TYPEAHEAD_INDEX_PATH", os.path.join(DATA_DIR, "typeahead.idx"))
+    TYPEAHEAD_REBUILD_SECONDS: int = int(os.getenv("TYPEAHEAD_REBUILD_SECONDS", "60"))
+    TYPEAHEAD_MAX_AGE_SECONDS: int = int(os.getenv("TYPEAHEAD_MAX_AGE_SECONDS", "3600"))
+    # Search history: searches are batch-inserted into search_log every flush interval (0 keeps
+    # them in memory only), at most SEARCH_LOG_BUFFER_MAX waiting; popular terms are a top-K sketch
+    # of SEARCH_POPULAR_CAPACITY counters whose counts halve every half-life, and a term is only shown
+    # once its guaranteed (decayed) count reaches SEARCH_POPULAR_MIN_COUNT; recent searches keep
+    # SEARCH_RECENT_PER_USER queries for the SEARCH_RECENT_MAX_USERS most recently active users.
+    # Both are snapshotted to SEARCH_STATS_SNAPSHOT_PATH and reloaded on start-up
+    SEARCH_LOG_FLUSH_SECONDS: int = int(os.getenv("SEARCH_LOG_FLUSH_SECONDS", "5"))
+    SEARCH_LOG_BUFFER_MAX: int = int(os.getenv("SEARCH_LOG_BUFFER_MAX", "10000"))
+    SEARCH_POPULAR_CAPACITY: int = int(os.getenv("SEARCH_POPULAR_CAPACITY", "1000"))
+    SEARCH_POPULAR_HALF_LIFE_HOURS: float = float(os.getenv("SEARCH_POPULAR_HALF_LIFE_HOURS", "24"))
+    SEARCH_POPULAR_MIN_COUNT: float = float(os.getenv("SEARCH_POPULAR_MIN_COUNT", "3"))
+    SEARCH_RECENT_PER_USER: int = int(os.getenv("SEARCH_RECENT_PER_USER", "10"))
+    SEARCH_RECENT_MAX_USERS: int = int(os.getenv("SEARCH_RECENT_MAX_USERS", "10000"))
+    SEARCH_STATS_SNAPSHOT_PATH: str = os.getenv("SEARCH_STATS_SNAPSHOT_PATH", os.path.join(DATA_DIR, "search_stats.json"))
+    SEARCH_STATS_SNAPSHOT_SECONDS: int = int(os.getenv("SEARCH_STATS_SNAPSHOT_SECONDS", "300"))
+    # Free-text skills are only suggested to others once this many profiles or jobs use them
+    # (COMMON_SKILLS are always suggested)
+    SKILL_SUGGESTION_MIN_USES: int = int(os.getenv("SKILL_SUGGESTION_MIN_USES", "3"))
+
     # =================================================================
     # Security & CORS Settings
     # =================================================================
@@ -69,8 +125,13 @@ class Settings(BaseSettings):
     # =================================================================
     # Default 16MB max file size
     MAX_FILE_SIZE: int = int(os.getenv("MAX_FILE_SIZE", str(16 * 1024 * 1024)))
+    # Largest request body accepted at all, checked before it is read
+    # (default: a post's three attachments plus 1MB for the form fields)
+    MAX_REQUEST_BODY_SIZE: int = int(os.getenv("MAX_REQUEST_BODY_SIZE", str(3 * MAX_FILE_SIZE + 1024 * 1024)))
     # Upload folder path
     UPLOAD_FOLDER: str = os.getenv("UPLOAD_FOLDER", "./static/uploads")
+    # Processes that decode and resize avatars (0 runs them in a thread instead)
+    AVATAR_WORKERS: int = int(os.getenv("AVATAR_WORKERS", "2"))
     
     # =================================================================
     # OAuth Settings (Google)
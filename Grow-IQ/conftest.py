@@ -0,0 +1,23 @@
+#!/usr/bin/env python3
+"""
+Shared pytest fixtures
+An empty in-memory SQLite database with every table created; test files add
+their own `db` fixture seeding the rows they need
+"""
+
+import os
+import sys
+
+import pytest
+from sqlalchemy import create_engine
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from models import Base
+
+
+@pytest.fixture
+def engine():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    return engine
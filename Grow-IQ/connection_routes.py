@@ -6,9 +6,24 @@ from fastapi.templating import Jinja2Templates
 from sqlalchemy.orm import Session, joinedload
 from sqlalchemy import and_, or_, func, desc, asc
 from database import get_db
+from database_enhanced import get_read_db
 from models import User, Connection, FriendRequest, Notification, Post
 from auth_utils import get_user_from_session
-from datetime import datetime, timedelta
+from pagination_utils import keyset_paginate, cached_count, cursor_pagination_info
+from facet_utils import facet_counts, experience_bucket
+from http_cache_utils import CachedPage, PRIVATE_PAGE_CACHE_CONTROL
+from timeline_service import link_timelines, unlink_timelines
+from graph_service import get_graph_index, record_connection, record_disconnection
+from connection_service import (
+    resolve_connection_statuses, connection_stats, connect_users, find_connection, find_pending_request,
+    involving, other_end,
+)
+from suggestion_service import people_you_may_know
+from search_service import user_search_matches
+from typeahead_service import typeahead
+from search_history_service import record_search, recent_searches, popular_searches
+from skill_service import users_with_skills
+from datetime import datetime
 import os
 
 # Initialize router
@@ -68,77 +83,16 @@ def connections_page(request: Request, db: Session = Depends(get_db)):
     return RedirectResponse(url="/network", status_code=307)
 
 @router.get("/api/stats")
-async def get_connection_stats(request: Request, db: Session = Depends(get_db)):
-    """Get user's connection statistics"""
-    try:
-        user_id = get_authenticated_user_id(request, db)
-        
-        stats = await calculate_connection_stats(user_id, db)
-        return JSONResponse(content=stats)
-        
-    except HTTPException:
-        # Re-raise HTTPExceptions (like 401) without wrapping them
-        raise
-    except Exception as e:
-        logging.error(f"Error getting connection stats: {str(e)}")
-        raise HTTPException(status_code=500, detail="Error getting connection stats")
-
-@router.get("/api/connections")
-async def get_connections(
+async def get_connection_stats(
     request: Request,
-    page: int = Query(1, ge=1),
-    limit: int = Query(20, ge=1, le=100),
-    sort_by: str = Query("name", regex="^(name|company|recent|mutual)$"),
-    search: Optional[str] = Query(None),
-    company_filter: Optional[str] = Query(None),
-    location_filter: Optional[str] = Query(None),
-    db: Session = Depends(get_db)
-):
-    """Get user's connections with pagination, sorting, and filtering"""
-    try:
-        user_id = get_authenticated_user_id(request, db)
-        
-        connections = await get_filtered_connections(
-            user_id, db, page, limit, sort_by, search, company_filter, location_filter
-        )
-        
-        return JSONResponse(content=connections)
-        
-    except HTTPException:
-        # Re-raise HTTPExceptions (like 401) without wrapping them
-        raise
-    except Exception as e:
-        logging.error(f"Error getting connections: {str(e)}")
-        raise HTTPException(status_code=500, detail="Error getting connections")
-
-@router.get("/api/pending-requests")
-async def get_pending_requests(
-    request: Request,
-    page: int = Query(1, ge=1),
-    limit: int = Query(20, ge=1, le=100),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_db),
+    read_db: Session = Depends(get_read_db)
 ):
-    """Get pending connection requests for the user"""
+    """Get user's connection statistics (counts come from the read replica)"""
     try:
         user_id = get_authenticated_user_id(request, db)
         
-        pending_requests = await get_user_pending_requests(user_id, db, page, limit)
-        return JSONResponse(content=pending_requests)
-        
-    except HTTPException:
-        # Re-raise HTTPExceptions (like 401) without wrapping them
-        raise
-    except Exception as e:
-        logging.error(f"Error getting pending requests: {str(e)}")
-        raise HTTPException(status_code=500, detail="Error getting pending requests")
-
-@router.get("/api/stats")
-async def get_connection_stats(request: Request, db: Session = Depends(get_db)):
-    """Get user's connection statistics"""
-    try:
-        user_id = get_authenticated_user_id(request, db)
-        
-        stats = await calculate_connection_stats(user_id, db)
+        stats = connection_stats(read_db, user_id)
         return JSONResponse(content=stats)
         
     except HTTPException:
@@ -157,6 +111,8 @@ async def get_connections(
     search: Optional[str] = Query(None),
     company_filter: Optional[str] = Query(None),
     location_filter: Optional[str] = Query(None),
+    cursor: Optional[str] = Query(None, description="Opaque cursor from pagination.next_cursor; pass an empty value for the first page"),
+    include_total: bool = Query(False, description="Include an approximate (cached) total in cursor mode"),
     db: Session = Depends(get_db)
 ):
     """Get user's connections with pagination, sorting, and filtering"""
@@ -164,20 +120,19 @@ async def get_connections(
         user_id = get_authenticated_user_id(request, db)
         
         connections = await get_filtered_connections(
-            user_id, db, page, limit, sort_by, search, company_filter, location_filter
+            user_id, db, page, limit, sort_by, search, company_filter, location_filter,
+            cursor=cursor, include_total=include_total
         )
         
         return JSONResponse(content=connections)
         
     except HTTPException:
-        # Re-raise HTTPExceptions (like 401) without wrapping them
+        # Re-raise HTTPExceptions (like 401 or a bad cursor) without wrapping them
         raise
     except Exception as e:
         logging.error(f"Error getting connections: {str(e)}")
         raise HTTPException(status_code=500, detail="Error getting connections")
 
-
-
 @router.get("/api/pending-requests")
 async def get_pending_requests(
     request: Request,
@@ -269,25 +224,14 @@ async def send_connection_request_json(
             raise HTTPException(status_code=404, detail="User not found")
         
         # Check if already connected
-        existing_connection = db.query(Connection).filter(
-            or_(
-                and_(Connection.user_id == sender_id, Connection.connected_user_id == receiver_id),
-                and_(Connection.user_id == receiver_id, Connection.connected_user_id == sender_id)
-            ),
-            Connection.status == 'accepted'
-        ).first()
-        
-        if existing_connection:
+        if find_connection(db, sender_id, receiver_id, 'accepted'):
             raise HTTPException(status_code=400, detail="Already connected with this user")
         
-        # Check if request already exists
-        existing_request = db.query(FriendRequest).filter(
-            FriendRequest.sender_id == sender_id,
-            FriendRequest.receiver_id == receiver_id,
-            FriendRequest.status == 'pending'
-        ).first()
-        
+        # Only one pending request per pair, whoever sent it
+        existing_request = find_pending_request(db, sender_id, receiver_id)
         if existing_request:
+            if existing_request.sender_id == receiver_id:
+                raise HTTPException(status_code=400, detail="This user has already sent you a connection request")
             raise HTTPException(status_code=400, detail="Connection request already sent")
         
         # Create connection request
@@ -319,6 +263,8 @@ async def send_connection_request_json(
             "request_id": friend_request.id
         })
         
+    except HTTPException:
+        raise
     except Exception as e:
         db.rollback()
         logging.error(f"Error sending connection request: {str(e)}")
@@ -349,14 +295,9 @@ async def accept_connection_by_user_id(
         friend_request.updated_at = datetime.now()
         
         # Create connection
-        new_connection = Connection(
-            user_id=friend_request.sender_id,
-            connected_user_id=friend_request.receiver_id,
-            status="accepted",
-            created_at=datetime.now()
-        )
-        
-        db.add(new_connection)
+        new_connection = connect_users(db, friend_request.sender_id, friend_request.receiver_id)
+        link_timelines(db, friend_request.sender_id, friend_request.receiver_id)
+        record_connection(db, friend_request.sender_id, friend_request.receiver_id)
         
         # Create notification
         notification = Notification(
@@ -393,9 +334,9 @@ async def get_accepted_connections(
         
         # Get accepted connections
         connections = db.query(Connection, User).join(
-            User, Connection.connected_user_id == User.id
+            User, User.id == other_end(current_user_id)
         ).filter(
-            Connection.user_id == current_user_id,
+            involving(current_user_id),
             Connection.status == 'accepted'
         ).all()
         
@@ -444,25 +385,14 @@ async def send_connection_request(
             raise HTTPException(status_code=404, detail="User not found")
         
         # Check if already connected
-        existing_connection = db.query(Connection).filter(
-            or_(
-                and_(Connection.user_id == sender_id, Connection.connected_user_id == receiver_id),
-                and_(Connection.user_id == receiver_id, Connection.connected_user_id == sender_id)
-            ),
-            Connection.status == 'accepted'
-        ).first()
-        
-        if existing_connection:
+        if find_connection(db, sender_id, receiver_id, 'accepted'):
             raise HTTPException(status_code=400, detail="Already connected with this user")
         
-        # Check if request already exists
-        existing_request = db.query(FriendRequest).filter(
-            FriendRequest.sender_id == sender_id,
-            FriendRequest.receiver_id == receiver_id,
-            FriendRequest.status == 'pending'
-        ).first()
-        
+        # Only one pending request per pair, whoever sent it
+        existing_request = find_pending_request(db, sender_id, receiver_id)
         if existing_request:
+            if existing_request.sender_id == receiver_id:
+                raise HTTPException(status_code=400, detail="This user has already sent you a connection request")
             raise HTTPException(status_code=400, detail="Connection request already sent")
         
         # Create connection request
@@ -494,6 +424,8 @@ async def send_connection_request(
             "request_id": friend_request.id
         })
         
+    except HTTPException:
+        raise
     except Exception as e:
         db.rollback()
         logging.error(f"Error sending connection request: {str(e)}")
@@ -548,13 +480,7 @@ async def respond_to_connection_request(
         
         if response == "accept":
             # Check if connection already exists to prevent duplicates
-            existing_connection = db.query(Connection).filter(
-                or_(
-                    and_(Connection.user_id == friend_request.sender_id, Connection.connected_user_id == friend_request.receiver_id),
-                    and_(Connection.user_id == friend_request.receiver_id, Connection.connected_user_id == friend_request.sender_id)
-                ),
-                Connection.status == 'accepted'
-            ).first()
+            existing_connection = find_connection(db, friend_request.sender_id, friend_request.receiver_id, 'accepted')
             
             if existing_connection:
                 # Connection already exists, just update the request status
@@ -565,25 +491,10 @@ async def respond_to_connection_request(
                 friend_request.status = 'accepted'
                 friend_request.responded_at = datetime.utcnow()
                 
-                # Create bidirectional connections - both users should see each other
-                connection1 = Connection(
-                    user_id=friend_request.sender_id,
-                    connected_user_id=friend_request.receiver_id,
-                    status='accepted',
-                    connection_type='professional',
-                    accepted_at=datetime.utcnow()
-                )
-                
-                connection2 = Connection(
-                    user_id=friend_request.receiver_id,
-                    connected_user_id=friend_request.sender_id,
-                    status='accepted',
-                    connection_type='professional',
-                    accepted_at=datetime.utcnow()
-                )
-                
-                db.add(connection1)
-                db.add(connection2)
+                # One row per pair; both users see it through the pair columns
+                connect_users(db, friend_request.sender_id, friend_request.receiver_id)
+                link_timelines(db, friend_request.sender_id, friend_request.receiver_id)
+                record_connection(db, friend_request.sender_id, friend_request.receiver_id)
             
             # Create notification for sender
             sender = db.query(User).get(friend_request.sender_id)
@@ -690,6 +601,8 @@ async def remove_connection(
         
         # Create notification for the other user
         other_user_id = connection.connected_user_id if connection.user_id == user_id else connection.user_id
+        unlink_timelines(db, user_id, other_user_id)
+        record_disconnection(db, user_id, other_user_id)
         current_user = db.query(User).get(user_id)
         
         notification = Notification(
@@ -768,7 +681,7 @@ async def get_user_profile(
             raise HTTPException(status_code=404, detail="User not found")
         
         # Check connection status
-        connection_status = await get_connection_status(current_user_id, user_id, db)
+        connection_status = resolve_connection_statuses(db, current_user_id, [user_id]).get(user_id, "not_connected")
         
         # Get mutual connections
         mutual_connections = await get_mutual_connections(current_user_id, user_id, db)
@@ -820,6 +733,7 @@ async def get_user_profile(
 async def search_connections(
     request: Request,
     db: Session = Depends(get_db),
+    read_db: Session = Depends(get_read_db),
     query: Optional[str] = Query(None, description="Search query for name, company, title, skills, etc."),
     search_type: str = Query("all", regex="^(all|name|company|title|skills|location|industry|education)$"),
     location: Optional[str] = Query(None, description="Filter by location"),
@@ -832,23 +746,34 @@ async def search_connections(
     page: int = Query(1, ge=1, description="Page number"),
     limit: int = Query(20, ge=1, le=100, description="Results per page"),
     sort_by: str = Query("relevance", regex="^(relevance|name|company|location|experience|mutual_connections)$"),
-    sort_order: str = Query("desc", regex="^(asc|desc)$")
+    sort_order: str = Query("desc", regex="^(asc|desc)$"),
+    cursor: Optional[str] = Query(None, description="Opaque cursor from pagination.next_cursor; pass an empty value for the first page"),
+    include_total: bool = Query(False, description="Include an approximate (cached) total in cursor mode")
 ):
-    """Enhanced search through users and connections with multiple filters"""
+    """Enhanced search through users and connections with multiple filters
+
+    The session is checked on the primary; the search itself runs on the
+    read replica.
+    """
     try:
         user_id = get_authenticated_user_id(request, db)
         
         if not query and not any([location, industry, company, title, experience_min, experience_max, user_type]):
             # If no search criteria, return suggestions
-            search_results = await get_connection_suggestions(user_id, db, page, limit)
+            search_results = await get_connection_suggestions(user_id, read_db, page, limit)
         else:
+            if query and not cursor:
+                record_search(user_id, query, "people")
             search_results = await enhanced_search_users_and_connections(
-                user_id, db, query, search_type, location, industry, company, 
-                title, experience_min, experience_max, user_type, page, limit, sort_by, sort_order
+                user_id, read_db, query, search_type, location, industry, company, 
+                title, experience_min, experience_max, user_type, page, limit, sort_by, sort_order,
+                cursor=cursor, include_total=include_total
             )
         
         return JSONResponse(content=search_results)
         
+    except HTTPException:
+        raise
     except Exception as e:
         logging.error(f"Error searching connections: {str(e)}")
         raise HTTPException(status_code=500, detail="Error searching connections")
@@ -868,11 +793,14 @@ async def enhanced_search_users_and_connections(
     page: int,
     limit: int,
     sort_by: str,
-    sort_order: str
+    sort_order: str,
+    cursor: Optional[str] = None,
+    include_total: bool = False
 ) -> Dict[str, Any]:
     """Enhanced search through users and connections with advanced filtering"""
     try:
         search_query = db.query(User).filter(User.id != user_id, User.is_active == True)
+        matches = user_search_matches(db, query) if query and search_type == "all" else None
         
         # Apply search query based on type
         if query:
@@ -890,14 +818,18 @@ async def enhanced_search_users_and_connections(
             elif search_type == "title":
                 search_query = search_query.filter(User.title.ilike(f'%{query}%'))
             elif search_type == "skills":
-                search_query = search_query.filter(User.skills.ilike(f'%{query}%'))
+                skill_filter = users_with_skills(User.id, query)
+                if skill_filter is not None:
+                    search_query = search_query.filter(skill_filter)
             elif search_type == "location":
                 search_query = search_query.filter(User.location.ilike(f'%{query}%'))
             elif search_type == "industry":
                 search_query = search_query.filter(User.industry.ilike(f'%{query}%'))
             elif search_type == "education":
                 search_query = search_query.filter(User.education.ilike(f'%{query}%'))
-            else:  # all - comprehensive search
+            elif matches is not None:  # all - full-text index
+                search_query = search_query.join(matches, matches.c.id == User.id)
+            else:  # all - no index on this database
                 search_terms = query.split()
                 for term in search_terms:
                     search_query = search_query.filter(
@@ -936,33 +868,75 @@ async def enhanced_search_users_and_connections(
         if user_type:
             search_query = search_query.filter(User.user_type == user_type)
         
-        # Apply sorting
+        # Facet counts over the whole filtered set, sent with the first page only
+        facets = None
+        if page == 1 and not cursor:
+            facets = facet_counts(search_query, {
+                "location": User.location,
+                "industry": User.industry,
+                "company": User.company,
+                "experience": experience_bucket(User.experience_years),
+            })
+        
+        # Apply sorting; the user id is the final key so keyset pagination is stable
+        descending = sort_order != "asc"
         if sort_by == "name":
-            search_query = search_query.order_by(User.full_name.asc() if sort_order == "asc" else User.full_name.desc())
+            sort_keys = [(User.full_name, descending)]
+            sort_values = lambda u: [u.full_name]
         elif sort_by == "company":
-            search_query = search_query.order_by(User.company.asc() if sort_order == "asc" else User.company.desc())
+            sort_keys = [(func.coalesce(User.company, ''), descending)]
+            sort_values = lambda u: [u.company or '']
         elif sort_by == "location":
-            search_query = search_query.order_by(User.location.asc() if sort_order == "asc" else User.location.desc())
+            sort_keys = [(func.coalesce(User.location, ''), descending)]
+            sort_values = lambda u: [u.location or '']
         elif sort_by == "experience":
-            search_query = search_query.order_by(User.experience_years.asc() if sort_order == "asc" else User.experience_years.desc())
-        elif sort_by == "mutual_connections":
-            # For mutual connections sorting, we'll need to calculate this
-            search_query = search_query.order_by(User.full_name.asc())
-        else:  # relevance - default sorting
-            search_query = search_query.order_by(User.full_name.asc())
-        
-        # Get total count
-        total = search_query.count()
-        
-        # Apply pagination
-        offset = (page - 1) * limit
-        users = search_query.offset(offset).limit(limit).all()
+            sort_keys = [(func.coalesce(User.experience_years, -1), descending)]
+            sort_values = lambda u: [u.experience_years if u.experience_years is not None else -1]
+        elif sort_by == "relevance" and matches is not None:
+            # Best full-text match first; rows are (User, rank) until unwrapped below
+            search_query = search_query.add_columns(matches.c.rank)
+            sort_keys = [(matches.c.rank, False)]
+            descending = False
+        else:
+            # relevance without a full-text match and mutual_connections, which we'll need to calculate
+            sort_keys = [(User.full_name, False)]
+            sort_values = lambda u: [u.full_name]
+            descending = False
+        sort_keys.append((User.id, descending))
+        ranked = sort_by == "relevance" and matches is not None
+        
+        if cursor is not None:
+            users, next_cursor = keyset_paginate(
+                search_query, sort_keys, limit, cursor or None,
+                (lambda row: [row[1], row[0].id]) if ranked else (lambda u: sort_values(u) + [u.id])
+            )
+            pagination = cursor_pagination_info(limit, next_cursor, cached_count(search_query) if include_total else None)
+        else:
+            # Get total count
+            total = search_query.count()
+            
+            # Apply pagination
+            offset = (page - 1) * limit
+            users = search_query.order_by(
+                *[(c.desc() if d else c.asc()) for c, d in sort_keys]
+            ).offset(offset).limit(limit).all()
+            pagination = {
+                "page": page,
+                "limit": limit,
+                "total": total,
+                "pages": (total + limit - 1) // limit
+            }
+        if ranked:
+            users = [row[0] for row in users]
         
         # Get enhanced results with connection status and mutual connections
+        user_ids = [user.id for user in users]
+        statuses = resolve_connection_statuses(db, user_id, user_ids)
+        mutual_counts = get_graph_index(db).mutual_counts(user_id, user_ids)
         results = []
         for user in users:
-            connection_status = await get_connection_status(user_id, user.id, db)
-            mutual_connections = await get_mutual_connections_count(user_id, user.id, db)
+            connection_status = statuses[user.id]
+            mutual_connections = mutual_counts[user.id]
             profile_completeness = calculate_profile_completeness(user)
             
             results.append({
@@ -992,12 +966,8 @@ async def enhanced_search_users_and_connections(
         
         return {
             "results": results,
-            "pagination": {
-                "page": page,
-                "limit": limit,
-                "total": total,
-                "pages": (total + limit - 1) // limit
-            },
+            "pagination": pagination,
+            "facets": facets,
             "filters_applied": {
                 "query": query,
                 "search_type": search_type,
@@ -1015,31 +985,6 @@ async def enhanced_search_users_and_connections(
         logging.error(f"Error in enhanced search: {str(e)}")
         raise e
 
-async def get_mutual_connections_count(user1_id: int, user2_id: int, db: Session) -> int:
-    """Get count of mutual connections between two users"""
-    try:
-        # Get connections of user1
-        user1_connections = db.query(Connection).filter(
-            Connection.user_id == user1_id,
-            Connection.status == 'accepted'
-        ).all()
-        user1_connection_ids = [conn.connected_user_id for conn in user1_connections]
-        
-        # Get connections of user2
-        user2_connections = db.query(Connection).filter(
-            Connection.user_id == user2_id,
-            Connection.status == 'accepted'
-        ).all()
-        user2_connection_ids = [conn.connected_user_id for conn in user2_connections]
-        
-        # Find mutual connections
-        mutual_ids = set(user1_connection_ids) & set(user2_connection_ids)
-        return len(mutual_ids)
-        
-    except Exception as e:
-        logging.error(f"Error getting mutual connections: {str(e)}")
-        return 0
-
 def calculate_profile_completeness(user: User) -> int:
     """Calculate profile completeness percentage"""
     try:
@@ -1073,23 +1018,27 @@ async def get_search_suggestions(
         user_id = get_authenticated_user_id(request, db)
         search_query = query.strip().lower()
         
-        # Search for users with names, titles, or companies that start with the query
-        suggestions = db.query(User).filter(
-            and_(
-                User.id != user_id,
-                User.is_active == True,
-                or_(
-                    User.full_name.ilike(f'{search_query}%'),
-                    User.title.ilike(f'{search_query}%'),
-                    User.company.ilike(f'{search_query}%'),
-                    User.username.ilike(f'{search_query}%')
+        # Prefix lookup in the shared typeahead index; the database is only
+        # searched until the index file has been built
+        suggestions = typeahead(search_query, limit, exclude_id=user_id)
+        if suggestions is None:
+            suggestions = db.query(User).filter(
+                and_(
+                    User.id != user_id,
+                    User.is_active == True,
+                    or_(
+                        User.full_name.ilike(f'{search_query}%'),
+                        User.title.ilike(f'{search_query}%'),
+                        User.company.ilike(f'{search_query}%'),
+                        User.username.ilike(f'{search_query}%')
+                    )
                 )
-            )
-        ).limit(limit).all()
+            ).limit(limit).all()
         
+        statuses = resolve_connection_statuses(db, user_id, [user.id for user in suggestions])
         results = []
         for user in suggestions:
-            connection_status = await get_connection_status(user_id, user.id, db)
+            connection_status = statuses[user.id]
             results.append({
                 "id": user.id,
                 "full_name": user.full_name,
@@ -1111,12 +1060,13 @@ async def get_recent_searches(
     db: Session = Depends(get_db),
     limit: int = Query(10, ge=1, le=50)
 ):
-    """Get recent search queries (placeholder for future implementation)"""
+    """Get the current user's latest distinct search queries, newest first"""
     try:
-        # This would typically store search history in a separate table
-        # For now, return empty array
-        return JSONResponse(content={"recent_searches": []})
+        user_id = get_authenticated_user_id(request, db)
+        return JSONResponse(content={"recent_searches": recent_searches(db, user_id, limit)})
         
+    except HTTPException:
+        raise
     except Exception as e:
         logging.error(f"Error getting recent searches: {str(e)}")
         return JSONResponse(content={"recent_searches": []})
@@ -1127,16 +1077,9 @@ async def get_popular_searches(
     db: Session = Depends(get_db),
     limit: int = Query(10, ge=1, le=50)
 ):
-    """Get popular search terms (placeholder for future implementation)"""
+    """Get the most searched terms lately (people and job searches)"""
     try:
-        # This would typically track search frequency
-        # For now, return some common search terms
-        popular_searches = [
-            "software engineer", "data scientist", "product manager",
-            "marketing", "sales", "design", "finance", "healthcare"
-        ]
-        
-        return JSONResponse(content={"popular_searches": popular_searches[:limit]})
+        return JSONResponse(content={"popular_searches": popular_searches(limit)})
         
     except Exception as e:
         logging.error(f"Error getting popular searches: {str(e)}")
@@ -1149,9 +1092,9 @@ async def get_user_connections_data(user_id: int, db: Session) -> Dict[str, Any]
     try:
         # Get accepted connections
         connections = db.query(Connection, User).join(
-            User, Connection.connected_user_id == User.id
+            User, User.id == other_end(user_id)
         ).filter(
-            Connection.user_id == user_id,
+            involving(user_id),
             Connection.status == 'accepted'
         ).all()
         
@@ -1174,8 +1117,8 @@ async def get_user_connections_data(user_id: int, db: Session) -> Dict[str, Any]
         # Get connection suggestions
         suggestions = await get_connection_suggestions_for_user(user_id, db, 1, 10)
         
-        # Calculate stats
-        stats = await calculate_connection_stats(user_id, db)
+        # Counters plus the cached industry rollup
+        stats = connection_stats(db, user_id)
         
         return {
             "connections": connections,
@@ -1189,63 +1132,6 @@ async def get_user_connections_data(user_id: int, db: Session) -> Dict[str, Any]
         logging.error(f"Error getting user connections data: {str(e)}")
         raise e
 
-async def calculate_connection_stats(user_id: int, db: Session) -> Dict[str, Any]:
-    """Calculate comprehensive connection statistics for a user"""
-    try:
-        # Total connections
-        total_connections = db.query(Connection).filter(
-            Connection.user_id == user_id,
-            Connection.status == 'accepted'
-        ).count()
-        
-        # Pending requests
-        pending_requests = db.query(FriendRequest).filter(
-            FriendRequest.receiver_id == user_id,
-            FriendRequest.status == 'pending'
-        ).count()
-        
-        # Sent requests
-        sent_requests = db.query(FriendRequest).filter(
-            FriendRequest.sender_id == user_id,
-            FriendRequest.status == 'pending'
-        ).count()
-        
-        # Mutual connections (simplified calculation)
-        mutual_connections = 0  # This would require more complex logic
-        
-        # Network growth (connections in last 30 days)
-        thirty_days_ago = datetime.utcnow() - timedelta(days=30)
-        recent_connections = db.query(Connection).filter(
-            Connection.user_id == user_id,
-            Connection.status == 'accepted',
-            Connection.accepted_at >= thirty_days_ago
-        ).count()
-        
-        # Industry distribution
-        industry_distribution = db.query(
-            User.industry,
-            func.count(User.id)
-        ).join(
-            Connection, User.id == Connection.connected_user_id
-        ).filter(
-            Connection.user_id == user_id,
-            Connection.status == 'accepted',
-            User.industry.isnot(None)
-        ).group_by(User.industry).all()
-        
-        return {
-            "total_connections": total_connections,
-            "pending_requests": pending_requests,
-            "sent_requests": sent_requests,
-            "mutual_connections": mutual_connections,
-            "recent_connections": recent_connections,
-            "industry_distribution": dict(industry_distribution)
-        }
-        
-    except Exception as e:
-        logging.error(f"Error calculating connection stats: {str(e)}")
-        raise e
-
 async def get_filtered_connections(
     user_id: int,
     db: Session,
@@ -1254,14 +1140,20 @@ async def get_filtered_connections(
     sort_by: str,
     search: Optional[str],
     company_filter: Optional[str],
-    location_filter: Optional[str]
+    location_filter: Optional[str],
+    cursor: Optional[str] = None,
+    include_total: bool = False
 ) -> Dict[str, Any]:
-    """Get filtered and sorted connections for a user"""
+    """Get filtered and sorted connections for a user
+
+    Offset pagination (page/limit) is kept for compatibility; passing a
+    cursor (empty string for the first page) switches to keyset pagination.
+    """
     try:
         query = db.query(Connection, User).join(
-            User, Connection.connected_user_id == User.id
+            User, User.id == other_end(user_id)
         ).filter(
-            Connection.user_id == user_id,
+            involving(user_id),
             Connection.status == 'accepted'
         )
         
@@ -1284,21 +1176,33 @@ async def get_filtered_connections(
         if location_filter:
             query = query.filter(User.location.ilike(f'%{location_filter}%'))
         
-        # Apply sorting
-        if sort_by == "name":
-            query = query.order_by(User.full_name.asc())
-        elif sort_by == "company":
-            query = query.order_by(User.company.asc())
+        # Sort keys end with the connection id so keyset pagination is stable
+        if sort_by == "company":
+            sort_keys = [(func.coalesce(User.company, ''), False), (Connection.id, False)]
+            row_key = lambda row: [row[1].company or '', row[0].id]
         elif sort_by == "recent":
-            query = query.order_by(Connection.accepted_at.desc())
-        elif sort_by == "mutual":
-            # This would require more complex logic for mutual connections
-            query = query.order_by(User.full_name.asc())
+            sort_keys = [(func.coalesce(Connection.accepted_at, Connection.created_at), True), (Connection.id, True)]
+            row_key = lambda row: [row[0].accepted_at or row[0].created_at, row[0].id]
+        else:
+            # name, and mutual (which would require more complex logic for mutual connections)
+            sort_keys = [(User.full_name, False), (Connection.id, False)]
+            row_key = lambda row: [row[1].full_name, row[0].id]
         
-        # Apply pagination
-        total = query.count()
-        offset = (page - 1) * limit
-        connections = query.offset(offset).limit(limit).all()
+        if cursor is not None:
+            connections, next_cursor = keyset_paginate(query, sort_keys, limit, cursor or None, row_key)
+            pagination = cursor_pagination_info(limit, next_cursor, cached_count(query) if include_total else None)
+        else:
+            total = query.count()
+            offset = (page - 1) * limit
+            connections = query.order_by(
+                *[(c.desc() if d else c.asc()) for c, d in sort_keys]
+            ).offset(offset).limit(limit).all()
+            pagination = {
+                "page": page,
+                "limit": limit,
+                "total": total,
+                "pages": (total + limit - 1) // limit
+            }
         
         return {
             "connections": [
@@ -1317,12 +1221,7 @@ async def get_filtered_connections(
                     "connection_type": conn.connection_type
                 } for conn, user in connections
             ],
-            "pagination": {
-                "page": page,
-                "limit": limit,
-                "total": total,
-                "pages": (total + limit - 1) // limit
-            }
+            "pagination": pagination
         }
         
     except Exception as e:
@@ -1429,123 +1328,39 @@ def get_connection_suggestions_for_user(
     page: int,
     limit: int
 ) -> Dict[str, Any]:
-    """Get connection suggestions for a user based on various factors"""
+    """Get connection suggestions for a user from their precomputed people-you-may-know list"""
     try:
-        # Get current user info
-        current_user = db.query(User).get(user_id)
-        if not current_user:
-            return {
-                "suggestions": [],
-                "pagination": {
-                    "page": page,
-                    "limit": limit,
-                    "total": 0,
-                    "pages": 0
-                }
-            }
-        
-        # Get user's current connections to exclude them
-        user_connections = db.query(Connection.connected_user_id).filter(
-            Connection.user_id == user_id,
-            Connection.status == 'accepted'
-        ).subquery()
-        
-        # Get user's sent and received requests to exclude them
-        user_requests = db.query(FriendRequest.sender_id).filter(
-            FriendRequest.receiver_id == user_id
-        ).union(
-            db.query(FriendRequest.receiver_id).filter(
-                FriendRequest.sender_id == user_id
-            )
-        ).subquery()
-        
-        # Find users who are not connected and not in requests
-        # Prioritize users with complete profiles
-        suggestions_query = db.query(User).filter(
-            User.id != user_id,
-            ~User.id.in_(user_connections),
-            ~User.id.in_(user_requests),
-            User.is_active == True
-        )
-        
-        # Apply intelligent filtering - prioritize users with complete profiles
-        suggestions_query = suggestions_query.order_by(
-            # Priority 1: Users with complete company info (not generic)
-            User.company.notlike('%Company%').desc(),
-            User.company.notlike('%Test%').desc(),
-            # Priority 2: Users with complete title info (not generic)
-            User.title.notlike('%Professional%').desc(),
-            # Priority 3: Users with complete location info (not generic)
-            User.location.notlike('%Location%').desc(),
-            # Priority 4: Users with complete industry info (not generic)
-            User.industry.notlike('%Industry%').desc(),
-            # Priority 5: Recent activity
-            User.created_at.desc()
-        )
-        
-        total = suggestions_query.count()
+        ranked = people_you_may_know(db, user_id)
+        has_more = len(ranked) > page * limit
         offset = (page - 1) * limit
-        suggestions = suggestions_query.offset(offset).limit(limit).all()
         
-        # Create intelligent suggestions with better data quality
         suggestions_with_reasons = []
-        for user in suggestions:
-            reason = "New to platform"
-            mutual_count = 0
-            
-            # Determine connection reason based on profile completeness
-            if current_user.company and user.company and user.company != "Company" and user.company != "Test Company":
-                if user.company == current_user.company:
-                    reason = f"Same company: {user.company}"
-                elif any(word in user.company.lower() for word in current_user.company.lower().split()):
-                    reason = f"Similar company: {user.company}"
-                else:
-                    reason = f"Company: {user.company}"
-            elif current_user.location and user.location and user.location != "Location":
-                if user.location == current_user.location:
-                    reason = f"Same location: {user.location}"
-                else:
-                    reason = f"Location: {user.location}"
-            elif current_user.industry and user.industry and user.industry != "Industry":
-                if user.industry == current_user.industry:
-                    reason = f"Same industry: {user.industry}"
-                else:
-                    reason = f"Industry: {user.industry}"
-            elif user.title and user.title != "Professional":
-                reason = f"Title: {user.title}"
-            elif user.company and user.company != "Company" and user.company != "Test Company":
-                reason = f"Company: {user.company}"
-            else:
-                reason = "New to platform"
-            
-            # Calculate mutual connections
-            mutual_count = calculate_mutual_connections_count(user_id, user.id, db)
-            
-            # Only include users with meaningful profile information
-            if (user.title and user.title != "Professional" and 
-                user.company and user.company not in ["Company", "Test Company"] and
-                user.full_name and len(user.full_name.strip()) > 0):
-                
-                suggestions_with_reasons.append({
-                    "id": user.id,
-                    "full_name": user.full_name,
-                    "title": user.title or "Professional",
-                    "company": user.company or "Company",
-                    "profile_image": user.profile_image or "default-avatar.svg",
-                    "location": user.location or "Location not specified",
-                    "industry": user.industry or "Industry not specified",
-                    "reason": reason,
-                    "mutual_count": mutual_count,
-                    "profile_completeness": calculate_profile_completeness(user)
-                })
+        for item in ranked[offset:offset + limit]:
+            user = item["user"]
+            suggestions_with_reasons.append({
+                "id": user.id,
+                "full_name": user.full_name,
+                "title": user.title or "Professional",
+                "company": user.company or "Company",
+                "profile_image": user.profile_image or "default-avatar.svg",
+                "location": user.location or "Location not specified",
+                "industry": user.industry or "Industry not specified",
+                "reason": item["reasons"][0],
+                "reasons": item["reasons"],
+                "score": item["score"],
+                "mutual_count": item["mutual_count"],
+                "profile_completeness": calculate_profile_completeness(user)
+            })
         
+        total = len(ranked)
         return {
             "suggestions": suggestions_with_reasons,
             "pagination": {
                 "page": page,
                 "limit": limit,
                 "total": total,
-                "pages": (total + limit - 1) // limit
+                "pages": (total + limit - 1) // limit,
+                "has_more": has_more
             }
         }
         
@@ -1562,98 +1377,17 @@ def get_connection_suggestions_for_user(
             }
         }
 
-def calculate_mutual_connections_count(
-    user1_id: int,
-    user2_id: int,
-    db: Session
-) -> int:
-    """Calculate the number of mutual connections between two users"""
-    try:
-        # Get user1's connections
-        user1_connections = db.query(Connection.connected_user_id).filter(
-            Connection.user_id == user1_id,
-            Connection.status == 'accepted'
-        ).subquery()
-        
-        # Count user2's connections that are also user1's connections
-        mutual_count = db.query(Connection).filter(
-            Connection.user_id == user2_id,
-            Connection.status == 'accepted',
-            Connection.connected_user_id.in_(user1_connections)
-        ).count()
-        
-        return mutual_count
-        
-    except Exception as e:
-        logging.error(f"Error calculating mutual connections count: {str(e)}")
-        return 0
-
-async def get_connection_status(
-    current_user_id: int,
-    target_user_id: int,
-    db: Session
-) -> str:
-    """Get the connection status between two users"""
-    try:
-        # Check if already connected
-        connection = db.query(Connection).filter(
-            or_(
-                and_(Connection.user_id == current_user_id, Connection.connected_user_id == target_user_id),
-                and_(Connection.user_id == target_user_id, Connection.connected_user_id == current_user_id)
-            ),
-            Connection.status == 'accepted'
-        ).first()
-        
-        if connection:
-            return "connected"
-        
-        # Check if request sent
-        sent_request = db.query(FriendRequest).filter(
-            FriendRequest.sender_id == current_user_id,
-            FriendRequest.receiver_id == target_user_id,
-            FriendRequest.status == 'pending'
-        ).first()
-        
-        if sent_request:
-            return "request_sent"
-        
-        # Check if request received
-        received_request = db.query(FriendRequest).filter(
-            FriendRequest.sender_id == target_user_id,
-            FriendRequest.receiver_id == current_user_id,
-            FriendRequest.status == 'pending'
-        ).first()
-        
-        if received_request:
-            return "request_received"
-        
-        return "not_connected"
-        
-    except Exception as e:
-        logging.error(f"Error getting connection status: {str(e)}")
-        return "unknown"
-
 async def get_mutual_connections(
     user1_id: int,
     user2_id: int,
     db: Session
 ) -> List[Dict[str, Any]]:
-    """Get mutual connections between two users"""
+    """Get mutual connections between two users (at most 10)"""
     try:
-        # Get user1's connections
-        user1_connections = db.query(Connection.connected_user_id).filter(
-            Connection.user_id == user1_id,
-            Connection.status == 'accepted'
-        ).subquery()
-        
-        # Get user2's connections that are also user1's connections
-        mutual_connections = db.query(User).join(
-            Connection, User.id == Connection.connected_user_id
-        ).filter(
-            Connection.user_id == user2_id,
-            Connection.status == 'accepted',
-            User.id.in_(user1_connections)
-        ).limit(10).all()
+        mutual_ids = get_graph_index(db).mutual_ids(user1_id, user2_id, limit=10)
+        if not mutual_ids:
+            return []
+        mutual_connections = db.query(User).filter(User.id.in_(mutual_ids)).order_by(User.id).all()
         
         return [
             {
@@ -1686,2074 +1420,37 @@ def get_default_user_id(db: Session) -> int:
         return default_user.id
     return user.id
 
+# ==================== PAGES ====================
+# Static pages, read once and served from memory gzipped with ETags
+
+search_page = CachedPage(os.path.join(BASE_DIR, "templates", "connections", "search.html"))
+find_connections_page_html = CachedPage(
+    os.path.join(BASE_DIR, "templates", "connections", "find_connections.html"),
+    cache_control=PRIVATE_PAGE_CACHE_CONTROL,
+)
+
 @router.get("/search", response_class=HTMLResponse)
-def enhanced_search_page(request: Request, db: Session = Depends(get_db)):
+def enhanced_search_page(request: Request):
     """Enhanced search page with LinkedIn-like interface"""
-    try:
-        return HTMLResponse(
-            content="""
-            <!DOCTYPE html>
-            <html lang="en">
-            <head>
-                <meta charset="UTF-8">
-                <meta name="viewport" content="width=device-width, initial-scale=1.0">
-                <title>Find People - Qrow IQ</title>
-                <link rel="stylesheet" href="https://cdnjs.cloudflare.com/ajax/libs/font-awesome/6.1.1/css/all.min.css">
-                <style>
-                    * { margin: 0; padding: 0; box-sizing: border-box; }
-                    body { font-family: 'Inter', -apple-system, BlinkMacSystemFont, sans-serif; background-color: #f3f2ef; color: #191919; line-height: 1.6; }
-                    .header { background: linear-gradient(135deg, #0077b5 0%, #005885 100%); color: white; padding: 2rem 0; text-align: center; box-shadow: 0 2px 10px rgba(0,0,0,0.1); }
-                    .header h1 { font-size: 2.5rem; font-weight: 700; margin-bottom: 0.5rem; }
-                    .header p { font-size: 1.1rem; opacity: 0.9; }
-                    .container { max-width: 1200px; margin: 0 auto; padding: 2rem; }
-                    .search-section { background: white; border-radius: 12px; padding: 2rem; margin-bottom: 2rem; box-shadow: 0 2px 20px rgba(0,0,0,0.08); }
-                    .search-header { margin-bottom: 1.5rem; }
-                    .search-header h2 { font-size: 1.5rem; color: #191919; margin-bottom: 0.5rem; }
-                    .search-input-group { position: relative; margin-bottom: 1.5rem; }
-                    .search-input { width: 100%; padding: 1rem 1rem 1rem 3rem; border: 2px solid #e0e0e0; border-radius: 8px; font-size: 1rem; transition: all 0.3s ease; background: #fafafa; }
-                    .search-input:focus { outline: none; border-color: #0077b5; background: white; box-shadow: 0 0 0 3px rgba(0,119,181,0.1); }
-                    .search-icon { position: absolute; left: 1rem; top: 50%; transform: translateY(-50%); color: #666; font-size: 1.2rem; }
-                    .filters-row { display: grid; grid-template-columns: repeat(auto-fit, minmax(200px, 1fr)); gap: 1rem; margin-bottom: 1.5rem; }
-                    .filter-group { display: flex; flex-direction: column; }
-                    .filter-group label { font-weight: 600; margin-bottom: 0.5rem; color: #191919; font-size: 0.9rem; }
-                    .filter-group input, .filter-group select { padding: 0.75rem; border: 1px solid #e0e0e0; border-radius: 6px; font-size: 0.9rem; transition: border-color 0.3s ease; }
-                    .filter-group input:focus, .filter-group select:focus { outline: none; border-color: #0077b5; }
-                    .search-actions { display: flex; gap: 1rem; align-items: center; flex-wrap: wrap; }
-                    .search-btn { background: #0077b5; color: white; border: none; padding: 1rem 2rem; border-radius: 8px; font-size: 1rem; font-weight: 600; cursor: pointer; transition: all 0.3s ease; display: flex; align-items: center; gap: 0.5rem; }
-                    .search-btn:hover { background: #005885; transform: translateY(-1px); box-shadow: 0 4px 12px rgba(0,119,181,0.3); }
-                    .clear-btn { background: #f0f0f0; color: #666; border: none; padding: 1rem 2rem; border-radius: 8px; font-size: 1rem; cursor: pointer; transition: all 0.3s ease; }
-                    .clear-btn:hover { background: #e0e0e0; color: #333; }
-                    .results-section { background: white; border-radius: 12px; padding: 2rem; box-shadow: 0 2px 20px rgba(0,0,0,0.08); }
-                    .results-header { display: flex; justify-content: space-between; align-items: center; margin-bottom: 1.5rem; padding-bottom: 1rem; border-bottom: 1px solid #e0e0e0; }
-                    .results-count { color: #666; font-size: 0.9rem; }
-                    .sort-controls { display: flex; gap: 1rem; align-items: center; }
-                    .sort-controls select { padding: 0.5rem; border: 1px solid #e0e0e0; border-radius: 4px; font-size: 0.9rem; }
-                    .user-card { border: 1px solid #e0e0e0; border-radius: 8px; padding: 1.5rem; margin-bottom: 1rem; transition: all 0.3s ease; background: #fafafa; }
-                    .user-card:hover { border-color: #0077b5; box-shadow: 0 4px 12px rgba(0,0,0,0.1); transform: translateY(-2px); }
-                    .user-header { display: flex; align-items: center; margin-bottom: 1rem; }
-                    .user-avatar { width: 60px; height: 60px; border-radius: 50%; object-fit: cover; margin-right: 1rem; border: 3px solid #0077b5; }
-                    .user-info h3 { font-size: 1.2rem; color: #191919; margin-bottom: 0.25rem; }
-                    .user-title { color: #666; font-weight: 500; margin-bottom: 0.25rem; }
-                    .user-company { color: #0077b5; font-weight: 600; }
-                    .user-details { display: grid; grid-template-columns: repeat(auto-fit, minmax(150px, 1fr)); gap: 1rem; margin-bottom: 1rem; }
-                    .detail-item { display: flex; align-items: center; gap: 0.5rem; color: #666; font-size: 0.9rem; }
-                    .detail-item i { color: #0077b5; width: 16px; }
-                    .profile-completeness { margin-bottom: 1rem; }
-                    .completeness-bar { width: 100%; height: 8px; background: #e0e0e0; border-radius: 4px; overflow: hidden; margin-bottom: 0.5rem; }
-                    .completeness-fill { height: 100%; background: linear-gradient(90deg, #0077b5, #00a0dc); transition: width 0.3s ease; }
-                    .completeness-text { font-size: 0.8rem; color: #666; }
-                    .action-buttons { display: flex; gap: 1rem; flex-wrap: wrap; }
-                    .btn { padding: 0.75rem 1.5rem; border: none; border-radius: 6px; font-size: 0.9rem; font-weight: 600; cursor: pointer; transition: all 0.3s ease; display: flex; align-items: center; gap: 0.5rem; }
-                    .btn-primary { background: #0077b5; color: white; }
-                    .btn-primary:hover { background: #005885; transform: translateY(-1px); }
-                    .btn-secondary { background: transparent; color: #0077b5; border: 1px solid #0077b5; }
-                    .btn-secondary:hover { background: #0077b5; color: white; }
-                    .btn-success { background: #28a745; color: white; }
-                    .btn-success:hover { background: #218838; }
-                    .btn-warning { background: #ffc107; color: #212529; }
-                    .btn-warning:hover { background: #e0a800; }
-                    .loading { text-align: center; padding: 3rem; color: #666; }
-                    .loading i { font-size: 2rem; color: #0077b5; margin-bottom: 1rem; }
-                    .no-results { text-align: center; padding: 3rem; color: #666; }
-                    .no-results i { font-size: 3rem; color: #ccc; margin-bottom: 1rem; }
-                    .pagination { display: flex; justify-content: center; gap: 0.5rem; margin-top: 2rem; }
-                    .page-btn { padding: 0.5rem 1rem; border: 1px solid #e0e0e0; background: white; color: #666; border-radius: 4px; cursor: pointer; transition: all 0.3s ease; }
-                    .page-btn:hover { background: #f0f0f0; border-color: #0077b5; color: #0077b5; }
-                    .page-btn.active { background: #0077b5; color: white; border-color: #0077b5; }
-                    .page-btn:disabled { opacity: 0.5; cursor: not-allowed; }
-                    .suggestions { background: #f8f9fa; border-radius: 8px; padding: 1rem; margin-top: 1rem; }
-                    .suggestions h4 { color: #191919; margin-bottom: 0.5rem; font-size: 0.9rem; }
-                    .suggestion-tags { display: flex; flex-wrap: wrap; gap: 0.5rem; }
-                    .suggestion-tag { background: white; border: 1px solid #e0e0e0; padding: 0.25rem 0.75rem; border-radius: 20px; font-size: 0.8rem; color: #666; cursor: pointer; transition: all 0.3s ease; }
-                    .suggestion-tag:hover { background: #0077b5; color: white; border-color: #0077b5; }
-                    @media (max-width: 768px) { .container { padding: 1rem; } .filters-row { grid-template-columns: 1fr; } .search-actions { flex-direction: column; } .search-btn, .clear-btn { width: 100%; } .results-header { flex-direction: column; gap: 1rem; align-items: flex-start; } .action-buttons { flex-direction: column; } .btn { width: 100%; justify-content: center; } }
-                </style>
-            </head>
-            <body>
-                <div class="header">
-                    <h1><i class="fas fa-search"></i> Find People</h1>
-                    <p>Discover and connect with professionals in your network</p>
-                </div>
-                
-                <div class="container">
-                    <div class="search-section">
-                        <div class="search-header">
-                            <h2><i class="fas fa-filter"></i> Search & Filters</h2>
-                            <p>Find people by name, company, skills, location, and more</p>
-                        </div>
-                        
-                        <div class="search-input-group">
-                            <i class="fas fa-search search-icon"></i>
-                            <input type="text" id="searchQuery" class="search-input" placeholder="Search for people, companies, skills, titles...">
-                        </div>
-                        
-                        <div class="filters-row">
-                            <div class="filter-group">
-                                <label for="searchType">Search Type</label>
-                                <select id="searchType">
-                                    <option value="all">All Fields</option>
-                                    <option value="name">Name</option>
-                                    <option value="company">Company</option>
-                                    <option value="title">Job Title</option>
-                                    <option value="skills">Skills</option>
-                                    <option value="location">Location</option>
-                                    <option value="industry">Industry</option>
-                                    <option value="education">Education</option>
-                                </select>
-                            </div>
-                            
-                            <div class="filter-group">
-                                <label for="location">Location</label>
-                                <input type="text" id="location" placeholder="e.g., San Francisco, CA">
-                            </div>
-                            
-                            <div class="filter-group">
-                                <label for="industry">Industry</label>
-                                <input type="text" id="industry" placeholder="e.g., Technology, Healthcare">
-                            </div>
-                            
-                            <div class="filter-group">
-                                <label for="company">Company</label>
-                                <input type="text" id="company" placeholder="e.g., Google, Microsoft">
-                            </div>
-                            
-                            <div class="filter-group">
-                                <label for="title">Job Title</label>
-                                <input type="text" id="title" placeholder="e.g., Software Engineer, Manager">
-                            </div>
-                            
-                            <div class="filter-group">
-                                <label for="experienceMin">Min Experience (years)</label>
-                                <input type="number" id="experienceMin" min="0" max="50" placeholder="0">
-                            </div>
-                            
-                            <div class="filter-group">
-                                <label for="experienceMax">Max Experience (years)</label>
-                                <input type="number" id="experienceMax" min="0" max="50" placeholder="20">
-                            </div>
-                            
-                            <div class="filter-group">
-                                <label for="userType">User Type</label>
-                                <select id="userType">
-                                    <option value="">All Types</option>
-                                    <option value="normal">Normal</option>
-                                    <option value="domain">Domain</option>
-                                    <option value="premium">Premium</option>
-                                </select>
-                            </div>
-                        </div>
-                        
-                        <div class="search-actions">
-                            <button class="search-btn" onclick="performSearch()">
-                                <i class="fas fa-search"></i> Search
-                            </button>
-                            <button class="clear-btn" onclick="clearFilters()">
-                                <i class="fas fa-times"></i> Clear Filters
-                            </button>
-                        </div>
-                        
-                        <div class="suggestions">
-                            <h4><i class="fas fa-lightbulb"></i> Popular Searches</h4>
-                            <div class="suggestion-tags" id="popularSearches">
-                                <!-- Popular searches will be loaded here -->
-                            </div>
-                        </div>
-                    </div>
-                    
-                    <div class="results-section">
-                        <div class="results-header">
-                            <div>
-                                <h2><i class="fas fa-users"></i> Search Results</h2>
-                                <div class="results-count" id="resultsCount">Start your search to find people</div>
-                            </div>
-                            
-                            <div class="sort-controls">
-                                <label for="sortBy">Sort by:</label>
-                                <select id="sortBy">
-                                    <option value="relevance">Relevance</option>
-                                    <option value="name">Name</option>
-                                    <option value="company">Company</option>
-                                    <option value="location">Location</option>
-                                    <option value="experience">Experience</option>
-                                    <option value="mutual_connections">Mutual Connections</option>
-                                </select>
-                                
-                                <label for="sortOrder">Order:</label>
-                                <select id="sortOrder">
-                                    <option value="asc">A-Z</option>
-                                    <option value="desc">Z-A</option>
-                                </select>
-                            </div>
-                        </div>
-                        
-                        <div id="searchResults">
-                            <div class="no-results">
-                                <i class="fas fa-search"></i>
-                                <p>Enter your search criteria above to find people</p>
-                            </div>
-                        </div>
-                        
-                        <div class="pagination" id="pagination" style="display: none;">
-                            <!-- Pagination will be generated here -->
-                        </div>
-                    </div>
-                </div>
-                
-                <script>
-                    let currentPage = 1;
-                    let currentResults = [];
-                    let totalPages = 0;
-                    
-                    // Load popular searches on page load
-                    document.addEventListener('DOMContentLoaded', function() {
-                        loadPopularSearches();
-                        
-                        // Add enter key support for search
-                        document.getElementById('searchQuery').addEventListener('keypress', function(e) {
-                            if (e.key === 'Enter') {
-                                performSearch();
-                            }
-                        });
-                        
-                        // Add real-time search suggestions
-                        document.getElementById('searchQuery').addEventListener('input', function(e) {
-                            if (e.target.value.length >= 2) {
-                                getSearchSuggestions(e.target.value);
-                            }
-                        });
-                    });
-                    
-                    async function loadPopularSearches() {
-                        try {
-                            const response = await fetch('/connections/api/search/popular');
-                            const data = await response.json();
-                            
-                            const container = document.getElementById('popularSearches');
-                            container.innerHTML = data.popular_searches.map(term => 
-                                `<span class="suggestion-tag" onclick="useSearchTerm('${term}')">${term}</span>`
-                            ).join('');
-                        } catch (error) {
-                            console.error('Error loading popular searches:', error);
-                        }
-                    }
-                    
-                    function useSearchTerm(term) {
-                        document.getElementById('searchQuery').value = term;
-                        performSearch();
-                    }
-                    
-                    async function getSearchSuggestions(query) {
-                        try {
-                            const response = await fetch(`/connections/api/search/suggestions?query=${encodeURIComponent(query)}`);
-                            const data = await response.json();
-                            
-                            if (data.suggestions.length > 0) {
-                                // You could show these suggestions in a dropdown
-                                console.log('Search suggestions:', data.suggestions);
-                            }
-                        } catch (error) {
-                            console.error('Error getting suggestions:', error);
-                        }
-                    }
-                    
-                    async function performSearch() {
-                        const query = document.getElementById('searchQuery').value;
-                        const searchType = document.getElementById('searchType').value;
-                        const location = document.getElementById('location').value;
-                        const industry = document.getElementById('industry').value;
-                        const company = document.getElementById('company').value;
-                        const title = document.getElementById('title').value;
-                        const experienceMin = document.getElementById('experienceMin').value;
-                        const experienceMax = document.getElementById('experienceMax').value;
-                        const userType = document.getElementById('userType').value;
-                        const sortBy = document.getElementById('sortBy').value;
-                        const sortOrder = document.getElementById('sortOrder').value;
-                        
-                        // Build query parameters
-                        const params = new URLSearchParams();
-                        if (query) params.append('query', query);
-                        if (searchType) params.append('search_type', searchType);
-                        if (location) params.append('location', location);
-                        if (experienceMin) params.append('experience_min', experienceMin);
-                        if (experienceMax) params.append('experience_max', experienceMax);
-                        if (userType) params.append('user_type', userType);
-                        if (sortBy) params.append('sort_by', sortBy);
-                        if (sortOrder) params.append('sort_order', sortOrder);
-                        params.append('page', currentPage);
-                        params.append('limit', 20);
-                        
-                        // Show loading
-                        showLoading();
-                        
-                        try {
-                            const response = await fetch(`/connections/api/search?${params.toString()}`);
-                            const data = await response.json();
-                            
-                            if (data.results) {
-                                currentResults = data.results;
-                                totalPages = data.pagination.pages;
-                                displayResults(data.results, data.pagination);
-                            } else {
-                                showNoResults();
-                            }
-                        } catch (error) {
-                            console.error('Search error:', error);
-                            showError('An error occurred while searching. Please try again.');
-                        }
-                    }
-                    
-                    function showLoading() {
-                        const container = document.getElementById('searchResults');
-                        container.innerHTML = `
-                            <div class="loading">
-                                <i class="fas fa-spinner fa-spin"></i>
-                                <p>Searching...</p>
-                            </div>
-                        `;
-                    }
-                    
-                    function displayResults(results, pagination) {
-                        const container = document.getElementById('searchResults');
-                        const countContainer = document.getElementById('resultsCount');
-                        
-                        if (!results || results.length === 0) {
-                            showNoResults();
-                            return;
-                        }
-                        
-                        countContainer.textContent = `${pagination.total} results found`;
-                        
-                        const resultsHTML = results.map(user => `
-                            <div class="user-card">
-                                <div class="user-header">
-                                    <img src="${user.profile_image || '/static/uploads/default-avatar.svg'}" alt="Profile" class="user-avatar">
-                                    <div class="user-info">
-                                        <h3>${user.full_name}</h3>
-                                        <div class="user-title">${user.title || 'No title specified'}</div>
-                                        <div class="user-company">${user.company || 'No company specified'}</div>
-                                    </div>
-                                </div>
-                                
-                                <div class="user-details">
-                                    <div class="detail-item">
-                                        <i class="fas fa-map-marker-alt"></i>
-                                        <span>${user.location || 'Location not specified'}</span>
-                                    </div>
-                                    <div class="detail-item">
-                                        <i class="fas fa-industry"></i>
-                                        <span>${user.industry || 'Industry not specified'}</span>
-                                    </div>
-                                    <div class="detail-item">
-                                        <i class="fas fa-briefcase"></i>
-                                        <span>${user.experience_years || 0} years experience</span>
-                                    </div>
-                                    <div class="detail-item">
-                                        <i class="fas fa-users"></i>
-                                        <span>${user.mutual_connections || 0} mutual connections</span>
-                                    </div>
-                                </div>
-                                
-                                ${user.bio ? `<div class="user-bio" style="margin-bottom: 1rem; color: #666; font-style: italic;">"${user.bio}"</div>` : ''}
-                                
-                                <div class="profile-completeness">
-                                    <div class="completeness-bar">
-                                        <div class="completeness-fill" style="width: ${user.profile_completeness || 0}%"></div>
-                                    </div>
-                                    <div class="completeness-text">Profile ${user.profile_completeness || 0}% complete</div>
-                                </div>
-                                
-                                <div class="action-buttons">
-                                    ${getConnectionButton(user)}
-                                    <button class="btn btn-secondary" onclick="viewProfile(${user.id})">
-                                        <i class="fas fa-eye"></i> View Profile
-                                    </button>
-                                </div>
-                            </div>
-                        `).join('');
-                        
-                        container.innerHTML = resultsHTML;
-                        
-                        // Show pagination if needed
-                        if (totalPages > 1) {
-                            showPagination();
-                        } else {
-                            document.getElementById('pagination').style.display = 'none';
-                        }
-                    }
-                    
-                    function getConnectionButton(user) {
-                        const status = user.connection_status;
-                        
-                        if (status === 'connected') {
-                            return `<button class="btn btn-success" disabled><i class="fas fa-check"></i> Connected</button>`;
-                        } else if (status === 'pending_sent') {
-                            return `<button class="btn btn-warning" disabled><i class="fas fa-clock"></i> Request Sent</button>`;
-                        } else if (status === 'pending_received') {
-                            return `<button class="btn btn-primary" onclick="acceptConnection(${user.id})">
-                                <i class="fas fa-user-plus"></i> Accept Request
-                            </button>`;
-                        } else {
-                            return `<button class="btn btn-primary" onclick="sendConnectionRequest(${user.id})">
-                                <i class="fas fa-user-plus"></i> Connect
-                            </button>`;
-                        }
-                    }
-                    
-                    function showNoResults() {
-                        const container = document.getElementById('searchResults');
-                        const countContainer = document.getElementById('resultsCount');
-                        
-                        countContainer.textContent = 'No results found';
-                        container.innerHTML = `
-                            <div class="no-results">
-                                <i class="fas fa-search"></i>
-                                <p>No people found matching your search criteria.</p>
-                                <p>Try adjusting your filters or search terms.</p>
-                            </div>
-                        `;
-                        
-                        document.getElementById('pagination').style.display = 'none';
-                    }
-                    
-                    function showError(message) {
-                        const container = document.getElementById('searchResults');
-                        container.innerHTML = `
-                            <div class="no-results">
-                                <i class="fas fa-exclamation-triangle"></i>
-                                <p>${message}</p>
-                            </div>
-                        `;
-                    }
-                    
-                    function showPagination() {
-                        const pagination = document.getElementById('pagination');
-                        pagination.style.display = 'flex';
-                        
-                        let paginationHTML = '';
-                        
-                        // Previous button
-                        paginationHTML += `<button class="page-btn" onclick="changePage(${currentPage - 1})" ${currentPage <= 1 ? 'disabled' : ''}>
-                            <i class="fas fa-chevron-left"></i> Previous
-                        </button>`;
-                        
-                        // Page numbers
-                        for (let i = 1; i <= totalPages; i++) {
-                            if (i === 1 || i === totalPages || (i >= currentPage - 2 && i <= currentPage + 2)) {
-                                paginationHTML += `<button class="page-btn ${i === currentPage ? 'active' : ''}" onclick="changePage(${i})">${i}</button>`;
-                            } else if (i === currentPage - 3 || i === currentPage + 3) {
-                                paginationHTML += `<span class="page-btn" style="cursor: default;">...</span>`;
-                            }
-                        }
-                        
-                        // Next button
-                        paginationHTML += `<button class="page-btn" onclick="changePage(${currentPage + 1})" ${currentPage >= totalPages ? 'disabled' : ''}>
-                            Next <i class="fas fa-chevron-right"></i>
-                        </button>`;
-                        
-                        pagination.innerHTML = paginationHTML;
-                    }
-                    
-                    function changePage(page) {
-                        if (page < 1 || page > totalPages) return;
-                        
-                        currentPage = page;
-                        performSearch();
-                        
-                        // Scroll to top of results
-                        document.getElementById('searchResults').scrollIntoView({ behavior: 'smooth' });
-                    }
-                    
-                    function clearFilters() {
-                        document.getElementById('searchQuery').value = '';
-                        document.getElementById('searchType').value = 'all';
-                        document.getElementById('location').value = '';
-                        document.getElementById('industry').value = '';
-                        document.getElementById('company').value = '';
-                        document.getElementById('title').value = '';
-                        document.getElementById('experienceMin').value = '';
-                        document.getElementById('experienceMax').value = '';
-                        document.getElementById('userType').value = '';
-                        document.getElementById('sortBy').value = 'relevance';
-                        document.getElementById('sortOrder').value = 'asc';
-                        
-                        // Reset results
-                        currentPage = 1;
-                        document.getElementById('searchResults').innerHTML = `
-                            <div class="no-results">
-                                <i class="fas fa-search"></i>
-                                <p>Enter your search criteria above to find people</p>
-                            </div>
-                        `;
-                        document.getElementById('resultsCount').textContent = 'Start your search to find people';
-                        document.getElementById('pagination').style.display = 'none';
-                    }
-                    
-                    async function sendConnectionRequest(userId) {
-                        try {
-                            const response = await fetch('/connections/api/request', {
-                                method: 'POST',
-                                headers: {
-                                    'Content-Type': 'application/json',
-                                },
-                                body: JSON.stringify({
-                                    receiver_id: userId,
-                                    message: 'I would like to connect with you on Qrow IQ!'
-                                })
-                            });
-                            
-                            if (response.ok) {
-                                alert('Connection request sent successfully!');
-                                performSearch(); // Refresh results
-                            } else {
-                                alert('Failed to send connection request. Please try again.');
-                            }
-                        } catch (error) {
-                            console.error('Error sending connection request:', error);
-                            alert('An error occurred. Please try again.');
-                        }
-                    }
-                    
-                    async function acceptConnection(userId) {
-                        try {
-                            const response = await fetch(`/connections/api/accept/${userId}`, {
-                                method: 'POST'
-                            });
-                            
-                            if (response.ok) {
-                                alert('Connection accepted!');
-                                performSearch(); // Refresh results
-                            } else {
-                                alert('Failed to accept connection. Please try again.');
-                            }
-                        } catch (error) {
-                            console.error('Error accepting connection:', error);
-                            alert('An error occurred. Please try again.');
-                        }
-                    }
-                    
-                    function viewProfile(userId) {
-                        // TODO: Implement profile view functionality
-                        alert('Profile view functionality coming soon!');
-                    }
-                </script>
-            </body>
-            </html>
-            """
-        )
-        
-    except Exception as e:
-        logging.error(f"Error loading enhanced search page: {str(e)}")
-        return HTMLResponse(
-            content=f"""
-            <html>
-                <head><title>Find People</title></head>
-                <body>
-                    <h1>Find People</h1>
-                    <p>Error: {str(e)}</p>
-                    <a href="/connections/">Back to My Network</a>
-                </body>
-            </html>
-            """
-        )
+    return search_page.response(request)
 
 @router.get("/find-connections", response_class=HTMLResponse)
 def find_connections_page(request: Request, db: Session = Depends(get_db)):
     """Find Connections page with user-friendly interface"""
-    try:
-        user_id = get_authenticated_user_id(request, db)
-        current_user = db.query(User).get(user_id)
-        
-        if not current_user:
-            return HTMLResponse(
-                content="""
-                <html>
-                    <head><title>Find Connections</title></head>
-                    <body>
-                        <h1>Error</h1>
-                        <p>User not found</p>
-                        <a href="/connections/">Back to My Network</a>
-                    </body>
-                </html>
-                """
-            )
-        
-        return HTMLResponse(
-            content=f"""
-            <html>
-                <head>
-                    <title>Find Connections - Qrow IQ</title>
-                    <link rel="stylesheet" href="https://cdnjs.cloudflare.com/ajax/libs/font-awesome/6.1.1/css/all.min.css">
-                    <style>
-                        * {{
-                            margin: 0;
-                            padding: 0;
-                            box-sizing: border-box;
-                        }}
-                        
-                        body {{
-                            font-family: 'Segoe UI', Tahoma, Geneva, Verdana, sans-serif;
-                            background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
-                            min-height: 100vh;
-                            color: #333;
-                        }}
-                        
-                        .header {{
-                            background: rgba(255, 255, 255, 0.95);
-                            backdrop-filter: blur(10px);
-                            padding: 2rem;
-                            text-align: center;
-                            box-shadow: 0 4px 20px rgba(0, 0, 0, 0.1);
-                        }}
-                        
-                        .header h1 {{
-                            color: #667eea;
-                            margin-bottom: 0.5rem;
-                            font-size: 2.5rem;
-                        }}
-                        
-                        .header p {{
-                            color: #666;
-                            font-size: 1.1rem;
-                        }}
-                        
-                        .container {{
-                            max-width: 1200px;
-                            margin: 2rem auto;
-                            padding: 0 1rem;
-                        }}
-                        
-                        .search-section {{
-                            background: rgba(255, 255, 255, 0.95);
-                            backdrop-filter: blur(10px);
-                            border-radius: 15px;
-                            padding: 2rem;
-                            margin-bottom: 2rem;
-                            box-shadow: 0 4px 20px rgba(0, 0, 0, 0.1);
-                        }}
-                        
-                        .search-filters {{
-                            display: grid;
-                            grid-template-columns: repeat(auto-fit, minmax(200px, 1fr));
-                            gap: 1rem;
-                            margin-bottom: 1.5rem;
-                        }}
-                        
-                        .filter-group {{
-                            display: flex;
-                            flex-direction: column;
-                        }}
-                        
-                        .filter-group label {{
-                            font-weight: 600;
-                            margin-bottom: 0.5rem;
-                            color: #555;
-                        }}
-                        
-                        .filter-group input, .filter-group select {{
-                            padding: 0.75rem;
-                            border: 2px solid #e1e5e9;
-                            border-radius: 8px;
-                            font-size: 1rem;
-                            transition: border-color 0.3s;
-                        }}
-                        
-                        .filter-group input:focus, .filter-group select:focus {{
-                            outline: none;
-                            border-color: #667eea;
-                        }}
-                        
-                        .search-btn {{
-                            background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
-                            color: white;
-                            border: none;
-                            padding: 1rem 2rem;
-                            border-radius: 8px;
-                            font-size: 1.1rem;
-                            font-weight: 600;
-                            cursor: pointer;
-                            transition: transform 0.3s;
-                            grid-column: 1 / -1;
-                            justify-self: center;
-                        }}
-                        
-                        .search-btn:hover {{
-                            transform: translateY(-2px);
-                        }}
-                        
-                        .suggestions-section {{
-                            background: rgba(255, 255, 255, 0.95);
-                            backdrop-filter: blur(10px);
-                            border-radius: 15px;
-                            padding: 2rem;
-                            box-shadow: 0 4px 20px rgba(0, 0, 0, 0.1);
-                        }}
-                        
-                        .suggestions-header {{
-                            display: flex;
-                            justify-content: space-between;
-                            align-items: center;
-                            margin-bottom: 2rem;
-                            padding-bottom: 1rem;
-                            border-bottom: 2px solid #e1e5e9;
-                        }}
-                        
-                        .suggestions-header h2 {{
-                            color: #667eea;
-                            font-size: 1.8rem;
-                        }}
-                        
-                        .suggestions-grid {{
-                            display: grid;
-                            grid-template-columns: repeat(auto-fill, minmax(300px, 1fr));
-                            gap: 1.5rem;
-                        }}
-                        
-                        .suggestion-card {{
-                            background: white;
-                            border-radius: 12px;
-                            padding: 1.5rem;
-                            box-shadow: 0 4px 15px rgba(0, 0, 0, 0.1);
-                            transition: transform 0.3s, box-shadow 0.3s;
-                            border: 1px solid #e1e5e9;
-                        }}
-                        
-                        .suggestion-card:hover {{
-                            transform: translateY(-5px);
-                            box-shadow: 0 8px 25px rgba(0, 0, 0, 0.15);
-                        }}
-                        
-                        .user-header {{
-                            display: flex;
-                            align-items: center;
-                            margin-bottom: 1rem;
-                        }}
-                        
-                        .user-avatar {{
-                            width: 60px;
-                            height: 60px;
-                            border-radius: 50%;
-                            object-fit: cover;
-                            margin-right: 1rem;
-                            border: 3px solid #667eea;
-                        }}
-                        
-                        .user-info h3 {{
-                            color: #333;
-                            margin-bottom: 0.25rem;
-                            font-size: 1.2rem;
-                        }}
-                        
-                        .user-info .title {{
-                            color: #667eea;
-                            font-weight: 600;
-                            margin-bottom: 0.25rem;
-                        }}
-                        
-                        .user-info .company {{
-                            color: #666;
-                            font-size: 0.9rem;
-                        }}
-                        
-                        .connection-reason {{
-                            background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
-                            color: white;
-                            padding: 0.5rem 1rem;
-                            border-radius: 20px;
-                            font-size: 0.9rem;
-                            font-weight: 600;
-                            margin-bottom: 1rem;
-                            display: inline-block;
-                        }}
-                        
-                        .user-details {{
-                            margin-bottom: 1rem;
-                        }}
-                        
-                        .detail-item {{
-                            display: flex;
-                            align-items: center;
-                            margin-bottom: 0.5rem;
-                            font-size: 0.9rem;
-                            color: #666;
-                        }}
-                        
-                        .detail-item i {{
-                            margin-right: 0.5rem;
-                            color: #667eea;
-                            width: 16px;
-                        }}
-                        
-                        .profile-completeness {{
-                            background: #f8f9fa;
-                            border-radius: 8px;
-                            padding: 0.75rem;
-                            margin-bottom: 1rem;
-                        }}
-                        
-                        .completeness-bar {{
-                            background: #e1e5e9;
-                            height: 8px;
-                            border-radius: 4px;
-                            overflow: hidden;
-                            margin-bottom: 0.5rem;
-                        }}
-                        
-                        .completeness-fill {{
-                            background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
-                            height: 100%;
-                            transition: width 0.3s;
-                        }}
-                        
-                        .completeness-text {{
-                            font-size: 0.8rem;
-                            color: #666;
-                            text-align: center;
-                        }}
-                        
-                        .action-buttons {{
-                            display: flex;
-                            gap: 0.5rem;
-                        }}
-                        
-                        .btn {{
-                            flex: 1;
-                            padding: 0.75rem;
-                            border: none;
-                            border-radius: 8px;
-                            font-weight: 600;
-                            cursor: pointer;
-                            transition: all 0.3s;
-                            text-decoration: none;
-                            text-align: center;
-                            display: inline-block;
-                        }}
-                        
-                        .btn-primary {{
-                            background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
-                            color: white;
-                        }}
-                        
-                        .btn-primary:hover {{
-                            transform: translateY(-2px);
-                            box-shadow: 0 4px 15px rgba(102, 126, 234, 0.4);
-                        }}
-                        
-                        .btn-secondary {{
-                            background: #f8f9fa;
-                            color: #667eea;
-                            border: 2px solid #667eea;
-                        }}
-                        
-                        .btn-secondary:hover {{
-                            background: #667eea;
-                            color: white;
-                        }}
-                        
-                        .nav-buttons {{
-                            display: flex;
-                            justify-content: center;
-                            gap: 1rem;
-                            margin-top: 2rem;
-                        }}
-                        
-                        .nav-btn {{
-                            background: rgba(255, 255, 255, 0.9);
-                            color: #667eea;
-                            padding: 1rem 2rem;
-                            border-radius: 8px;
-                            text-decoration: none;
-                            font-weight: 600;
-                            transition: all 0.3s;
-                            border: 2px solid transparent;
-                        }}
-                        
-                        .nav-btn:hover {{
-                            background: #667eea;
-                            color: white;
-                            transform: translateY(-2px);
-                        }}
-                        
-                        .loading {{
-                            text-align: center;
-                            padding: 2rem;
-                            color: #666;
-                        }}
-                        
-                        .no-suggestions {{
-                            text-align: center;
-                            padding: 3rem;
-                            color: #666;
-                        }}
-                        
-                        .no-suggestions i {{
-                            font-size: 4rem;
-                            color: #ddd;
-                            margin-bottom: 1rem;
-                        }}
-                    </style>
-                </head>
-                <body>
-                    <div class="header">
-                        <h1><i class="fas fa-user-plus"></i> Find Connections</h1>
-                        <p>Discover and connect with professionals in your network</p>
-                    </div>
-                    
-                    <div class="container">
-                        <div class="search-section">
-                            <h2><i class="fas fa-search"></i> Search Filters</h2>
-                            <div class="search-filters">
-                                <div class="filter-group">
-                                    <label for="location">Location</label>
-                                    <input type="text" id="location" placeholder="Enter location">
-                                </div>
-                                <div class="filter-group">
-                                    <label for="industry">Industry</label>
-                                    <input type="text" id="industry" placeholder="Enter industry">
-                                </div>
-                                <div class="filter-group">
-                                    <label for="company">Company</label>
-                                    <input type="text" id="company" placeholder="Enter company">
-                                </div>
-                                <div class="filter-group">
-                                    <label for="title">Job Title</label>
-                                    <input type="text" id="title" placeholder="Enter job title">
-                                </div>
-                                <button class="search-btn" onclick="searchConnections()">
-                                    <i class="fas fa-search"></i> Search Connections
-                                </button>
-                            </div>
-                        </div>
-                        
-                        <div class="suggestions-section">
-                            <div class="suggestions-header">
-                                <h2><i class="fas fa-users"></i> Connection Suggestions</h2>
-                                <div>
-                                    <span id="suggestions-count">0</span> suggestions found
-                                </div>
-                            </div>
-                            
-                            <div id="suggestions-container">
-                                <div class="loading">
-                                    <i class="fas fa-spinner fa-spin"></i>
-                                    <p>Loading suggestions...</p>
-                                </div>
-                            </div>
-                        </div>
-                        
-                        <div class="nav-buttons">
-                            <a href="/connections/search" class="nav-btn">
-                                <i class="fas fa-search"></i> Enhanced Search
-                            </a>
-                            <a href="/connections/" class="nav-btn">
-                                <i class="fas fa-arrow-left"></i> Back to My Network
-                            </a>
-                            <a href="/home" class="nav-btn">
-                                <i class="fas fa-home"></i> Home
-                            </a>
-                        </div>
-                    </div>
-                    
-                    <script>
-                        // Load suggestions when page loads
-                        document.addEventListener('DOMContentLoaded', function() {{
-                            loadSuggestions();
-                        }});
-                        
-                        function loadSuggestions() {{
-                            const container = document.getElementById('suggestions-container');
-                            container.innerHTML = '<div class="loading"><i class="fas fa-spinner fa-spin"></i><p>Loading suggestions...</p></div>';
-                            
-                            fetch('/connections/api/suggestions')
-                                .then(response => response.json())
-                                .then(data => {{
-                                    displaySuggestions(data.suggestions);
-                                    document.getElementById('suggestions-count').textContent = data.suggestions.length;
-                                }})
-                                .catch(error => {{
-                                    console.error('Error loading suggestions:', error);
-                                    container.innerHTML = '<div class="no-suggestions"><i class="fas fa-exclamation-triangle"></i><p>Error loading suggestions. Please try again.</p></div>';
-                                }});
-                        }}
-                        
-                        function displaySuggestions(suggestions) {{
-                            const container = document.getElementById('suggestions-container');
-                            
-                            if (!suggestions || suggestions.length === 0) {{
-                                container.innerHTML = '<div class="no-suggestions"><i class="fas fa-user-plus"></i><p>No suggestions found. Try adjusting your search filters.</p></div>';
-                                return;
-                            }}
-                            
-                            const suggestionsHTML = suggestions.map(suggestion => `
-                                <div class="suggestion-card">
-                                    <div class="user-header">
-                                        <img src="${{suggestion.profile_image || '/static/uploads/default-avatar.svg'}}" alt="Profile" class="user-avatar">
-                                        <div class="user-info">
-                                            <h3>${{suggestion.full_name}}</h3>
-                                            <div class="title">${{suggestion.title}}</div>
-                                            <div class="company">${{suggestion.company}}</div>
-                                        </div>
-                                    </div>
-                                    
-                                    <div class="connection-reason">${{suggestion.reason}}</div>
-                                    
-                                    <div class="user-details">
-                                        <div class="detail-item">
-                                            <i class="fas fa-map-marker-alt"></i>
-                                            <span>${{suggestion.location}}</span>
-                                        </div>
-                                        <div class="detail-item">
-                                            <i class="fas fa-industry"></i>
-                                            <span>${{suggestion.industry}}</span>
-                                        </div>
-                                        <div class="detail-item">
-                                            <i class="fas fa-users"></i>
-                                            <span>${{suggestion.mutual_count}} mutual connections</span>
-                                        </div>
-                                    </div>
-                                    
-                                    <div class="profile-completeness">
-                                        <div class="completeness-bar">
-                                            <div class="completeness-fill" style="width: ${{suggestion.profile_completeness || 0}}%"></div>
-                                        </div>
-                                        <div class="completeness-text">Profile ${{suggestion.profile_completeness || 0}}% complete</div>
-                                    </div>
-                                    
-                                    <div class="action-buttons">
-                                        <button class="btn btn-primary" onclick="sendConnectionRequest(${{suggestion.id}})">
-                                            <i class="fas fa-user-plus"></i> Connect
-                                        </button>
-                                        <button class="btn btn-secondary" onclick="viewProfile(${{suggestion.id}})">
-                                            <i class="fas fa-eye"></i> View Profile
-                                        </button>
-                                    </div>
-                                </div>
-                            `).join('');
-                            
-                            container.innerHTML = suggestionsHTML;
-                        }}
-                        
-                        function searchConnections() {{
-                            const location = document.getElementById('location').value;
-                            const industry = document.getElementById('industry').value;
-                            const company = document.getElementById('company').value;
-                            const title = document.getElementById('title').value;
-                            
-                            // For now, just reload suggestions
-                            // In the future, this could filter the API call
-                            loadSuggestions();
-                        }}
-                        
-                        function sendConnectionRequest(userId) {{
-                            // TODO: Implement connection request functionality
-                            alert('Connection request functionality coming soon!');
-                        }}
-                        
-                        function viewProfile(userId) {{
-                            // TODO: Implement profile view functionality
-                            alert('Profile view functionality coming soon!');
-                        }}
-                    </script>
-                </body>
-            </html>
-            """
-        )
-        
-    except Exception as e:
-        logging.error(f"Error loading find connections page: {str(e)}")
+    user_id = get_authenticated_user_id(request, db)
+    if not db.get(User, user_id):
         return HTMLResponse(
-            content=f"""
+            status_code=404,
+            content="""
             <html>
                 <head><title>Find Connections</title></head>
                 <body>
-                    <h1>Find Connections</h1>
-                    <p>Error: {str(e)}</p>
+                    <h1>Error</h1>
+                    <p>User not found</p>
                     <a href="/connections/">Back to My Network</a>
                 </body>
             </html>
             """
         )
+    return find_connections_page_html.response(request)
 
-@router.get("/search", response_class=HTMLResponse)
-def enhanced_search_page(request: Request, db: Session = Depends(get_db)):
-    """Enhanced search page with LinkedIn-like interface"""
-    try:
-        return HTMLResponse(
-            content=f"""
-            <!DOCTYPE html>
-            <html lang="en">
-            <head>
-                <meta charset="UTF-8">
-                <meta name="viewport" content="width=device-width, initial-scale=1.0">
-                <title>Find People - Qrow IQ</title>
-                <link rel="stylesheet" href="https://cdnjs.cloudflare.com/ajax/libs/font-awesome/6.1.1/css/all.min.css">
-                <style>
-                    * {{
-                        margin: 0;
-                        padding: 0;
-                        box-sizing: border-box;
-                    }}
-                    
-                    body {{
-                        font-family: 'Inter', -apple-system, BlinkMacSystemFont, 'Segoe UI', Roboto, sans-serif;
-                        background-color: #f3f2ef;
-                        color: #191919;
-                        line-height: 1.6;
-                    }}
-                    
-                    .header {{
-                        background: linear-gradient(135deg, #0077b5 0%, #005885 100%);
-                        color: white;
-                        padding: 2rem 0;
-                        text-align: center;
-                        box-shadow: 0 2px 10px rgba(0,0,0,0.1);
-                    }}
-                    
-                    .header h1 {{
-                        font-size: 2.5rem;
-                        font-weight: 700;
-                        margin-bottom: 0.5rem;
-                    }}
-                    
-                    .header p {{
-                        font-size: 1.1rem;
-                        opacity: 0.9;
-                    }}
-                    
-                    .container {{
-                        max-width: 1200px;
-                        margin: 2rem auto;
-                        padding: 0 1rem;
-                    }}
-                    
-                    .search-section {{
-                        background: white;
-                        border-radius: 12px;
-                        padding: 2rem;
-                        margin-bottom: 2rem;
-                        box-shadow: 0 2px 20px rgba(0,0,0,0.08);
-                    }}
-                    
-                    .search-header {{
-                        margin-bottom: 1.5rem;
-                    }}
-                    
-                    .search-header h2 {{
-                        font-size: 1.5rem;
-                        color: #191919;
-                        margin-bottom: 0.5rem;
-                    }}
-                    
-                    .search-input-group {{
-                        position: relative;
-                        margin-bottom: 1.5rem;
-                    }}
-                    
-                    .search-input {{
-                        width: 100%;
-                        padding: 1rem 1rem 1rem 3rem;
-                        border: 2px solid #e0e0e0;
-                        border-radius: 8px;
-                        font-size: 1rem;
-                        transition: all 0.3s ease;
-                        background: #fafafa;
-                    }}
-                    
-                    .search-input:focus {{
-                        outline: none;
-                        border-color: #0077b5;
-                        background: white;
-                        box-shadow: 0 0 0 3px rgba(0,119,181,0.1);
-                    }}
-                    
-                    .search-icon {{
-                        position: absolute;
-                        left: 1rem;
-                        top: 50%;
-                        transform: translateY(-50%);
-                        color: #666;
-                        font-size: 1.2rem;
-                    }}
-                    
-                    .filters-row {{
-                        display: grid;
-                        grid-template-columns: repeat(auto-fit, minmax(200px, 1fr));
-                        gap: 1rem;
-                        margin-bottom: 1.5rem;
-                    }}
-                    
-                    .filter-group {{
-                        display: flex;
-                        flex-direction: column;
-                    }}
-                    
-                    .filter-group label {{
-                        font-weight: 600;
-                        margin-bottom: 0.5rem;
-                        color: #191919;
-                        font-size: 0.9rem;
-                    }}
-                    
-                    .filter-group input, .filter-group select {{
-                        padding: 0.75rem;
-                        border: 1px solid #e0e0e0;
-                        border-radius: 6px;
-                        font-size: 0.9rem;
-                        transition: border-color 0.3s ease;
-                    }}
-                    
-                    .filter-group input:focus, .filter-group select:focus {{
-                        outline: none;
-                        border-color: #0077b5;
-                    }}
-                    
-                    .search-actions {{
-                        display: flex;
-                        gap: 1rem;
-                        align-items: center;
-                        flex-wrap: wrap;
-                    }}
-                    
-                    .search-btn {{
-                        background: #0077b5;
-                        color: white;
-                        border: none;
-                        padding: 1rem 2rem;
-                        border-radius: 8px;
-                        font-size: 1rem;
-                        font-weight: 600;
-                        cursor: pointer;
-                        transition: all 0.3s ease;
-                        display: flex;
-                        align-items: center;
-                        gap: 0.5rem;
-                    }}
-                    
-                    .search-btn:hover {{
-                        background: #005885;
-                        transform: translateY(-1px);
-                        box-shadow: 0 4px 12px rgba(0,119,181,0.3);
-                    }}
-                    
-                    .clear-btn {{
-                        background: #f0f0f0;
-                        color: #666;
-                        border: none;
-                        padding: 1rem 2rem;
-                        border-radius: 8px;
-                        font-size: 1rem;
-                        cursor: pointer;
-                        transition: all 0.3s ease;
-                    }}
-                    
-                    .clear-btn:hover {{
-                        background: #e0e0e0;
-                        color: #333;
-                    }}
-                    
-                    .results-section {{
-                        background: white;
-                        border-radius: 12px;
-                        padding: 2rem;
-                        box-shadow: 0 2px 20px rgba(0,0,0,0.08);
-                    }}
-                    
-                    .results-header {{
-                        display: flex;
-                        justify-content: space-between;
-                        align-items: center;
-                        margin-bottom: 1.5rem;
-                        padding-bottom: 1rem;
-                        border-bottom: 1px solid #e0e0e0;
-                    }}
-                    
-                    .results-count {{
-                        color: #666;
-                        font-size: 0.9rem;
-                    }}
-                    
-                    .sort-controls {{
-                        display: flex;
-                        gap: 1rem;
-                        align-items: center;
-                    }}
-                    
-                    .sort-controls select {{
-                        padding: 0.5rem;
-                        border: 1px solid #e0e0e0;
-                        border-radius: 4px;
-                        font-size: 0.9rem;
-                    }}
-                    
-                    .user-card {{
-                        border: 1px solid #e0e0e0;
-                        border-radius: 8px;
-                        padding: 1.5rem;
-                        margin-bottom: 1rem;
-                        transition: all 0.3s ease;
-                        background: #fafafa;
-                    }}
-                    
-                    .user-card:hover {{
-                        border-color: #0077b5;
-                        box-shadow: 0 4px 12px rgba(0,0,0,0.1);
-                        transform: translateY(-2px);
-                    }}
-                    
-                    .user-header {{
-                        display: flex;
-                        align-items: center;
-                        margin-bottom: 1rem;
-                    }}
-                    
-                    .user-avatar {{
-                        width: 60px;
-                        height: 60px;
-                        border-radius: 50%;
-                        object-fit: cover;
-                        margin-right: 1rem;
-                        border: 3px solid #0077b5;
-                    }}
-                    
-                    .user-info h3 {{
-                        font-size: 1.2rem;
-                        color: #191919;
-                        margin-bottom: 0.25rem;
-                    }}
-                    
-                    .user-title {{
-                        color: #666;
-                        font-weight: 500;
-                        margin-bottom: 0.25rem;
-                    }}
-                    
-                    .user-company {{
-                        color: #0077b5;
-                        font-weight: 600;
-                    }}
-                    
-                    .user-details {{
-                        display: grid;
-                        grid-template-columns: repeat(auto-fit, minmax(150px, 1fr));
-                        gap: 1rem;
-                        margin-bottom: 1rem;
-                    }}
-                    
-                    .detail-item {{
-                        display: flex;
-                        align-items: center;
-                        gap: 0.5rem;
-                        color: #666;
-                        font-size: 0.9rem;
-                    }}
-                    
-                    .detail-item i {{
-                        color: #0077b5;
-                        width: 16px;
-                    }}
-                    
-                    .profile-completeness {{
-                        margin-bottom: 1rem;
-                    }}
-                    
-                    .completeness-bar {{
-                        width: 100%;
-                        height: 8px;
-                        background: #e0e0e0;
-                        border-radius: 4px;
-                        overflow: hidden;
-                        margin-bottom: 0.5rem;
-                    }}
-                    
-                    .completeness-fill {{
-                        height: 100%;
-                        background: linear-gradient(90deg, #0077b5, #00a0dc);
-                        transition: width 0.3s ease;
-                    }}
-                    
-                    .completeness-text {{
-                        font-size: 0.8rem;
-                        color: #666;
-                    }}
-                    
-                    .action-buttons {{
-                        display: flex;
-                        gap: 1rem;
-                        flex-wrap: wrap;
-                    }}
-                    
-                    .btn {{
-                        padding: 0.75rem 1.5rem;
-                        border: none;
-                        border-radius: 6px;
-                        font-size: 0.9rem;
-                        font-weight: 600;
-                        cursor: pointer;
-                        transition: all 0.3s ease;
-                        display: flex;
-                        align-items: center;
-                        gap: 0.5rem;
-                    }}
-                    
-                    .btn-primary {{
-                        background: #0077b5;
-                        color: white;
-                    }}
-                    
-                    .btn-primary:hover {{
-                        background: #005885;
-                        transform: translateY(-1px);
-                    }}
-                    
-                    .btn-secondary {{
-                        background: transparent;
-                        color: #0077b5;
-                        border: 1px solid #0077b5;
-                    }}
-                    
-                    .btn-secondary:hover {{
-                        background: #0077b5;
-                        color: white;
-                    }}
-                    
-                    .btn-success {{
-                        background: #28a745;
-                        color: white;
-                    }}
-                    
-                    .btn-success:hover {{
-                        background: #218838;
-                    }}
-                    
-                    .btn-warning {{
-                        background: #ffc107;
-                        color: #212529;
-                    }}
-                    
-                    .btn-warning:hover {{
-                        background: #e0a800;
-                    }}
-                    
-                    .loading {{
-                        text-align: center;
-                        padding: 3rem;
-                        color: #666;
-                    }}
-                    
-                    .loading i {{
-                        font-size: 2rem;
-                        color: #0077b5;
-                        margin-bottom: 1rem;
-                    }}
-                    
-                    .no-results {{
-                        text-align: center;
-                        padding: 3rem;
-                        color: #666;
-                    }}
-                    
-                    .no-results i {{
-                        font-size: 3rem;
-                        color: #ccc;
-                        margin-bottom: 1rem;
-                    }}
-                    
-                    .pagination {{
-                        display: flex;
-                        justify-content: center;
-                        gap: 0.5rem;
-                        margin-top: 2rem;
-                    }}
-                    
-                    .page-btn {{
-                        padding: 0.5rem 1rem;
-                        border: 1px solid #e0e0e0;
-                        background: white;
-                        color: #666;
-                        border-radius: 4px;
-                        cursor: pointer;
-                        transition: all 0.3s ease;
-                    }}
-                    
-                    .page-btn:hover {{
-                        background: #f0f0f0;
-                        border-color: #0077b5;
-                        color: #0077b5;
-                    }}
-                    
-                    .page-btn.active {{
-                        background: #0077b5;
-                        color: white;
-                        border-color: #0077b5;
-                    }}
-                    
-                    .page-btn:disabled {{
-                        opacity: 0.5;
-                        cursor: not-allowed;
-                    }}
-                    
-                    .suggestions {{
-                        background: #f8f9fa;
-                        border-radius: 8px;
-                        padding: 1rem;
-                        margin-top: 1rem;
-                    }}
-                    
-                    .suggestions h4 {{
-                        color: #191919;
-                        margin-bottom: 0.5rem;
-                        font-size: 0.9rem;
-                    }}
-                    
-                    .suggestion-tags {{
-                        display: flex;
-                        flex-wrap: wrap;
-                        gap: 0.5rem;
-                    }}
-                    
-                    .suggestion-tag {{
-                        background: white;
-                        border: 1px solid #e0e0e0;
-                        padding: 0.25rem 0.75rem;
-                        border-radius: 20px;
-                        font-size: 0.8rem;
-                        color: #666;
-                        cursor: pointer;
-                        transition: all 0.3s ease;
-                    }}
-                    
-                    .suggestion-tag:hover {{
-                        background: #0077b5;
-                        color: white;
-                        border-color: #0077b5;
-                    }}
-                    
-                    @media (max-width: 768px) {{
-                        .container {{
-                            padding: 1rem;
-                        }}
-                        
-                        .filters-row {{
-                            grid-template-columns: 1fr;
-                        }}
-                        
-                        .search-actions {{
-                            flex-direction: column;
-                        }}
-                        
-                        .search-btn, .clear-btn {{
-                            width: 100%;
-                        }}
-                        
-                        .results-header {{
-                            flex-direction: column;
-                            gap: 1rem;
-                            align-items: flex-start;
-                        }}
-                        
-                        .action-buttons {{
-                            flex-direction: column;
-                        }}
-                        
-                        .btn {{
-                            width: 100%;
-                            justify-content: center;
-                        }}
-                    }}
-                </style>
-            </head>
-            <body>
-                <div class="header">
-                    <h1><i class="fas fa-search"></i> Find People</h1>
-                    <p>Discover and connect with professionals in your network</p>
-                </div>
-                
-                <div class="container">
-                    <div class="search-section">
-                        <div class="search-header">
-                            <h2><i class="fas fa-filter"></i> Search & Filters</h2>
-                            <p>Find people by name, company, skills, location, and more</p>
-                        </div>
-                        
-                        <div class="search-input-group">
-                            <i class="fas fa-search search-icon"></i>
-                            <input type="text" id="searchQuery" class="search-input" placeholder="Search for people, companies, skills, titles...">
-                        </div>
-                        
-                        <div class="filters-row">
-                            <div class="filter-group">
-                                <label for="searchType">Search Type</label>
-                                <select id="searchType">
-                                    <option value="all">All Fields</option>
-                                    <option value="name">Name</option>
-                                    <option value="company">Company</option>
-                                    <option value="title">Job Title</option>
-                                    <option value="skills">Skills</option>
-                                    <option value="location">Location</option>
-                                    <option value="industry">Industry</option>
-                                    <option value="education">Education</option>
-                                </select>
-                            </div>
-                            
-                            <div class="filter-group">
-                                <label for="location">Location</label>
-                                <input type="text" id="location" placeholder="e.g., San Francisco, CA">
-                            </div>
-                            
-                            <div class="filter-group">
-                                <label for="industry">Industry</label>
-                                <input type="text" id="industry" placeholder="e.g., Technology, Healthcare">
-                            </div>
-                            
-                            <div class="filter-group">
-                                <label for="company">Company</label>
-                                <input type="text" id="company" placeholder="e.g., Google, Microsoft">
-                            </div>
-                            
-                            <div class="filter-group">
-                                <label for="title">Job Title</label>
-                                <input type="text" id="title" placeholder="e.g., Software Engineer, Manager">
-                            </div>
-                            
-                            <div class="filter-group">
-                                <label for="experienceMin">Min Experience (years)</label>
-                                <input type="number" id="experienceMin" min="0" max="50" placeholder="0">
-                            </div>
-                            
-                            <div class="filter-group">
-                                <label for="experienceMax">Max Experience (years)</label>
-                                <input type="number" id="experienceMax" min="0" max="50" placeholder="20">
-                            </div>
-                            
-                            <div class="filter-group">
-                                <label for="userType">User Type</label>
-                                <select id="userType">
-                                    <option value="">All Types</option>
-                                    <option value="normal">Normal</option>
-                                    <option value="domain">Domain</option>
-                                    <option value="premium">Premium</option>
-                                </select>
-                            </div>
-                        </div>
-                        
-                        <div class="search-actions">
-                            <button class="search-btn" onclick="performSearch()">
-                                <i class="fas fa-search"></i> Search
-                            </button>
-                            <button class="clear-btn" onclick="clearFilters()">
-                                <i class="fas fa-times"></i> Clear Filters
-                            </button>
-                        </div>
-                        
-                        <div class="suggestions">
-                            <h4><i class="fas fa-lightbulb"></i> Popular Searches</h4>
-                            <div class="suggestion-tags" id="popularSearches">
-                                <!-- Popular searches will be loaded here -->
-                            </div>
-                        </div>
-                    </div>
-                    
-                    <div class="results-section">
-                        <div class="results-header">
-                            <div>
-                                <h2><i class="fas fa-users"></i> Search Results</h2>
-                                <div class="results-count" id="resultsCount">Start your search to find people</div>
-                            </div>
-                            
-                            <div class="sort-controls">
-                                <label for="sortBy">Sort by:</label>
-                                <select id="sortBy">
-                                    <option value="relevance">Relevance</option>
-                                    <option value="name">Name</option>
-                                    <option value="company">Company</option>
-                                    <option value="location">Location</option>
-                                    <option value="experience">Experience</option>
-                                    <option value="mutual_connections">Mutual Connections</option>
-                                </select>
-                                
-                                <label for="sortOrder">Order:</label>
-                                <select id="sortOrder">
-                                    <option value="asc">A-Z</option>
-                                    <option value="desc">Z-A</option>
-                                </select>
-                            </div>
-                        </div>
-                        
-                        <div id="searchResults">
-                            <div class="no-results">
-                                <i class="fas fa-search"></i>
-                                <p>Enter your search criteria above to find people</p>
-                            </div>
-                        </div>
-                        
-                        <div class="pagination" id="pagination" style="display: none;">
-                            <!-- Pagination will be generated here -->
-                        </div>
-                    </div>
-                </div>
-                
-                <script>
-                    let currentPage = 1;
-                    let currentResults = [];
-                    let totalPages = 0;
-                    
-                    // Load popular searches on page load
-                    document.addEventListener('DOMContentLoaded', function() {{
-                        loadPopularSearches();
-                        
-                        // Add enter key support for search
-                        document.getElementById('searchQuery').addEventListener('keypress', function(e) {{
-                            if (e.key === 'Enter') {{
-                                performSearch();
-                            }}
-                        }});
-                        
-                        // Add real-time search suggestions
-                        document.getElementById('searchQuery').addEventListener('input', function(e) {{
-                            if (e.target.value.length >= 2) {{
-                                getSearchSuggestions(e.target.value);
-                            }}
-                        }});
-                    }});
-                    
-                    async function loadPopularSearches() {{
-                        try {{
-                            const response = await fetch('/connections/api/search/popular');
-                            const data = await response.json();
-                            
-                            const container = document.getElementById('popularSearches');
-                            container.innerHTML = data.popular_searches.map(term => 
-                                `<span class="suggestion-tag" onclick="useSearchTerm('${{term}}')">${{term}}</span>`
-                            ).join('');
-                        }} catch (error) {{
-                            console.error('Error loading popular searches:', error);
-                        }}
-                    }}
-                    
-                    function useSearchTerm(term) {{
-                        document.getElementById('searchQuery').value = term;
-                        performSearch();
-                    }}
-                    
-                    async function getSearchSuggestions(query) {{
-                        try {{
-                            const response = await fetch(`/connections/api/search/suggestions?query=${{encodeURIComponent(query)}}`);
-                            const data = await response.json();
-                            
-                            if (data.suggestions.length > 0) {{
-                                // You could show these suggestions in a dropdown
-                                console.log('Search suggestions:', data.suggestions);
-                            }}
-                        }} catch (error) {{
-                            console.error('Error getting suggestions:', error);
-                        }}
-                    }}
-                    
-                    async function performSearch() {{
-                        const query = document.getElementById('searchQuery').value;
-                        const searchType = document.getElementById('searchType').value;
-                        const location = document.getElementById('location').value;
-                        const industry = document.getElementById('industry').value;
-                        const company = document.getElementById('company').value;
-                        const title = document.getElementById('title').value;
-                        const experienceMin = document.getElementById('experienceMin').value;
-                        const experienceMax = document.getElementById('experienceMax').value;
-                        const userType = document.getElementById('userType').value;
-                        const sortBy = document.getElementById('sortBy').value;
-                        const sortOrder = document.getElementById('sortOrder').value;
-                        
-                        // Build query parameters
-                        const params = new URLSearchParams();
-                        if (query) params.append('query', query);
-                        if (searchType) params.append('search_type', searchType);
-                        if (location) params.append('location', location);
-                        if (industry) params.append('industry', industry);
-                        if (company) params.append('company', company);
-                        if (title) params.append('title', title);
-                        if (experienceMin) params.append('experience_min', experienceMin);
-                        if (experienceMax) params.append('experience_max', experienceMax);
-                        if (userType) params.append('user_type', userType);
-                        if (sortBy) params.append('sort_by', sortBy);
-                        if (sortOrder) params.append('sort_order', sortOrder);
-                        params.append('page', currentPage);
-                        params.append('limit', 20);
-                        
-                        // Show loading
-                        showLoading();
-                        
-                        try {{
-                            const response = await fetch(`/connections/api/search?${{params.toString()}}`);
-                            const data = await response.json();
-                            
-                            if (data.results) {{
-                                currentResults = data.results;
-                                totalPages = data.pagination.pages;
-                                displayResults(data.results, data.pagination);
-                            }} else {{
-                                showNoResults();
-                            }}
-                        }} catch (error) {{
-                            console.error('Search error:', error);
-                            showError('An error occurred while searching. Please try again.');
-                        }}
-                    }}
-                    
-                    function showLoading() {{
-                        const container = document.getElementById('searchResults');
-                        container.innerHTML = `
-                            <div class="loading">
-                                <i class="fas fa-spinner fa-spin"></i>
-                                <p>Searching...</p>
-                            </div>
-                        `;
-                    }}
-                    
-                    function displayResults(results, pagination) {{
-                        const container = document.getElementById('searchResults');
-                        const countContainer = document.getElementById('resultsCount');
-                        
-                        if (!results || results.length === 0) {{
-                            showNoResults();
-                            return;
-                        }}
-                        
-                        countContainer.textContent = `${{pagination.total}} results found`;
-                        
-                        const resultsHTML = results.map(user => `
-                            <div class="user-card">
-                                <div class="user-header">
-                                    <img src="${{user.profile_image || '/static/uploads/default-avatar.svg'}}" alt="Profile" class="user-avatar">
-                                    <div class="user-info">
-                                        <h3>${{user.full_name}}</h3>
-                                        <div class="user-title">${{user.title || 'No title specified'}}</div>
-                                        <div class="user-company">${{user.company || 'No company specified'}}</div>
-                                    </div>
-                                </div>
-                                
-                                <div class="user-details">
-                                    <div class="detail-item">
-                                        <i class="fas fa-map-marker-alt"></i>
-                                        <span>${{user.location || 'Location not specified'}}</span>
-                                    </div>
-                                    <div class="detail-item">
-                                        <i class="fas fa-industry"></i>
-                                        <span>${{user.industry || 'Industry not specified'}}</span>
-                                    </div>
-                                    <div class="detail-item">
-                                        <i class="fas fa-briefcase"></i>
-                                        <span>${{user.experience_years || 0}} years experience</span>
-                                    </div>
-                                    <div class="detail-item">
-                                        <i class="fas fa-users"></i>
-                                        <span>${{user.mutual_connections || 0}} mutual connections</span>
-                                    </div>
-                                </div>
-                                
-                                ${{user.bio ? `<div class="user-bio" style="margin-bottom: 1rem; color: #666; font-style: italic;">"${{user.bio}}"</div>` : ''}}
-                                
-                                <div class="profile-completeness">
-                                    <div class="completeness-bar">
-                                        <div class="completeness-fill" style="width: ${{user.profile_completeness || 0}}%"></div>
-                                    </div>
-                                    <div class="completeness-text">Profile ${{user.profile_completeness || 0}}% complete</div>
-                                </div>
-                                
-                                <div class="action-buttons">
-                                    ${{getConnectionButton(user)}}
-                                    <button class="btn btn-secondary" onclick="viewProfile(${{user.id}})">
-                                        <i class="fas fa-eye"></i> View Profile
-                                    </button>
-                                </div>
-                            </div>
-                        `).join('');
-                        
-                        container.innerHTML = resultsHTML;
-                        
-                        // Show pagination if needed
-                        if (totalPages > 1) {{
-                            showPagination();
-                        }} else {{
-                            document.getElementById('pagination').style.display = 'none';
-                        }}
-                    }}
-                    
-                    function getConnectionButton(user) {{
-                        const status = user.connection_status;
-                        
-                        if (status === 'connected') {{
-                            return `<button class="btn btn-success" disabled><i class="fas fa-check"></i> Connected</button>`;
-                        }} else if (status === 'pending_sent') {{
-                            return `<button class="btn btn-warning" disabled><i class="fas fa-clock"></i> Request Sent</button>`;
-                        }} else if (status === 'pending_received') {{
-                            return `<button class="btn btn-primary" onclick="acceptConnection(${{user.id}})">
-                                <i class="fas fa-user-plus"></i> Accept Request
-                            </button>`;
-                        }} else {{
-                            return `<button class="btn btn-primary" onclick="sendConnectionRequest(${{user.id}})">
-                                <i class="fas fa-user-plus"></i> Connect
-                            </button>`;
-                        }}
-                    }}
-                    
-                    function showNoResults() {{
-                        const container = document.getElementById('searchResults');
-                        const countContainer = document.getElementById('resultsCount');
-                        
-                        countContainer.textContent = 'No results found';
-                        container.innerHTML = `
-                            <div class="no-results">
-                                <i class="fas fa-search"></i>
-                                <p>No people found matching your search criteria.</p>
-                                <p>Try adjusting your filters or search terms.</p>
-                            </div>
-                        `;
-                        
-                        document.getElementById('pagination').style.display = 'none';
-                    }}
-                    
-                    function showError(message) {{
-                        const container = document.getElementById('searchResults');
-                        container.innerHTML = `
-                            <div class="no-results">
-                                <i class="fas fa-exclamation-triangle"></i>
-                                <p>${{message}}</p>
-                            </div>
-                        `;
-                    }}
-                    
-                    function showPagination() {{
-                        const pagination = document.getElementById('pagination');
-                        pagination.style.display = 'flex';
-                        
-                        let paginationHTML = '';
-                        
-                        // Previous button
-                        paginationHTML += `<button class="page-btn" onclick="changePage(${{currentPage - 1}})" ${{currentPage <= 1 ? 'disabled' : ''}}>
-                            <i class="fas fa-chevron-left"></i> Previous
-                        </button>`;
-                        
-                        // Page numbers
-                        for (let i = 1; i <= totalPages; i++) {{
-                            if (i === 1 || i === totalPages || (i >= currentPage - 2 && i <= currentPage + 2)) {{
-                                paginationHTML += `<button class="page-btn ${{i === currentPage ? 'active' : ''}}" onclick="changePage(${{i}})">${{i}}</button>`;
-                            }} else if (i === currentPage - 3 || i === currentPage + 3) {{
-                                paginationHTML += `<span class="page-btn" style="cursor: default;">...</span>`;
-                            }}
-                        }}
-                        
-                        // Next button
-                        paginationHTML += `<button class="page-btn" onclick="changePage(${{currentPage + 1}})" ${{currentPage >= totalPages ? 'disabled' : ''}}>
-                            Next <i class="fas fa-chevron-right"></i>
-                        </button>`;
-                        
-                        pagination.innerHTML = paginationHTML;
-                    }}
-                    
-                    function changePage(page) {{
-                        if (page < 1 || page > totalPages) return;
-                        
-                        currentPage = page;
-                        performSearch();
-                        
-                        // Scroll to top of results
-                        document.getElementById('searchResults').scrollIntoView({{ behavior: 'smooth' }});
-                    }}
-                    
-                    function clearFilters() {{
-                        document.getElementById('searchQuery').value = '';
-                        document.getElementById('searchType').value = 'all';
-                        document.getElementById('location').value = '';
-                        document.getElementById('industry').value = '';
-                        document.getElementById('company').value = '';
-                        document.getElementById('title').value = '';
-                        document.getElementById('experienceMin').value = '';
-                        document.getElementById('experienceMax').value = '';
-                        document.getElementById('userType').value = '';
-                        document.getElementById('sortBy').value = 'relevance';
-                        document.getElementById('sortOrder').value = 'asc';
-                        
-                        // Reset results
-                        currentPage = 1;
-                        document.getElementById('searchResults').innerHTML = `
-                            <div class="no-results">
-                                <i class="fas fa-search"></i>
-                                <p>Enter your search criteria above to find people</p>
-                            </div>
-                        `;
-                        document.getElementById('resultsCount').textContent = 'Start your search to find people';
-                        document.getElementById('pagination').style.display = 'none';
-                    }}
-                    
-                    async function sendConnectionRequest(userId) {{
-                        try {{
-                            const response = await fetch('/connections/api/send-request', {{
-                                method: 'POST',
-                                headers: {{
-                                    'Content-Type': 'application/x-www-form-urlencoded',
-                                }},
-                                body: new URLSearchParams({{
-                                    receiver_id: userId,
-                                    message: 'I would like to connect with you on Qrow IQ!'
-                                }})
-                            }});
-                            
-                            if (response.ok) {{
-                                alert('Connection request sent successfully!');
-                                performSearch(); // Refresh results
-                            }} else {{
-                                alert('Failed to send connection request. Please try again.');
-                            }}
-                        }} catch (error) {{
-                            console.error('Error sending connection request:', error);
-                            alert('An error occurred. Please try again.');
-                        }}
-                    }}
-                    
-                    async function acceptConnection(userId) {{
-                        try {{
-                            const response = await fetch(`/connections/api/respond-request`, {{
-                                method: 'POST',
-                                headers: {{
-                                    'Content-Type': 'application/x-www-form-urlencoded',
-                                }},
-                                body: new URLSearchParams({{
-                                    request_id: userId,
-                                    response: 'accept'
-                                }})
-                            }});
-                            
-                            if (response.ok) {{
-                                alert('Connection accepted!');
-                                performSearch(); // Refresh results
-                            }} else {{
-                                alert('Failed to accept connection. Please try again.');
-                            }}
-                        }} catch (error) {{
-                            console.error('Error accepting connection:', error);
-                            alert('An error occurred. Please try again.');
-                        }}
-                    }}
-                    
-                    function viewProfile(userId) {{
-                        // TODO: Implement profile view functionality
-                        alert('Profile view functionality coming soon!');
-                    }}
-                </script>
-            </body>
-            </html>
-            """
-        )
-        
-    except Exception as e:
-        logging.error(f"Error loading enhanced search page: {str(e)}")
-        return HTMLResponse(
-            content=f"""
-            <html>
-                <head><title>Find People</title></head>
-                <body>
-                    <h1>Find People</h1>
-                    <p>Error: {str(e)}</p>
-                    <a href="/connections/">Back to My Network</a>
-                </body>
-            </html>
-            """
-        )
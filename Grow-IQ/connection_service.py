@@ -0,0 +1,465 @@
+"""
+Connection service for Qrow IQ
+Pair lookups over the canonical (low_user_id, high_user_id) edge columns,
+set-based lookups over connections and friend requests for a viewer and a
+whole page of other users at once, and the per-user connection counters and
+cached stats rollup shown on the network page
+"""
+
+import time
+import logging
+import threading
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterable, Optional, Set, Tuple
+
+from sqlalchemy import and_, case, event, func, inspect, or_, select, text, union_all, update
+from sqlalchemy.orm import Session
+
+from config import settings
+from models import Connection, FriendRequest, User
+
+logger = logging.getLogger(__name__)
+
+CONNECTED = "connected"
+REQUEST_SENT = "request_sent"
+REQUEST_RECEIVED = "request_received"
+NOT_CONNECTED = "not_connected"
+
+
+# ==================== PAIRS ====================
+# Connection and FriendRequest rows carry their two users as
+# (low_user_id, high_user_id), so "the row between a and b" is one seek on a
+# unique index whichever of the two is asking, instead of an OR over both
+# column orders.
+
+def edge_key(a: int, b: int) -> Tuple[int, int]:
+    """(smaller id, larger id) of a pair of users"""
+    return (a, b) if a < b else (b, a)
+
+
+def same_pair(model, a: int, b: int):
+    """Filter on model rows between users a and b, in either direction"""
+    low, high = edge_key(a, b)
+    return and_(model.low_user_id == low, model.high_user_id == high)
+
+
+def involving(user_id: int):
+    """Filter on connection rows with user_id at either end"""
+    return or_(Connection.low_user_id == user_id, Connection.high_user_id == user_id)
+
+
+def other_end(user_id: int):
+    """The user at the other end of a connection row involving user_id, as a SQL expression"""
+    return case((Connection.low_user_id == user_id, Connection.high_user_id), else_=Connection.low_user_id)
+
+
+def find_connection(db: Session, a: int, b: int, status: Optional[str] = None) -> Optional[Connection]:
+    """The connection row between a and b (there is at most one), optionally only with this status"""
+    query = db.query(Connection).filter(same_pair(Connection, a, b))
+    if status is not None:
+        query = query.filter(Connection.status == status)
+    return query.first()
+
+
+def find_pending_request(db: Session, a: int, b: int) -> Optional[FriendRequest]:
+    """The pending friend request between a and b, sent by either of them"""
+    return db.query(FriendRequest).filter(same_pair(FriendRequest, a, b), FriendRequest.status == 'pending').first()
+
+
+def connect_users(db: Session, requester_id: int, accepter_id: int, connection_type: str = 'professional') -> Connection:
+    """Mark the pair as connected, reusing an earlier pending, declined or removed row.
+
+    The caller links timelines, records the graph change and commits.
+    """
+    connection = find_connection(db, requester_id, accepter_id)
+    now = datetime.utcnow()
+    if connection is None:
+        connection = Connection(user_id=requester_id, connected_user_id=accepter_id, connection_type=connection_type)
+        db.add(connection)
+    elif connection.status == 'accepted':
+        return connection
+    connection.status = 'accepted'
+    connection.accepted_at = now
+    connection.updated_at = now
+    return connection
+
+
+def resolve_connection_statuses(db: Session, viewer_id: int, target_ids: Iterable[int]) -> Dict[int, str]:
+    """Connection status of the viewer towards each target, from two queries.
+
+    Status is "connected", "request_sent", "request_received" or
+    "not_connected", checked in that order. It is "unknown" for every
+    target if the lookup fails.
+    """
+    targets = {target_id for target_id in target_ids if target_id != viewer_id}
+    statuses = {target_id: NOT_CONNECTED for target_id in targets}
+    if not targets:
+        return statuses
+    # Each target is the high end of the pair when above the viewer and the
+    # low end when below, so both halves of the OR are index seeks
+    above = [target_id for target_id in targets if target_id > viewer_id]
+    below = [target_id for target_id in targets if target_id < viewer_id]
+    try:
+        connected = db.execute(
+            select(Connection.low_user_id, Connection.high_user_id).where(
+                Connection.status == 'accepted',
+                or_(
+                    and_(Connection.low_user_id == viewer_id, Connection.high_user_id.in_(above)),
+                    and_(Connection.high_user_id == viewer_id, Connection.low_user_id.in_(below)),
+                ),
+            )
+        ).all()
+        requests = db.execute(
+            select(FriendRequest.sender_id, FriendRequest.receiver_id).where(
+                FriendRequest.status == 'pending',
+                or_(
+                    and_(FriendRequest.low_user_id == viewer_id, FriendRequest.high_user_id.in_(above)),
+                    and_(FriendRequest.high_user_id == viewer_id, FriendRequest.low_user_id.in_(below)),
+                ),
+            )
+        ).all()
+    except Exception as e:
+        logger.error(f"Error resolving connection statuses: {e}")
+        return {target_id: "unknown" for target_id in targets}
+
+    # Apply in reverse precedence so the stronger status wins
+    for sender_id, receiver_id in requests:
+        if receiver_id == viewer_id:
+            statuses[sender_id] = REQUEST_RECEIVED
+    for sender_id, receiver_id in requests:
+        if sender_id == viewer_id:
+            statuses[receiver_id] = REQUEST_SENT
+    for low, high in connected:
+        statuses[high if low == viewer_id else low] = CONNECTED
+    return statuses
+
+
+
+# ==================== EDGE SCHEMA ====================
+# Databases created before the pair columns existed get them added and
+# backfilled at startup. Legacy duplicates block the unique indexes; removing
+# them is left to migrate_edge_pairs.py, never done at boot.
+
+def _pair_of(table, first, second):
+    low = case((table.c[first] < table.c[second], table.c[first]), else_=table.c[second])
+    high = case((table.c[first] < table.c[second], table.c[second]), else_=table.c[first])
+    return low, high
+
+
+def _backfill_pair_columns(conn, table, first, second):
+    low, high = _pair_of(table, first, second)
+    conn.execute(
+        update(table)
+        .where(or_(table.c.low_user_id.is_(None), table.c.high_user_id.is_(None)))
+        .values(low_user_id=low, high_user_id=high)
+    )
+
+
+def _extra_rows(conn, table, first, second, *criteria) -> int:
+    pair = _pair_of(table, first, second)
+    per_pair = (
+        select((func.count() - 1).label("extra"))
+        .select_from(table)
+        .where(*criteria)
+        .group_by(*pair)
+        .having(func.count() > 1)
+        .subquery()
+    )
+    return conn.scalar(select(func.coalesce(func.sum(per_pair.c.extra), 0)))
+
+
+def count_duplicate_edges(conn) -> Tuple[int, int]:
+    """Rows dedupe_edges() would remove or cancel: (surplus connections, surplus pending requests).
+
+    Pairs are computed from the user columns, so this also works before the
+    pair columns exist.
+    """
+    connections, requests = Connection.__table__, FriendRequest.__table__
+    return (_extra_rows(conn, connections, "user_id", "connected_user_id"),
+            _extra_rows(conn, requests, "sender_id", "receiver_id", requests.c.status == 'pending'))
+
+
+def add_edge_pair_columns(conn) -> bool:
+    """Add the empty pair columns to SQLite tables lacking them; returns True if any were added"""
+    added = False
+    for table in ("connections", "friend_requests"):
+        columns = [row[1] for row in conn.execute(text(f"PRAGMA table_info({table})")).fetchall()]
+        if not columns or "low_user_id" in columns:
+            continue
+        conn.execute(text(f"ALTER TABLE {table} ADD COLUMN low_user_id INTEGER"))
+        conn.execute(text(f"ALTER TABLE {table} ADD COLUMN high_user_id INTEGER"))
+        added = True
+    return added
+
+
+def _create_edge_indexes(conn, unique: bool = True):
+    for table in (Connection.__table__, FriendRequest.__table__):
+        for index in table.indexes:
+            if unique or not index.unique:
+                index.create(conn, checkfirst=True)
+
+
+def dedupe_edges(conn) -> Tuple[int, int]:
+    """Collapse duplicate connection rows and pending requests to one per pair.
+
+    Of the connection rows for a pair the accepted one is kept (the newest if
+    several are), carrying the earliest accepted_at; the rest are deleted.
+    Of several pending requests for a pair the oldest stays pending and the
+    others are cancelled. Returns (connections deleted, requests cancelled).
+    """
+    connections, requests = Connection.__table__, FriendRequest.__table__
+    _backfill_pair_columns(conn, connections, "user_id", "connected_user_id")
+    _backfill_pair_columns(conn, requests, "sender_id", "receiver_id")
+
+    duplicated = (
+        select(connections.c.low_user_id, connections.c.high_user_id)
+        .group_by(connections.c.low_user_id, connections.c.high_user_id)
+        .having(func.count() > 1)
+        .subquery()
+    )
+    rows = conn.execute(
+        select(connections.c.id, connections.c.low_user_id, connections.c.high_user_id,
+               connections.c.status, connections.c.accepted_at)
+        .join(duplicated, and_(connections.c.low_user_id == duplicated.c.low_user_id,
+                               connections.c.high_user_id == duplicated.c.high_user_id))
+        .order_by(connections.c.id)
+    ).all()
+    groups: Dict[Tuple[int, int], list] = {}
+    for row in rows:
+        groups.setdefault((row.low_user_id, row.high_user_id), []).append(row)
+    doomed = []
+    for group in groups.values():
+        keeper = max(group, key=lambda row: (row.status == 'accepted', row.id))
+        accepted_at = [row.accepted_at for row in group if row.status == 'accepted' and row.accepted_at]
+        if accepted_at and keeper.status == 'accepted':
+            conn.execute(update(connections).where(connections.c.id == keeper.id).values(accepted_at=min(accepted_at)))
+        doomed.extend(row.id for row in group if row.id != keeper.id)
+    for start in range(0, len(doomed), 500):
+        conn.execute(connections.delete().where(connections.c.id.in_(doomed[start:start + 500])))
+
+    first_pending = (
+        select(func.min(requests.c.id))
+        .where(requests.c.status == 'pending')
+        .group_by(requests.c.low_user_id, requests.c.high_user_id)
+    )
+    cancelled = conn.execute(
+        update(requests)
+        .where(requests.c.status == 'pending', requests.c.id.not_in(first_pending))
+        .values(status='cancelled')
+    ).rowcount
+    return len(doomed), cancelled
+
+
+def upgrade_edge_storage(conn) -> Tuple[int, int]:
+    """Backfill and dedupe the pair columns, then build their indexes; returns dedupe_edges()"""
+    removed = dedupe_edges(conn)
+    _create_edge_indexes(conn)
+    # Deduplication bypasses the flush hook; recount if the counter columns exist yet
+    if any(removed) and "connections_count" in {column["name"] for column in inspect(conn).get_columns("users")}:
+        refresh_connection_counters(conn)
+    return removed
+
+
+def ensure_edge_schema() -> bool:
+    """Add, backfill and index the pair columns of an existing SQLite database, without removing any row.
+
+    Returns True if the columns had to be added. While legacy duplicate edges
+    remain, the unique pair indexes are left out and an error is logged at
+    every startup until migrate_edge_pairs.py has been run; other databases
+    should always run it.
+    """
+    from database_enhanced import db_manager
+    engine = db_manager.engine
+    if engine.dialect.name != "sqlite":
+        return False
+    with engine.begin() as conn:
+        indexes = [row[1] for row in conn.execute(text("PRAGMA index_list(connections)")).fetchall()]
+        added = add_edge_pair_columns(conn)
+        if not added and "uq_connection_pair" in indexes:
+            return False
+        _backfill_pair_columns(conn, Connection.__table__, "user_id", "connected_user_id")
+        _backfill_pair_columns(conn, FriendRequest.__table__, "sender_id", "receiver_id")
+        connections, requests = count_duplicate_edges(conn)
+        _create_edge_indexes(conn, unique=not (connections or requests))
+    if connections or requests:
+        logger.error(f"Found {connections} duplicate connections and {requests} duplicate pending requests; "
+                     f"the unique pair indexes are missing until migrate_edge_pairs.py is run")
+    elif added:
+        logger.info("Added and indexed connection pair columns")
+    return added
+
+# ==================== CONNECTION COUNTERS ====================
+# users.connections_count / pending_in_count / pending_out_count are recomputed
+# for both users of every connection or friend request changed in a flush, in
+# the same transaction, so every route that changes a connection keeps them
+# right without calling anything.
+
+# session.info key holding the users whose stats rollup is dropped on commit
+_STATS_KEY = "connection_stats_changed"
+
+
+def _connections_count():
+    return select(func.count(Connection.id)).where(
+        Connection.status == 'accepted',
+        or_(Connection.low_user_id == User.id, Connection.high_user_id == User.id),
+    ).scalar_subquery()
+
+
+def _pending_count(column):
+    return select(func.count(FriendRequest.id)).where(
+        column == User.id, FriendRequest.status == 'pending'
+    ).scalar_subquery()
+
+
+def refresh_connection_counters(connection, user_ids: Optional[Iterable[int]] = None) -> int:
+    """Recompute the connection counters of user_ids (default: every user) in one UPDATE.
+
+    Takes a Session or Connection; the caller commits. Returns the number of
+    users updated.
+    """
+    statement = update(User.__table__).values(
+        connections_count=_connections_count(),
+        pending_in_count=_pending_count(FriendRequest.receiver_id),
+        pending_out_count=_pending_count(FriendRequest.sender_id),
+        updated_at=User.__table__.c.updated_at,  # counters are not a profile edit
+    )
+    if user_ids is not None:
+        user_ids = set(user_ids)
+        if not user_ids:
+            return 0
+        statement = statement.where(User.__table__.c.id.in_(user_ids))
+    return connection.execute(statement).rowcount
+
+
+def read_connection_counters(db: Session, user_id: int) -> Tuple[int, int, int]:
+    """(connections, pending requests received, pending requests sent) as seen by this transaction"""
+    row = db.execute(
+        select(User.connections_count, User.pending_in_count, User.pending_out_count).where(User.id == user_id)
+    ).first()
+    return tuple(value or 0 for value in row) if row else (0, 0, 0)
+
+
+def _changed_users(session: Session) -> Set[int]:
+    users = set()
+    for obj in session.new | session.dirty | session.deleted:
+        if isinstance(obj, Connection):
+            ends = ("user_id", "connected_user_id")
+        elif isinstance(obj, FriendRequest):
+            ends = ("sender_id", "receiver_id")
+        else:
+            continue
+        state = inspect(obj)
+        if obj in session.dirty and not any(state.attrs[name].history.has_changes() for name in ("status",) + ends):
+            continue
+        for name in ends:
+            # Current value plus any old one, in case the row was moved to other users
+            users.add(getattr(obj, name))
+            users.update(state.attrs[name].history.deleted)
+    users.discard(None)
+    return users
+
+
+@event.listens_for(Session, "after_flush")
+def _refresh_changed_counters(session, flush_context):
+    users = _changed_users(session)
+    if not users:
+        return
+    refresh_connection_counters(session.connection(), users)
+    session.info.setdefault(_STATS_KEY, set()).update(users)
+
+
+def ensure_connection_counter_schema() -> bool:
+    """Add the users connection counter columns to an existing SQLite database and backfill them.
+
+    Returns True if the columns had to be added. Other databases should run
+    migrate_connection_counters.py.
+    """
+    from database_enhanced import db_manager
+    engine = db_manager.engine
+    if engine.dialect.name != "sqlite":
+        return False
+    with engine.begin() as conn:
+        columns = [row[1] for row in conn.execute(text("PRAGMA table_info(users)")).fetchall()]
+        if not columns or "connections_count" in columns:
+            return False
+        for column in ("connections_count", "pending_in_count", "pending_out_count"):
+            conn.execute(text(f"ALTER TABLE users ADD COLUMN {column} INTEGER NOT NULL DEFAULT 0"))
+        updated = refresh_connection_counters(conn)
+    logger.info(f"Added users connection counters and backfilled {updated} users")
+    return True
+
+
+# ==================== STATS ROLLUP ====================
+# The network page stats per user, cached in this process for
+# CONNECTION_STATS_CACHE_SECONDS and dropped when a commit changes the user's
+# connections or requests.
+
+_STATS_CACHE_MAX_ENTRIES = 4096
+_stats_cache: Dict[int, Tuple[float, Dict[str, Any]]] = {}
+_stats_cache_lock = threading.Lock()
+
+
+def invalidate_connection_stats(user_ids: Iterable[int]):
+    with _stats_cache_lock:
+        for user_id in user_ids:
+            _stats_cache.pop(user_id, None)
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_committed_stats(session):
+    users = session.info.pop(_STATS_KEY, None)
+    if users:
+        invalidate_connection_stats(users)
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def _discard_rolled_back_stats(session, previous_transaction):
+    if previous_transaction.parent is None:
+        session.info.pop(_STATS_KEY, None)
+
+
+def compute_connection_stats(db: Session, user_id: int) -> Dict[str, Any]:
+    """Stats rollup from the counters plus one aggregate over the user's neighbours.
+
+    The aggregate groups neighbours by industry and counts those connected in
+    the last 30 days in the same pass.
+    """
+    total, pending_in, pending_out = read_connection_counters(db, user_id)
+
+    neighbours = union_all(
+        select(Connection.high_user_id.label("other_id"), Connection.accepted_at)
+        .where(Connection.low_user_id == user_id, Connection.status == 'accepted'),
+        select(Connection.low_user_id.label("other_id"), Connection.accepted_at)
+        .where(Connection.high_user_id == user_id, Connection.status == 'accepted'),
+    ).subquery()
+    thirty_days_ago = datetime.utcnow() - timedelta(days=30)
+    rows = db.execute(
+        select(User.industry, func.count(), func.count(case((neighbours.c.accepted_at >= thirty_days_ago, 1))))
+        .join(User, User.id == neighbours.c.other_id)
+        .group_by(User.industry)
+    ).all()
+
+    return {
+        "total_connections": total,
+        "pending_requests": pending_in,
+        "sent_requests": pending_out,
+        "mutual_connections": 0,
+        "recent_connections": sum(recent for _, _, recent in rows),
+        "industry_distribution": {industry: count for industry, count, _ in rows if industry is not None},
+    }
+
+
+def connection_stats(db: Session, user_id: int) -> Dict[str, Any]:
+    """The user's stats rollup, from the cache when fresh"""
+    now = time.monotonic()
+    with _stats_cache_lock:
+        hit = _stats_cache.get(user_id)
+        if hit and now - hit[0] < settings.CONNECTION_STATS_CACHE_SECONDS:
+            return hit[1]
+
+    stats = compute_connection_stats(db, user_id)
+    with _stats_cache_lock:
+        if len(_stats_cache) >= _STATS_CACHE_MAX_ENTRIES:
+            _stats_cache.clear()
+        _stats_cache[user_id] = (now, stats)
+    return stats
@@ -7,6 +7,8 @@ from sqlalchemy.exc import SQLAlchemyError, OperationalError, DisconnectionError
 from contextlib import contextmanager
 from typing import Generator, Optional, Dict, Any
 from config import settings
+import sqlite3
+import threading
 import time
 
 # Configure logging
@@ -21,7 +23,15 @@ class DatabaseManager:
         self.SessionLocal = None
         self.metadata = MetaData()
         self.connection_health = {"status": "unknown", "last_check": None, "error_count": 0}
+        self.read_engine = None
+        self.ReadSessionLocal = None
+        self._replica_lag = {"value": None, "checked_at": 0.0}
+        self._snapshot_refreshed_at = None
+        self._snapshot_lock = threading.Lock()
+        self._refresher_stop = threading.Event()
+        self._refresher_thread = None
         self._initialize_engine()
+        self._initialize_read_engine()
     
     def _initialize_engine(self):
         """Initialize database engine with appropriate configuration"""
@@ -65,6 +75,133 @@ class DatabaseManager:
             logger.error(f"Failed to initialize database engine: {e}")
             raise
     
+    def _snapshot_path(self) -> str:
+        """Path of the local SQLite snapshot used as a read replica stand-in"""
+        primary_path = settings.DATABASE_URL.replace("sqlite:///", "")
+        return f"{primary_path}.replica"
+    
+    def _initialize_read_engine(self):
+        """Initialize the read-replica engine used by read-only GET handlers"""
+        replica_url = settings.DATABASE_REPLICA_URL
+        if not replica_url and settings.SQLITE_READ_SNAPSHOT and "sqlite" in settings.DATABASE_URL:
+            if not self.refresh_sqlite_snapshot():
+                return
+            replica_url = f"sqlite:///{self._snapshot_path()}"
+        if not replica_url:
+            return
+        
+        try:
+            if "sqlite" in replica_url:
+                # No StaticPool here: a refreshed snapshot must be picked up by new connections
+                self.read_engine = create_engine(
+                    replica_url,
+                    connect_args={"check_same_thread": False},
+                    echo=settings.DEBUG,
+                    future=True
+                )
+            else:
+                self.read_engine = create_engine(
+                    replica_url,
+                    poolclass=QueuePool,
+                    pool_size=20,
+                    max_overflow=30,
+                    pool_recycle=300,
+                    pool_pre_ping=True,
+                    pool_timeout=30,
+                    echo=settings.DEBUG,
+                    future=True
+                )
+            self.ReadSessionLocal = sessionmaker(
+                autocommit=False,
+                autoflush=False,
+                bind=self.read_engine
+            )
+            logger.info("Read replica engine initialized")
+        except Exception as e:
+            # Reads keep working against the primary
+            logger.error(f"Failed to initialize read replica engine: {e}")
+            self.read_engine = None
+            self.ReadSessionLocal = None
+    
+    def refresh_sqlite_snapshot(self) -> bool:
+        """Copy the SQLite primary into the snapshot file using the backup API"""
+        if "sqlite" not in settings.DATABASE_URL:
+            return False
+        primary_path = settings.DATABASE_URL.replace("sqlite:///", "")
+        snapshot_path = self._snapshot_path()
+        tmp_path = f"{snapshot_path}.tmp"
+        with self._snapshot_lock:
+            try:
+                source = sqlite3.connect(primary_path)
+                target = sqlite3.connect(tmp_path)
+                try:
+                    source.backup(target)
+                finally:
+                    target.close()
+                    source.close()
+                # Atomic swap; connections already open keep reading the old snapshot
+                os.replace(tmp_path, snapshot_path)
+                if self.read_engine is not None:
+                    self.read_engine.dispose()
+                self._snapshot_refreshed_at = time.time()
+                return True
+            except Exception as e:
+                logger.error(f"Failed to refresh SQLite read snapshot: {e}")
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+                return False
+    
+    def _measure_replica_lag(self) -> Optional[float]:
+        """Return replica lag in seconds, or None when the replica is unusable"""
+        if self._snapshot_refreshed_at is not None and not settings.DATABASE_REPLICA_URL:
+            return time.time() - self._snapshot_refreshed_at
+        try:
+            with self.read_engine.connect() as conn:
+                lag = conn.execute(text(
+                    "SELECT EXTRACT(EPOCH FROM (now() - pg_last_xact_replay_timestamp()))"
+                )).scalar()
+                # NULL means the server is not replaying WAL (e.g. a promoted or primary server)
+                return float(lag) if lag is not None else 0.0
+        except Exception as e:
+            logger.warning(f"Replica lag check failed: {e}")
+            return None
+    
+    def replica_lag(self) -> Optional[float]:
+        """Cached replica lag in seconds (None when no usable replica)"""
+        if self.read_engine is None:
+            return None
+        now = time.time()
+        if now - self._replica_lag["checked_at"] >= settings.REPLICA_LAG_CHECK_SECONDS:
+            self._replica_lag = {"value": self._measure_replica_lag(), "checked_at": now}
+        return self._replica_lag["value"]
+    
+    def replica_available(self) -> bool:
+        """Check whether reads may be served by the replica right now"""
+        lag = self.replica_lag()
+        return lag is not None and lag <= settings.REPLICA_MAX_LAG_SECONDS
+    
+    def get_read_session(self) -> Session:
+        """Session for read-only work: the replica when fresh enough, else the primary"""
+        if self.ReadSessionLocal is not None and self.replica_available():
+            return self.ReadSessionLocal()
+        return self.SessionLocal()
+    
+    def start_replica_refresher(self):
+        """Start the background thread that keeps the SQLite snapshot fresh"""
+        if self._snapshot_refreshed_at is None or settings.DATABASE_REPLICA_URL:
+            return
+        if self._refresher_thread and self._refresher_thread.is_alive():
+            return
+        
+        def _run():
+            while not self._refresher_stop.wait(settings.REPLICA_SNAPSHOT_INTERVAL_SECONDS):
+                self.refresh_sqlite_snapshot()
+        
+        self._refresher_stop.clear()
+        self._refresher_thread = threading.Thread(target=_run, name="sqlite-snapshot-refresher", daemon=True)
+        self._refresher_thread.start()
+        logger.info("SQLite read snapshot refresher started")
+    
     def _test_connection(self):
         """Test database connection"""
         try:
@@ -156,6 +293,11 @@ class DatabaseManager:
                     "overall": "healthy",
                     "database": db_info,
                     "pool": pool_status,
+                    "replica": {
+                        "configured": self.read_engine is not None,
+                        "lag_seconds": self.replica_lag(),
+                        "serving_reads": self.replica_available()
+                    },
                     "last_check": time.time()
                 }
                 
@@ -205,6 +347,9 @@ class DatabaseManager:
     def cleanup(self):
         """Cleanup database connections"""
         try:
+            self._refresher_stop.set()
+            if self.read_engine:
+                self.read_engine.dispose()
             if self.engine:
                 self.engine.dispose()
                 logger.info("Database connections cleaned up")
@@ -223,6 +368,18 @@ def get_db() -> Generator[Session, None, None]:
     finally:
         db.close()
 
+def get_read_db() -> Generator[Session, None, None]:
+    """Get a session for read-only GET handlers (replica with lag-aware fallback)"""
+    db = db_manager.get_read_session()
+    try:
+        yield db
+    finally:
+        db.close()
+
+def start_replica_refresher():
+    """Keep the local SQLite read snapshot fresh in the background"""
+    db_manager.start_replica_refresher()
+
 def get_db_context() -> Generator[Session, None, None]:
     """Get database context (backward compatibility)"""
     return db_manager.get_db_context()
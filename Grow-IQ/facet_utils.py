@@ -0,0 +1,119 @@
+"""
+Facet utilities for Qrow IQ
+Counts per value of several columns (location, company, ...) over a filtered
+search, computed with one statement and cached per database and distinct
+search until users or jobs change there
+"""
+
+import time
+import threading
+import logging
+from typing import Any, Dict, List, Tuple
+
+from sqlalchemy import String, case, cast, event, func, literal, select, union_all
+from sqlalchemy.orm import Session
+
+from models import User, Job
+
+logger = logging.getLogger(__name__)
+
+# How long cached facet counts stay valid (seconds)
+FACET_CACHE_TTL = 60
+# Values returned per facet, most frequent first
+FACET_TOP_VALUES = 10
+_FACET_CACHE_MAX_ENTRIES = 512
+
+_facet_cache: Dict[Tuple[Any, str], Tuple[float, Dict[str, List[Dict[str, Any]]]]] = {}
+_facet_cache_lock = threading.Lock()
+
+# session.info key set when a flush changed users or jobs; their facets are dropped on commit
+_FACETS_STALE_KEY = "facets_stale"
+
+# (label, lowest, highest) years of experience; None is open-ended
+EXPERIENCE_BUCKETS = [("0-2", 0, 2), ("3-5", 3, 5), ("6-10", 6, 10), ("10+", 11, None)]
+
+
+def experience_bucket(column):
+    """CASE expression mapping years of experience to an EXPERIENCE_BUCKETS label (NULL if unknown)"""
+    whens = [
+        (column <= highest if highest is not None else column >= lowest, label)
+        for label, lowest, highest in EXPERIENCE_BUCKETS
+    ]
+    return case(*whens, else_=None)
+
+
+def facet_counts(query, facets: Dict[str, Any], top: int = FACET_TOP_VALUES,
+                 ttl: int = FACET_CACHE_TTL) -> Dict[str, List[Dict[str, Any]]]:
+    """Value counts for each facet expression over the rows `query` selects.
+
+    Each facet is grouped on its own and cut to its `top` values in the
+    database; the per-facet groups are sent as one UNION ALL statement, so at
+    most `top` rows per facet come back. Empty values are left out. Results
+    are cached per database and distinct query for `ttl` seconds, or until a
+    commit there changes users or jobs.
+    """
+    names = list(facets)
+    base = query.order_by(None)
+    parts = []
+    for i, name in enumerate(names):
+        expr = facets[name]
+        grouped = base.with_entities(
+            literal(i).label("facet"), cast(expr, String).label("value"), func.count().label("n")
+        ).filter(expr.isnot(None), expr != "").group_by(expr).order_by(func.count().desc(), expr).limit(top)
+        # Wrapped so the LIMIT is allowed inside a compound select (SQLite rejects it otherwise)
+        sub = grouped.subquery()
+        parts.append(select(sub.c.facet, sub.c.value, sub.c.n))
+    statement = union_all(*parts)
+
+    compiled = statement.compile(query.session.get_bind())
+    key = (query.session.get_bind(), f"{compiled}|{sorted((k, repr(v)) for k, v in compiled.params.items())}")
+    now = time.time()
+    with _facet_cache_lock:
+        hit = _facet_cache.get(key)
+        if hit and now - hit[0] < ttl:
+            return hit[1]
+
+    counts = {name: [] for name in names}
+    for facet, value, count in query.session.execute(statement):
+        counts[names[facet]].append((value, count))
+    result = {
+        name: [
+            {"value": value, "count": count}
+            for value, count in sorted(rows, key=lambda item: (-item[1], str(item[0])))
+        ]
+        for name, rows in counts.items()
+    }
+
+    with _facet_cache_lock:
+        if len(_facet_cache) >= _FACET_CACHE_MAX_ENTRIES:
+            _facet_cache.clear()
+        _facet_cache[key] = (now, result)
+    return result
+
+
+def reset_facet_cache(bind=None):
+    """Drop cached facet counts, of one database or all of them"""
+    with _facet_cache_lock:
+        if bind is None:
+            _facet_cache.clear()
+        else:
+            for key in [key for key in _facet_cache if key[0] is bind]:
+                del _facet_cache[key]
+
+
+@event.listens_for(Session, "after_flush")
+def _mark_facets_stale(session, flush_context):
+    if any(isinstance(obj, (User, Job)) for obj in session.new | session.dirty | session.deleted):
+        session.info[_FACETS_STALE_KEY] = True
+
+
+@event.listens_for(Session, "after_commit")
+def _drop_stale_facets(session):
+    if session.info.pop(_FACETS_STALE_KEY, False):
+        reset_facet_cache(session.get_bind())
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def _keep_facets(session, previous_transaction):
+    if previous_transaction.parent is None:
+        session.info.pop(_FACETS_STALE_KEY, None)
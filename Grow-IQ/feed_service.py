@@ -0,0 +1,394 @@
+"""
+Feed service for Qrow IQ
+Loads a page of posts with authors and the viewer's likes in a fixed number of
+queries, and maintains the denormalized engagement counters and time-decayed
+engagement score on posts
+"""
+
+import math
+import sqlite3
+import logging
+import threading
+from collections import defaultdict
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from sqlalchemy import case, delete, event, func, or_, select, text, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from sqlalchemy.pool import Pool
+
+from config import settings
+from models import Post, PostLike, Comment, User, MediaVariant
+from media_service import load_image_variants
+
+logger = logging.getLogger(__name__)
+
+_reconciler_stop = threading.Event()
+_reconciler_thread: Optional[threading.Thread] = None
+
+
+def feed_query(db: Session):
+    """Base query yielding (Post, User) rows in one joined SELECT.
+
+    Callers add their own filters, ordering and pagination. Counts come from
+    the maintained counter columns.
+    """
+    return db.query(Post, User).join(User, Post.user_id == User.id)
+
+
+def feed_version(db: Session, window) -> Tuple[Any, ...]:
+    """Cheap validator for one feed page, read in a single statement.
+
+    `window` is the page query (ordered and limited, yielding Post rows), so
+    every aggregate reads at most one page of rows. The result changes when a
+    post enters or leaves the page, is edited or has a like/comment counter
+    move (all of which bump posts.updated_at), when one of its authors edits
+    their profile, or when image variants finish processing.
+    """
+    page = window.with_entities(Post.id.label("id"), Post.updated_at.label("updated_at"),
+                                Post.user_id.label("user_id")).subquery()
+    authors = select(page.c.user_id)
+    row = db.execute(select(
+        select(func.count()).select_from(page).scalar_subquery(),
+        select(func.max(page.c.id)).scalar_subquery(),
+        select(func.min(page.c.id)).scalar_subquery(),
+        select(func.max(page.c.updated_at)).scalar_subquery(),
+        select(func.max(User.updated_at)).where(User.id.in_(authors)).scalar_subquery(),
+        select(func.max(MediaVariant.id)).scalar_subquery(),
+    )).first()
+    return tuple(row)
+
+
+def load_liked_post_ids(db: Session, viewer_id: Optional[int], post_ids: Iterable[int]) -> Set[int]:
+    """IDs among post_ids that the viewer has liked, from one IN query"""
+    post_ids = list(post_ids)
+    if not viewer_id or not post_ids:
+        return set()
+    rows = db.execute(
+        select(PostLike.post_id).where(PostLike.user_id == viewer_id, PostLike.post_id.in_(post_ids))
+    ).all()
+    return {row[0] for row in rows}
+
+
+def hydrate_feed(db: Session, rows: List[Tuple[Post, User]], viewer_id: Optional[int]) -> List[Dict[str, Any]]:
+    """Attach engagement data to a page of (Post, User) rows.
+
+    Each item is {"post", "author", "likes_count", "comments_count", "is_liked",
+    "image_variants"}; the endpoint decides how to serialize it. Variants are
+    looked up only when the page has images.
+    """
+    liked = load_liked_post_ids(db, viewer_id, [post.id for post, _ in rows])
+    variants = load_image_variants(db, [post.image_path for post, _ in rows])
+
+    items = []
+    for post, author in rows:
+        items.append({
+            "post": post,
+            "author": author,
+            "likes_count": post.likes_count or 0,
+            "comments_count": post.comments_count or 0,
+            "is_liked": post.id in liked,
+            "image_variants": variants.get(post.image_path),
+        })
+    return items
+
+
+# ==================== ENGAGEMENT SCORE ====================
+# engagement_score is log2 of the sum of weight * 2 ** ((t - SCORE_EPOCH) / half-life)
+# over the post itself and each like and comment, t being the event time.
+# Subtracting the same exponent for "now" gives the usual exponentially
+# decayed score; since that offset is common to all posts, the stored value
+# ranks identically and never needs rescoring as time passes. Each event adds
+# or removes a single term, so updates are relative UPDATEs like the counters.
+# Kept in log space, the score grows by one per half-life instead of doubling,
+# so it never overflows however far from the epoch events happen.
+
+SCORE_EPOCH = datetime(2025, 1, 1)
+POST_WEIGHT = 1.0
+LIKE_WEIGHT = 1.0
+COMMENT_WEIGHT = 2.0
+
+_LN2 = math.log(2.0)
+# connection_record.info key: this SQLite connection has ln()/exp()
+_SQLITE_MATH_CHECKED = "sqlite_math_checked"
+# Log-space scores stay far below this for millennia; old linear sums exceeded it within weeks
+_LINEAR_SCORE_BOUND = 1e6
+
+
+def decayed_log_weight(weight: float, at: Optional[datetime] = None) -> float:
+    """log2 of the contribution of an event of `weight` that happened at `at` (default now)"""
+    at = at or datetime.now()
+    half_lives = (at - SCORE_EPOCH).total_seconds() / (settings.FEED_SCORE_HALF_LIFE_HOURS * 3600)
+    return math.log2(weight) + half_lives
+
+
+def log2_sum(terms: Iterable[float]) -> Optional[float]:
+    """log2(sum(2 ** t)) of log-space terms without leaving log space (None if there are none)"""
+    terms = list(terms)
+    if not terms:
+        return None
+    top = max(terms)
+    return top + math.log2(sum(2.0 ** (t - top) for t in terms))
+
+
+def _add_score_term(score, term: float):
+    # log2(2 ** score + 2 ** term), in SQL; ln/exp are portable where log2 is not
+    return case(
+        (score.is_(None), term),
+        (score >= term, score + func.ln(1 + func.exp((term - score) * _LN2)) / _LN2),
+        else_=term + func.ln(1 + func.exp((score - term) * _LN2)) / _LN2,
+    )
+
+
+def _remove_score_term(score, term: float):
+    # log2(2 ** score - 2 ** term); the post's own term keeps the score above
+    # any one like or comment it includes, so the else branch only guards rounding
+    return case(
+        (score > term, score + func.ln(1 - func.exp((term - score) * _LN2)) / _LN2),
+        else_=score,
+    )
+
+
+def _sqlite_ln(value):
+    # NULL for NULL or non-positive input, like SQLite's own ln()
+    try:
+        return None if value is None else math.log(value)
+    except ValueError:
+        return None
+
+
+def _sqlite_exp(value):
+    try:
+        return None if value is None else math.exp(value)
+    except OverflowError:
+        return math.inf
+
+
+@event.listens_for(Pool, "checkout")
+def _ensure_sqlite_math(dbapi_connection, connection_record, connection_proxy):
+    # ln()/exp() only exist in SQLite builds with SQLITE_ENABLE_MATH_FUNCTIONS;
+    # add them where missing. Checked on checkout rather than connect so
+    # connections opened before this module was imported are covered too.
+    if not isinstance(dbapi_connection, sqlite3.Connection) or _SQLITE_MATH_CHECKED in connection_record.info:
+        return
+    try:
+        dbapi_connection.execute("SELECT ln(1), exp(0)")
+    except sqlite3.OperationalError:
+        dbapi_connection.create_function("ln", 1, _sqlite_ln, deterministic=True)
+        dbapi_connection.create_function("exp", 1, _sqlite_exp, deterministic=True)
+    connection_record.info[_SQLITE_MATH_CHECKED] = True
+
+
+@event.listens_for(Post, "before_insert")
+def _initial_engagement_score(mapper, connection, post):
+    # A new post starts with its own recency term so fresh posts rank above stale ones
+    if post.engagement_score is None:
+        if post.created_at is None:
+            post.created_at = datetime.now()
+        post.engagement_score = decayed_log_weight(POST_WEIGHT, post.created_at)
+
+
+def rescore_engagement(db: Session) -> int:
+    """Recompute every post's engagement_score from its likes and comments.
+
+    Used to backfill the column; incremental updates keep it current afterwards.
+    Returns the number of posts scored.
+    """
+    terms = defaultdict(list)
+    for post_id, created_at in db.execute(select(Post.id, Post.created_at)):
+        terms[post_id].append(decayed_log_weight(POST_WEIGHT, created_at or SCORE_EPOCH))
+    for post_id, created_at in db.execute(select(PostLike.post_id, PostLike.created_at)):
+        if post_id in terms:
+            terms[post_id].append(decayed_log_weight(LIKE_WEIGHT, created_at or SCORE_EPOCH))
+    for post_id, created_at in db.execute(select(Comment.post_id, Comment.created_at)):
+        if post_id in terms:
+            terms[post_id].append(decayed_log_weight(COMMENT_WEIGHT, created_at or SCORE_EPOCH))
+    scores = {post_id: log2_sum(post_terms) for post_id, post_terms in terms.items()}
+    if scores:
+        db.execute(update(Post), [{"id": post_id, "engagement_score": score} for post_id, score in scores.items()])
+    db.commit()
+    return len(scores)
+
+
+def ensure_engagement_score_schema() -> bool:
+    """Add posts.engagement_score to an existing SQLite database and backfill it.
+
+    Scores still stored as linear sums are rescored too. Returns True if the
+    column had to be added. Other databases should run migrate_engagement_score.py.
+    """
+    from database_enhanced import db_manager, get_db_context
+    engine = db_manager.engine
+    if engine.dialect.name != "sqlite":
+        return False
+    with engine.begin() as conn:
+        columns = [row[1] for row in conn.execute(text("PRAGMA table_info(posts)")).fetchall()]
+        if not columns:
+            return False
+        added = "engagement_score" not in columns
+        if added:
+            conn.execute(text("ALTER TABLE posts ADD COLUMN engagement_score FLOAT DEFAULT 0.0"))
+            conn.execute(text("CREATE INDEX IF NOT EXISTS ix_posts_engagement_score ON posts (engagement_score)"))
+        # Scores written before they were kept in log space are astronomically large
+        elif not conn.execute(text("SELECT 1 FROM posts WHERE engagement_score > :bound LIMIT 1"),
+                              {"bound": _LINEAR_SCORE_BOUND}).first():
+            return False
+    with get_db_context() as db:
+        scored = rescore_engagement(db)
+    logger.info(f"{'Added posts.engagement_score and scored' if added else 'Rescored'} {scored} posts")
+    return added
+
+
+def ensure_post_updated_at_schema() -> bool:
+    """Add posts.updated_at to an existing SQLite database, starting from created_at.
+
+    Returns True if the column had to be added. Other databases should run
+    migrate_post_updated_at.py.
+    """
+    from database_enhanced import db_manager
+    engine = db_manager.engine
+    if engine.dialect.name != "sqlite":
+        return False
+    with engine.begin() as conn:
+        columns = [row[1] for row in conn.execute(text("PRAGMA table_info(posts)")).fetchall()]
+        if not columns or "updated_at" in columns:
+            return False
+        conn.execute(text("ALTER TABLE posts ADD COLUMN updated_at DATETIME"))
+        updated = conn.execute(text("UPDATE posts SET updated_at = COALESCE(created_at, CURRENT_TIMESTAMP)")).rowcount
+    logger.info(f"Added posts.updated_at to {updated} posts")
+    return True
+
+
+# ==================== ENGAGEMENT COUNTERS ====================
+# posts.likes_count / comments_count are kept in step with post_likes and
+# comments by relative UPDATEs issued in the caller's transaction, so the
+# counter and the row it counts are committed (or rolled back) together.
+
+def _bump_counter(db: Session, post_id: int, column, delta: int, weight: float, at: Optional[datetime] = None):
+    # `delta` events of `weight` that happened at `at` are added to (or, if
+    # negative, removed from) the counter and the score
+    term = decayed_log_weight(weight * abs(delta), at)
+    score = _add_score_term(Post.engagement_score, term) if delta > 0 else _remove_score_term(Post.engagement_score, term)
+    db.execute(
+        update(Post)
+        .where(Post.id == post_id)
+        .values({
+            column: func.coalesce(column, 0) + delta,
+            Post.engagement_score: score,
+            Post.updated_at: datetime.now(),
+        })
+        .execution_options(synchronize_session=False)
+    )
+
+
+def add_like(db: Session, post_id: int, user_id: int) -> bool:
+    """Insert a like and bump the counter; False if the user already liked the post.
+
+    The insert is ON CONFLICT DO NOTHING against the unique (post_id, user_id)
+    constraint, so a concurrent double like is a no-op. The caller commits.
+    """
+    dialect = db.get_bind().dialect.name
+    if dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    elif dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert
+    else:
+        # No portable upsert; a savepoint keeps the outer transaction usable
+        try:
+            with db.begin_nested():
+                db.add(PostLike(post_id=post_id, user_id=user_id))
+        except IntegrityError:
+            return False
+        _bump_counter(db, post_id, Post.likes_count, 1, LIKE_WEIGHT)
+        return True
+
+    result = db.execute(
+        insert(PostLike)
+        .values(post_id=post_id, user_id=user_id)
+        .on_conflict_do_nothing(index_elements=["post_id", "user_id"])
+    )
+    if not result.rowcount:
+        return False
+    _bump_counter(db, post_id, Post.likes_count, 1, LIKE_WEIGHT)
+    return True
+
+
+def remove_like(db: Session, post_id: int, user_id: int) -> bool:
+    """Delete a like and decrement the counter; False if there was nothing to delete.
+    The caller commits."""
+    # The like's own timestamp tells exactly how much it added to the score
+    liked_at = db.execute(
+        select(PostLike.created_at).where(PostLike.post_id == post_id, PostLike.user_id == user_id)
+    ).scalar()
+    if liked_at is None:
+        return False
+    result = db.execute(
+        delete(PostLike)
+        .where(PostLike.post_id == post_id, PostLike.user_id == user_id)
+        .execution_options(synchronize_session=False)
+    )
+    if not result.rowcount:
+        return False
+    _bump_counter(db, post_id, Post.likes_count, -1, LIKE_WEIGHT, liked_at)
+    return True
+
+
+def record_comment(db: Session, post_id: int, delta: int = 1, at: Optional[datetime] = None):
+    """Adjust comments_count and the score after adding (1) or deleting (-1) a
+    comment created at `at` (default now). The caller commits."""
+    _bump_counter(db, post_id, Post.comments_count, delta, COMMENT_WEIGHT, at)
+
+
+def read_counters(db: Session, post_id: int) -> Tuple[int, int]:
+    """Current (likes_count, comments_count) as seen by this transaction"""
+    row = db.execute(select(Post.likes_count, Post.comments_count).where(Post.id == post_id)).first()
+    return (row[0] or 0, row[1] or 0) if row else (0, 0)
+
+
+def reconcile_engagement_counters(db: Session) -> int:
+    """Recompute drifted counters from post_likes and comments in one UPDATE.
+
+    Returns the number of posts that were corrected.
+    """
+    likes = select(func.count(PostLike.id)).where(PostLike.post_id == Post.id).scalar_subquery()
+    comments = select(func.count(Comment.id)).where(Comment.post_id == Post.id).scalar_subquery()
+    result = db.execute(
+        update(Post)
+        .where(or_(
+            func.coalesce(Post.likes_count, -1) != likes,
+            func.coalesce(Post.comments_count, -1) != comments,
+        ))
+        .values(likes_count=likes, comments_count=comments, updated_at=datetime.now())
+        .execution_options(synchronize_session=False)
+    )
+    db.commit()
+    if result.rowcount:
+        logger.warning(f"Reconciled engagement counters on {result.rowcount} posts")
+    return result.rowcount
+
+
+def start_counter_reconciler():
+    """Run reconcile_engagement_counters() periodically in a daemon thread"""
+    global _reconciler_thread
+    interval = settings.ENGAGEMENT_RECONCILE_INTERVAL_SECONDS
+    if interval <= 0 or (_reconciler_thread and _reconciler_thread.is_alive()):
+        return
+
+    def _run():
+        from database_enhanced import get_db_context
+        while not _reconciler_stop.wait(interval):
+            try:
+                with get_db_context() as db:
+                    reconcile_engagement_counters(db)
+            except Exception as e:
+                logger.error(f"Engagement counter reconciliation failed: {e}")
+
+    _reconciler_stop.clear()
+    _reconciler_thread = threading.Thread(target=_run, name="engagement-reconciler", daemon=True)
+    _reconciler_thread.start()
+    logger.info("Engagement counter reconciler started")
+
+
+def stop_counter_reconciler():
+    """Stop the reconciliation thread started by start_counter_reconciler()"""
+    _reconciler_stop.set()
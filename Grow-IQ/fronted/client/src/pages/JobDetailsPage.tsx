@@ -24,6 +24,14 @@ type JobDetail = {
   benefits?: string[];
 };
 
+// requirements / benefits are stored as free text, one item per line
+const toLines = (value: unknown): string[] =>
+  Array.isArray(value)
+    ? value
+    : typeof value === "string"
+      ? value.split("\n").map(line => line.trim()).filter(Boolean)
+      : [];
+
 export const JobDetailsPage = (): JSX.Element => {
   const [match, params] = useRoute("/job/:id");
   const [location, setLocation] = useLocation();
@@ -43,11 +51,9 @@ export const JobDetailsPage = (): JSX.Element => {
       setError(null);
       setLoading(true);
       try {
-        // There is no dedicated job-by-id API; reuse the search endpoint and pick the match
-        const res = await fetch("/api/jobs/search", { credentials: "include" });
-        if (!res.ok) throw new Error("Failed to load job");
-        const data = await res.json();
-        const found = (data?.jobs || []).find((j: any) => j.id === jobId);
+        const res = await fetch(`/api/jobs/${jobId}/details`, { credentials: "include" });
+        if (!res.ok && res.status !== 404) throw new Error("Failed to load job");
+        const found = res.ok ? await res.json() : null;
         if (!found) {
           setError("Job not found");
           setJob(null);
@@ -63,9 +69,9 @@ export const JobDetailsPage = (): JSX.Element => {
             salary_range: found.salary_range,
             salary: found.salary_range,
             posted_at: found.posted_at,
-            requirements: found.requirements || [],
-            responsibilities: found.responsibilities || [],
-            benefits: found.benefits || [],
+            requirements: toLines(found.requirements),
+            responsibilities: toLines(found.responsibilities),
+            benefits: toLines(found.benefits),
           };
           setJob(mapped);
         }
@@ -32,9 +32,11 @@ export const JobListSection = (): JSX.Element => {
   const [applyingJobs, setApplyingJobs] = useState<Set<number>>(new Set());
   const [appliedJobs, setAppliedJobs] = useState<Set<number>>(new Set());
   const [selectedJob, setSelectedJob] = useState<JobItem | null>(null);
+  const [nextCursor, setNextCursor] = useState<string | null>(null);
 
   // Fetch jobs from backend
-  const fetchJobs = async () => {
+  // Pass the previous page's next_cursor to append the following page
+  const fetchJobs = async (cursor?: string) => {
     setError(null);
     setLoading(true);
     try {
@@ -42,6 +44,7 @@ export const JobListSection = (): JSX.Element => {
       if (searchTerm) params.set("q", searchTerm);
       if (selectedLocation) params.set("location", selectedLocation);
       if (selectedJobType) params.set("job_type", selectedJobType);
+      if (cursor) params.set("cursor", cursor);
       const qs = params.toString();
       const url = qs ? `/api/jobs/search?${qs}` : "/api/jobs/search";
       const res = await fetch(url, { credentials: "include" });
@@ -52,15 +55,16 @@ export const JobListSection = (): JSX.Element => {
         company: j.company,
         title: j.title,
         location: j.location,
-        description: j.description,
+        description: j.snippet || "",
         jobType: j.job_type,
         salary: j.salary_range || j.salary,
         logo: null,
       }));
-      setJobs(apiJobs);
+      setJobs(prev => (cursor ? [...prev, ...apiJobs] : apiJobs));
+      setNextCursor(data?.pagination?.next_cursor || null);
     } catch (e: any) {
       setError(e?.message || "Failed to load jobs");
-      setJobs([]);
+      if (!cursor) setJobs([]);
     } finally {
       setLoading(false);
     }
@@ -88,6 +92,15 @@ export const JobListSection = (): JSX.Element => {
     const job = filteredJobs.find(j => j.id === jobId);
     if (job) {
       setSelectedJob(job);
+      // Search results only carry a snippet; load the full description
+      fetch(`/api/jobs/${jobId}/details`, { credentials: "include" })
+        .then(res => (res.ok ? res.json() : null))
+        .then(full => {
+          if (full?.description) {
+            setSelectedJob(prev => (prev?.id === jobId ? { ...prev, description: full.description } : prev));
+          }
+        })
+        .catch(() => {});
     }
   };
 
@@ -289,6 +302,15 @@ export const JobListSection = (): JSX.Element => {
               </Card>
             ))
           )}
+          {nextCursor && !loading && (
+            <Button
+              variant="outline"
+              onClick={() => fetchJobs(nextCursor)}
+              className="w-full border-[#673ab7] text-[#673ab7]"
+            >
+              Load more jobs
+            </Button>
+          )}
           </div>
         </div>
 
@@ -0,0 +1,334 @@
+"""
+Social graph service for Qrow IQ
+Keeps every user's accepted connections in memory as a sorted int array, built
+from the connections table and updated in place when connections are accepted
+or removed, so mutual-connection queries for a whole page of users are
+answered by array intersection instead of per-row SQL
+"""
+
+import time
+import logging
+import threading
+from array import array
+from bisect import bisect_left
+from collections import defaultdict
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import event, or_, select
+from sqlalchemy.orm import Session
+
+from config import settings
+from models import Connection
+
+logger = logging.getLogger(__name__)
+
+_EMPTY = array("i")
+
+# Above this size ratio, walking the smaller array and bisecting into the
+# larger one beats probing a hash of the smaller one with every element of the larger
+_GALLOP_RATIO = 8
+
+# session.info key holding connection changes that take effect on commit
+_CHANGES_KEY = "graph_changes"
+
+
+def _count_sorted(small: array, large: array) -> int:
+    """Size of the intersection of two sorted arrays, bisecting forward through `large`"""
+    count, lo, hi = 0, 0, len(large)
+    for value in small:
+        lo = bisect_left(large, value, lo)
+        if lo == hi:
+            break
+        if large[lo] == value:
+            count += 1
+            lo += 1
+    return count
+
+
+class SocialGraphIndex:
+    """Undirected accepted-connection graph as {user_id: sorted array('i') of neighbour ids}.
+
+    Updates copy the two affected arrays and swap them in, so readers never
+    see a half-updated array and need no lock.
+    """
+
+    def __init__(self):
+        self._adjacency: Dict[int, array] = {}
+        self._lock = threading.Lock()
+        self.built_at = 0.0  # time.monotonic() of the last build; 0 means never built
+
+    @classmethod
+    def from_edges(cls, edges: Iterable[Tuple[int, int]]) -> "SocialGraphIndex":
+        """Build from (user_id, connected_user_id) pairs; direction and duplicates are ignored"""
+        lists: Dict[int, array] = defaultdict(lambda: array("i"))
+        for a, b in edges:
+            if a != b:
+                lists[a].append(b)
+                lists[b].append(a)
+        index = cls()
+        for user_id, neighbours in lists.items():
+            index._adjacency[user_id] = array("i", sorted(set(neighbours)))
+        index.built_at = time.monotonic()
+        return index
+
+    @classmethod
+    def from_db(cls, db: Session) -> "SocialGraphIndex":
+        """Build from every accepted row of the connections table, streamed in batches"""
+        rows = db.execute(
+            select(Connection.user_id, Connection.connected_user_id)
+            .where(Connection.status == 'accepted')
+            .execution_options(yield_per=50_000)
+        )
+        return cls.from_edges(rows)
+
+    @property
+    def user_count(self) -> int:
+        return len(self._adjacency)
+
+    @property
+    def edge_count(self) -> int:
+        return sum(len(neighbours) for neighbours in self._adjacency.values()) // 2
+
+    def neighbours(self, user_id: int) -> array:
+        return self._adjacency.get(user_id, _EMPTY)
+
+    def degree(self, user_id: int) -> int:
+        return len(self.neighbours(user_id))
+
+    def is_connected(self, a: int, b: int) -> bool:
+        neighbours = self.neighbours(a)
+        i = bisect_left(neighbours, b)
+        return i < len(neighbours) and neighbours[i] == b
+
+    def add_edge(self, a: int, b: int):
+        if a == b:
+            return
+        with self._lock:
+            for user_id, other in ((a, b), (b, a)):
+                neighbours = self.neighbours(user_id)
+                i = bisect_left(neighbours, other)
+                if i < len(neighbours) and neighbours[i] == other:
+                    continue
+                self._adjacency[user_id] = neighbours[:i] + array("i", [other]) + neighbours[i:]
+
+    def remove_edge(self, a: int, b: int):
+        with self._lock:
+            for user_id, other in ((a, b), (b, a)):
+                neighbours = self.neighbours(user_id)
+                i = bisect_left(neighbours, other)
+                if i < len(neighbours) and neighbours[i] == other:
+                    self._adjacency[user_id] = neighbours[:i] + neighbours[i + 1:]
+
+    def mutual_count(self, a: int, b: int) -> int:
+        return self.mutual_counts(a, [b])[b]
+
+    def mutual_counts(self, user_id: int, candidate_ids: Iterable[int]) -> Dict[int, int]:
+        """Mutual connection count between user_id and each candidate.
+
+        The user's array is hashed once for the whole batch; candidates with
+        far more connections than the user are intersected by bisection instead.
+        """
+        mine = self.neighbours(user_id)
+        mine_set = set(mine) if mine else None
+        counts = {}
+        for candidate_id in candidate_ids:
+            theirs = self.neighbours(candidate_id)
+            if not mine or not theirs:
+                counts[candidate_id] = 0
+            elif len(theirs) > _GALLOP_RATIO * len(mine):
+                counts[candidate_id] = _count_sorted(mine, theirs)
+            else:
+                counts[candidate_id] = len(mine_set.intersection(theirs))
+        return counts
+
+    def mutual_ids(self, a: int, b: int, limit: Optional[int] = None) -> List[int]:
+        """Ascending ids of the connections a and b share, at most `limit` of them"""
+        small, large = sorted((self.neighbours(a), self.neighbours(b)), key=len)
+        if not small:
+            return []
+        if len(large) > _GALLOP_RATIO * len(small):
+            mutual = []
+            lo, hi = 0, len(large)
+            for value in small:
+                lo = bisect_left(large, value, lo)
+                if lo == hi:
+                    break
+                if large[lo] == value:
+                    mutual.append(value)
+        else:
+            large_set = set(large)
+            mutual = [value for value in small if value in large_set]
+        return mutual[:limit] if limit is not None else mutual
+
+
+class _SqlGraphView:
+    """Stand-in for the shared index while it is first built.
+
+    Answers the same questions from the connections table, reading the
+    neighbours of only the users asked about into a private partial index.
+    """
+
+    def __init__(self, db: Session):
+        self._db = db
+        self._partial = SocialGraphIndex()
+        self._loaded = set()
+
+    def _load(self, user_ids: Iterable[int]) -> SocialGraphIndex:
+        missing = set(user_ids) - self._loaded
+        if missing:
+            missing_ids = list(missing)
+            rows = self._db.execute(
+                select(Connection.low_user_id, Connection.high_user_id)
+                .where(Connection.status == 'accepted',
+                       or_(Connection.low_user_id.in_(missing_ids), Connection.high_user_id.in_(missing_ids)))
+            )
+            for a, b in rows:
+                self._partial.add_edge(a, b)
+            self._loaded |= missing
+        return self._partial
+
+    def neighbours(self, user_id: int) -> array:
+        return self._load([user_id]).neighbours(user_id)
+
+    def degree(self, user_id: int) -> int:
+        return len(self.neighbours(user_id))
+
+    def is_connected(self, a: int, b: int) -> bool:
+        return self._load([a]).is_connected(a, b)
+
+    def mutual_count(self, a: int, b: int) -> int:
+        return self.mutual_counts(a, [b])[b]
+
+    def mutual_counts(self, user_id: int, candidate_ids: Iterable[int]) -> Dict[int, int]:
+        candidate_ids = list(candidate_ids)
+        return self._load([user_id, *candidate_ids]).mutual_counts(user_id, candidate_ids)
+
+    def mutual_ids(self, a: int, b: int, limit: Optional[int] = None) -> List[int]:
+        return self._load([a, b]).mutual_ids(a, b, limit)
+
+
+# ==================== SHARED INDEX ====================
+# One index per process. It is first built in the background, from startup
+# or the first request, while requests are answered from SQL; it is then
+# rebuilt in the background every GRAPH_INDEX_REFRESH_SECONDS, which picks up
+# changes made by other processes. Changes committed here are applied immediately.
+
+_index = SocialGraphIndex()
+_build_lock = threading.Lock()
+_rebuild_replay: Optional[List[Tuple[str, int, int]]] = None
+
+
+def _apply(index: SocialGraphIndex, op: str, a: int, b: int):
+    if op == "add":
+        index.add_edge(a, b)
+    else:
+        index.remove_edge(a, b)
+
+
+def _build_from(db: Session) -> SocialGraphIndex:
+    # The caller has set _rebuild_replay so commits made meanwhile are replayed
+    global _index, _rebuild_replay
+    try:
+        fresh = SocialGraphIndex.from_db(db)
+        with _build_lock:
+            # Changes committed while the snapshot was being read
+            for change in _rebuild_replay or []:
+                _apply(fresh, *change)
+            _index = fresh
+        logger.info(f"Built social graph index: {fresh.user_count} users, {fresh.edge_count} connections")
+        return fresh
+    finally:
+        _rebuild_replay = None
+
+
+def _rebuild_in_background(bind):
+    global _rebuild_replay
+
+    def _run():
+        try:
+            with Session(bind=bind) as db:
+                _build_from(db)
+        except Exception as e:
+            logger.error(f"Social graph index build failed: {e}")
+            if _index.built_at:
+                _index.built_at = time.monotonic()  # retry after another interval
+
+    with _build_lock:
+        if _rebuild_replay is not None:
+            return
+        _rebuild_replay = []
+    threading.Thread(target=_run, name="graph-index-rebuild", daemon=True).start()
+
+
+def start_graph_index_build():
+    """Start building the shared index from the application database in the background"""
+    from database_enhanced import db_manager
+    _rebuild_in_background(db_manager.engine)
+
+
+def build_graph_index(db: Session) -> SocialGraphIndex:
+    """Build the shared index from db now, in this thread"""
+    global _rebuild_replay
+    with _build_lock:
+        if _rebuild_replay is None:
+            _rebuild_replay = []
+    return _build_from(db)
+
+
+def get_graph_index(db: Session, wait: bool = False):
+    """The process-wide index.
+
+    Until its first build finishes this starts the build in the background
+    and returns a stand-in answering from db, so request handlers never wait
+    for it; background jobs pass wait=True to build it in their own thread.
+    """
+    if not _index.built_at:
+        if wait:
+            return build_graph_index(db)
+        _rebuild_in_background(db.get_bind())
+        return _SqlGraphView(db)
+    if time.monotonic() - _index.built_at > settings.GRAPH_INDEX_REFRESH_SECONDS:
+        _rebuild_in_background(db.get_bind())
+    return _index
+
+
+def reset_graph_index():
+    """Drop the in-memory index; the next get_graph_index() starts rebuilding it"""
+    global _index
+    with _build_lock:
+        _index = SocialGraphIndex()
+
+
+def _record(db: Session, op: str, a: int, b: int):
+    if not db.in_transaction():
+        db.begin()  # so a rollback before any SQL still discards the change
+    db.info.setdefault(_CHANGES_KEY, []).append((op, a, b))
+
+
+def record_connection(db: Session, a: int, b: int):
+    """Add the a-b edge to the index once db's transaction commits"""
+    _record(db, "add", a, b)
+
+
+def record_disconnection(db: Session, a: int, b: int):
+    """Remove the a-b edge from the index once db's transaction commits"""
+    _record(db, "remove", a, b)
+
+
+@event.listens_for(Session, "after_commit")
+def _apply_committed_changes(session):
+    changes = session.info.pop(_CHANGES_KEY, None)
+    if not changes:
+        return
+    with _build_lock:
+        if _rebuild_replay is not None:
+            _rebuild_replay.extend(changes)
+    if _index.built_at:
+        for change in changes:
+            _apply(_index, *change)
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def _discard_rolled_back_changes(session, previous_transaction):
+    if previous_transaction.parent is None:
+        session.info.pop(_CHANGES_KEY, None)
@@ -5,9 +5,10 @@ from fastapi import APIRouter, Depends, HTTPException, status, Request
 from fastapi.responses import HTMLResponse, JSONResponse, FileResponse
 from fastapi.templating import Jinja2Templates
 from sqlalchemy.orm import Session
-from database_enhanced import get_db
+from database_enhanced import get_db, get_read_db
 from auth_utils import get_current_user
 from models import User, Post, Connection, Comment, Job
+from timeline_service import timeline_page, top_network_posts
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -28,7 +29,11 @@ templates = Jinja2Templates(directory=os.path.join(BASE_DIR, "templates"))
 FRONTEND_DIST_DIR = os.path.join(BASE_DIR, "fronted", "dist", "public")
 
 def get_analytics_data(db: Session, user_id: int):
-    """Get comprehensive analytics data for the user's network"""
+    """Get comprehensive analytics data for the user's network
+
+    Read-only and tolerant of slightly stale data, so it may run on a
+    get_read_db session.
+    """
     try:
         # Get user's connections
         connections = db.query(Connection).filter(
@@ -51,32 +56,24 @@ def get_analytics_data(db: Session, user_id: int):
             'total_network_users': len(connected_user_ids) + 1  # +1 for current user
         }
         
-        # Get posts from network (user + connections)
+        # Get posts from network (user + connections) from the materialized timeline;
+        # no rebuild here since this may run on the read replica
+        network_post_ids, _ = timeline_page(db, user_id, 50, rebuild_if_empty=False)
         network_posts = db.query(Post).filter(
-            Post.user_id.in_(list(connected_user_ids) + [user_id])
-        ).order_by(Post.created_at.desc()).limit(50).all()
+            Post.id.in_(network_post_ids)
+        ).order_by(Post.created_at.desc(), Post.id.desc()).all() if network_post_ids else []
         
-        # Get top performing posts from network
+        # Get top performing posts from network (indexed top-K on the decayed engagement score)
         top_posts = []
-        for post in network_posts[:10]:
-            # Calculate engagement (likes + comments)
-            engagement = 0
-            if hasattr(post, 'likes'):
-                engagement += len(post.likes) if post.likes else 0
-            if hasattr(post, 'comments'):
-                engagement += len(post.comments) if post.comments else 0
-            
+        for post, author in top_network_posts(db, user_id, 5):
             top_posts.append({
                 'id': post.id,
                 'content': post.content[:100] + "..." if len(post.content) > 100 else post.content,
-                'user_name': post.user.full_name if post.user else "Unknown User",
-                'engagement': engagement,
+                'user_name': author.full_name if author else "Unknown User",
+                'engagement': (post.likes_count or 0) + (post.comments_count or 0),
                 'created_at': post.created_at
             })
         
-        # Sort by engagement
-        top_posts.sort(key=lambda x: x['engagement'], reverse=True)
-        
         # Get network activity insights
         network_insights = {
             'new_connections_this_week': len([c for c in connections if c.created_at and (datetime.now() - c.created_at).days <= 7]),
@@ -96,7 +93,7 @@ def get_analytics_data(db: Session, user_id: int):
         
         return {
             'network_stats': network_stats,
-            'top_posts': top_posts[:5],  # Top 5 posts
+            'top_posts': top_posts,  # Top 5 posts
             'network_insights': network_insights,
             'connection_growth': connection_growth,
             'profile_views_trend': profile_views_trend,
@@ -241,6 +238,14 @@ async def home_page(request: Request):
     base_url = get_base_url(request)
     return RedirectResponse(url=f"{base_url}/home", status_code=307)
 
+@router.get("/home/analytics", response_class=JSONResponse)
+async def home_analytics(
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_read_db)
+):
+    """Network analytics for the home dashboard (served from the read replica)"""
+    return {"success": True, "data": get_analytics_data(db, current_user.id)}
+
 @router.post("/update-profile")
 async def update_profile(
     request: Request,
@@ -363,7 +368,7 @@ async def debug_hr_page(request: Request, current_user: User = Depends(get_curre
 @router.get("/debug/jobs", response_class=JSONResponse)
 async def debug_jobs(
     request: Request,
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """Debug route to check jobs in database"""
     try:
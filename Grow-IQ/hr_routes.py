@@ -21,6 +21,8 @@ from sqlalchemy import desc, func
 from database_enhanced import get_db
 from models import User, Job, JobApplication
 from auth_utils import get_current_user
+from pagination_utils import keyset_paginate, cached_count
+from skill_service import users_with_skills
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -449,6 +451,8 @@ async def get_candidates(
     location: Optional[str] = Query(None),
     limit: int = Query(50),
     offset: int = Query(0),
+    cursor: Optional[str] = Query(None, description="Opaque cursor from next_cursor; pass an empty value for the first page"),
+    include_total: bool = Query(False, description="Include an approximate (cached) total in cursor mode"),
     db: Session = Depends(get_db),
     hr_user: User = Depends(get_hr_user)
 ):
@@ -465,16 +469,18 @@ async def get_candidates(
         
         if search:
             search_term = f"%{search}%"
-            query = query.filter(
+            matches = (
                 (User.full_name.ilike(search_term)) |
                 (User.email.ilike(search_term)) |
-                (User.title.ilike(search_term)) |
-                (User.skills.ilike(search_term))
+                (User.title.ilike(search_term))
             )
+            skill_match = users_with_skills(User.id, search)
+            query = query.filter(matches if skill_match is None else matches | skill_match)
         
-        if skills:
-            skills_term = f"%{skills}%"
-            query = query.filter(User.skills.ilike(skills_term))
+        # Every listed skill (or a synonym), matched by prefix through user_skills
+        skill_filter = users_with_skills(User.id, skills)
+        if skill_filter is not None:
+            query = query.filter(skill_filter)
         
         if experience_min:
             query = query.filter(User.experience_years >= experience_min)
@@ -483,11 +489,17 @@ async def get_candidates(
             location_term = f"%{location}%"
             query = query.filter(User.location.ilike(location_term))
         
-        # Get total count
-        total_count = query.count()
-        
-        # Apply pagination
-        candidates = query.offset(offset).limit(limit).all()
+        sort_keys = [(User.created_at, True), (User.id, True)]
+        next_cursor = None
+        if cursor is not None:
+            candidates, next_cursor = keyset_paginate(query, sort_keys, limit, cursor or None)
+            total_count = cached_count(query) if include_total else None
+        else:
+            # Get total count
+            total_count = query.count()
+            
+            # Apply pagination
+            candidates = query.order_by(User.created_at.desc(), User.id.desc()).offset(offset).limit(limit).all()
         
         # Format response
         candidates_data = []
@@ -516,11 +528,14 @@ async def get_candidates(
         return {
             "candidates": candidates_data,
             "total_count": total_count,
-            "offset": offset,
+            "offset": offset if cursor is None else None,
             "limit": limit,
+            "next_cursor": next_cursor,
             "status": "success"
         }
         
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error getting candidates: {e}")
         raise HTTPException(status_code=500, detail="Error retrieving candidates")
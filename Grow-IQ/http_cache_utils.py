@@ -0,0 +1,108 @@
+"""
+HTTP caching utilities for Qrow IQ
+Conditional GET support: weak ETags built from cheap validators (max ids,
+updated_at timestamps, counters) so polled endpoints can answer 304 Not
+Modified without building the response body, and static HTML pages held in
+memory pre-compressed with strong ETags
+"""
+
+import gzip
+import hashlib
+from typing import Any, Optional, Tuple
+
+from fastapi import Request, Response
+from fastapi.staticfiles import StaticFiles
+
+# Responses are per-user and must be revalidated on every poll
+PRIVATE_CACHE_CONTROL = "private, no-cache"
+
+# Content-addressed files: a new version always gets a new URL
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+# Static pages at stable URLs: reused for a day, then revalidated by ETag
+PAGE_CACHE_CONTROL = "public, max-age=86400"
+PRIVATE_PAGE_CACHE_CONTROL = "private, max-age=86400"
+
+
+class ImmutableStaticFiles(StaticFiles):
+    """StaticFiles for content-hashed files, served with a one-year immutable Cache-Control"""
+
+    def file_response(self, *args, **kwargs) -> Response:
+        response = super().file_response(*args, **kwargs)
+        response.headers["Cache-Control"] = IMMUTABLE_CACHE_CONTROL
+        return response
+
+
+def make_etag(*parts: Any) -> str:
+    """Weak ETag from validator values (timestamps, ids, counters, query params)"""
+    digest = hashlib.sha1(repr(parts).encode("utf-8")).hexdigest()[:20]
+    return f'W/"{digest}"'
+
+
+def _strip_weak(tag: str) -> str:
+    tag = tag.strip()
+    return tag[2:] if tag.startswith("W/") else tag
+
+
+def is_not_modified(request: Request, etag: str) -> bool:
+    """True when the request's If-None-Match matches etag (weak comparison)"""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    target = _strip_weak(etag)
+    return any(_strip_weak(tag) == target for tag in header.split(","))
+
+
+def set_cache_headers(response: Response, etag: str, cache_control: str = PRIVATE_CACHE_CONTROL):
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = cache_control
+
+
+def not_modified_response(etag: str, cache_control: str = PRIVATE_CACHE_CONTROL) -> Response:
+    """Empty 304 carrying the same validators as the full response"""
+    return Response(status_code=304, headers={"ETag": etag, "Cache-Control": cache_control})
+
+
+def conditional_response(request: Request, response: Response, etag: str) -> Optional[Response]:
+    """Set ETag/Cache-Control on response; return a 304 to send instead if the client is current"""
+    if is_not_modified(request, etag):
+        return not_modified_response(etag)
+    set_cache_headers(response, etag)
+    return None
+
+
+class CachedPage:
+    """A static HTML file read on first use and kept in memory with a gzip copy and strong ETags.
+
+    The ETag is a hash of the file, so a deploy that changes the page changes
+    the ETag and browsers pick it up on their next revalidation. The gzip copy
+    is a different representation and gets its own tag (suffixed "-gz").
+    """
+
+    def __init__(self, path: str, cache_control: str = PAGE_CACHE_CONTROL):
+        self.path = path
+        self.cache_control = cache_control
+        self._loaded: Optional[Tuple[bytes, bytes, str]] = None
+
+    def _load(self) -> Tuple[bytes, bytes, str]:
+        if self._loaded is None:
+            with open(self.path, "rb") as f:
+                body = f.read()
+            digest = hashlib.sha1(body).hexdigest()[:20]
+            self._loaded = (body, gzip.compress(body, compresslevel=9, mtime=0), digest)
+        return self._loaded
+
+    def response(self, request: Request) -> Response:
+        """304 if the client's copy is current, else the page (gzipped when accepted)"""
+        body, compressed, digest = self._load()
+        gzipped = "gzip" in request.headers.get("accept-encoding", "")
+        etag = f'"{digest}-gz"' if gzipped else f'"{digest}"'
+        headers = {"ETag": etag, "Cache-Control": self.cache_control, "Vary": "Accept-Encoding"}
+        if is_not_modified(request, etag):
+            return Response(status_code=304, headers=headers)
+        if gzipped:
+            return Response(compressed, media_type="text/html; charset=utf-8",
+                            headers={**headers, "Content-Encoding": "gzip"})
+        return Response(body, media_type="text/html; charset=utf-8", headers=headers)
@@ -4,12 +4,19 @@ from datetime import datetime
 from fastapi import APIRouter, Depends, HTTPException, status, Request, Form, Query, Response
 from fastapi.responses import HTMLResponse, RedirectResponse, JSONResponse
 from fastapi.templating import Jinja2Templates
+from sqlalchemy import func
 from sqlalchemy.orm import Session
-from typing import Optional, List, Tuple
+from typing import Optional, List
 import re
 from database_enhanced import get_db
 from models import User, Job, JobApplication
 from auth_utils import get_current_user, get_user_from_session
+from pagination_utils import keyset_paginate, cached_count, cursor_pagination_info
+from facet_utils import facet_counts
+from search_service import job_search_matches, job_skill_matches
+from search_history_service import record_search
+from skill_service import user_skill_names
+from job_token_service import normalize_tokens, matching_job_ids, top_matching_jobs
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -193,8 +200,7 @@ async def jobs_listing_page(
 ):
     """Display active jobs. If the user has profile skills, show only matching jobs."""
     try:
-        # Load active jobs (limit to recent for performance)
-        jobs = db.query(Job).filter(Job.is_active == True).order_by(Job.posted_at.desc()).limit(300).all()
+        jobs_query = db.query(Job).filter(Job.is_active == True)
 
         # Get current user from session
         session_token = request.cookies.get("session_token")
@@ -206,24 +212,20 @@ async def jobs_listing_page(
 
         # If user has skills, filter jobs by overlap - ONLY show matching jobs
         if current_user and current_user.skills:
-            user_tokens = _parse_user_skills(current_user.skills)
+            user_tokens = _user_skill_tokens(db, current_user)
             # Also include title and industry for better matching
             if current_user.title:
-                user_tokens |= _normalize_tokens(current_user.title)
+                user_tokens |= normalize_tokens(current_user.title)
             if current_user.industry:
-                user_tokens |= _normalize_tokens(current_user.industry)
+                user_tokens |= normalize_tokens(current_user.industry)
             
             if user_tokens:
+                # Only show jobs sharing a token with the user's skills - no fallback to all jobs
                 logger.info(f"Filtering jobs for user {current_user.email} with {len(user_tokens)} skill tokens")
-                filtered = []
-                for j in jobs:
-                    jt = _job_token_set(j)
-                    # Only include jobs where at least one skill matches
-                    if user_tokens.intersection(jt):
-                        filtered.append(j)
-                logger.info(f"Found {len(filtered)} matching jobs out of {len(jobs)} total jobs")
-                # Only show matching jobs - no fallback to all jobs
-                jobs = filtered
+                jobs_query = jobs_query.filter(Job.id.in_(matching_job_ids(user_tokens)))
+
+        # Limit to recent for performance
+        jobs = jobs_query.order_by(Job.posted_at.desc()).limit(300).all()
 
         return templates.TemplateResponse("jobs.html", {
             "request": request,
@@ -238,122 +240,19 @@ async def jobs_listing_page(
             detail="An error occurred while loading jobs"
         )
 
-@router.get("/jobs/search")
-async def search_jobs(
-    request: Request,
-    query: Optional[str] = Query(None, description="Search term"),
-    location: Optional[str] = Query(None, description="Filter by location"),
-    job_type: Optional[str] = Query(None, description="Filter by job type"),
-    db: Session = Depends(get_db)
-):
-    """Search for jobs by title, company, or description"""
-    try:
-        search_query = db.query(Job).filter(Job.is_active == True)
-        
-        if query:
-            search_terms = query.split()
-            for term in search_terms:
-                search_query = search_query.filter(
-                    (Job.title.ilike(f'%{term}%')) |
-                    (Job.company.ilike(f'%{term}%')) |
-                    (Job.description.ilike(f'%{term}%'))
-                )
-        
-        if location:
-            search_query = search_query.filter(Job.location.ilike(f'%{location}%'))
-            
-        if job_type:
-            search_query = search_query.filter(Job.job_type == job_type)
-        
-        jobs = search_query.order_by(Job.posted_at.desc()).limit(20).all()
-        
-        # Get poster information for each job
-        jobs_data = []
-        for job in jobs:
-            posted_by = db.query(User).get(job.posted_by)
-            jobs_data.append({
-                "id": job.id,
-                "title": job.title,
-                "company": job.company,
-                "location": job.location,
-                "job_type": job.job_type,
-                "salary_range": job.salary_range,
-                "description": job.description,
-                "posted_at": job.posted_at,
-                "posted_by": posted_by.full_name if posted_by else "Unknown",
-                "application_deadline": job.application_deadline
-            })
-        
-        return {"jobs": jobs_data, "total": len(jobs_data)}
-        
-    except Exception as e:
-        logging.error(f"Error searching jobs: {str(e)}")
-        raise HTTPException(status_code=500, detail=f"Error searching jobs: {str(e)}")
-
 # ==================== JOB RECOMMENDATIONS ====================
 
-def _normalize_tokens(text: str) -> set:
-    """Normalize text into tokens for skill matching"""
-    if not text:
-        return set()
-    text = text.lower()
-    # Split on non-alphanumeric characters, keep +, #, . for technologies like C++, C#, etc.
-    tokens = re.split(r"[^a-z0-9+.#]+", text)
-    stop = {
-        "the","a","an","and","or","of","for","to","in","on","with","at","by","from",
-        "is","are","be","this","that","as","it","your","you","we","our","their","they",
-        "job","role","position","responsibilities","requirements","skills","preferred","must",
-        "will","have","has","about","what","who","how","years","year","experience","exp"
-    }
-    # Filter out stop words and very short tokens (less than 2 chars)
-    normalized = {t for t in tokens if t and len(t) >= 2 and t not in stop}
-    return normalized
-
-def _parse_user_skills(skills_field: Optional[str]) -> set:
-    if not skills_field:
-        return set()
-    # Try JSON first
-    try:
-        import json
-        data = json.loads(skills_field)
-        if isinstance(data, list):
-            items = [s for s in data if isinstance(s, str)]
-            return _normalize_tokens(",".join(items))
-        if isinstance(data, dict):
-            keys = [k for k, v in data.items() if v]
-            return _normalize_tokens(",".join(keys))
-    except Exception:
-        pass
-    # Fallback: comma/semicolon/newline separated string
-    parts = re.split(r"[,;\n]+", skills_field)
-    return _normalize_tokens(",".join([p.strip() for p in parts if p.strip()]))
+def _user_skill_tokens(db: Session, user: User) -> set:
+    """Tokens of the user's skills, read from the indexed user_skills table"""
+    return normalize_tokens(",".join(user_skill_names(db, user.id)))
 
-def _job_token_set(job: Job) -> set:
-    parts: List[str] = []
-    if job.title:
-        parts.append(job.title)
-    if job.description:
-        parts.append(job.description)
-    if job.requirements:
-        parts.append(job.requirements)
-    if job.location:
-        parts.append(job.location)
-    if job.job_type:
-        parts.append(job.job_type)
-    return _normalize_tokens("\n".join(parts))
-
-def _score_job(user_tokens: set, job_tokens: set) -> float:
-    if not user_tokens or not job_tokens:
+def _score_job(overlap: int, user_token_count: int, job_token_count: int) -> float:
+    if not overlap:
         return 0.0
-    overlap = user_tokens.intersection(job_tokens)
     # Weighted score: precision and recall style harmonic mean to favor overlap without huge bias
-    precision = len(overlap) / max(len(job_tokens), 1)
-    recall = len(overlap) / max(len(user_tokens), 1)
-    if precision + recall == 0:
-        return 0.0
-    f1 = 2 * precision * recall / (precision + recall)
-    # Small bonus for exact skill string hits inside requirements/description length
-    return f1
+    precision = overlap / max(job_token_count, 1)
+    recall = overlap / max(user_token_count, 1)
+    return 2 * precision * recall / (precision + recall)
 
 @router.get("/api/jobs/recommendations")
 async def recommend_jobs(
@@ -364,13 +263,14 @@ async def recommend_jobs(
     """Recommend jobs based on the current user's skills (from profile)."""
     try:
         # Parse user skills tokens
-        user_tokens = _parse_user_skills(current_user.skills)
+        user_tokens = _user_skill_tokens(db, current_user)
 
-        # If no skills, just return latest active jobs
-        base_query = db.query(Job).filter(Job.is_active == True)
-        jobs: List[Job] = base_query.order_by(Job.posted_at.desc()).limit(200).all()
+        # Only jobs sharing a token with the user are read and scored
+        top = top_matching_jobs(db, user_tokens, _score_job, limit)
 
-        if not user_tokens:
+        # Latest active jobs when the user has no skills or nothing matches
+        if not top:
+            jobs: List[Job] = db.query(Job).filter(Job.is_active == True).order_by(Job.posted_at.desc()).limit(limit).all()
             jobs_simple = [
                 {
                     "id": j.id,
@@ -381,37 +281,10 @@ async def recommend_jobs(
                     "posted_at": j.posted_at.isoformat() if j.posted_at else None,
                     "score": 0.0
                 }
-                for j in jobs[:limit]
+                for j in jobs
             ]
             return {"jobs": jobs_simple, "total": len(jobs_simple)}
 
-        # Score jobs by overlap
-        scored: List[Tuple[float, Job]] = []
-        for job in jobs:
-            jt = _job_token_set(job)
-            score = _score_job(user_tokens, jt)
-            if score > 0:
-                scored.append((score, job))
-
-        # Fallback to recent jobs if no matches
-        if not scored:
-            jobs_simple = [
-                {
-                    "id": j.id,
-                    "title": j.title,
-                    "company": j.company,
-                    "location": j.location,
-                    "job_type": j.job_type,
-                    "posted_at": j.posted_at.isoformat() if j.posted_at else None,
-                    "score": 0.0
-                }
-                for j in jobs[:limit]
-            ]
-            return {"jobs": jobs_simple, "total": len(jobs_simple)}
-
-        # Sort and trim
-        scored.sort(key=lambda x: x[0], reverse=True)
-        top = scored[:limit]
         results = []
         for score, j in top:
             results.append({
@@ -542,7 +415,7 @@ async def apply_for_job(
         db.rollback()
         raise HTTPException(status_code=500, detail=f"Error submitting application: {str(e)}")
 
-@router.get("/jobs/{job_id}", response_class=HTMLResponse)
+@router.get("/jobs/{job_id:int}", response_class=HTMLResponse)
 async def job_detail_page(
     request: Request,
     job_id: int,
@@ -721,28 +594,54 @@ async def create_debug_session(response: Response, db: Session = Depends(get_db)
 
 # ==================== JOB SEARCH API ====================
 
+# Relative weight of the skill match against the match on the search box query
+SKILL_MATCH_WEIGHT = 0.5
+
+# Description characters shown in search results
+JOB_SNIPPET_CHARS = 200
+
+# Search result rows: everything a job card shows, without the full description
+JOB_LIST_COLUMNS = (
+    Job.id, Job.title, Job.company, Job.location, Job.job_type, Job.salary_range,
+    Job.posted_at, Job.is_active, func.substr(Job.description, 1, JOB_SNIPPET_CHARS).label("snippet"),
+)
+
+@router.get("/jobs/search")
 @router.get("/api/jobs/search")
 async def search_jobs(
     request: Request,
     q: Optional[str] = Query(None, description="Search query"),
     location: Optional[str] = Query(None, description="Location filter"),
     job_type: Optional[str] = Query(None, description="Job type filter"),
+    cursor: Optional[str] = Query(None, description="next_cursor of the previous page; omit for the first page"),
+    limit: int = Query(20, ge=1, le=100, description="Jobs per page"),
+    include_total: bool = Query(False, description="Also return an approximate total"),
     db: Session = Depends(get_db)
 ):
-    """Search jobs with filters, personalized by user skills"""
+    """Search jobs with filters, personalized by user skills.
+
+    Ranked by full-text relevance to `q` plus how strongly each job mentions
+    the user's skills; newest first when there is neither. Rows carry a short
+    description snippet; the full text is at /jobs/{job_id}/details. The
+    first page also carries location, company and job type facet counts.
+    """
     try:
-        from auth_utils import get_user_from_session
-        
-        query = db.query(Job).filter(Job.is_active == True)
+        query = db.query(*JOB_LIST_COLUMNS).filter(Job.is_active == True)
+        ranks = []
         
         # Apply search filters
         if q:
-            search_term = f"%{q}%"
-            query = query.filter(
-                (Job.title.ilike(search_term)) |
-                (Job.company.ilike(search_term)) |
-                (Job.description.ilike(search_term))
-            )
+            matches = job_search_matches(db, q)
+            if matches is not None:
+                query = query.join(matches, matches.c.id == Job.id)
+                ranks.append(matches.c.rank)
+            else:
+                search_term = f"%{q}%"
+                query = query.filter(
+                    (Job.title.ilike(search_term)) |
+                    (Job.company.ilike(search_term)) |
+                    (Job.description.ilike(search_term))
+                )
         
         if location:
             location_term = f"%{location}%"
@@ -751,91 +650,91 @@ async def search_jobs(
         if job_type:
             query = query.filter(Job.job_type == job_type)
         
-        # Get all matching jobs
-        jobs = query.order_by(Job.posted_at.desc()).all()
-        
         # Get current user and their skills for personalization
-        current_user = None
         user_skill_tokens = set()
+        viewer_id = None
         
         session_token = request.cookies.get("session_token")
         if session_token:
             try:
                 session_data = get_user_from_session(session_token, db)
                 if session_data and session_data.get("user_id"):
+                    viewer_id = session_data['user_id']
                     current_user = db.query(User).filter(User.id == session_data['user_id']).first()
                     if current_user and current_user.skills:
                         # Parse user skills
-                        user_skill_tokens = _parse_user_skills(current_user.skills)
+                        user_skill_tokens = _user_skill_tokens(db, current_user)
                         # Also include title and industry for better matching
                         if current_user.title:
-                            user_skill_tokens |= _normalize_tokens(current_user.title)
+                            user_skill_tokens |= normalize_tokens(current_user.title)
                         if current_user.industry:
-                            user_skill_tokens |= _normalize_tokens(current_user.industry)
+                            user_skill_tokens |= normalize_tokens(current_user.industry)
             except Exception as e:
                 logger.debug(f"Could not get user for personalization: {e}")
         
-        # Score and rank jobs based on user skills if available
+        if q and not cursor:
+            record_search(viewer_id, q, "jobs")
+        
+        # Only jobs matching at least one of the user's skills, the more the better
         if user_skill_tokens:
-            logger.info(f"User has {len(user_skill_tokens)} skill tokens. Filtering jobs to show only matching ones.")
-            scored_jobs = []
-            for job in jobs:
-                job_tokens = _job_token_set(job)
-                # Check if there's at least one skill match (intersection)
-                overlap = user_skill_tokens.intersection(job_tokens)
-                if overlap:
-                    match_score = _score_job(user_skill_tokens, job_tokens)
-                    # Only include jobs with at least one matching skill (score > 0)
-                    if match_score > 0:
-                        scored_jobs.append((match_score, job))
-                        logger.debug(f"Job '{job.title}' matches with skills: {overlap} (score: {match_score:.4f})")
-            
-            logger.info(f"Found {len(scored_jobs)} jobs matching user skills out of {len(jobs)} total jobs")
-            
-            # Sort by match score (descending), then by posted_at (descending)
-            scored_jobs.sort(key=lambda x: (x[0], x[1].posted_at or datetime.min), reverse=True)
-            
-            # Convert to dict with match scores - only jobs with matching skills
-            job_list = []
-            for score, job in scored_jobs:
-                job_dict = {
-                    "id": job.id,
-                    "title": job.title,
-                    "company": job.company,
-                    "location": job.location,
-                    "job_type": job.job_type,
-                    "salary_range": job.salary_range,
-                    "description": job.description,
-                    "posted_at": job.posted_at.isoformat() if job.posted_at else None,
-                    "is_active": job.is_active,
-                    "match_score": round(score, 4)  # Add match score for frontend display
-                }
-                job_list.append(job_dict)
+            skill_matches = job_skill_matches(db, user_skill_tokens)
+            if skill_matches is not None:
+                query = query.join(skill_matches, skill_matches.c.id == Job.id)
+                ranks.append(skill_matches.c.rank * SKILL_MATCH_WEIGHT)
+        
+        # Facet counts over the whole filtered set, sent with the first page only
+        facets = None
+        if not cursor:
+            facets = facet_counts(query, {"location": Job.location, "company": Job.company, "job_type": Job.job_type})
+        
+        if ranks:
+            # bm25 / negated ts_rank: lower is better
+            rank = sum(ranks[1:], ranks[0])
+            query = query.add_columns(rank.label("rank"))
+            sort_keys = [(rank, False), (Job.id, True)]
+            row_key = lambda row: [row.rank, row.id]
         else:
-            # No user skills, return jobs ordered by recency
-            # Note: If user is not authenticated or has no skills, show all jobs
-            job_list = []
-            for job in jobs:
-                job_dict = {
-                    "id": job.id,
-                    "title": job.title,
-                    "company": job.company,
-                    "location": job.location,
-                    "job_type": job.job_type,
-                    "salary_range": job.salary_range,
-                    "description": job.description,
-                    "posted_at": job.posted_at.isoformat() if job.posted_at else None,
-                    "is_active": job.is_active,
-                    "match_score": 0.0  # No match score for unauthenticated users
-                }
-                job_list.append(job_dict)
+            sort_keys = [(Job.posted_at, True), (Job.id, True)]
+            row_key = None
+        
+        rows, next_cursor = keyset_paginate(query, sort_keys, limit, cursor or None, row_key)
+        job_list = [
+            {
+                "id": row.id,
+                "title": row.title,
+                "company": row.company,
+                "location": row.location,
+                "job_type": row.job_type,
+                "salary_range": row.salary_range,
+                "snippet": row.snippet,
+                "posted_at": row.posted_at.isoformat() if row.posted_at else None,
+                "is_active": row.is_active,
+                # Higher is a better match; 0.0 when nothing was ranked
+                "match_score": round(-row.rank, 4) if ranks else 0.0
+            }
+            for row in rows
+        ]
         
-        return {"jobs": job_list, "total": len(job_list)}
+        return {
+            "jobs": job_list,
+            "pagination": cursor_pagination_info(limit, next_cursor, cached_count(query) if include_total else None),
+            "facets": facets
+        }
         
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error searching jobs: {e}")
         raise HTTPException(status_code=500, detail=f"Error searching jobs: {str(e)}")
 
+@router.get("/jobs/{job_id:int}/details")
+async def get_job(job_id: int, db: Session = Depends(get_db)):
+    """Full details of one active job"""
+    job = db.query(Job).filter(Job.id == job_id, Job.is_active == True).first()
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job.to_dict()
+
 # ==================== HR JOB MANAGEMENT API ====================
 
 @router.get("/api/hr/jobs")
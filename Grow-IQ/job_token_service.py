@@ -0,0 +1,141 @@
+"""
+Job token index service for Qrow IQ
+Tokenizes each job once, when it is created or edited, into the job_tokens
+inverted index (token -> job ids). Recommendations read only the jobs that
+share a token with the user, so their cost grows with the number of matching
+jobs rather than the size of the catalog.
+"""
+
+import re
+import heapq
+import logging
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+from sqlalchemy import delete, event, func, insert, inspect, select
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+
+from models import Job, JobToken
+
+logger = logging.getLogger(__name__)
+
+MAX_TOKEN_LENGTH = 64
+
+# Job fields whose text is indexed
+TOKEN_FIELDS = ("title", "description", "requirements", "location", "job_type")
+
+_STOP_WORDS = {
+    "the", "a", "an", "and", "or", "of", "for", "to", "in", "on", "with", "at", "by", "from",
+    "is", "are", "be", "this", "that", "as", "it", "your", "you", "we", "our", "their", "they",
+    "job", "role", "position", "responsibilities", "requirements", "skills", "preferred", "must",
+    "will", "have", "has", "about", "what", "who", "how", "years", "year", "experience", "exp"
+}
+
+
+def normalize_tokens(text: Optional[str]) -> Set[str]:
+    """Lowercased word tokens without stop words; +, # and . are kept for names like C++, C# and Node.js"""
+    if not text:
+        return set()
+    tokens = re.split(r"[^a-z0-9+.#]+", text.lower())
+    return {t for t in tokens if 2 <= len(t) <= MAX_TOKEN_LENGTH and t not in _STOP_WORDS}
+
+
+def job_tokens(job: Job) -> Set[str]:
+    """Token set of a job's indexed fields"""
+    return normalize_tokens("\n".join(getattr(job, field) or "" for field in TOKEN_FIELDS))
+
+
+def index_job_tokens(connection, tokens_by_job: Dict[int, Set[str]]):
+    """Replace the job_tokens rows of the given jobs"""
+    if not tokens_by_job:
+        return
+    connection.execute(delete(JobToken).where(JobToken.job_id.in_(list(tokens_by_job))))
+    rows = [{"token": token, "job_id": job_id} for job_id, tokens in tokens_by_job.items() for token in tokens]
+    if rows:
+        connection.execute(insert(JobToken), rows)
+
+
+def backfill_job_tokens(connection, batch_size: int = 500) -> int:
+    """Index every job. Returns the number of jobs indexed."""
+    columns = [getattr(Job, field) for field in TOKEN_FIELDS]
+    job_ids = connection.scalars(select(Job.id).order_by(Job.id)).all()
+    for start in range(0, len(job_ids), batch_size):
+        rows = connection.execute(select(Job.id, *columns).where(Job.id.in_(job_ids[start:start + batch_size]))).all()
+        index_job_tokens(connection, {
+            row[0]: normalize_tokens("\n".join(value or "" for value in row[1:])) for row in rows
+        })
+    return len(job_ids)
+
+
+def ensure_job_token_index(engine: Optional[Engine] = None) -> bool:
+    """Fill job_tokens from existing jobs when it is still empty. Returns True if it had to be filled.
+
+    The table itself comes from create_all; migrate_job_tokens.py rebuilds it on demand.
+    """
+    if engine is None:
+        from database_enhanced import db_manager
+        engine = db_manager.engine
+    with engine.begin() as conn:
+        if conn.scalar(select(JobToken.job_id).limit(1)) is not None or conn.scalar(select(Job.id).limit(1)) is None:
+            return False
+        indexed = backfill_job_tokens(conn)
+    logger.info(f"Built the job token index for {indexed} jobs")
+    return True
+
+
+# ==================== CANDIDATES ====================
+
+def matching_job_ids(tokens: Iterable[str]):
+    """Subquery of the ids of jobs sharing at least one token"""
+    return select(JobToken.job_id).where(JobToken.token.in_(list(tokens))).distinct()
+
+
+def top_matching_jobs(db: Session, user_tokens: Set[str], score: Callable[[int, int, int], float],
+                      limit: int) -> List[Tuple[float, Job]]:
+    """Best active jobs for the user's tokens, as (score, job) with the highest score (then newest) first.
+
+    `score(overlap, user_token_count, job_token_count)` is called once per
+    job sharing a token with the user; jobs scoring 0 are dropped.
+    """
+    if not user_tokens:
+        return []
+    overlaps = (
+        select(JobToken.job_id, func.count().label("overlap"))
+        .where(JobToken.token.in_(list(user_tokens)))
+        .group_by(JobToken.job_id)
+    ).subquery()
+    # Read per matching job from the job_id index
+    token_count = select(func.count()).where(JobToken.job_id == overlaps.c.job_id).scalar_subquery()
+    rows = db.execute(
+        select(overlaps.c.job_id, overlaps.c.overlap, token_count, Job.posted_at)
+        .join(Job, Job.id == overlaps.c.job_id)
+        .where(Job.is_active == True)
+    ).all()
+
+    scored = []
+    for job_id, overlap, count, posted_at in rows:
+        value = score(overlap, len(user_tokens), count)
+        if value > 0:
+            scored.append((value, posted_at.timestamp() if posted_at else 0.0, job_id))
+    best = heapq.nlargest(limit, scored)
+    jobs = {job.id: job for job in db.query(Job).filter(Job.id.in_([job_id for _, _, job_id in best]))}
+    return [(value, jobs[job_id]) for value, _, job_id in best if job_id in jobs]
+
+
+# ==================== CHANGE TRACKING ====================
+
+@event.listens_for(Session, "after_flush")
+def _index_changed_jobs(session, flush_context):
+    changed = {}
+    for job in session.new | session.dirty | session.deleted:
+        if not isinstance(job, Job):
+            continue
+        if job in session.dirty:
+            state = inspect(job)
+            if not any(state.attrs[field].history.has_changes() for field in TOKEN_FIELDS):
+                continue
+        tokens = set() if job in session.deleted else job_tokens(job)
+        if tokens or job not in session.new:
+            changed[job.id] = tokens
+    if changed:
+        index_job_tokens(session.connection(), changed)
@@ -0,0 +1,172 @@
+"""
+Media service for Qrow IQ
+Derives responsive variants of uploaded post images in the background: each
+image is resized once to a few widths and encoded as WebP and JPEG under
+content-hashed filenames, so the files never change and can be cached forever
+"""
+
+import io
+import os
+import hashlib
+import logging
+from collections import defaultdict
+from typing import Any, Dict, Iterable, List, Optional
+
+from PIL import Image, ImageOps
+from sqlalchemy import delete, select
+from sqlalchemy.orm import Session
+
+from models import MediaVariant, Post
+
+logger = logging.getLogger(__name__)
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+UPLOADS_DIR = os.path.join(BASE_DIR, "static", "uploads")
+VARIANTS_DIR = os.path.join(UPLOADS_DIR, "variants")
+VARIANTS_URL = "/static/uploads/variants"
+
+# Target widths; images narrower than a target are not upscaled
+VARIANT_WIDTHS = {"thumb": 320, "feed": 720, "full": 1600}
+
+# (format name, Pillow format, encoder options)
+VARIANT_FORMATS = [
+    ("webp", "WEBP", {"quality": 80, "method": 4}),
+    ("jpeg", "JPEG", {"quality": 82, "optimize": True, "progressive": True}),
+]
+
+# Vector and animated sources are served as uploaded
+_SKIPPED_EXTENSIONS = {".svg", ".gif"}
+
+_EXIF_ORIENTATION = 0x0112
+_ROTATED_ORIENTATIONS = {5, 6, 7, 8}
+
+
+def _write_hashed(data: bytes, width: int, ext: str, dest_dir: str) -> str:
+    """Store data under a name derived from its content; identical output is written once"""
+    filename = f"{hashlib.sha256(data).hexdigest()[:16]}-{width}w.{ext}"
+    path = os.path.join(dest_dir, filename)
+    if not os.path.exists(path):
+        tmp_path = f"{path}.part"
+        with open(tmp_path, "wb") as out:
+            out.write(data)
+        os.replace(tmp_path, path)
+    return filename
+
+
+def generate_variants(source_path: str, dest_dir: str = VARIANTS_DIR) -> List[Dict[str, Any]]:
+    """Resize one image to every VARIANT_WIDTHS entry in every VARIANT_FORMATS format.
+
+    Returns one dict per variant with kind, format, width, height and filename.
+    Returns [] for sources that are not resized (SVG, GIF, animated images).
+    """
+    if os.path.splitext(source_path)[1].lower() in _SKIPPED_EXTENSIONS:
+        return []
+    os.makedirs(dest_dir, exist_ok=True)
+
+    with Image.open(source_path) as img:
+        if getattr(img, "is_animated", False):
+            return []
+        # JPEG sources are decoded at a reduced scale when even the largest variant is smaller
+        largest = max(VARIANT_WIDTHS.values())
+        width, height = img.size
+        rotated = img.getexif().get(_EXIF_ORIENTATION) in _ROTATED_ORIENTATIONS
+        if rotated:
+            width, height = height, width  # the stored height becomes the displayed width
+        if width > largest:
+            needed = (largest, round(height * largest / width))
+            img.draft("RGB", needed[::-1] if rotated else needed)
+        img = ImageOps.exif_transpose(img)
+        img.load()
+
+    if img.mode in ("RGBA", "LA") or (img.mode == "P" and "transparency" in img.info):
+        img = img.convert("RGBA")
+        flat = Image.new("RGB", img.size, (255, 255, 255))
+        flat.paste(img, mask=img.getchannel("A"))
+    else:
+        img = img.convert("RGB")
+        flat = img
+
+    variants = []
+    previous = None
+    # Smallest first, so a source narrower than a target reuses the previous variant
+    for kind, target in sorted(VARIANT_WIDTHS.items(), key=lambda item: item[1]):
+        width = min(target, img.width)
+        if previous and previous[0] == width:
+            variants.extend(dict(v, kind=kind) for v in previous[1])
+            continue
+        height = max(1, round(img.height * width / img.width))
+        resized = img if width == img.width else img.resize((width, height), Image.LANCZOS)
+        resized_flat = flat if width == img.width else flat.resize((width, height), Image.LANCZOS)
+
+        encoded = []
+        for fmt, pil_format, options in VARIANT_FORMATS:
+            buffer = io.BytesIO()
+            (resized if pil_format == "WEBP" else resized_flat).save(buffer, pil_format, **options)
+            encoded.append({
+                "kind": kind,
+                "format": fmt,
+                "width": width,
+                "height": height,
+                "filename": _write_hashed(buffer.getvalue(), width, "jpg" if fmt == "jpeg" else fmt, dest_dir),
+            })
+        variants.extend(encoded)
+        previous = (width, encoded)
+    return variants
+
+
+def store_variants(db: Session, source: str, variants: List[Dict[str, Any]]):
+    """Replace the recorded variants of source. The caller commits."""
+    db.execute(delete(MediaVariant).where(MediaVariant.source == source))
+    db.add_all([MediaVariant(source=source, **variant) for variant in variants])
+
+
+def build_post_variants(post_id: int):
+    """Background task run after a post with an image is created"""
+    from database_enhanced import get_db_context
+    try:
+        with get_db_context() as db:
+            source = db.execute(select(Post.image_path).where(Post.id == post_id)).scalar()
+            if not source:
+                return
+            variants = generate_variants(os.path.join(UPLOADS_DIR, source))
+            store_variants(db, source, variants)
+        logger.info(f"Generated {len(variants)} image variants for post {post_id}")
+    except Exception as e:
+        logger.error(f"Image variant generation failed for post {post_id}: {e}")
+
+
+def variant_url(filename: str) -> str:
+    return f"{VARIANTS_URL}/{filename}"
+
+
+def load_image_variants(db: Session, sources: Iterable[Optional[str]]) -> Dict[str, Dict[str, Any]]:
+    """Variant URLs for a page of image filenames, from one IN query.
+
+    Maps each source that has variants to
+    {"webp": {"thumb", "feed", "full", "srcset"}, "jpeg": {...}, "width", "height"};
+    sources still being processed (or never resized) are absent.
+    """
+    sources = list({source for source in sources if source})
+    if not sources:
+        return {}
+    rows = db.execute(
+        select(MediaVariant).where(MediaVariant.source.in_(sources))
+        .order_by(MediaVariant.source, MediaVariant.width)
+    ).scalars().all()
+
+    grouped: Dict[str, List[MediaVariant]] = defaultdict(list)
+    for row in rows:
+        grouped[row.source].append(row)
+
+    result = {}
+    for source, variants in grouped.items():
+        entry: Dict[str, Any] = {}
+        for fmt, _, _ in VARIANT_FORMATS:
+            urls = {v.kind: variant_url(v.filename) for v in variants if v.format == fmt}
+            widths = sorted({(v.width, v.filename) for v in variants if v.format == fmt})
+            urls["srcset"] = ", ".join(f"{variant_url(filename)} {width}w" for width, filename in widths)
+            entry[fmt] = urls
+        entry["width"] = max(v.width for v in variants)
+        entry["height"] = max(v.height for v in variants)
+        result[source] = entry
+    return result
@@ -8,6 +8,10 @@ from sqlalchemy import and_, or_, func
 
 from database_enhanced import get_db, db_manager
 from auth_utils import get_user_from_session
+from pagination_utils import keyset_paginate
+from timeline_service import link_timelines
+from graph_service import record_connection
+from connection_service import find_connection
 from models import User, Connection
 from models import Message
 from werkzeug.security import generate_password_hash, check_password_hash
@@ -274,16 +278,13 @@ async def create_connection(
         raise HTTPException(status_code=404, detail="User not found")
 
     # Check existing connection both directions
-    existing = db.query(Connection).filter(
-        or_(
-            and_(Connection.user_id == current_user.id, Connection.connected_user_id == receiver_id),
-            and_(Connection.user_id == receiver_id, Connection.connected_user_id == current_user.id),
-        )
-    ).first()
+    existing = find_connection(db, current_user.id, receiver_id)
     if existing:
         # If a reverse pending exists where current_user is receiver, just accept it
         if existing.status == "pending" and existing.connected_user_id == current_user.id:
             existing.status = "accepted"
+            link_timelines(db, existing.user_id, existing.connected_user_id)
+            record_connection(db, existing.user_id, existing.connected_user_id)
             db.commit()
             sender = db.query(User).filter(User.id == existing.user_id).first()
             return JSONResponse(content=serialize_connection(existing, sender=sender, receiver=current_user), status_code=200)
@@ -314,6 +315,8 @@ async def accept_connection(
     if conn.connected_user_id != current_user.id:
         raise HTTPException(status_code=403, detail="Not authorized to accept this request")
     conn.status = "accepted"
+    link_timelines(db, conn.user_id, conn.connected_user_id)
+    record_connection(db, conn.user_id, conn.connected_user_id)
     db.commit()
     sender = db.query(User).filter(User.id == conn.user_id).first()
     return serialize_connection(conn, sender=sender, receiver=current_user)
@@ -343,33 +346,38 @@ async def get_chat_messages(
     other_user_id: int,
     limit: int = 50,
     offset: int = 0,
+    cursor: Optional[str] = None,
     db: Session = Depends(get_db),
 ):
+    """Chat history, newest page first (messages within a page are oldest-first).
+
+    Pass `cursor` (empty for the latest page, then `next_cursor`) to page back
+    through older messages with keyset pagination; offset is kept for compatibility.
+    """
     current_user = _resolve_optional_user(request, db)
     # must be connected (accepted) in either direction
-    connection = db.query(Connection).filter(
-        or_(
-            and_(Connection.user_id == current_user.id, Connection.connected_user_id == other_user_id),
-            and_(Connection.user_id == other_user_id, Connection.connected_user_id == current_user.id),
-        ),
-        Connection.status == "accepted",
-    ).first()
+    connection = find_connection(db, current_user.id, other_user_id, "accepted")
     if not connection:
         raise HTTPException(status_code=403, detail="Can only view chat history with connections")
 
-    messages = (
-        db.query(Message)
-        .filter(
-            or_(
-                and_(Message.sender_id == current_user.id, Message.receiver_id == other_user_id),
-                and_(Message.sender_id == other_user_id, Message.receiver_id == current_user.id),
-            )
+    query = db.query(Message).filter(
+        or_(
+            and_(Message.sender_id == current_user.id, Message.receiver_id == other_user_id),
+            and_(Message.sender_id == other_user_id, Message.receiver_id == current_user.id),
         )
-        .order_by(Message.timestamp.desc())
-        .offset(offset)
-        .limit(limit)
-        .all()
     )
+    next_cursor = None
+    if cursor is not None:
+        messages, next_cursor = keyset_paginate(
+            query, [(Message.created_at, True), (Message.id, True)], limit, cursor or None
+        )
+    else:
+        messages = (
+            query.order_by(Message.created_at.desc(), Message.id.desc())
+            .offset(offset)
+            .limit(limit)
+            .all()
+        )
 
     other = db.query(User).filter(User.id == other_user_id).first()
     result = []
@@ -380,12 +388,12 @@ async def get_chat_messages(
                 "sender_id": m.sender_id,
                 "receiver_id": m.receiver_id,
                 "content": m.content,
-                "timestamp": m.timestamp.isoformat() if m.timestamp else None,
+                "timestamp": m.created_at.isoformat() if m.created_at else None,
                 "is_read": m.is_read,
                 "sender": serialize_user(current_user if m.sender_id == current_user.id else other),
             }
         )
-    return {"messages": list(reversed(result))}
+    return {"messages": list(reversed(result)), "next_cursor": next_cursor}
 
 
 @router.post("/messages")
@@ -401,13 +409,7 @@ async def send_message(
         raise HTTPException(status_code=400, detail="receiver_id and content are required")
 
     # verify connection exists and accepted
-    connection = db.query(Connection).filter(
-        or_(
-            and_(Connection.user_id == current_user.id, Connection.connected_user_id == receiver_id),
-            and_(Connection.user_id == receiver_id, Connection.connected_user_id == current_user.id),
-        ),
-        Connection.status == "accepted",
-    ).first()
+    connection = find_connection(db, current_user.id, receiver_id, "accepted")
     if not connection:
         raise HTTPException(status_code=403, detail="Can only message your connections")
 
@@ -1,8 +1,10 @@
-from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
 from sqlalchemy.orm import Session
 from database import get_db
-from models import Message, User, Connection
+from models import Message, User
+from connection_service import find_connection
 from auth_utils import get_user_from_session
+from http_cache_utils import make_etag, conditional_response
 from typing import List, Optional
 from pydantic import BaseModel
 from datetime import datetime
@@ -56,10 +58,7 @@ async def send_message(
         raise HTTPException(status_code=404, detail="Receiver not found")
     
     # Check if users are connected
-    connection = db.query(Connection).filter(
-        ((Connection.user_id == sender_id) & (Connection.connected_user_id == message_data.receiver_id)) |
-        ((Connection.user_id == message_data.receiver_id) & (Connection.connected_user_id == sender_id))
-    ).filter(Connection.status == 'accepted').first()
+    connection = find_connection(db, sender_id, message_data.receiver_id, 'accepted')
     
     if not connection:
         raise HTTPException(status_code=403, detail="You can only message your connections")
@@ -97,10 +96,7 @@ async def get_chat_history(
     current_user_id = get_authenticated_user_id(request, db)
     
     # Check if users are connected
-    connection = db.query(Connection).filter(
-        ((Connection.user_id == current_user_id) & (Connection.connected_user_id == user_id)) |
-        ((Connection.user_id == user_id) & (Connection.connected_user_id == current_user_id))
-    ).filter(Connection.status == 'accepted').first()
+    connection = find_connection(db, current_user_id, user_id, 'accepted')
     
     if not connection:
         raise HTTPException(status_code=403, detail="You can only view messages with your connections")
@@ -212,9 +208,10 @@ async def mark_message_read(
 @router.get("/api/messages/unread-count")
 async def get_unread_count(
     request: Request,
+    response: Response,
     db: Session = Depends(get_db)
 ):
-    """Get unread message count for current user"""
+    """Get unread message count for current user (304 when If-None-Match is current)"""
     current_user_id = get_authenticated_user_id(request, db)
     
     unread_count = db.query(Message).filter(
@@ -222,4 +219,7 @@ async def get_unread_count(
         Message.is_read == False
     ).count()
     
+    not_modified = conditional_response(request, response, make_etag(current_user_id, unread_count))
+    if not_modified:
+        return not_modified
     return {"unread_count": unread_count}
\ No newline at end of file
@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+"""
+Database migration script to add per-user connection counters
+"""
+import os
+import sys
+import logging
+
+# Add the current directory to Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from database_enhanced import get_db, db_manager
+from connection_service import ensure_connection_counter_schema, refresh_connection_counters
+from sqlalchemy import text
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+def migrate_connection_counters():
+    """Add users.connections_count / pending_in_count / pending_out_count and backfill them"""
+    try:
+        logger.info("Starting connection counters migration...")
+
+        if db_manager.engine.dialect.name == "sqlite":
+            if ensure_connection_counter_schema():
+                logger.info("Connection counter columns added and backfilled")
+                return True
+        else:
+            with db_manager.engine.begin() as conn:
+                for column in ("connections_count", "pending_in_count", "pending_out_count"):
+                    conn.execute(text(f"ALTER TABLE users ADD COLUMN IF NOT EXISTS {column} INTEGER NOT NULL DEFAULT 0"))
+
+        # Columns already present: recount anyway so the migration can be re-run safely
+        db = next(get_db())
+        updated = refresh_connection_counters(db)
+        db.commit()
+        logger.info(f"Recounted connections for {updated} users")
+
+        logger.info("Connection counters migration completed successfully!")
+        return True
+
+    except Exception as e:
+        logger.error(f"Error during connection counters migration: {e}")
+        if 'db' in locals():
+            db.rollback()
+        return False
+    finally:
+        if 'db' in locals():
+            db.close()
+
+if __name__ == "__main__":
+    print("🔧 Connection Counters Migration")
+    print("=" * 40)
+
+    if migrate_connection_counters():
+        print("✅ users connection counters added and backfilled!")
+    else:
+        print("❌ Connection counters migration failed!")
+        sys.exit(1)
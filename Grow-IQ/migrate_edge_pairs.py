@@ -0,0 +1,52 @@
+#!/usr/bin/env python3
+"""
+Database migration script to store connections and friend requests by canonical user pair
+"""
+import os
+import sys
+import logging
+
+# Add the current directory to Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from database_enhanced import db_manager
+from connection_service import add_edge_pair_columns, upgrade_edge_storage
+from sqlalchemy import text
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+def migrate_edge_pairs():
+    """Add low_user_id/high_user_id, collapse duplicate edges and pending requests, and add the unique indexes"""
+    try:
+        logger.info("Starting edge pair migration...")
+
+        with db_manager.engine.begin() as conn:
+            if db_manager.engine.dialect.name == "sqlite":
+                add_edge_pair_columns(conn)
+            else:
+                for table in ("connections", "friend_requests"):
+                    conn.execute(text(f"ALTER TABLE {table} ADD COLUMN IF NOT EXISTS low_user_id INTEGER"))
+                    conn.execute(text(f"ALTER TABLE {table} ADD COLUMN IF NOT EXISTS high_user_id INTEGER"))
+            # Safe to re-run: only surplus rows are removed
+            deleted, cancelled = upgrade_edge_storage(conn)
+        logger.info(f"Removed {deleted} duplicate connections, cancelled {cancelled} duplicate pending requests")
+
+        logger.info("Edge pair migration completed successfully!")
+        return True
+
+    except Exception as e:
+        logger.error(f"Error during edge pair migration: {e}")
+        return False
+
+if __name__ == "__main__":
+    print("🔧 Connection Pair Migration")
+    print("=" * 40)
+
+    if migrate_edge_pairs():
+        print("✅ Connections and requests stored once per user pair!")
+        print("📊 New indexes: uq_connection_pair, uq_friend_request_pending_pair")
+    else:
+        print("❌ Edge pair migration failed!")
+        sys.exit(1)
@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""
+Database migration script to backfill post engagement counters
+"""
+import os
+import sys
+import logging
+
+# Add the current directory to Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from database_enhanced import get_db
+from feed_service import reconcile_engagement_counters
+from sqlalchemy import text
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+def migrate_engagement_counters():
+    """Enforce one like per user per post and backfill likes/comments counters"""
+    try:
+        logger.info("Starting engagement counters migration...")
+
+        # Get database connection
+        db = next(get_db())
+
+        # Drop duplicate likes left over from before the unique constraint
+        result = db.execute(text("""
+            DELETE FROM post_likes
+            WHERE id NOT IN (SELECT MIN(id) FROM post_likes GROUP BY post_id, user_id)
+        """))
+        logger.info(f"Removed {result.rowcount} duplicate likes")
+
+        # Older databases were created without uq_post_like_post_user
+        db.execute(text("""
+            CREATE UNIQUE INDEX IF NOT EXISTS uq_post_like_post_user_idx ON post_likes (post_id, user_id)
+        """))
+        db.commit()
+
+        # Counters were never maintained before, so most rows need a backfill
+        fixed = reconcile_engagement_counters(db)
+        logger.info(f"Backfilled engagement counters on {fixed} posts")
+
+        logger.info("Engagement counters migration completed successfully!")
+        return True
+
+    except Exception as e:
+        logger.error(f"Error during engagement counters migration: {e}")
+        if 'db' in locals():
+            db.rollback()
+        return False
+    finally:
+        if 'db' in locals():
+            db.close()
+
+if __name__ == "__main__":
+    print("🔧 Engagement Counters Migration")
+    print("=" * 40)
+
+    if migrate_engagement_counters():
+        print("✅ Post likes/comments counters backfilled successfully!")
+    else:
+        print("❌ Engagement counters migration failed!")
+        sys.exit(1)
@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+"""
+Database migration script to add the time-decayed post engagement score
+"""
+import os
+import sys
+import logging
+
+# Add the current directory to Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from database_enhanced import get_db, db_manager
+from feed_service import ensure_engagement_score_schema, rescore_engagement
+from sqlalchemy import text
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+def migrate_engagement_score():
+    """Add posts.engagement_score with its index and score every existing post"""
+    try:
+        logger.info("Starting engagement score migration...")
+
+        if db_manager.engine.dialect.name == "sqlite":
+            if ensure_engagement_score_schema():
+                logger.info("Engagement score column added and backfilled")
+                return True
+        else:
+            with db_manager.engine.begin() as conn:
+                conn.execute(text("ALTER TABLE posts ADD COLUMN IF NOT EXISTS engagement_score DOUBLE PRECISION DEFAULT 0.0"))
+                conn.execute(text("CREATE INDEX IF NOT EXISTS ix_posts_engagement_score ON posts (engagement_score)"))
+
+        # Column already present: rescore anyway so the migration can be re-run safely
+        # (this also moves scores stored before they were kept in log space)
+        db = next(get_db())
+        scored = rescore_engagement(db)
+        logger.info(f"Scored {scored} posts")
+
+        logger.info("Engagement score migration completed successfully!")
+        return True
+
+    except Exception as e:
+        logger.error(f"Error during engagement score migration: {e}")
+        if 'db' in locals():
+            db.rollback()
+        return False
+    finally:
+        if 'db' in locals():
+            db.close()
+
+if __name__ == "__main__":
+    print("🔧 Engagement Score Migration")
+    print("=" * 40)
+
+    if migrate_engagement_score():
+        print("✅ posts.engagement_score added and backfilled!")
+    else:
+        print("❌ Engagement score migration failed!")
+        sys.exit(1)
@@ -0,0 +1,50 @@
+#!/usr/bin/env python3
+"""
+Database migration script to add the job full-text search index
+"""
+import os
+import sys
+import logging
+
+# Add the current directory to Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from database_enhanced import db_manager
+from search_service import create_search_index, search_index_exists
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+def migrate_job_search():
+    """Add jobs_fts (SQLite) or jobs.search_vector with a GIN index (PostgreSQL)"""
+    try:
+        logger.info("Starting job search index migration...")
+
+        dialect = db_manager.engine.dialect.name
+        if dialect not in ("sqlite", "postgresql"):
+            logger.warning(f"No full-text index for {dialect}; job search keeps using ILIKE")
+            return True
+
+        with db_manager.engine.begin() as conn:
+            if search_index_exists(conn, "jobs"):
+                logger.info("Job search index already exists")
+                return True
+            create_search_index(conn, "jobs")
+
+        logger.info("Job search index migration completed successfully!")
+        return True
+
+    except Exception as e:
+        logger.error(f"Error during job search index migration: {e}")
+        return False
+
+if __name__ == "__main__":
+    print("🔧 Job Search Index Migration")
+    print("=" * 40)
+
+    if migrate_job_search():
+        print("✅ Job full-text search index ready!")
+    else:
+        print("❌ Job search index migration failed!")
+        sys.exit(1)
@@ -0,0 +1,46 @@
+#!/usr/bin/env python3
+"""
+Database migration script to build the job token inverted index
+"""
+import os
+import sys
+import logging
+
+# Add the current directory to Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from database_enhanced import db_manager, init_database
+from job_token_service import backfill_job_tokens
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+def migrate_job_tokens():
+    """Create job_tokens and (re)index every job's title, description, requirements, location and type"""
+    try:
+        logger.info("Starting job token index migration...")
+
+        # Initialize database (this will create the job_tokens table)
+        init_database()
+
+        with db_manager.engine.begin() as conn:
+            indexed = backfill_job_tokens(conn)
+
+        logger.info(f"Indexed the tokens of {indexed} jobs")
+        logger.info("Job token index migration completed successfully!")
+        return True
+
+    except Exception as e:
+        logger.error(f"Error during job token index migration: {e}")
+        return False
+
+if __name__ == "__main__":
+    print("🔧 Job Token Index Migration")
+    print("=" * 40)
+
+    if migrate_job_tokens():
+        print("✅ Job token inverted index ready!")
+    else:
+        print("❌ Job token index migration failed!")
+        sys.exit(1)
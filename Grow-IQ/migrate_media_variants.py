@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+Database migration script to add responsive image variants for post images
+"""
+import os
+import sys
+import logging
+
+# Add the current directory to Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from database_enhanced import get_db, init_database
+from models import Post, MediaVariant
+from media_service import UPLOADS_DIR, generate_variants, store_variants
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+def migrate_media_variants():
+    """Create the media_variants table and resize images of existing posts"""
+    try:
+        logger.info("Starting media variants migration...")
+
+        # Initialize database (this will create the media_variants table)
+        init_database()
+
+        # Get database connection
+        db = next(get_db())
+
+        done = {row[0] for row in db.query(MediaVariant.source).distinct().all()}
+        sources = [row[0] for row in db.query(Post.image_path).filter(Post.image_path.isnot(None)).distinct().all()]
+        processed = 0
+        for source in sources:
+            path = os.path.join(UPLOADS_DIR, source)
+            if source in done or not os.path.exists(path):
+                continue
+            try:
+                store_variants(db, source, generate_variants(path))
+                db.commit()
+                processed += 1
+            except Exception as e:
+                db.rollback()
+                logger.warning(f"Skipped {source}: {e}")
+
+        logger.info(f"Generated variants for {processed} of {len(sources)} post images")
+        logger.info("Media variants migration completed successfully!")
+        return True
+
+    except Exception as e:
+        logger.error(f"Error during media variants migration: {e}")
+        if 'db' in locals():
+            db.rollback()
+        return False
+    finally:
+        if 'db' in locals():
+            db.close()
+
+if __name__ == "__main__":
+    print("🔧 Responsive Image Variants Migration")
+    print("=" * 40)
+
+    if migrate_media_variants():
+        print("✅ Image variants generated successfully!")
+        print("📊 New table: media_variants (WebP/JPEG thumb, feed and full sizes)")
+    else:
+        print("❌ Media variants migration failed!")
+        sys.exit(1)
@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+"""
+Database migration script to precompute people-you-may-know lists
+"""
+import os
+import sys
+import logging
+
+# Add the current directory to Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from database_enhanced import get_db, init_database
+from suggestion_service import refresh_people_suggestions
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+def migrate_people_suggestions():
+    """Create the people_suggestions table and build every active user's list"""
+    try:
+        logger.info("Starting people suggestions migration...")
+
+        # Initialize database (this will create the people_suggestions table)
+        init_database()
+
+        # Get database connection
+        db = next(get_db())
+
+        written = refresh_people_suggestions(db)
+
+        logger.info(f"Precomputed suggestion lists for {written} users")
+        logger.info("People suggestions migration completed successfully!")
+        return True
+
+    except Exception as e:
+        logger.error(f"Error during people suggestions migration: {e}")
+        if 'db' in locals():
+            db.rollback()
+        return False
+    finally:
+        if 'db' in locals():
+            db.close()
+
+if __name__ == "__main__":
+    print("🔧 People You May Know Migration")
+    print("=" * 40)
+
+    if migrate_people_suggestions():
+        print("✅ Suggestion lists precomputed successfully!")
+        print("📊 New table: people_suggestions (ranked candidates per user)")
+    else:
+        print("❌ People suggestions migration failed!")
+        sys.exit(1)
@@ -0,0 +1,47 @@
+#!/usr/bin/env python3
+"""
+Database migration script to add posts.updated_at, used to validate cached feed pages
+"""
+import os
+import sys
+import logging
+
+# Add the current directory to Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from database_enhanced import db_manager
+from feed_service import ensure_post_updated_at_schema
+from sqlalchemy import text
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+def migrate_post_updated_at():
+    """Add posts.updated_at and start it from each post's created_at"""
+    try:
+        logger.info("Starting post updated_at migration...")
+
+        if db_manager.engine.dialect.name == "sqlite":
+            ensure_post_updated_at_schema()
+        else:
+            with db_manager.engine.begin() as conn:
+                conn.execute(text("ALTER TABLE posts ADD COLUMN IF NOT EXISTS updated_at TIMESTAMP"))
+                conn.execute(text("UPDATE posts SET updated_at = COALESCE(created_at, CURRENT_TIMESTAMP) WHERE updated_at IS NULL"))
+
+        logger.info("Post updated_at migration completed successfully!")
+        return True
+
+    except Exception as e:
+        logger.error(f"Error during post updated_at migration: {e}")
+        return False
+
+if __name__ == "__main__":
+    print("🔧 Post updated_at Migration")
+    print("=" * 40)
+
+    if migrate_post_updated_at():
+        print("✅ posts.updated_at added and backfilled!")
+    else:
+        print("❌ Post updated_at migration failed!")
+        sys.exit(1)
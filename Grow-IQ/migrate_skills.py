@@ -0,0 +1,47 @@
+#!/usr/bin/env python3
+"""
+Database migration script to add the skills catalog and backfill user and job skills
+"""
+import os
+import sys
+import logging
+
+# Add the current directory to Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from database_enhanced import db_manager, init_database
+from skill_service import seed_skill_catalog, backfill_skills
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+def migrate_skills():
+    """Create skills, user_skills and job_skills, seed the catalog and rebuild them from existing data"""
+    try:
+        logger.info("Starting skills catalog migration...")
+
+        # Initialize database (this will create the skill tables)
+        init_database()
+
+        with db_manager.engine.begin() as conn:
+            added = seed_skill_catalog(conn)
+            written = backfill_skills(conn)
+
+        logger.info(f"Added or repointed {added} synonyms; {written} user/job skill rows after backfill")
+        logger.info("Skills catalog migration completed successfully!")
+        return True
+
+    except Exception as e:
+        logger.error(f"Error during skills catalog migration: {e}")
+        return False
+
+if __name__ == "__main__":
+    print("🔧 Skills Catalog Migration")
+    print("=" * 40)
+
+    if migrate_skills():
+        print("✅ Skills catalog and user/job skills ready!")
+    else:
+        print("❌ Skills catalog migration failed!")
+        sys.exit(1)
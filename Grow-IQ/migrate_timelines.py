@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+"""
+Database migration script to add materialized network timelines
+"""
+import os
+import sys
+import logging
+
+# Add the current directory to Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from database_enhanced import get_db, init_database
+from models import User
+from timeline_service import rebuild_timeline
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+def migrate_timelines():
+    """Create the timeline_entries table and build every user's timeline"""
+    try:
+        logger.info("Starting timelines migration...")
+
+        # Initialize database (this will create the timeline_entries table)
+        init_database()
+
+        # Get database connection
+        db = next(get_db())
+
+        user_ids = [row[0] for row in db.query(User.id).all()]
+        written = 0
+        for user_id in user_ids:
+            written += rebuild_timeline(db, user_id)
+            db.commit()
+
+        logger.info(f"Built timelines for {len(user_ids)} users ({written} entries)")
+        logger.info("Timelines migration completed successfully!")
+        return True
+
+    except Exception as e:
+        logger.error(f"Error during timelines migration: {e}")
+        if 'db' in locals():
+            db.rollback()
+        return False
+    finally:
+        if 'db' in locals():
+            db.close()
+
+if __name__ == "__main__":
+    print("🔧 Network Timelines Migration")
+    print("=" * 40)
+
+    if migrate_timelines():
+        print("✅ Timelines built successfully!")
+        print("📊 New table: timeline_entries (per-user network feed)")
+    else:
+        print("❌ Timelines migration failed!")
+        sys.exit(1)
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Text, Boolean, DateTime, ForeignKey, Enum, CheckConstraint, UniqueConstraint
+from sqlalchemy import Column, Integer, Float, String, Text, Boolean, DateTime, ForeignKey, Enum, CheckConstraint, UniqueConstraint, Index, text
 from sqlalchemy.orm import DeclarativeBase, relationship
 from datetime import datetime
 import os
@@ -8,6 +8,13 @@ import json
 class Base(DeclarativeBase):
     pass
 
+def _edge_end(first, second, pick):
+    """Insert default for the canonical end (pick=min or max) of a two-user row"""
+    def default(context):
+        params = context.get_current_parameters()
+        return pick(params[first], params[second])
+    return default
+
 class Session(Base):
     __tablename__ = 'sessions'
     
@@ -72,6 +79,11 @@ class User(Base):
     show_email = Column(Boolean, default=False, nullable=False)
     show_phone = Column(Boolean, default=False, nullable=False)
     
+    # Connection counters, recomputed by connection_service whenever a connection or request changes
+    connections_count = Column(Integer, default=0, nullable=False)
+    pending_in_count = Column(Integer, default=0, nullable=False)
+    pending_out_count = Column(Integer, default=0, nullable=False)
+    
     # Relationships
     posts = relationship('Post', backref='author', lazy='dynamic', cascade='all, delete-orphan')
     comments = relationship('Comment', backref='author', lazy='dynamic', cascade='all, delete-orphan')
@@ -317,12 +329,17 @@ class Post(Base):
     likes_count = Column(Integer, default=0)
     comments_count = Column(Integer, default=0)
     shares_count = Column(Integer, default=0)
+    # Time-decayed engagement, maintained by feed_service on like/comment events
+    engagement_score = Column(Float, default=0.0, index=True)
     is_public = Column(Boolean, default=True)
     created_at = Column(DateTime, default=datetime.now)
+    # Bumped on edits and by feed_service on every counter change; part of the feed ETag
+    updated_at = Column(DateTime, default=datetime.now, onupdate=datetime.now)
     user_id = Column(Integer, ForeignKey('users.id'), nullable=False)
     
     # Relationships
-    comments = relationship('Comment', backref='post', lazy='selectin', cascade='all, delete-orphan')
+    # Loaded on demand; comment lists go through comment_service, counts through likes/comments_count
+    comments = relationship('Comment', backref='post', cascade='all, delete-orphan')
 
 
 class PostLike(Base):
@@ -341,6 +358,124 @@ class PostLike(Base):
     post = relationship('Post', backref='post_likes')
     user = relationship('User')
 
+class TimelineEntry(Base):
+    """Materialized network feed: one row per (reader, post), written by fan-out on post creation"""
+    __tablename__ = 'timeline_entries'
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    user_id = Column(Integer, ForeignKey('users.id'), nullable=False)  # reader
+    post_id = Column(Integer, ForeignKey('posts.id', ondelete='CASCADE'), nullable=False)
+    author_id = Column(Integer, ForeignKey('users.id'), nullable=False)
+    created_at = Column(DateTime, nullable=False)  # copy of posts.created_at, the feed sort key
+
+    __table_args__ = (
+        UniqueConstraint('user_id', 'post_id', name='uq_timeline_user_post'),
+        # A feed page is a range scan on this index
+        Index('ix_timeline_user_created_post', 'user_id', 'created_at', 'post_id'),
+        Index('ix_timeline_user_author', 'user_id', 'author_id'),
+    )
+
+
+class PeopleSuggestion(Base):
+    """Precomputed "people you may know" entry, refreshed by suggestion_service"""
+    __tablename__ = 'people_suggestions'
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    user_id = Column(Integer, ForeignKey('users.id', ondelete='CASCADE'), nullable=False)
+    candidate_id = Column(Integer, ForeignKey('users.id', ondelete='CASCADE'), nullable=False)
+    rank = Column(Integer, nullable=False)  # 0 = best
+    score = Column(Float, nullable=False)
+    mutual_count = Column(Integer, default=0, nullable=False)
+    reasons = Column(Text)  # JSON list of strings
+    computed_at = Column(DateTime, nullable=False)  # lists older than PYMK_TTL_HOURS are recomputed
+
+    __table_args__ = (
+        UniqueConstraint('user_id', 'candidate_id', name='uq_people_suggestion_user_candidate'),
+        # A user's list is one range scan on this index
+        Index('ix_people_suggestions_user_rank', 'user_id', 'rank'),
+        Index('ix_people_suggestions_candidate', 'candidate_id'),
+        Index('ix_people_suggestions_computed', 'computed_at'),
+    )
+
+
+class Skill(Base):
+    """Skills dictionary; a synonym (e.g. "k8s") points at its canonical skill"""
+    __tablename__ = 'skills'
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    name = Column(String(100), nullable=False)  # as displayed
+    normalized = Column(String(100), nullable=False)  # casefolded lookup key
+    canonical_id = Column(Integer, ForeignKey('skills.id', ondelete='CASCADE'))  # NULL for canonical skills
+
+    __table_args__ = (
+        # Exact lookups and prefix suggestions are range scans on this index
+        Index('uq_skills_normalized', 'normalized', unique=True),
+    )
+
+
+class UserSkill(Base):
+    """Canonical skill held by a user, derived from users.skills by skill_service"""
+    __tablename__ = 'user_skills'
+    user_id = Column(Integer, ForeignKey('users.id', ondelete='CASCADE'), primary_key=True)
+    skill_id = Column(Integer, ForeignKey('skills.id', ondelete='CASCADE'), primary_key=True)
+
+    __table_args__ = (
+        Index('ix_user_skills_skill_user', 'skill_id', 'user_id'),
+    )
+
+
+class JobSkill(Base):
+    """Canonical skill required by a job, derived from the [SKILLS] line of jobs.requirements"""
+    __tablename__ = 'job_skills'
+    job_id = Column(Integer, ForeignKey('jobs.id', ondelete='CASCADE'), primary_key=True)
+    skill_id = Column(Integer, ForeignKey('skills.id', ondelete='CASCADE'), primary_key=True)
+
+    __table_args__ = (
+        Index('ix_job_skills_skill_job', 'skill_id', 'job_id'),
+    )
+
+
+class JobToken(Base):
+    """Inverted index entry: a normalized token of a job's text, written by job_token_service"""
+    __tablename__ = 'job_tokens'
+    token = Column(String(64), primary_key=True)  # leading key: all jobs with a token are one range scan
+    job_id = Column(Integer, ForeignKey('jobs.id', ondelete='CASCADE'), primary_key=True)
+
+    __table_args__ = (
+        # A job's token count and re-indexing on edit
+        Index('ix_job_tokens_job', 'job_id'),
+    )
+
+
+class SearchLog(Base):
+    """Append-only record of a search, batch-inserted by search_history_service"""
+    __tablename__ = 'search_log'
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    user_id = Column(Integer, ForeignKey('users.id', ondelete='CASCADE'))  # NULL for anonymous job searches
+    query = Column(String(100), nullable=False)  # normalized search text
+    search_type = Column(String(20), nullable=False)  # 'people' or 'jobs'
+    searched_at = Column(DateTime, nullable=False)
+
+    __table_args__ = (
+        # Recent searches of a user not yet held in memory
+        Index('ix_search_log_user_searched', 'user_id', 'searched_at'),
+        Index('ix_search_log_searched', 'searched_at'),
+    )
+
+
+class MediaVariant(Base):
+    """Resized derivative of an uploaded image, written by media_service after upload"""
+    __tablename__ = 'media_variants'
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    source = Column(String(200), nullable=False, index=True)  # original filename in static/uploads
+    kind = Column(String(20), nullable=False)  # thumb, feed, full
+    format = Column(String(10), nullable=False)  # webp, jpeg
+    width = Column(Integer, nullable=False)
+    height = Column(Integer, nullable=False)
+    filename = Column(String(100), nullable=False)  # content-hashed name in static/uploads/variants
+    created_at = Column(DateTime, default=datetime.now)
+
+    __table_args__ = (
+        UniqueConstraint('source', 'kind', 'format', name='uq_media_variant_source_kind_format'),
+    )
+
 class Connection(Base):
     __tablename__ = 'connections'
     
@@ -353,12 +488,14 @@ class Connection(Base):
     created_at = Column(DateTime, default=datetime.now)
     accepted_at = Column(DateTime)
     updated_at = Column(DateTime, default=datetime.now, onupdate=datetime.now)
+    # The pair as (smaller id, larger id), filled on insert; user_id stays the requester
+    low_user_id = Column(Integer, nullable=False, default=_edge_end('user_id', 'connected_user_id', min))
+    high_user_id = Column(Integer, nullable=False, default=_edge_end('user_id', 'connected_user_id', max))
     
-    # Ensure unique connections between two users
     __table_args__ = (
-        # This ensures we don't have duplicate connections
-        # between the same two users
-        None,
+        # One row per pair of users, found by a single seek whichever user asks
+        Index('uq_connection_pair', 'low_user_id', 'high_user_id', unique=True),
+        Index('ix_connections_high_low', 'high_user_id', 'low_user_id'),
     )
     
     # Relationships
@@ -376,16 +513,20 @@ class FriendRequest(Base):
     created_at = Column(DateTime, default=datetime.now)
     responded_at = Column(DateTime)
     updated_at = Column(DateTime, default=datetime.now, onupdate=datetime.now)
+    # The pair as (smaller id, larger id), filled on insert
+    low_user_id = Column(Integer, nullable=False, default=_edge_end('sender_id', 'receiver_id', min))
+    high_user_id = Column(Integer, nullable=False, default=_edge_end('sender_id', 'receiver_id', max))
     
     # Relationships
     sender = relationship('User', foreign_keys=[sender_id], overlaps="sent_friend_requests,received_friend_requests")
     receiver = relationship('User', foreign_keys=[receiver_id], overlaps="sent_friend_requests,received_friend_requests")
     
-    # Ensure unique requests between two users
     __table_args__ = (
-        # This ensures we don't have duplicate requests
-        # between the same two users
-        None,
+        # At most one pending request per pair of users, in either direction
+        Index('uq_friend_request_pending_pair', 'low_user_id', 'high_user_id', unique=True,
+              sqlite_where=text("status = 'pending'"), postgresql_where=text("status = 'pending'")),
+        Index('ix_friend_requests_receiver_status', 'receiver_id', 'status'),
+        Index('ix_friend_requests_sender_status', 'sender_id', 'status'),
     )
 
 class Job(Base):
@@ -0,0 +1,141 @@
+"""
+Pagination utilities for Qrow IQ
+Keyset (cursor) pagination with opaque cursors and cached approximate totals
+"""
+
+import base64
+import json
+import time
+import threading
+import logging
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from fastapi import HTTPException
+from sqlalchemy import and_, or_
+
+logger = logging.getLogger(__name__)
+
+# How long a cached total stays valid (seconds)
+TOTAL_CACHE_TTL = 60
+_TOTAL_CACHE_MAX_ENTRIES = 1024
+
+_total_cache: Dict[Tuple[Any, str], Tuple[float, int]] = {}
+_total_cache_lock = threading.Lock()
+
+
+def _encode_value(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return {"$dt": value.isoformat()}
+    return value
+
+
+def _decode_value(value: Any) -> Any:
+    if isinstance(value, dict) and "$dt" in value:
+        return datetime.fromisoformat(value["$dt"])
+    return value
+
+
+def encode_cursor(values: Sequence[Any]) -> str:
+    """Encode the sort-key values of the last row into an opaque cursor"""
+    payload = json.dumps([_encode_value(v) for v in values], separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str, expected_length: int) -> List[Any]:
+    """Decode an opaque cursor; raises a 400 for malformed or foreign cursors"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")).decode("utf-8"))
+        if not isinstance(values, list) or len(values) != expected_length:
+            raise ValueError("cursor does not match this listing")
+        return [_decode_value(v) for v in values]
+    except Exception as e:
+        logger.warning(f"Invalid pagination cursor: {e}")
+        raise HTTPException(status_code=400, detail="Invalid pagination cursor")
+
+
+def _after_cursor(keys: Sequence[Tuple[Any, bool]], values: Sequence[Any]):
+    """Build the row-value comparison `(k1, k2, ...) > (v1, v2, ...)` honouring
+    each key's direction, as an OR of prefix-equality terms (portable to SQLite)"""
+    clauses = []
+    for i, (column, descending) in enumerate(keys):
+        equal_prefix = [keys[j][0] == values[j] for j in range(i)]
+        step = column < values[i] if descending else column > values[i]
+        clauses.append(and_(*equal_prefix, step) if equal_prefix else step)
+    return or_(*clauses)
+
+
+def keyset_filter(keys: Sequence[Tuple[Any, bool]], cursor: str):
+    """WHERE clause selecting rows after `cursor` in `keys` order, for callers
+    that need the condition inside a larger statement (subqueries, CTEs)"""
+    return _after_cursor(keys, decode_cursor(cursor, len(keys)))
+
+
+def keyset_paginate(
+    query,
+    keys: Sequence[Tuple[Any, bool]],
+    limit: int,
+    cursor: Optional[str] = None,
+    row_key: Optional[Callable[[Any], Sequence[Any]]] = None,
+) -> Tuple[List[Any], Optional[str]]:
+    """Fetch one page of `query` ordered by `keys` starting after `cursor`.
+
+    `keys` is a list of (column expression, descending) pairs and must end with
+    a unique column (usually the primary key) so the ordering is total.
+    `row_key` extracts the same values from a result row; by default the
+    attribute names of the key columns are read from the row.
+
+    Returns (rows, next_cursor); next_cursor is None on the last page.
+    """
+    if cursor:
+        query = query.filter(keyset_filter(keys, cursor))
+    query = query.order_by(*[(c.desc() if d else c.asc()) for c, d in keys])
+    rows = query.limit(limit + 1).all()
+
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    next_cursor = None
+    if has_more and rows:
+        if row_key is None:
+            names = [c.key for c, _ in keys]
+            row_key = lambda row: [getattr(row, name) for name in names]
+        next_cursor = encode_cursor(row_key(rows[-1]))
+    return rows, next_cursor
+
+
+def cached_count(query, ttl: int = TOTAL_CACHE_TTL) -> int:
+    """Approximate total for a listing: COUNT(*) cached per database and distinct query for `ttl` seconds.
+
+    Only for the opt-in totals of cursor-mode listings; offset-mode pages
+    report exact counts.
+    """
+    statement = query.statement
+    compiled = statement.compile()
+    key = (query.session.get_bind(), f"{compiled}|{sorted((k, repr(v)) for k, v in compiled.params.items())}")
+    now = time.time()
+    with _total_cache_lock:
+        hit = _total_cache.get(key)
+        if hit and now - hit[0] < ttl:
+            return hit[1]
+
+    total = query.order_by(None).count()
+    with _total_cache_lock:
+        if len(_total_cache) >= _TOTAL_CACHE_MAX_ENTRIES:
+            _total_cache.clear()
+        _total_cache[key] = (now, total)
+    return total
+
+
+def cursor_pagination_info(limit: int, next_cursor: Optional[str], total: Optional[int] = None) -> Dict[str, Any]:
+    """Pagination block returned by cursor-mode listings"""
+    info = {
+        "mode": "cursor",
+        "limit": limit,
+        "next_cursor": next_cursor,
+        "has_more": next_cursor is not None,
+    }
+    if total is not None:
+        info["total"] = total
+        info["total_is_approximate"] = True
+    return info
@@ -4,80 +4,40 @@ Handles comprehensive profile management including avatar upload, data updates,
 """
 
 from fastapi import APIRouter, Depends, HTTPException, Request, UploadFile, File, Form
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, Response
 from sqlalchemy.orm import Session
 from sqlalchemy.exc import SQLAlchemyError
 from typing import Optional, List
 import os
-import uuid
 import json
 import logging
 from datetime import datetime
-from PIL import Image
-import io
 
 from database import get_db
 from models import User
 from auth_utils import get_current_user
+from http_cache_utils import make_etag, conditional_response
+from skill_service import skill_suggestions
+from avatar_service import process_avatar, save_avatar, remove_avatar, avatar_urls, AVATAR_MAX_FILE_SIZE, DEFAULT_AVATAR_URL
 
 logger = logging.getLogger(__name__)
 router = APIRouter()
 
-# Configuration
-UPLOAD_DIR = "static/uploads/profile_pics"
-ALLOWED_EXTENSIONS = {'.jpg', '.jpeg', '.png', '.gif', '.webp'}
-MAX_FILE_SIZE = 5 * 1024 * 1024  # 5MB
-MAX_IMAGE_SIZE = (800, 800)  # Max dimensions
-
-# Ensure upload directory exists
-os.makedirs(UPLOAD_DIR, exist_ok=True)
-
-def validate_and_process_image(file_content: bytes, filename: str) -> tuple[bytes, str]:
-    """Validate and process uploaded image"""
-    
-    # Check file size
-    if len(file_content) > MAX_FILE_SIZE:
-        raise HTTPException(status_code=400, detail="Image too large (>5MB)")
-    
-    # Check file extension
-    ext = os.path.splitext(filename)[1].lower()
-    if ext not in ALLOWED_EXTENSIONS:
-        raise HTTPException(status_code=400, detail="Invalid file type. Use JPG, PNG, GIF, or WebP")
-    
-    try:
-        # Open and process image
-        image = Image.open(io.BytesIO(file_content))
-        
-        # Convert to RGB if necessary
-        if image.mode in ('RGBA', 'LA', 'P'):
-            background = Image.new('RGB', image.size, (255, 255, 255))
-            if image.mode == 'P':
-                image = image.convert('RGBA')
-            background.paste(image, mask=image.split()[-1] if image.mode in ('RGBA', 'LA') else None)
-            image = background
-        
-        # Resize if too large
-        if image.size[0] > MAX_IMAGE_SIZE[0] or image.size[1] > MAX_IMAGE_SIZE[1]:
-            image.thumbnail(MAX_IMAGE_SIZE, Image.Resampling.LANCZOS)
-        
-        # Save to bytes
-        output = io.BytesIO()
-        image.save(output, format='JPEG', quality=90, optimize=True)
-        processed_content = output.getvalue()
-        
-        return processed_content, '.jpg'
-        
-    except Exception as e:
-        logger.error(f"Image processing error: {e}")
-        raise HTTPException(status_code=400, detail="Invalid image file")
-
 @router.get("/api/profile/current")
 async def get_current_profile(
+    request: Request,
+    response: Response,
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
-    """Get current user's complete profile data"""
+    """Get current user's complete profile data (304 when If-None-Match is current)"""
     try:
+        # current_user is already loaded, so revalidation costs no extra query
+        etag = make_etag(current_user.id, current_user.updated_at)
+        not_modified = conditional_response(request, response, etag)
+        if not_modified:
+            return not_modified
+        
         logger.info(f"Fetching profile for user ID: {current_user.id}")
         
         # Get user from current session to avoid session conflicts
@@ -272,37 +232,19 @@ async def upload_avatar(
 ):
     """Upload and update user avatar"""
     try:
-        # Read file content
-        file_content = await file.read()
-        
-        # Validate and process image
-        processed_content, ext = validate_and_process_image(file_content, file.filename)
-        
-        # Generate unique filename
-        filename = f"profile_{current_user.id}_{uuid.uuid4().hex}{ext}"
-        file_path = os.path.join(UPLOAD_DIR, filename)
+        # Read at most one byte past the limit so oversized uploads are not buffered whole
+        file_content = await file.read(AVATAR_MAX_FILE_SIZE + 1)
         
-        # Save file
-        with open(file_path, 'wb') as f:
-            f.write(processed_content)
+        # Decode and resize in the avatar process pool
+        variants = await process_avatar(file_content)
         
         # Get user from current session to avoid session conflicts
         user = db.query(User).filter(User.id == current_user.id).first()
         if not user:
             raise HTTPException(status_code=404, detail="User not found")
         
-        # Update user profile
-        profile_pic_url = f"/static/uploads/profile_pics/{filename}"
-        
-        # Remove old profile picture if it exists and is not default
+        profile_pic_url = await save_avatar(user.id, variants)
         old_pic = user.profile_pic
-        if old_pic and old_pic != '/static/uploads/default-avatar.svg' and old_pic.startswith('/static/uploads/'):
-            old_file_path = old_pic.replace('/static/', 'static/')
-            if os.path.exists(old_file_path):
-                try:
-                    os.remove(old_file_path)
-                except OSError:
-                    pass  # Ignore if file can't be deleted
         
         # Update profile picture
         if hasattr(user, 'update_profile_pic'):
@@ -315,6 +257,9 @@ async def upload_avatar(
         # Save changes
         db.commit()
         
+        # Remove old profile picture (every size) if it exists and is not default
+        remove_avatar(old_pic)
+        
         # Get updated user data
         updated_user = db.query(User).filter(User.id == user.id).first()
         
@@ -325,7 +270,8 @@ async def upload_avatar(
             "message": "Avatar uploaded successfully",
             "data": {
                 "profile_image_url": profile_pic_url,
-                "filename": filename,
+                "avatar_urls": avatar_urls(profile_pic_url),
+                "filename": os.path.basename(profile_pic_url),
                 "updated_at": updated_user.updated_at.isoformat() if hasattr(updated_user, 'updated_at') and updated_user.updated_at else None
             }
         }
@@ -351,23 +297,17 @@ async def delete_avatar(
         current_user.profile_image = 'default-avatar.svg'
         current_user.updated_at = datetime.now()
         
-        # Remove old file if it exists
-        if old_pic and old_pic.startswith('/static/uploads/'):
-            old_file_path = old_pic.replace('/static/', 'static/')
-            if os.path.exists(old_file_path):
-                try:
-                    os.remove(old_file_path)
-                except OSError:
-                    pass
-        
         # Save changes
         db.commit()
         
+        # Remove old files (every size) if they exist
+        remove_avatar(old_pic)
+        
         return {
             "success": True,
             "message": "Avatar removed successfully",
             "data": {
-                "profile_image_url": "/static/uploads/default-avatar.svg"
+                "profile_image_url": DEFAULT_AVATAR_URL
             }
         }
         
@@ -381,28 +321,12 @@ async def get_skill_suggestions(
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
-    """Get skill suggestions based on query"""
-    
-    # Common skills database - in production, this could come from a database
-    common_skills = [
-        "JavaScript", "Python", "Java", "C++", "React", "Node.js", "Angular", "Vue.js",
-        "HTML", "CSS", "SQL", "MongoDB", "PostgreSQL", "MySQL", "Docker", "Kubernetes",
-        "AWS", "Azure", "Google Cloud", "Git", "Jenkins", "CI/CD", "Agile", "Scrum",
-        "Project Management", "Leadership", "Communication", "Problem Solving",
-        "Data Analysis", "Machine Learning", "Artificial Intelligence", "DevOps",
-        "Cybersecurity", "Network Administration", "System Administration",
-        "Marketing", "Digital Marketing", "SEO", "Content Writing", "Graphic Design",
-        "UI/UX Design", "Product Management", "Business Analysis", "Sales",
-        "Customer Service", "Human Resources", "Finance", "Accounting"
-    ]
-    
-    if query:
-        suggestions = [skill for skill in common_skills 
-                      if query.lower() in skill.lower()][:10]
-    else:
-        suggestions = common_skills[:20]
-    
-    return {"success": True, "data": suggestions}
+    """Get skill suggestions whose name or a synonym starts with the query"""
+    try:
+        return {"success": True, "data": skill_suggestions(db, query, 10)}
+    except SQLAlchemyError as e:
+        logger.error(f"Error getting skill suggestions: {e}")
+        raise HTTPException(status_code=500, detail="Failed to get skill suggestions")
 
 @router.get("/api/profile/debug")
 async def debug_profile_info(
@@ -0,0 +1,331 @@
+"""
+Search history service for Qrow IQ
+Keeps recent searches per user and popular search terms in bounded memory:
+a capped ring buffer per user (least recently active users evicted) and a
+time-decayed space-saving top-K sketch. Searches are appended to the
+search_log table in batches by a background thread, never per request, and
+the in-memory state is snapshotted to a file so it survives restarts.
+State is per process, like the social graph index.
+"""
+
+import os
+import json
+import time
+import heapq
+import logging
+import threading
+from collections import OrderedDict, deque
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import insert, select
+from sqlalchemy.orm import Session
+
+from config import settings
+from models import SearchLog
+
+logger = logging.getLogger(__name__)
+
+MAX_QUERY_LENGTH = 100
+
+# Shown (after any real terms) until enough searches have been counted
+DEFAULT_POPULAR_SEARCHES = [
+    "software engineer", "data scientist", "product manager",
+    "marketing", "sales", "design", "finance", "healthcare"
+]
+
+# Forward decay weights grow as 2 ** (age / half-life); past this exponent
+# all counts are rescaled to a new base time so the floats stay small
+_REBASE_EXPONENT = 30
+
+
+def normalize_query(query: Optional[str]) -> str:
+    """Lowercased, whitespace-collapsed search text, cut to MAX_QUERY_LENGTH"""
+    return " ".join((query or "").lower().split())[:MAX_QUERY_LENGTH]
+
+
+class DecayedTopK:
+    """Space-saving heavy hitters over at most `capacity` terms, with exponential time decay.
+
+    A new term arriving when the sketch is full takes over the smallest
+    counter and inherits its count as error, so memory never grows past
+    `capacity`. Each hit is weighted 2 ** ((t - base) / half_life) (forward
+    decay), which ranks terms as if every count had halved each half-life.
+    """
+
+    def __init__(self, capacity: int, half_life_seconds: float, base: Optional[float] = None):
+        self.capacity = capacity
+        self.half_life = half_life_seconds
+        self.base = time.time() if base is None else base
+        self._counts: Dict[str, List[float]] = {}  # term -> [count, error]
+        self._heap: List[Tuple[float, str]] = []  # (count when pushed, term); may lag behind _counts
+
+    def __len__(self):
+        return len(self._counts)
+
+    def _weight(self, now: float) -> float:
+        exponent = (now - self.base) / self.half_life
+        if exponent > _REBASE_EXPONENT:
+            scale = 2.0 ** -exponent
+            for counter in self._counts.values():
+                counter[0] *= scale
+                counter[1] *= scale
+            self._heap = [(counter[0], term) for term, counter in self._counts.items()]
+            heapq.heapify(self._heap)
+            self.base = now
+            exponent = 0.0
+        return 2.0 ** exponent
+
+    def _pop_smallest(self) -> Tuple[str, List[float]]:
+        while True:
+            count, term = heapq.heappop(self._heap)
+            counter = self._counts[term]
+            if counter[0] == count:
+                return term, self._counts.pop(term)
+            # Counted again since it was pushed; put it back with its current count
+            heapq.heappush(self._heap, (counter[0], term))
+
+    def add(self, term: str, now: Optional[float] = None):
+        weight = self._weight(time.time() if now is None else now)
+        counter = self._counts.get(term)
+        if counter is not None:
+            counter[0] += weight
+            return
+        error = 0.0
+        if len(self._counts) >= self.capacity:
+            _, evicted = self._pop_smallest()
+            error = evicted[0]
+        self._counts[term] = [error + weight, error]
+        heapq.heappush(self._heap, (error + weight, term))
+
+    def top(self, k: int, min_count: float = 0.0) -> List[Tuple[str, float]]:
+        """The k heaviest terms with their guaranteed decayed count, heaviest first.
+
+        A term's guaranteed count leaves out the error inherited from the
+        counter it took over, so a term seen once just after an eviction does
+        not rank as high as the term it replaced. Terms whose guaranteed
+        count is below min_count are left out.
+        """
+        scale = 2.0 ** -((time.time() - self.base) / self.half_life)
+        guaranteed = ((counter[0] - counter[1], term) for term, counter in self._counts.items())
+        best = heapq.nlargest(k, (item for item in guaranteed if item[0] * scale >= min_count))
+        return [(term, count * scale) for count, term in best]
+
+    def to_dict(self) -> dict:
+        return {"base": self.base, "counters": [[term, c[0], c[1]] for term, c in self._counts.items()]}
+
+    @classmethod
+    def from_dict(cls, data: dict, capacity: int, half_life_seconds: float) -> "DecayedTopK":
+        sketch = cls(capacity, half_life_seconds, base=data["base"])
+        counters = sorted(data["counters"], key=lambda item: item[1], reverse=True)[:capacity]
+        sketch._counts = {term: [count, error] for term, count, error in counters}
+        sketch._heap = [(count, term) for term, count, _ in counters]
+        heapq.heapify(sketch._heap)
+        return sketch
+
+
+class RecentSearches:
+    """Newest-first ring buffer of distinct queries per user, for at most `max_users` users"""
+
+    def __init__(self, per_user: int, max_users: int):
+        self.per_user = per_user
+        self.max_users = max_users
+        self._rings: "OrderedDict[int, deque]" = OrderedDict()  # user_id -> deque of (query, searched_at)
+
+    def _ring(self, user_id: int) -> deque:
+        ring = self._rings.get(user_id)
+        if ring is None:
+            ring = self._rings[user_id] = deque(maxlen=self.per_user)
+            while len(self._rings) > self.max_users:
+                self._rings.popitem(last=False)
+        else:
+            self._rings.move_to_end(user_id)
+        return ring
+
+    def add(self, user_id: int, query: str, searched_at: float):
+        ring = self._ring(user_id)
+        for entry in list(ring):
+            if entry[0] == query:
+                ring.remove(entry)
+        ring.appendleft((query, searched_at))
+
+    def get(self, user_id: int) -> List[Tuple[str, float]]:
+        ring = self._rings.get(user_id)
+        if ring is None:
+            return []
+        self._rings.move_to_end(user_id)
+        return list(ring)
+
+    def to_list(self) -> list:
+        return [[user_id, [list(entry) for entry in ring]] for user_id, ring in self._rings.items()]
+
+    @classmethod
+    def from_list(cls, data: list, per_user: int, max_users: int) -> "RecentSearches":
+        recent = cls(per_user, max_users)
+        for user_id, entries, *_ in data[-max_users:]:
+            recent._ring(user_id).extend(tuple(entry) for entry in entries[:per_user])
+        return recent
+
+
+# ==================== SHARED STATE ====================
+
+_lock = threading.Lock()
+_popular = DecayedTopK(settings.SEARCH_POPULAR_CAPACITY, settings.SEARCH_POPULAR_HALF_LIFE_HOURS * 3600)
+_recent = RecentSearches(settings.SEARCH_RECENT_PER_USER, settings.SEARCH_RECENT_MAX_USERS)
+# Searches waiting for the next batch insert; the oldest are dropped if the writer falls behind
+_pending: deque = deque(maxlen=settings.SEARCH_LOG_BUFFER_MAX)
+_writer_thread: Optional[threading.Thread] = None
+_writer_stop = threading.Event()
+
+
+def record_search(user_id: Optional[int], query: Optional[str], search_type: str = "people"):
+    """Count a search towards popular terms and the user's recent searches; no database I/O"""
+    text = normalize_query(query)
+    if len(text) < 2:
+        return
+    now = time.time()
+    with _lock:
+        _popular.add(text, now)
+        if user_id is not None:
+            _recent.add(user_id, text, now)
+    _pending.append({"user_id": user_id, "query": text, "search_type": search_type,
+                     "searched_at": datetime.fromtimestamp(now)})
+
+
+def popular_searches(limit: int = 10) -> List[str]:
+    """Most searched terms lately, padded with DEFAULT_POPULAR_SEARCHES.
+
+    Only terms searched at least SEARCH_POPULAR_MIN_COUNT times (decayed) are
+    shown, so a one-off query is never published to other users.
+    """
+    with _lock:
+        terms = [term for term, _ in _popular.top(limit, settings.SEARCH_POPULAR_MIN_COUNT)]
+    for term in DEFAULT_POPULAR_SEARCHES:
+        if len(terms) >= limit:
+            break
+        if term not in terms:
+            terms.append(term)
+    return terms
+
+
+def recent_searches(db: Session, user_id: int, limit: int = 10) -> List[str]:
+    """The user's latest distinct searches, newest first.
+
+    The latest rows of the search log (searches flushed by any worker) are
+    merged with this worker's ring, which still holds its searches that are
+    waiting for or in the middle of a batch insert.
+    """
+    with _lock:
+        latest = {}
+        for query, searched_at in _recent.get(user_id):
+            latest.setdefault(query, searched_at)
+    rows = db.execute(
+        select(SearchLog.query, SearchLog.searched_at)
+        .where(SearchLog.user_id == user_id)
+        .order_by(SearchLog.searched_at.desc(), SearchLog.id.desc())
+        .limit(settings.SEARCH_RECENT_PER_USER * 4)
+    ).all()
+    for query, searched_at in rows:
+        latest[query] = max(latest.get(query, 0.0), searched_at.timestamp())
+    return sorted(latest, key=latest.get, reverse=True)[:min(limit, settings.SEARCH_RECENT_PER_USER)]
+
+
+def flush_search_log(db: Session) -> int:
+    """Insert the buffered searches in one batch. Returns how many were written."""
+    batch = []
+    while _pending:
+        try:
+            batch.append(_pending.popleft())
+        except IndexError:
+            break
+    if batch:
+        db.execute(insert(SearchLog), batch)
+        db.commit()
+    return len(batch)
+
+
+def save_search_snapshot(path: Optional[str] = None):
+    """Write popular term counters and recent searches to path, replacing it atomically"""
+    path = path or settings.SEARCH_STATS_SNAPSHOT_PATH
+    with _lock:
+        data = {"saved_at": time.time(), "popular": _popular.to_dict(), "recent": _recent.to_list()}
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    tmp_path = f"{path}.tmp.{os.getpid()}"
+    with open(tmp_path, "w") as f:
+        json.dump(data, f, separators=(",", ":"))
+    os.replace(tmp_path, path)
+
+
+def load_search_snapshot(path: Optional[str] = None) -> bool:
+    """Replace the in-memory state with a snapshot, if one exists"""
+    global _popular, _recent
+    path = path or settings.SEARCH_STATS_SNAPSHOT_PATH
+    try:
+        with open(path) as f:
+            data = json.load(f)
+        popular = DecayedTopK.from_dict(data["popular"], settings.SEARCH_POPULAR_CAPACITY,
+                                        settings.SEARCH_POPULAR_HALF_LIFE_HOURS * 3600)
+        recent = RecentSearches.from_list(data["recent"], settings.SEARCH_RECENT_PER_USER,
+                                          settings.SEARCH_RECENT_MAX_USERS)
+    except FileNotFoundError:
+        return False
+    except (ValueError, KeyError, TypeError) as e:
+        logger.error(f"Ignoring unreadable search snapshot {path}: {e}")
+        return False
+    with _lock:
+        _popular, _recent = popular, recent
+    logger.info(f"Loaded search snapshot: {len(popular)} popular terms, {len(data['recent'])} users' recent searches")
+    return True
+
+
+def reset_search_history():
+    """Empty the in-memory state and the pending batch"""
+    global _popular, _recent
+    with _lock:
+        _popular = DecayedTopK(settings.SEARCH_POPULAR_CAPACITY, settings.SEARCH_POPULAR_HALF_LIFE_HOURS * 3600)
+        _recent = RecentSearches(settings.SEARCH_RECENT_PER_USER, settings.SEARCH_RECENT_MAX_USERS)
+    _pending.clear()
+
+
+def _flush_and_snapshot(snapshot: bool):
+    from database_enhanced import get_db_context
+    try:
+        with get_db_context() as db:
+            flush_search_log(db)
+    except Exception as e:
+        logger.error(f"Search log flush failed: {e}")
+    if snapshot:
+        try:
+            save_search_snapshot()
+        except Exception as e:
+            logger.error(f"Search snapshot failed: {e}")
+
+
+def start_search_history():
+    """Load the last snapshot and start the batch writer / snapshot thread"""
+    global _writer_thread
+    load_search_snapshot()
+    interval = settings.SEARCH_LOG_FLUSH_SECONDS
+    if interval <= 0 or (_writer_thread and _writer_thread.is_alive()):
+        return
+    _writer_stop.clear()
+
+    def _run():
+        last_snapshot = time.monotonic()
+        while not _writer_stop.wait(interval):
+            snapshot = time.monotonic() - last_snapshot >= settings.SEARCH_STATS_SNAPSHOT_SECONDS
+            _flush_and_snapshot(snapshot)
+            if snapshot:
+                last_snapshot = time.monotonic()
+
+    _writer_thread = threading.Thread(target=_run, name="search-log-writer", daemon=True)
+    _writer_thread.start()
+    logger.info(f"Search log writer started (every {interval}s)")
+
+
+def stop_search_history():
+    """Stop the writer, then write what is left and a final snapshot"""
+    _writer_stop.set()
+    if _writer_thread is not None:
+        _writer_thread.join(timeout=5)
+    _flush_and_snapshot(snapshot=True)
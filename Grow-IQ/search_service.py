@@ -0,0 +1,214 @@
+"""
+Search service for Qrow IQ
+Full-text indexes over user profiles and job postings: FTS5 tables kept in
+step with their source tables by triggers on SQLite, generated tsvector
+columns with GIN indexes on PostgreSQL. Matches are ranked with bm25 /
+ts_rank so relevance ordering means relevance.
+"""
+
+import re
+import logging
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import Float, Integer, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+
+logger = logging.getLogger(__name__)
+
+# Indexed columns with their ranking weight (bm25 column weights / tsvector
+# weight class); a match in a user's name counts far more than one in the bio
+USER_SEARCH_COLUMNS = {
+    "full_name": (10.0, "A"),
+    "username": (8.0, "A"),
+    "title": (5.0, "B"),
+    "company": (4.0, "B"),
+    "skills": (3.0, "B"),
+    "industry": (2.0, "C"),
+    "location": (2.0, "C"),
+    "education": (1.0, "D"),
+    "bio": (1.0, "D"),
+}
+
+JOB_SEARCH_COLUMNS = {
+    "title": (10.0, "A"),
+    "company": (5.0, "A"),
+    "requirements": (3.0, "B"),
+    "job_type": (2.0, "C"),
+    "location": (2.0, "C"),
+    "description": (1.0, "D"),
+}
+
+# Source table -> (FTS5 table, indexed columns)
+SEARCH_INDEXES = {
+    "users": ("users_fts", USER_SEARCH_COLUMNS),
+    "jobs": ("jobs_fts", JOB_SEARCH_COLUMNS),
+}
+
+# Terms beyond this are ignored; each one narrows the match further anyway
+MAX_SEARCH_TERMS = 8
+
+_TERM = re.compile(r"\w+", re.UNICODE)
+
+# Whether each (engine, table) has its index, so the check is done once per engine
+_index_available: Dict[Tuple[Engine, str], bool] = {}
+
+
+def search_terms(query: Optional[str]) -> List[str]:
+    """Lowercased word tokens of a search box query, at most MAX_SEARCH_TERMS"""
+    return [term.lower() for term in _TERM.findall(query or "")][:MAX_SEARCH_TERMS]
+
+
+def _sqlite_schema(table: str) -> List[str]:
+    fts_table, indexed = SEARCH_INDEXES[table]
+    columns = ", ".join(indexed)
+    new_values = ", ".join(f"new.{column}" for column in indexed)
+    old_values = ", ".join(f"old.{column}" for column in indexed)
+    delete_old = (f"INSERT INTO {fts_table}({fts_table}, rowid, {columns}) "
+                  f"VALUES ('delete', old.id, {old_values});")
+    insert_new = f"INSERT INTO {fts_table}(rowid, {columns}) VALUES (new.id, {new_values});"
+    return [
+        # External content: the text stays in the source table, the index only holds tokens
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {fts_table} USING fts5({columns}, "
+        f"content='{table}', content_rowid='id', tokenize='unicode61 remove_diacritics 2', prefix='2 3')",
+        f"CREATE TRIGGER IF NOT EXISTS {fts_table}_ai AFTER INSERT ON {table} BEGIN {insert_new} END",
+        f"CREATE TRIGGER IF NOT EXISTS {fts_table}_ad AFTER DELETE ON {table} BEGIN {delete_old} END",
+        # Only edits to indexed columns touch the index (not logins, counters or view counts)
+        f"CREATE TRIGGER IF NOT EXISTS {fts_table}_au AFTER UPDATE OF {columns} ON {table} "
+        f"BEGIN {delete_old} {insert_new} END",
+    ]
+
+
+def _postgres_schema(table: str) -> List[str]:
+    _, indexed = SEARCH_INDEXES[table]
+    vector = " || ".join(
+        f"setweight(to_tsvector('simple', coalesce({column}, '')), '{weight}')"
+        for column, (_, weight) in indexed.items()
+    )
+    return [
+        f"ALTER TABLE {table} ADD COLUMN IF NOT EXISTS search_vector tsvector GENERATED ALWAYS AS ({vector}) STORED",
+        f"CREATE INDEX IF NOT EXISTS ix_{table}_search_vector ON {table} USING GIN (search_vector)",
+    ]
+
+
+def search_index_exists(connection, table: str) -> bool:
+    dialect = connection.dialect.name
+    if dialect == "sqlite":
+        query = text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name")
+        params = {"name": SEARCH_INDEXES[table][0]}
+    elif dialect == "postgresql":
+        query = text("SELECT 1 FROM information_schema.columns "
+                     "WHERE table_name = :table AND column_name = 'search_vector'")
+        params = {"table": table}
+    else:
+        return False
+    return connection.execute(query, params).first() is not None
+
+
+def create_search_index(connection, table: str):
+    """Create the full-text index of table on connection and fill it from existing rows"""
+    if connection.dialect.name == "sqlite":
+        fts_table = SEARCH_INDEXES[table][0]
+        for statement in _sqlite_schema(table):
+            connection.execute(text(statement))
+        connection.execute(text(f"INSERT INTO {fts_table}({fts_table}) VALUES ('rebuild')"))
+    else:
+        # The generated column is computed for every existing row as it is added
+        for statement in _postgres_schema(table):
+            connection.execute(text(statement))
+
+
+def ensure_search_index(table: str, engine: Optional[Engine] = None) -> bool:
+    """Create the full-text index of table in an existing SQLite database if missing.
+
+    Returns True if it had to be created. PostgreSQL should run the
+    migrate_*_search.py scripts; other databases search with ILIKE.
+    """
+    if engine is None:
+        from database_enhanced import db_manager
+        engine = db_manager.engine
+    with engine.begin() as conn:
+        if search_index_exists(conn, table):
+            _index_available[engine, table] = True
+            return False
+        if engine.dialect.name != "sqlite":
+            _index_available[engine, table] = False
+            return False
+        create_search_index(conn, table)
+    _index_available[engine, table] = True
+    logger.info(f"Created the {SEARCH_INDEXES[table][0]} full-text index")
+    return True
+
+
+def ensure_user_search_index(engine: Optional[Engine] = None) -> bool:
+    return ensure_search_index("users", engine)
+
+
+def ensure_job_search_index(engine: Optional[Engine] = None) -> bool:
+    return ensure_search_index("jobs", engine)
+
+
+def _index_ready(db: Session, table: str) -> bool:
+    engine = db.get_bind()
+    if (engine, table) not in _index_available:
+        try:
+            ensure_search_index(table, engine)
+        except Exception as e:
+            logger.warning(f"Full-text index on {table} unavailable, searching with ILIKE: {e}")
+            _index_available[engine, table] = False
+    return _index_available[engine, table]
+
+
+def search_matches(db: Session, table: str, terms: List[List[str]], match_all: bool = True, name: str = "matches"):
+    """Subquery of (id, rank) for rows of table matching terms, or None without an index.
+
+    Each term is a list of words matched as a phrase. With match_all every
+    term must match and its last word may be a prefix (search box input);
+    otherwise any term may match, as whole words. Lower rank is a better
+    match.
+    """
+    terms = [words for words in terms if words]
+    if not terms or not _index_ready(db, table):
+        return None
+    fts_table, indexed = SEARCH_INDEXES[table]
+    if db.get_bind().dialect.name == "sqlite":
+        weights = ", ".join(str(weight) for weight, _ in indexed.values())
+        phrases = [f'"{" ".join(words)}"' + ("*" if match_all else "") for words in terms]
+        return (
+            text(f"SELECT rowid AS id, bm25({fts_table}, {weights}) AS rank "
+                 f"FROM {fts_table} WHERE {fts_table} MATCH :match")
+            .bindparams(match=(" " if match_all else " OR ").join(phrases))
+            .columns(id=Integer, rank=Float)
+            .subquery(name)
+        )
+    phrases = [" <-> ".join(words) + (":*" if match_all else "") for words in terms]
+    return (
+        text(f"SELECT {table}.id AS id, -ts_rank({table}.search_vector, q) AS rank "
+             f"FROM {table}, to_tsquery('simple', :tsquery) AS q WHERE {table}.search_vector @@ q")
+        .bindparams(tsquery=(" & " if match_all else " | ").join(f"({phrase})" for phrase in phrases))
+        .columns(id=Integer, rank=Float)
+        .subquery(name)
+    )
+
+
+def user_search_matches(db: Session, query: Optional[str]):
+    """Subquery of (id, rank) for users matching every word of query as a prefix, or None.
+
+    None means there is nothing to search for or no index on this
+    database, and the caller should fall back to ILIKE.
+    """
+    return search_matches(db, "users", [[term] for term in search_terms(query)], name="user_matches")
+
+
+def job_search_matches(db: Session, query: Optional[str]):
+    """Subquery of (id, rank) for jobs matching every word of query as a prefix, or None"""
+    return search_matches(db, "jobs", [[term] for term in search_terms(query)], name="job_matches")
+
+
+def job_skill_matches(db: Session, skills: Iterable[str]):
+    """Subquery of (id, rank) for jobs mentioning any of skills, ranked by bm25, or None.
+
+    Skills like "node.js" are matched as the phrase "node js".
+    """
+    phrases = sorted({tuple(search_terms(skill)) for skill in skills} - {()})
+    return search_matches(db, "jobs", [list(words) for words in phrases], match_all=False, name="skill_matches")
@@ -0,0 +1,296 @@
+"""
+Skill catalog service for Qrow IQ
+Normalizes the free-form skills on profiles (users.skills) and jobs (the
+[SKILLS] line of jobs.requirements) into the skills dictionary and the
+indexed user_skills / job_skills tables, kept in step by a session hook, so
+skill filters and suggestions are index lookups instead of text scans.
+"""
+
+import re
+import json
+import logging
+from typing import Dict, Iterable, List, Optional
+
+from sqlalchemy import and_, delete, event, func, insert, inspect, or_, select, update
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from config import settings
+from models import User, Job, Skill, UserSkill, JobSkill
+
+logger = logging.getLogger(__name__)
+
+MAX_SKILL_LENGTH = 100
+
+# Seeded into an empty catalog; the first SUGGESTION_DEFAULTS are suggested before anything is typed
+COMMON_SKILLS = [
+    "JavaScript", "Python", "Java", "C++", "React", "Node.js", "Angular", "Vue.js",
+    "HTML", "CSS", "SQL", "MongoDB", "PostgreSQL", "MySQL", "Docker", "Kubernetes",
+    "AWS", "Azure", "Google Cloud", "Git", "Jenkins", "CI/CD", "Agile", "Scrum",
+    "Project Management", "Leadership", "Communication", "Problem Solving",
+    "Data Analysis", "Machine Learning", "Artificial Intelligence", "DevOps",
+    "Cybersecurity", "Network Administration", "System Administration",
+    "Marketing", "Digital Marketing", "SEO", "Content Writing", "Graphic Design",
+    "UI/UX Design", "Product Management", "Business Analysis", "Sales",
+    "Customer Service", "Human Resources", "Finance", "Accounting"
+]
+SUGGESTION_DEFAULTS = 20
+
+# Synonym -> canonical skill, seeded alongside COMMON_SKILLS
+SKILL_SYNONYMS = {
+    "JS": "JavaScript", "ECMAScript": "JavaScript", "Py": "Python", "ReactJS": "React",
+    "React.js": "React", "Node": "Node.js", "NodeJS": "Node.js", "AngularJS": "Angular",
+    "Vue": "Vue.js", "Postgres": "PostgreSQL", "Mongo": "MongoDB", "K8s": "Kubernetes",
+    "Amazon Web Services": "AWS", "GCP": "Google Cloud", "Microsoft Azure": "Azure",
+    "ML": "Machine Learning", "AI": "Artificial Intelligence", "UX": "UI/UX Design",
+    "UI Design": "UI/UX Design", "HR": "Human Resources", "Search Engine Optimization": "SEO",
+    "Continuous Integration": "CI/CD", "Security": "Cybersecurity",
+}
+
+_JOB_SKILLS_LINE = re.compile(r"^\[SKILLS\](.*)$", re.MULTILINE)
+# Upper bound for prefix range scans; sorts after any character that appears in skill names
+_PREFIX_END = "\U0010ffff"
+
+
+def normalize_skill(name: Optional[str]) -> str:
+    """Casefolded, whitespace-collapsed lookup key"""
+    return " ".join((name or "").split()).casefold()[:MAX_SKILL_LENGTH]
+
+
+def parse_skills(skills_field: Optional[str]) -> List[str]:
+    """Skill names from a users.skills value: a JSON list, a JSON object of flags, or comma separated"""
+    if not skills_field:
+        return []
+    try:
+        data = json.loads(skills_field)
+        if isinstance(data, list):
+            items = [s for s in data if isinstance(s, str)]
+        elif isinstance(data, dict):
+            items = [str(k) for k, v in data.items() if v]
+        else:
+            items = re.split(r"[,;\n]+", skills_field)
+    except ValueError:
+        items = re.split(r"[,;\n]+", skills_field)
+    return [" ".join(item.split())[:MAX_SKILL_LENGTH] for item in items if item.strip()]
+
+
+def parse_job_skills(requirements: Optional[str]) -> List[str]:
+    """Skill names from the [SKILLS] line job posting appends to the requirements"""
+    names = []
+    for line in _JOB_SKILLS_LINE.findall(requirements or ""):
+        names.extend(parse_skills(line))
+    return names
+
+
+# ==================== CATALOG ====================
+
+def _insert_skills(connection, rows: List[Dict]):
+    """Insert catalog rows, skipping names another transaction added first"""
+    dialect = connection.dialect.name
+    if dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert as dialect_insert
+    elif dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert as dialect_insert
+    else:
+        # No portable upsert; a savepoint per row keeps the outer transaction usable
+        for row in rows:
+            try:
+                with connection.begin_nested():
+                    connection.execute(insert(Skill), [row])
+            except IntegrityError:
+                pass
+        return
+    connection.execute(dialect_insert(Skill).on_conflict_do_nothing(index_elements=["normalized"]), rows)
+
+
+def resolve_skill_ids(connection, names: Iterable[str], create: bool = True) -> Dict[str, int]:
+    """Map skill names (by normalized key) to canonical skill ids, adding unknown names to the catalog"""
+    display = {}
+    for name in names:
+        key = normalize_skill(name)
+        if key:
+            display.setdefault(key, name)
+    if not display:
+        return {}
+    rows = connection.execute(
+        select(Skill.normalized, func.coalesce(Skill.canonical_id, Skill.id))
+        .where(Skill.normalized.in_(list(display)))
+    ).all()
+    resolved = {key: skill_id for key, skill_id in rows}
+    missing = [key for key in display if key not in resolved]
+    if create and missing:
+        _insert_skills(connection, [{"name": display[key], "normalized": key} for key in missing])
+        # Re-read: a concurrent insert of the same name may have won, possibly as a synonym
+        rows = connection.execute(
+            select(Skill.normalized, func.coalesce(Skill.canonical_id, Skill.id))
+            .where(Skill.normalized.in_(missing))
+        ).all()
+        resolved.update(rows)
+    return resolved
+
+
+def seed_skill_catalog(connection) -> int:
+    """Add COMMON_SKILLS and SKILL_SYNONYMS; synonyms already entered as skills are pointed at their canonical skill.
+
+    Returns the number of synonyms added or repointed. Run backfill_skills
+    afterwards so join rows move to the canonical skills.
+    """
+    canonical = resolve_skill_ids(connection, COMMON_SKILLS + list(SKILL_SYNONYMS.values()))
+    targets = {normalize_skill(name): canonical[normalize_skill(target)] for name, target in SKILL_SYNONYMS.items()}
+    existing = dict(connection.execute(
+        select(Skill.normalized, Skill.canonical_id).where(Skill.normalized.in_(list(targets)))
+    ).all())
+    synonyms = [
+        {"name": name, "normalized": normalize_skill(name), "canonical_id": targets[normalize_skill(name)]}
+        for name in SKILL_SYNONYMS if normalize_skill(name) not in existing
+    ]
+    if synonyms:
+        _insert_skills(connection, synonyms)
+    repointed = 0
+    for key, canonical_id in existing.items():
+        if canonical_id is None:
+            connection.execute(update(Skill).where(Skill.normalized == key).values(canonical_id=targets[key]))
+            repointed += 1
+    return len(synonyms) + repointed
+
+
+def sync_user_skills(connection, skills_by_user: Dict[int, List[str]]):
+    """Replace the user_skills rows of the given users"""
+    _sync(connection, UserSkill, UserSkill.user_id, "user_id", skills_by_user)
+
+
+def sync_job_skills(connection, skills_by_job: Dict[int, List[str]]):
+    """Replace the job_skills rows of the given jobs"""
+    _sync(connection, JobSkill, JobSkill.job_id, "job_id", skills_by_job)
+
+
+def _sync(connection, model, owner_column, owner_key: str, skills_by_owner: Dict[int, List[str]]):
+    if not skills_by_owner:
+        return
+    connection.execute(delete(model).where(owner_column.in_(list(skills_by_owner))))
+    ids = resolve_skill_ids(connection, [name for names in skills_by_owner.values() for name in names])
+    rows = [
+        {owner_key: owner_id, "skill_id": skill_id}
+        for owner_id, names in skills_by_owner.items()
+        for skill_id in {ids[normalize_skill(name)] for name in names if normalize_skill(name)}
+    ]
+    if rows:
+        connection.execute(insert(model), rows)
+
+
+def backfill_skills(connection, batch_size: int = 1000) -> int:
+    """Rebuild user_skills and job_skills from users.skills and jobs.requirements. Returns rows written."""
+    batches = (
+        (select(User.id, User.skills).where(User.skills.isnot(None), User.skills != ""), parse_skills, sync_user_skills),
+        (select(Job.id, Job.requirements).where(Job.requirements.like("%[SKILLS]%")), parse_job_skills, sync_job_skills),
+    )
+    for statement, parse, sync in batches:
+        rows = connection.execute(statement).all()
+        for start in range(0, len(rows), batch_size):
+            sync(connection, {owner_id: parse(text) for owner_id, text in rows[start:start + batch_size]})
+    return (connection.scalar(select(func.count()).select_from(UserSkill))
+            + connection.scalar(select(func.count()).select_from(JobSkill)))
+
+
+def ensure_skill_catalog(engine: Optional[Engine] = None) -> bool:
+    """Seed the skills catalog and backfill the skill tables from existing profiles and jobs.
+
+    Runs once, while the catalog has no synonyms yet; returns True if it ran.
+    The tables themselves come from create_all; migrate_skills.py runs the
+    same backfill on demand.
+    """
+    if engine is None:
+        from database_enhanced import db_manager
+        engine = db_manager.engine
+    with engine.begin() as conn:
+        if conn.scalar(select(Skill.id).where(Skill.canonical_id.isnot(None)).limit(1)) is not None:
+            return False
+        seed_skill_catalog(conn)
+        written = backfill_skills(conn)
+    logger.info(f"Seeded the skills catalog and backfilled {written} user/job skill rows")
+    return True
+
+
+# ==================== QUERIES ====================
+
+def user_skill_names(db: Session, user_id: int) -> List[str]:
+    """Canonical names of the user's skills"""
+    return list(db.scalars(
+        select(Skill.name).join(UserSkill, UserSkill.skill_id == Skill.id)
+        .where(UserSkill.user_id == user_id).order_by(Skill.normalized)
+    ))
+
+
+def _prefix_skill_ids(prefix: str):
+    """Canonical ids of the skills (or synonyms) whose key starts with prefix"""
+    key = normalize_skill(prefix)
+    return (
+        select(func.coalesce(Skill.canonical_id, Skill.id))
+        .where(Skill.normalized >= key, Skill.normalized < key + _PREFIX_END)
+    )
+
+
+def users_with_skills(user_id_column, skills: Optional[str]):
+    """Filter clause for users having every comma-separated skill (matched by prefix, synonyms included)"""
+    clauses = [
+        user_id_column.in_(select(UserSkill.user_id).where(UserSkill.skill_id.in_(_prefix_skill_ids(name))))
+        for name in parse_skills(skills)
+    ]
+    return and_(*clauses) if clauses else None
+
+
+def skill_suggestions(db: Session, query: str = "", limit: int = 10) -> List[str]:
+    """Canonical skill names whose name or a synonym starts with query, most used first.
+
+    Usage is the number of profiles and jobs listing the skill. Skills typed
+    in by users are left out until SKILL_SUGGESTION_MIN_USES of them use it;
+    COMMON_SKILLS are always eligible.
+    """
+    key = normalize_skill(query)
+    if not key:
+        return COMMON_SKILLS[:SUGGESTION_DEFAULTS]
+    matches = (
+        select(func.coalesce(Skill.canonical_id, Skill.id).label("skill_id"))
+        .where(Skill.normalized >= key, Skill.normalized < key + _PREFIX_END)
+        .distinct()
+    ).subquery()
+    uses = (
+        select(func.count()).where(UserSkill.skill_id == matches.c.skill_id).scalar_subquery()
+        + select(func.count()).where(JobSkill.skill_id == matches.c.skill_id).scalar_subquery()
+    )
+    ranked = (
+        select(Skill.name, Skill.normalized, uses.label("uses"))
+        .join(matches, Skill.id == matches.c.skill_id)
+    ).subquery()
+    rows = db.execute(
+        select(ranked.c.name)
+        .where(or_(ranked.c.uses >= settings.SKILL_SUGGESTION_MIN_USES,
+                   ranked.c.normalized.in_([normalize_skill(name) for name in COMMON_SKILLS])))
+        .order_by(ranked.c.uses.desc(), ranked.c.normalized)
+        .limit(limit)
+    ).scalars()
+    return list(rows)
+
+
+# ==================== CHANGE TRACKING ====================
+
+@event.listens_for(Session, "after_flush")
+def _sync_changed_skills(session, flush_context):
+    users, jobs = {}, {}
+    for obj in session.new | session.dirty | session.deleted:
+        if isinstance(obj, User):
+            field, parse, target = "skills", parse_skills, users
+        elif isinstance(obj, Job):
+            field, parse, target = "requirements", parse_job_skills, jobs
+        else:
+            continue
+        if obj in session.dirty and not inspect(obj).attrs[field].history.has_changes():
+            continue
+        names = [] if obj in session.deleted else parse(getattr(obj, field))
+        if names or obj not in session.new:
+            target[obj.id] = names
+    if users or jobs:
+        connection = session.connection()
+        sync_user_skills(connection, users)
+        sync_job_skills(connection, jobs)
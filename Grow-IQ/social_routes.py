@@ -1,17 +1,28 @@
 import os
 import time
 import logging
-import uuid
 from typing import List, Optional
-from fastapi import APIRouter, Depends, HTTPException, Request, Form, File, UploadFile, Query
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Request, Response, Form, File, UploadFile, Query
 from fastapi.responses import HTMLResponse, RedirectResponse, JSONResponse
 from sqlalchemy.orm import Session
 from werkzeug.utils import secure_filename
 from passlib.context import CryptContext
-from database_enhanced import get_db
+from database_enhanced import get_db, get_read_db
 from auth_utils import get_current_user
+from pagination_utils import keyset_paginate, keyset_filter
+from http_cache_utils import make_etag, conditional_response
+from comment_service import load_comment_threads
+from upload_utils import save_uploads, discard_uploads, IMAGE_TYPES, VIDEO_TYPES, CERTIFICATE_TYPES
+from timeline_service import timeline_feed, fan_out_post, link_timelines
+from graph_service import get_graph_index, record_connection
+from connection_service import connect_users, find_connection, find_pending_request
+from suggestion_service import people_you_may_know
+from media_service import build_post_variants
+from feed_service import (
+    feed_query, feed_version, hydrate_feed, add_like, remove_like, record_comment, read_counters
+)
 from models import (
-    User, Post, PostLike, Job, Notification, Connection, FriendRequest, 
+    User, Post, Job, Notification, Connection, FriendRequest, 
     Event, EventRegistration, Comment
 )
 from datetime import datetime, timedelta
@@ -68,17 +79,15 @@ async def send_friend_request(
         if current_user.id == receiver.id:
             raise HTTPException(status_code=400, detail="Cannot send friend request to yourself.")
         
-        # Check if request already exists
-        existing_request = db.query(FriendRequest).filter(
-            FriendRequest.sender_id == current_user.id,
-            FriendRequest.receiver_id == receiver.id
-        ).first()
+        if find_connection(db, current_user.id, receiver.id, 'accepted'):
+            raise HTTPException(status_code=400, detail="You are already friends.")
         
+        # Only one pending request per pair, whoever sent it
+        existing_request = find_pending_request(db, current_user.id, receiver.id)
         if existing_request:
-            if existing_request.status == 'pending':
-                raise HTTPException(status_code=400, detail="Friend request already sent.")
-            elif existing_request.status == 'accepted':
-                raise HTTPException(status_code=400, detail="You are already friends.")
+            if existing_request.sender_id == receiver.id:
+                raise HTTPException(status_code=400, detail="This user has already sent you a friend request.")
+            raise HTTPException(status_code=400, detail="Friend request already sent.")
         
         # Create friend request
         friend_request = FriendRequest(
@@ -104,6 +113,8 @@ async def send_friend_request(
         
         return {"message": "Friend request sent successfully!", "status": "success"}
         
+    except HTTPException:
+        raise
     except Exception as e:
         db.rollback()
         logging.error(f"Error sending friend request: {str(e)}")
@@ -134,15 +145,9 @@ async def respond_to_friend_request(
             friend_request.responded_at = datetime.utcnow()
             
             # Create professional connection
-            connection = Connection(
-                user_id=friend_request.sender_id,
-                connected_user_id=friend_request.receiver_id,
-                status='accepted',
-                connection_type='personal',
-                accepted_at=datetime.utcnow()
-            )
-            
-            db.add(connection)
+            connect_users(db, friend_request.sender_id, friend_request.receiver_id, connection_type='personal')
+            link_timelines(db, friend_request.sender_id, friend_request.receiver_id)
+            record_connection(db, friend_request.sender_id, friend_request.receiver_id)
             
             # Create notification for sender
             notification = Notification(
@@ -227,32 +232,10 @@ async def get_connection_suggestions(
 ):
     """Get connection suggestions for current user"""
     try:
-        # Get users who are not already connected or have pending requests
-        subquery = db.query(Connection.connected_user_id).filter(
-            Connection.user_id == current_user.id
-        ).union(
-            db.query(Connection.user_id).filter(
-                Connection.connected_user_id == current_user.id
-            )
-        ).subquery()
-        
-        friend_request_subquery = db.query(FriendRequest.receiver_id).filter(
-            FriendRequest.sender_id == current_user.id
-        ).union(
-            db.query(FriendRequest.sender_id).filter(
-                FriendRequest.receiver_id == current_user.id
-            )
-        ).subquery()
-        
-        suggestions = db.query(User).filter(
-            User.id != current_user.id,
-            ~User.id.in_(subquery),
-            ~User.id.in_(friend_request_subquery)
-        ).limit(limit).all()
-        
-        # Format suggestions for frontend
+        # Precomputed list, already excluding connections and pending requests
         formatted_suggestions = []
-        for suggestion in suggestions:
+        for item in people_you_may_know(db, current_user.id)[:limit]:
+            suggestion = item["user"]
             formatted_suggestion = {
                 "id": suggestion.id,
                 "full_name": suggestion.full_name,
@@ -260,7 +243,8 @@ async def get_connection_suggestions(
                 "company": suggestion.company,
                 "location": suggestion.location,
                 "profile_image": suggestion.profile_image,
-                "mutual_connections": 0  # TODO: Implement mutual connections calculation
+                "mutual_connections": item["mutual_count"],
+                "reasons": item["reasons"]
             }
             formatted_suggestions.append(formatted_suggestion)
         
@@ -315,6 +299,7 @@ async def search_people(
         results = query.limit(limit).all()
         
         # Format results for frontend
+        mutual_counts = get_graph_index(db).mutual_counts(current_user.id, [r.id for r in results])
         formatted_results = []
         for result in results:
             formatted_result = {
@@ -324,7 +309,7 @@ async def search_people(
                 "company": result.company,
                 "location": result.location,
                 "profile_image": result.profile_image,
-                "mutual_connections": 0  # TODO: Implement mutual connections calculation
+                "mutual_connections": mutual_counts[result.id]
             }
             formatted_results.append(formatted_result)
         
@@ -491,6 +476,7 @@ async def register_for_event(
 
 @router.post("/posts/create")
 async def create_post(
+    background_tasks: BackgroundTasks,
     content: str = Form(...),
     post_type: str = Form("general"),
     image: Optional[UploadFile] = File(None),
@@ -505,62 +491,14 @@ async def create_post(
         if not current_user.can_post_content():
             raise HTTPException(status_code=403, detail="You cannot post content.")
         
-        # Handle image upload
-        image_path = None
-        if image and image.filename:
-            if allowed_file(image.filename):
-                filename = str(uuid.uuid4()) + '.' + image.filename.rsplit('.', 1)[1].lower()
-                file_path = os.path.join(get_upload_folder(), filename)
-                
-                # Save file
-                with open(file_path, "wb") as buffer:
-                    content_data = await image.read()
-                    buffer.write(content_data)
-                
-                image_path = filename
-            else:
-                raise HTTPException(status_code=400, detail="Invalid image file type")
-        
-        # Handle video upload
-        video_path = None
-        if video and video.filename:
-            if video.content_type.startswith('video/'):
-                filename = str(uuid.uuid4()) + '.' + video.filename.rsplit('.', 1)[1].lower()
-                file_path = os.path.join(get_upload_folder(), filename)
-                
-                # Save file
-                with open(file_path, "wb") as buffer:
-                    content_data = await video.read()
-                    buffer.write(content_data)
-                
-                video_path = filename
-            else:
-                raise HTTPException(status_code=400, detail="Invalid video file type")
-        
-        # Handle certificate upload
-        certificate_path = None
-        if certificate and certificate.filename:
-            allowed_certificate_types = [
-                'application/pdf',
-                'application/msword',
-                'application/vnd.openxmlformats-officedocument.wordprocessingml.document',
-                'image/jpeg',
-                'image/png',
-                'image/gif'
-            ]
-            
-            if certificate.content_type in allowed_certificate_types:
-                filename = str(uuid.uuid4()) + '.' + certificate.filename.rsplit('.', 1)[1].lower()
-                file_path = os.path.join(get_upload_folder(), filename)
-                
-                # Save file
-                with open(file_path, "wb") as buffer:
-                    content_data = await certificate.read()
-                    buffer.write(content_data)
-                
-                certificate_path = filename
-            else:
-                raise HTTPException(status_code=400, detail="Invalid certificate file type")
+        # Uploads are streamed to disk in chunks; type comes from the file's magic bytes
+        upload_folder = get_upload_folder()
+        paths = await save_uploads(upload_folder, {
+            "image": (image if image and image.filename else None, IMAGE_TYPES),
+            "video": (video if video and video.filename else None, VIDEO_TYPES),
+            "certificate": (certificate if certificate and certificate.filename else None, CERTIFICATE_TYPES),
+        })
+        image_path, video_path, certificate_path = paths["image"], paths["video"], paths["certificate"]
         
         post = Post(
             content=content,
@@ -573,7 +511,14 @@ async def create_post(
         )
         
         db.add(post)
-        db.commit()
+        try:
+            db.commit()
+        except Exception:
+            discard_uploads(upload_folder, paths.values())
+            raise
+        background_tasks.add_task(fan_out_post, post.id)
+        if image_path:
+            background_tasks.add_task(build_post_variants, post.id)
         
         return {
             "message": "Post created successfully!", 
@@ -584,89 +529,145 @@ async def create_post(
             "has_certificate": bool(certificate_path)
         }
         
+    except HTTPException:
+        raise
     except Exception as e:
         db.rollback()
         logging.error(f"Error creating post: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Error creating post: {str(e)}")
 
+def _serialize_feed_item(item):
+    post, author = item["post"], item["author"]
+    return {
+        "id": post.id,
+        "content": post.content,
+        "image_path": post.image_path,
+        "image_srcset": item["image_variants"]["webp"]["srcset"] if item["image_variants"] else None,
+        "image_variants": item["image_variants"],
+        "video_path": post.video_path,
+        "certificate_path": post.certificate_path,
+        "post_type": post.post_type,
+        "is_public": post.is_public,
+        "created_at": post.created_at.isoformat(),
+        "author": {
+            "id": author.id,
+            "full_name": author.full_name,
+            "title": author.title,
+            "company": author.company,
+            "profile_image": author.profile_image,
+            "profile_pic": author.profile_pic,
+            "profile_image_url": author.get_profile_pic_url() if hasattr(author, 'get_profile_pic_url') else None
+        },
+        "likes_count": item["likes_count"],
+        "comments_count": item["comments_count"],
+        "shares_count": 0,
+        "is_liked": item["is_liked"]
+    }
+
 @router.get("/posts")
 async def get_posts(
+    request: Request,
+    response: Response,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     limit: int = Query(20, ge=1, le=100),
-    offset: int = Query(0, ge=0)
+    offset: int = Query(0, ge=0),
+    cursor: Optional[str] = Query(None, description="Opaque cursor from the X-Next-Cursor header; pass an empty value for the first page"),
+    sort: str = Query("recent", pattern="^(recent|top)$", description="recent: newest first; top: by time-decayed engagement")
 ):
-    """Get posts for the current user's feed"""
+    """Get posts for the current user's feed
+
+    The body stays a plain list; in cursor mode the cursor for the next page
+    is returned in the X-Next-Cursor header (absent on the last page).
+    Polls with a matching If-None-Match get a 304 before the page is loaded.
+    """
     try:
-        # Get posts with author information
-        posts = db.query(Post).join(User, Post.user_id == User.id).filter(
-            Post.is_public == True
-        ).order_by(Post.created_at.desc()).offset(offset).limit(limit).all()
+        # Posts and authors come from one joined query; counts and the
+        # viewer's likes are batched by hydrate_feed()
+        query = feed_query(db).filter(Post.is_public == True)
+        sort_column = Post.engagement_score if sort == "top" else Post.created_at
+        keys = [(sort_column, True), (Post.id, True)]
+        ordered = query.order_by(sort_column.desc(), Post.id.desc())
+        if cursor is not None:
+            # One extra row, as keyset_paginate reads, so the next-cursor header is covered too
+            window = (ordered.filter(keyset_filter(keys, cursor)) if cursor else ordered).limit(limit + 1)
+        else:
+            window = ordered.offset(offset).limit(limit)
+        
+        # The body carries is_liked, so the tag is per viewer
+        etag = make_etag(feed_version(db, window), current_user.id, limit, offset, cursor, sort)
+        not_modified = conditional_response(request, response, etag)
+        if not_modified:
+            return not_modified
+        
+        if cursor is not None:
+            rows, next_cursor = keyset_paginate(
+                query, keys, limit, cursor or None,
+                row_key=lambda row: [getattr(row[0], sort_column.key), row[0].id]
+            )
+            if next_cursor:
+                response.headers["X-Next-Cursor"] = next_cursor
+        else:
+            rows = window.all()
         
         # Format posts for frontend (include likes and whether current user liked)
-        formatted_posts = []
-        for post in posts:
-            likes_count = db.query(PostLike).filter(PostLike.post_id == post.id).count()
-            comments_count = db.query(Comment).filter(Comment.post_id == post.id).count()
-            is_liked = db.query(PostLike).filter(PostLike.post_id == post.id, PostLike.user_id == current_user.id).first() is not None
-            author = post.author
-            formatted_post = {
-                "id": post.id,
-                "content": post.content,
-                "image_path": post.image_path,
-                "video_path": post.video_path,
-                "certificate_path": post.certificate_path,
-                "post_type": post.post_type,
-                "is_public": post.is_public,
-                "created_at": post.created_at.isoformat(),
-                "author": {
-                    "id": author.id,
-                    "full_name": author.full_name,
-                    "title": author.title,
-                    "company": author.company,
-                    "profile_image": author.profile_image,
-                    "profile_pic": author.profile_pic,
-                    "profile_image_url": author.get_profile_pic_url() if hasattr(author, 'get_profile_pic_url') else None
-                },
-                "likes_count": likes_count,
-                "comments_count": comments_count,
-                "shares_count": 0,
-                "is_liked": is_liked
-            }
-            formatted_posts.append(formatted_post)
+        formatted_posts = [_serialize_feed_item(item) for item in hydrate_feed(db, rows, current_user.id)]
         
         return formatted_posts
         
+    except HTTPException:
+        raise
     except Exception as e:
         logging.error(f"Error fetching posts: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Error fetching posts: {str(e)}")
 
+@router.get("/timeline")
+async def get_timeline(
+    response: Response,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db),
+    limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = Query(None, description="Opaque cursor from the X-Next-Cursor header")
+):
+    """Network feed: posts from the current user and their connections, newest first
+
+    Same item shape as /social/posts; the next-page cursor is returned in the
+    X-Next-Cursor header (absent on the last page).
+    """
+    try:
+        items, next_cursor = timeline_feed(db, current_user.id, limit, cursor or None)
+        if next_cursor:
+            response.headers["X-Next-Cursor"] = next_cursor
+        return [_serialize_feed_item(item) for item in items]
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logging.error(f"Error fetching timeline: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Error fetching timeline: {str(e)}")
+
 # ==================== COMMENTS ====================
 @router.get("/posts/{post_id}/comments")
 async def list_comments(
     post_id: int,
+    response: Response,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_db),
+    limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = Query(None, description="Opaque cursor from the X-Next-Cursor header")
 ):
+    """Top-level comments, oldest first, each with its nested replies
+
+    Paginated by thread; the cursor for the next page is returned in the
+    X-Next-Cursor header (absent on the last page).
+    """
     try:
-        post = db.query(Post).filter(Post.id == post_id).first()
-        if not post:
+        if not db.query(Post.id).filter(Post.id == post_id).first():
             raise HTTPException(status_code=404, detail="Post not found")
-        comments = db.query(Comment).filter(Comment.post_id == post_id).order_by(Comment.created_at.asc()).all()
-        result = []
-        for c in comments:
-            author = db.query(User).get(c.user_id)
-            result.append({
-                "id": c.id,
-                "content": c.content,
-                "created_at": c.created_at.isoformat(),
-                "author": {
-                    "id": author.id,
-                    "full_name": author.full_name,
-                    "profile_image": author.profile_image
-                }
-            })
-        return result
+        threads, next_cursor = load_comment_threads(db, post_id, limit, cursor or None)
+        if next_cursor:
+            response.headers["X-Next-Cursor"] = next_cursor
+        return threads
     except HTTPException:
         raise
     except Exception as e:
@@ -677,6 +678,7 @@ async def list_comments(
 async def create_comment(
     post_id: int,
     content: str = Form(...),
+    parent_comment_id: Optional[int] = Form(None),
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
@@ -686,15 +688,24 @@ async def create_comment(
         post = db.query(Post).filter(Post.id == post_id).first()
         if not post:
             raise HTTPException(status_code=404, detail="Post not found")
-        comment = Comment(content=content.strip(), post_id=post_id, user_id=current_user.id)
+        if parent_comment_id is not None and not db.query(Comment.id).filter(
+            Comment.id == parent_comment_id, Comment.post_id == post_id
+        ).first():
+            raise HTTPException(status_code=400, detail="Parent comment not found on this post")
+        comment = Comment(
+            content=content.strip(), post_id=post_id, user_id=current_user.id,
+            parent_comment_id=parent_comment_id
+        )
         db.add(comment)
+        db.flush()
+        record_comment(db, post_id)
+        _, count = read_counters(db, post_id)
         db.commit()
-        db.refresh(comment)
-        count = db.query(Comment).filter(Comment.post_id == post_id).count()
         return {
             "id": comment.id,
             "content": comment.content,
             "created_at": comment.created_at.isoformat(),
+            "parent_comment_id": comment.parent_comment_id,
             "comments_count": count
         }
     except HTTPException:
@@ -718,24 +729,12 @@ async def toggle_like_post(
         if not post:
             raise HTTPException(status_code=404, detail="Post not found")
 
-        existing = db.query(PostLike).filter(
-            PostLike.post_id == post_id,
-            PostLike.user_id == current_user.id
-        ).first()
-
-        if existing:
-            db.delete(existing)
-            db.commit()
-            new_state = False
-        else:
-            like = PostLike(post_id=post_id, user_id=current_user.id)
-            db.add(like)
-            db.commit()
-            new_state = True
-
-        total = db.query(PostLike).filter(PostLike.post_id == post_id).count()
-        # Optionally mirror into posts.likes_count for fast lookup
-        post.likes_count = total
+        # Like row and counter change commit together; the unique
+        # (post_id, user_id) constraint keeps concurrent toggles idempotent
+        new_state = not remove_like(db, post_id, current_user.id)
+        if new_state:
+            add_like(db, post_id, current_user.id)
+        total, _ = read_counters(db, post_id)
         db.commit()
 
         return {"post_id": post_id, "is_liked": new_state, "likes_count": total}
@@ -810,10 +809,7 @@ async def get_user_profile(user_id: int, db: Session = Depends(get_db)):
         ).order_by(Post.created_at.desc()).limit(5).all()
         
         # Get user's connections count
-        connections_count = db.query(Connection).filter(
-            Connection.user_id == user.id,
-            Connection.status == 'accepted'
-        ).count()
+        connections_count = user.connections_count or 0
         
         profile_data = {
             "id": user.id,
@@ -853,7 +849,7 @@ async def search_users(
     query: str = Query(...),
     user_type: Optional[str] = Query(None),
     location: Optional[str] = Query(None),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """Search for users by name, title, company, or location"""
     try:
@@ -901,7 +897,7 @@ async def search_jobs(
     query: str = Query(...),
     location: Optional[str] = Query(None),
     job_type: Optional[str] = Query(None),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """Search for jobs by title, company, or description"""
     try:
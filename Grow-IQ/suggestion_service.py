@@ -0,0 +1,396 @@
+"""
+Suggestion service for Qrow IQ
+"People you may know": friends-of-friends over the in-memory connection graph,
+ranked by mutual connection count with a small boost for shared company,
+industry, location and title words. Only the shortlisted candidates are read
+from the users table.
+
+A background job also precomputes a top-N list per user into
+people_suggestions, adding candidates found by attribute blocking (users
+grouped by normalized company, industry, location and title words), so the
+suggestion endpoints are a single indexed read.
+"""
+
+import re
+import json
+import heapq
+import logging
+import threading
+from collections import Counter, defaultdict
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterable, List, Optional, Set
+
+from sqlalchemy import and_, delete, event, exists, func, inspect, or_, select, union, update
+from sqlalchemy.orm import Session
+
+from config import settings
+from models import User, Connection, FriendRequest, PeopleSuggestion
+from graph_service import SocialGraphIndex, get_graph_index
+
+logger = logging.getLogger(__name__)
+
+# Attribute boosts, kept below one mutual connection so mutual count leads the ranking
+COMPANY_WEIGHT = 0.5
+INDUSTRY_WEIGHT = 0.3
+LOCATION_WEIGHT = 0.2
+TITLE_WEIGHT = 0.1
+
+# Candidates (by mutual count) whose profiles are loaded for attribute scoring, per suggestion wanted
+POOL_FACTOR = 5
+
+# Sample values from seed data that say nothing about the user
+_PLACEHOLDERS = {"", "company", "test company", "professional", "location", "industry",
+                 "location not specified", "industry not specified"}
+
+
+def _meaningful(value: Optional[str]) -> Optional[str]:
+    value = (value or "").strip()
+    return value if value.lower() not in _PLACEHOLDERS else None
+
+
+def _normalize(value: Optional[str]) -> Optional[str]:
+    """Lowercase alphanumeric form used to compare and group attribute values"""
+    value = _meaningful(value)
+    if not value:
+        return None
+    return re.sub(r"[^a-z0-9]+", " ", value.lower()).strip() or None
+
+
+def _title_words(title: Optional[str]) -> Set[str]:
+    title = _normalize(title)
+    return {word for word in title.split() if len(word) > 2} if title else set()
+
+
+def pending_request_ids(db: Session, user_id: int) -> Set[int]:
+    """Users with a pending request to or from user_id (friend requests or pending connection rows), in one query"""
+    rows = db.execute(union(
+        select(FriendRequest.receiver_id).where(FriendRequest.sender_id == user_id, FriendRequest.status == 'pending'),
+        select(FriendRequest.sender_id).where(FriendRequest.receiver_id == user_id, FriendRequest.status == 'pending'),
+        select(Connection.connected_user_id).where(Connection.user_id == user_id, Connection.status == 'pending'),
+        select(Connection.user_id).where(Connection.connected_user_id == user_id, Connection.status == 'pending'),
+    )).all()
+    return {row[0] for row in rows}
+
+
+def friends_of_friends(index: SocialGraphIndex, user_id: int, exclude: Set[int],
+                       max_hub_degree: Optional[int] = None) -> Counter:
+    """Mutual connection count of every user two hops from user_id, in one pass.
+
+    Connections with more than max_hub_degree connections of their own are
+    skipped: they link to nearly everyone, so they add cost but little signal.
+    """
+    max_hub_degree = settings.SUGGESTION_MAX_HUB_DEGREE if max_hub_degree is None else max_hub_degree
+    counts: Counter = Counter()
+    for friend_id in index.neighbours(user_id):
+        friends = index.neighbours(friend_id)
+        if len(friends) <= max_hub_degree:
+            counts.update(friends)  # counted in C
+    for excluded in exclude:
+        counts.pop(excluded, None)
+    counts.pop(user_id, None)
+    for friend_id in index.neighbours(user_id):
+        counts.pop(friend_id, None)
+    return counts
+
+
+def _score(viewer, candidate, mutual: int):
+    """(score, reasons) for a candidate; viewer and candidate are Users or rows with the profile columns"""
+    score = float(mutual)
+    reasons = []
+    if mutual:
+        reasons.append(f"{mutual} mutual connection{'s' if mutual != 1 else ''}")
+    company = _normalize(candidate.company)
+    if company and company == _normalize(viewer.company):
+        score += COMPANY_WEIGHT
+        reasons.append(f"Same company: {candidate.company.strip()}")
+    industry = _normalize(candidate.industry)
+    if industry and industry == _normalize(viewer.industry):
+        score += INDUSTRY_WEIGHT
+        reasons.append(f"Same industry: {candidate.industry.strip()}")
+    location = _normalize(candidate.location)
+    if location and location == _normalize(viewer.location):
+        score += LOCATION_WEIGHT
+        reasons.append(f"Same location: {candidate.location.strip()}")
+    shared_title = _title_words(viewer.title) & _title_words(candidate.title)
+    if shared_title:
+        score += TITLE_WEIGHT
+        reasons.append(f"Similar title: {candidate.title}")
+    return score, reasons
+
+
+def _cold_start_candidates(db: Session, viewer: User, exclude: Set[int], limit: int) -> List[User]:
+    """For users without connections: recent users sharing company, industry or location"""
+    shared = [
+        column == value
+        for column, value in ((User.company, _meaningful(viewer.company)),
+                              (User.industry, _meaningful(viewer.industry)),
+                              (User.location, _meaningful(viewer.location)))
+        if value
+    ]
+    if not shared:
+        return []
+    query = (
+        select(User)
+        .where(User.is_active == True, or_(*shared), User.id != viewer.id)
+        .order_by(User.created_at.desc(), User.id.desc())
+        .limit(limit + len(exclude))
+    )
+    return [user for user in db.execute(query).scalars() if user.id not in exclude][:limit]
+
+
+def suggest_connections(db: Session, user_id: int, k: int = 20) -> List[Dict[str, Any]]:
+    """Top k people user_id may know, best first.
+
+    Each item is {"user", "score", "mutual_count", "reasons"}. Existing
+    connections, pending requests in either direction and inactive users are
+    excluded.
+    """
+    viewer = db.get(User, user_id)
+    if not viewer or k <= 0:
+        return []
+    index = get_graph_index(db)
+    exclude = pending_request_ids(db, user_id)
+
+    mutual = friends_of_friends(index, user_id, exclude)
+    if mutual:
+        shortlist = heapq.nlargest(k * POOL_FACTOR, mutual.items(), key=lambda item: (item[1], -item[0]))
+        candidates = db.execute(
+            select(User).where(User.id.in_([candidate_id for candidate_id, _ in shortlist]), User.is_active == True)
+        ).scalars().all()
+    else:
+        connected = set(index.neighbours(user_id))
+        candidates = _cold_start_candidates(db, viewer, exclude | connected, k * POOL_FACTOR)
+
+    ranked = []
+    for candidate in candidates:
+        count = mutual.get(candidate.id, 0)
+        score, reasons = _score(viewer, candidate, count)
+        ranked.append({"user": candidate, "score": round(score, 2), "mutual_count": count,
+                       "reasons": reasons or ["New to platform"]})
+    ranked.sort(key=lambda item: (-item["score"], item["user"].id))
+    return ranked[:k]
+
+
+# ==================== PRECOMPUTED LISTS ====================
+# people_suggestions holds each user's top PYMK_LIST_SIZE candidates in rank
+# order. Lists are recomputed by a background job once older than
+# PYMK_TTL_HOURS, or sooner when the user or someone on the list edits the
+# profile fields used for matching. A user without a list gets the live
+# friends-of-friends result, which is stored for the next read.
+
+_PROFILE_COLUMNS = (User.id, User.company, User.industry, User.location, User.title)
+_MATCH_FIELDS = ("company", "industry", "location", "title")
+
+# computed_at of lists invalidated by a profile change; older than any real list
+STALE_AT = datetime(1970, 1, 1)
+
+_refresher_stop = threading.Event()
+_refresher_thread: Optional[threading.Thread] = None
+
+
+def blocking_keys(profile) -> Set[str]:
+    """Blocking keys of a user: normalized company, industry and location, and title words"""
+    keys = {f"{field}:{value}" for field in ("company", "industry", "location")
+            if (value := _normalize(getattr(profile, field)))}
+    keys.update(f"title:{word}" for word in _title_words(profile.title))
+    return keys
+
+
+def _pending_pairs(db: Session) -> Dict[int, Set[int]]:
+    """Both ends of every pending friend request or connection, in one query"""
+    pending = defaultdict(set)
+    rows = db.execute(union(
+        select(FriendRequest.sender_id, FriendRequest.receiver_id).where(FriendRequest.status == 'pending'),
+        select(Connection.user_id, Connection.connected_user_id).where(Connection.status == 'pending'),
+    ))
+    for a, b in rows:
+        pending[a].add(b)
+        pending[b].add(a)
+    return pending
+
+
+def compute_people_suggestions(
+    user_id: int,
+    profiles: Dict[int, Any],
+    keys: Dict[int, Set[str]],
+    blocks: Dict[str, List[int]],
+    index: SocialGraphIndex,
+    pending: Set[int],
+    n: int,
+) -> List[Dict[str, Any]]:
+    """Top n candidates for one user from friends-of-friends plus attribute blocks.
+
+    profiles maps active user ids to rows with the profile columns; blocks
+    maps each blocking key to the ids sharing it. Blocks bigger than
+    PYMK_MAX_BLOCK_SIZE are skipped.
+    """
+    viewer = profiles[user_id]
+    mutual = friends_of_friends(index, user_id, pending)
+    candidates = set(mutual)
+    for key in keys[user_id]:
+        block = blocks[key]
+        if len(block) <= settings.PYMK_MAX_BLOCK_SIZE:
+            candidates.update(block)
+    candidates.difference_update(pending, index.neighbours(user_id))
+    candidates.discard(user_id)
+
+    scored = []
+    for candidate_id in candidates:
+        candidate = profiles.get(candidate_id)
+        if candidate is None:
+            continue  # inactive
+        count = mutual.get(candidate_id, 0)
+        score, reasons = _score(viewer, candidate, count)
+        scored.append((score, -candidate_id, count, reasons))
+    return [
+        {"candidate_id": -neg_id, "score": round(score, 2), "mutual_count": count, "reasons": reasons}
+        for score, neg_id, count, reasons in heapq.nlargest(n, scored)
+    ]
+
+
+def store_people_suggestions(db: Session, user_id: int, items: List[Dict[str, Any]], computed_at: Optional[datetime] = None):
+    """Replace a user's stored list. Items need candidate_id (or user), score, mutual_count, reasons.
+    The caller commits."""
+    computed_at = computed_at or datetime.now()
+    db.execute(delete(PeopleSuggestion).where(PeopleSuggestion.user_id == user_id))
+    db.add_all([
+        PeopleSuggestion(
+            user_id=user_id,
+            candidate_id=item["candidate_id"] if "candidate_id" in item else item["user"].id,
+            rank=rank,
+            score=item["score"],
+            mutual_count=item["mutual_count"],
+            reasons=json.dumps(item["reasons"]),
+            computed_at=computed_at,
+        )
+        for rank, item in enumerate(items)
+    ])
+
+
+def refresh_people_suggestions(db: Session, user_ids: Optional[Iterable[int]] = None, batch_size: int = 500) -> int:
+    """Recompute and store the lists of user_ids (default: every active user).
+
+    Reads all active profiles once to build the blocks, so this is meant for
+    the background job and the migration script. Commits every batch_size
+    users and returns the number of lists written.
+    """
+    profiles = {row.id: row for row in db.execute(select(*_PROFILE_COLUMNS).where(User.is_active == True))}
+    keys = {user_id: blocking_keys(profile) for user_id, profile in profiles.items()}
+    blocks: Dict[str, List[int]] = defaultdict(list)
+    for user_id, user_keys in keys.items():
+        for key in user_keys:
+            blocks[key].append(user_id)
+    index = get_graph_index(db, wait=True)
+    pending = _pending_pairs(db)
+
+    written = 0
+    now = datetime.now()
+    for user_id in (profiles if user_ids is None else user_ids):
+        if user_id not in profiles:
+            db.execute(delete(PeopleSuggestion).where(PeopleSuggestion.user_id == user_id))
+            continue
+        items = compute_people_suggestions(user_id, profiles, keys, blocks, index,
+                                           pending.get(user_id, set()), settings.PYMK_LIST_SIZE)
+        store_people_suggestions(db, user_id, items, now)
+        written += 1
+        if written % batch_size == 0:
+            db.commit()
+    db.commit()
+    return written
+
+
+def stale_suggestion_user_ids(db: Session, limit: int = 5000) -> List[int]:
+    """Users whose stored list is past PYMK_TTL_HOURS or was invalidated, oldest first"""
+    cutoff = datetime.now() - timedelta(hours=settings.PYMK_TTL_HOURS)
+    rows = db.execute(
+        select(PeopleSuggestion.user_id)
+        .group_by(PeopleSuggestion.user_id)
+        .having(func.min(PeopleSuggestion.computed_at) < cutoff)
+        .order_by(func.min(PeopleSuggestion.computed_at))
+        .limit(limit)
+    ).all()
+    return [row[0] for row in rows]
+
+
+def people_you_may_know(db: Session, user_id: int) -> List[Dict[str, Any]]:
+    """The user's suggestions, best first, as {"user", "score", "mutual_count", "reasons"}.
+
+    Normally one indexed read of the stored list; candidates connected or
+    with a pending request since it was computed are dropped. Without a
+    stored list, the live friends-of-friends result is returned and stored.
+    """
+    pending_request = exists().where(
+        FriendRequest.status == 'pending',
+        or_(
+            and_(FriendRequest.sender_id == user_id, FriendRequest.receiver_id == PeopleSuggestion.candidate_id),
+            and_(FriendRequest.sender_id == PeopleSuggestion.candidate_id, FriendRequest.receiver_id == user_id),
+        ),
+    )
+    rows = db.execute(
+        select(PeopleSuggestion, User)
+        .join(User, User.id == PeopleSuggestion.candidate_id)
+        .where(PeopleSuggestion.user_id == user_id, User.is_active == True, ~pending_request)
+        .order_by(PeopleSuggestion.rank)
+    ).all()
+    if rows:
+        index = get_graph_index(db)
+        return [
+            {"user": user, "score": entry.score, "mutual_count": entry.mutual_count,
+             "reasons": json.loads(entry.reasons or "[]") or ["New to platform"]}
+            for entry, user in rows
+            if not index.is_connected(user_id, user.id)
+        ]
+
+    items = suggest_connections(db, user_id, settings.PYMK_LIST_SIZE)
+    if items:
+        try:
+            store_people_suggestions(db, user_id, items)
+            db.commit()
+        except Exception as e:
+            db.rollback()
+            logger.warning(f"Could not store suggestions for user {user_id}: {e}")
+    return items
+
+
+@event.listens_for(User, "after_update")
+def _invalidate_on_profile_change(mapper, connection, user):
+    # Lists that match on this user's old attributes: their own and any that include them
+    state = inspect(user)
+    if not any(state.attrs[field].history.has_changes() for field in _MATCH_FIELDS):
+        return
+    listed_by = select(PeopleSuggestion.user_id).where(PeopleSuggestion.candidate_id == user.id)
+    connection.execute(
+        update(PeopleSuggestion)
+        .where(or_(PeopleSuggestion.user_id == user.id, PeopleSuggestion.user_id.in_(listed_by)))
+        .values(computed_at=STALE_AT)
+    )
+
+
+def start_suggestion_refresher():
+    """Recompute stale people_suggestions lists periodically in a daemon thread"""
+    global _refresher_thread
+    interval = settings.PYMK_REFRESH_INTERVAL_SECONDS
+    if interval <= 0 or (_refresher_thread and _refresher_thread.is_alive()):
+        return
+
+    def _run():
+        from database_enhanced import get_db_context
+        while not _refresher_stop.wait(interval):
+            try:
+                with get_db_context() as db:
+                    stale = stale_suggestion_user_ids(db)
+                    if stale:
+                        written = refresh_people_suggestions(db, stale)
+                        logger.info(f"Refreshed {written} people-you-may-know lists")
+            except Exception as e:
+                logger.error(f"People-you-may-know refresh failed: {e}")
+
+    _refresher_stop.clear()
+    _refresher_thread = threading.Thread(target=_run, name="pymk-refresher", daemon=True)
+    _refresher_thread.start()
+    logger.info("People-you-may-know refresher started")
+
+
+def stop_suggestion_refresher():
+    """Stop the thread started by start_suggestion_refresher()"""
+    _refresher_stop.set()
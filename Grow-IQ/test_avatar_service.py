@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+Avatar service test
+Checks multi-size rendering, draft-mode decoding, validation and the process pool path
+"""
+
+import io
+import os
+import sys
+import asyncio
+
+import pytest
+from fastapi import HTTPException
+from PIL import Image, ImageOps
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import avatar_service
+from avatar_service import render_avatar_variants, process_avatar, avatar_urls, remove_avatar, AVATAR_SIZES
+from config import settings
+
+
+def _encode(size, fmt="JPEG", mode="RGB"):
+    output = io.BytesIO()
+    Image.new(mode, size, (10, 120, 200)).save(output, fmt)
+    return output.getvalue()
+
+
+def test_renders_every_size_square():
+    variants = render_avatar_variants(_encode((3000, 2000)))
+    assert sorted(variants) == sorted(AVATAR_SIZES)
+    for size, content in variants.items():
+        with Image.open(io.BytesIO(content)) as img:
+            assert img.format == "JPEG" and img.size == (size, size)
+
+
+def test_jpeg_is_decoded_in_draft_mode(monkeypatch):
+    decoded = []
+    original = ImageOps.exif_transpose
+
+    def exif_transpose(img, **kwargs):
+        decoded.append(img.size)
+        return original(img, **kwargs)
+
+    monkeypatch.setattr(ImageOps, "exif_transpose", exif_transpose)
+    render_avatar_variants(_encode((3200, 3200)))
+    # libjpeg scaled the decode down to 1/8 instead of producing the full 3200px bitmap
+    assert decoded[0] == (400, 400)
+
+
+def test_small_and_transparent_sources():
+    variants = render_avatar_variants(_encode((100, 80), "PNG", "RGBA"))
+    with Image.open(io.BytesIO(variants[400])) as img:
+        assert img.size == (80, 80)  # never upscaled
+    with Image.open(io.BytesIO(variants[64])) as img:
+        assert img.size == (64, 64) and img.mode == "RGB"
+
+
+def test_validation(monkeypatch):
+    monkeypatch.setattr(settings, "AVATAR_WORKERS", 0)
+    with pytest.raises(HTTPException) as exc:
+        asyncio.run(process_avatar(_encode((50, 50)), max_size=10))
+    assert exc.value.status_code == 413
+    with pytest.raises(HTTPException) as exc:
+        asyncio.run(process_avatar(b"%PDF-1.7 not an image"))
+    assert exc.value.status_code == 400
+    with pytest.raises(HTTPException) as exc:
+        asyncio.run(process_avatar(b"\xff\xd8\xff\xe0 truncated"))
+    assert exc.value.status_code == 400
+
+
+def test_process_pool_round_trip(monkeypatch):
+    monkeypatch.setattr(settings, "AVATAR_WORKERS", 1)
+    try:
+        variants = asyncio.run(process_avatar(_encode((900, 600))))
+        # Workers are never forked from the threaded server process
+        assert avatar_service._pool._mp_context.get_start_method() != "fork"
+    finally:
+        avatar_service.shutdown_avatar_pool()
+    assert sorted(variants) == sorted(AVATAR_SIZES)
+
+
+def test_save_urls_and_removal(tmp_path, monkeypatch):
+    monkeypatch.setattr(avatar_service, "BASE_DIR", str(tmp_path))
+    monkeypatch.setattr(avatar_service, "AVATAR_DIR", str(tmp_path / "static" / "uploads" / "profile_pics"))
+    url = asyncio.run(avatar_service.save_avatar(7, {size: b"x" for size in AVATAR_SIZES}))
+    urls = avatar_urls(url)
+    assert urls[400] == url and urls[64].endswith("-64.jpg")
+    assert len(os.listdir(avatar_service.AVATAR_DIR)) == 3
+    remove_avatar(url)
+    assert os.listdir(avatar_service.AVATAR_DIR) == []
+    # Legacy single-file avatars map every size to the same file
+    assert set(avatar_urls("/static/uploads/profile_pics/old.png").values()) == {"/static/uploads/profile_pics/old.png"}
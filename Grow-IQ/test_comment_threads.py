@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Threaded comments test
+Checks that a page of comment threads is loaded in one query and nested correctly
+"""
+
+import os
+import sys
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import event
+from sqlalchemy.orm import sessionmaker
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from models import User, Post, Comment
+from feed_service import feed_query
+from comment_service import load_comment_threads
+
+BASE = datetime(2025, 1, 1)
+
+
+@pytest.fixture
+def db(engine):
+    session = sessionmaker(bind=engine)()
+    session.add_all([
+        User(username="alice", email="alice@example.com", full_name="Alice"),
+        User(username="bob", email="bob@example.com", full_name="Bob"),
+    ])
+    session.flush()
+    session.add_all([Post(content="first", user_id=1), Post(content="other", user_id=2)])
+    session.flush()
+
+    def comment(minutes, parent=None, post_id=1, user_id=1):
+        c = Comment(content=f"c{minutes}", post_id=post_id, user_id=user_id,
+                    parent_comment_id=parent, created_at=BASE + timedelta(minutes=minutes))
+        session.add(c)
+        session.flush()
+        return c.id
+
+    roots = [comment(m, user_id=1 + m % 2) for m in range(0, 50, 10)]
+    reply = comment(1, roots[0], user_id=2)
+    comment(2, reply)
+    comment(11, roots[1])
+    comment(3, post_id=2)
+    session.commit()
+    yield session
+    session.close()
+
+
+class QueryCounter:
+    def __init__(self, engine):
+        self.engine = engine
+        self.count = 0
+
+    def _on_execute(self, *args):
+        self.count += 1
+
+    def __enter__(self):
+        event.listen(self.engine, "before_cursor_execute", self._on_execute)
+        return self
+
+    def __exit__(self, *exc):
+        event.remove(self.engine, "before_cursor_execute", self._on_execute)
+
+
+def test_threads_are_nested(engine, db):
+    db.expire_all()
+    with QueryCounter(engine) as counter:
+        threads, cursor = load_comment_threads(db, 1, 2)
+    assert counter.count == 1
+    assert [t["content"] for t in threads] == ["c0", "c10"]
+    assert threads[0]["author"]["full_name"] == "Alice"
+    reply = threads[0]["replies"][0]
+    assert reply["content"] == "c1" and reply["author"]["full_name"] == "Bob"
+    assert [r["content"] for r in reply["replies"]] == ["c2"]
+    assert [r["content"] for r in threads[1]["replies"]] == ["c11"]
+    assert cursor is not None
+
+
+def test_cursor_walk_covers_all_roots(db):
+    seen, cursor = [], None
+    while True:
+        threads, cursor = load_comment_threads(db, 1, 2, cursor)
+        seen.extend(t["content"] for t in threads)
+        if cursor is None:
+            break
+    assert seen == ["c0", "c10", "c20", "c30", "c40"]
+
+
+def test_feed_query_does_not_load_comments(engine, db):
+    db.expire_all()
+    with QueryCounter(engine) as counter:
+        feed_query(db).all()
+    assert counter.count == 1
@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""
+Connection stats rollup test
+Checks counter maintenance on request/connection transitions, the single
+aggregate query, and cache invalidation on commit
+"""
+
+import os
+import sys
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import event
+from sqlalchemy.orm import sessionmaker
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from models import User, Connection, FriendRequest
+from connection_service import (
+    compute_connection_stats, connect_users, connection_stats, invalidate_connection_stats, read_connection_counters,
+    refresh_connection_counters,
+)
+
+
+@pytest.fixture
+def db(engine):
+    session = sessionmaker(bind=engine)()
+    industries = {2: "Software", 3: "Software", 4: "Finance"}
+    session.add_all([
+        User(id=i, username=f"u{i}", email=f"u{i}@example.com", full_name=f"User {i}", industry=industries.get(i))
+        for i in range(1, 7)
+    ])
+    session.commit()
+    invalidate_connection_stats(range(1, 7))
+    yield session
+    session.close()
+
+
+def test_counters_follow_request_lifecycle(db):
+    request = FriendRequest(sender_id=1, receiver_id=2)
+    db.add(request)
+    db.commit()
+    assert read_connection_counters(db, 1) == (0, 0, 1)
+    assert read_connection_counters(db, 2) == (0, 1, 0)
+
+    request.status = 'accepted'
+    connection = connect_users(db, 1, 2)
+    db.commit()
+    assert read_connection_counters(db, 1) == (1, 0, 0)
+    assert read_connection_counters(db, 2) == (1, 0, 0)
+
+    connection.status = 'removed'
+    db.commit()
+    assert read_connection_counters(db, 1) == (0, 0, 0)
+
+    # Reconnecting reuses the removed row
+    assert connect_users(db, 2, 1) is connection
+    db.commit()
+    assert read_connection_counters(db, 2) == (1, 0, 0)
+
+
+def test_deleted_and_rolled_back_requests(db):
+    request = FriendRequest(sender_id=3, receiver_id=1)
+    db.add(request)
+    db.commit()
+    db.delete(request)
+    db.commit()
+    assert read_connection_counters(db, 1) == (0, 0, 0)
+
+    db.add(FriendRequest(sender_id=3, receiver_id=1))
+    db.flush()
+    assert read_connection_counters(db, 1) == (0, 1, 0)
+    db.rollback()
+    assert read_connection_counters(db, 1) == (0, 0, 0)
+
+
+def test_refresh_matches_maintained_counters(db):
+    db.add_all([
+        Connection(user_id=1, connected_user_id=2, status='accepted'),
+        Connection(user_id=3, connected_user_id=1, status='accepted'),
+        FriendRequest(sender_id=4, receiver_id=1),
+    ])
+    db.commit()
+    maintained = [read_connection_counters(db, i) for i in range(1, 7)]
+    refresh_connection_counters(db)
+    db.commit()
+    assert [read_connection_counters(db, i) for i in range(1, 7)] == maintained
+    assert maintained[0] == (2, 1, 0)
+
+
+def test_rollup_is_two_queries(db, engine):
+    old = datetime.utcnow() - timedelta(days=90)
+    db.add_all([
+        Connection(user_id=1, connected_user_id=2, status='accepted', accepted_at=datetime.utcnow()),
+        Connection(user_id=3, connected_user_id=1, status='accepted', accepted_at=old),
+        Connection(user_id=1, connected_user_id=4, status='accepted', accepted_at=old),
+        Connection(user_id=1, connected_user_id=5, status='accepted', accepted_at=old),
+        Connection(user_id=1, connected_user_id=6, status='pending'),
+        FriendRequest(sender_id=1, receiver_id=6),
+    ])
+    db.commit()
+
+    statements = []
+    event.listen(engine, "before_cursor_execute", lambda *args: statements.append(args[2]))
+    stats = compute_connection_stats(db, 1)
+    assert len(statements) == 2
+    assert stats["total_connections"] == 4
+    assert stats["sent_requests"] == 1
+    assert stats["recent_connections"] == 1
+    assert stats["industry_distribution"] == {"Software": 2, "Finance": 1}
+
+
+def test_cache_invalidated_on_commit(db, engine):
+    first = connection_stats(db, 1)
+    statements = []
+    event.listen(engine, "before_cursor_execute", lambda *args: statements.append(args[2]))
+    assert connection_stats(db, 1) is first
+    assert statements == []
+
+    db.add(FriendRequest(sender_id=2, receiver_id=1))
+    db.commit()
+    assert connection_stats(db, 1)["pending_requests"] == 1
+    # Unrelated users keep their cached rollup
+    cached = connection_stats(db, 5)
+    db.add(Connection(user_id=3, connected_user_id=4, status='accepted'))
+    db.commit()
+    assert connection_stats(db, 5) is cached
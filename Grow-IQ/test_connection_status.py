@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+"""
+Batched connection status test
+Checks status precedence and that a page of targets is resolved in two queries
+"""
+
+import os
+import sys
+
+import pytest
+from sqlalchemy import event
+from sqlalchemy.orm import sessionmaker
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from models import User, Connection, FriendRequest
+from connection_service import resolve_connection_statuses
+
+
+@pytest.fixture
+def db(engine):
+    session = sessionmaker(bind=engine)()
+    session.add_all([User(username=f"u{i}", email=f"u{i}@example.com", full_name=f"User {i}") for i in range(1, 30)])
+    session.flush()
+    session.add_all([
+        Connection(user_id=1, connected_user_id=2, status="accepted"),
+        Connection(user_id=3, connected_user_id=1, status="accepted"),
+        Connection(user_id=1, connected_user_id=7, status="removed"),
+        FriendRequest(sender_id=1, receiver_id=4, status="pending"),
+        FriendRequest(sender_id=5, receiver_id=1, status="pending"),
+        FriendRequest(sender_id=6, receiver_id=1, status="declined"),
+        # A stale pending request between users who are already connected
+        FriendRequest(sender_id=1, receiver_id=2, status="pending"),
+    ])
+    session.commit()
+    yield session
+    session.close()
+
+
+def test_statuses(db):
+    statuses = resolve_connection_statuses(db, 1, [1, 2, 3, 4, 5, 6, 7])
+    assert statuses == {
+        2: "connected",
+        3: "connected",
+        4: "request_sent",
+        5: "request_received",
+        6: "not_connected",
+        7: "not_connected",
+    }
+
+
+def test_page_uses_two_queries(engine, db):
+    count = []
+    listener = lambda *args: count.append(1)
+    event.listen(engine, "before_cursor_execute", listener)
+    try:
+        statuses = resolve_connection_statuses(db, 1, range(2, 22))
+    finally:
+        event.remove(engine, "before_cursor_execute", listener)
+    assert len(count) == 2
+    assert len(statuses) == 20
+    assert resolve_connection_statuses(db, 1, []) == {}
@@ -216,10 +216,10 @@ class ConnectionSystemTester:
             with open("connection_routes.py", "r") as f:
                 content = f.read()
                 
+                # Mutual counts come from graph_service, statuses from connection_service
                 required_functions = [
                     "get_connection_suggestions_for_user",
-                    "calculate_mutual_connections_count",
-                    "get_connection_status"
+                    "get_mutual_connections"
                 ]
                 
                 missing_functions = []
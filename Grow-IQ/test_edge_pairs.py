@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+"""
+Canonical connection pair test
+Checks one row per user pair, that startup adds the pair columns without
+deleting legacy rows, the dedupe migration and that pair lookups are index
+seeks
+"""
+
+import os
+import sys
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import sessionmaker
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import database_enhanced
+from migrate_edge_pairs import migrate_edge_pairs
+from models import Base, User, Connection, FriendRequest
+from connection_service import (
+    connect_users, ensure_edge_schema, find_connection, find_pending_request, same_pair,
+)
+
+
+@pytest.fixture
+def db(engine):
+    session = sessionmaker(bind=engine)()
+    session.add_all([User(id=i, username=f"u{i}", email=f"u{i}@example.com", full_name=f"User {i}") for i in range(1, 6)])
+    session.commit()
+    yield session
+    session.close()
+
+
+def test_pair_columns_are_canonical(db):
+    db.add_all([Connection(user_id=4, connected_user_id=2, status='accepted'), FriendRequest(sender_id=5, receiver_id=3)])
+    db.commit()
+    assert (db.query(Connection).one().low_user_id, db.query(Connection).one().high_user_id) == (2, 4)
+    assert find_connection(db, 2, 4, 'accepted') is find_connection(db, 4, 2)
+    assert find_pending_request(db, 3, 5).sender_id == 5
+
+
+def test_one_connection_per_pair(db):
+    db.add(Connection(user_id=1, connected_user_id=2, status='accepted'))
+    db.commit()
+    db.add(Connection(user_id=2, connected_user_id=1, status='accepted'))
+    with pytest.raises(IntegrityError):
+        db.commit()
+    db.rollback()
+
+    first = connect_users(db, 3, 1)
+    db.commit()
+    assert connect_users(db, 1, 3) is first
+    db.commit()
+    assert db.query(Connection).count() == 2
+
+
+def test_one_pending_request_per_pair(db):
+    db.add(FriendRequest(sender_id=1, receiver_id=2))
+    db.commit()
+    db.add(FriendRequest(sender_id=2, receiver_id=1))
+    with pytest.raises(IntegrityError):
+        db.commit()
+    db.rollback()
+
+    # Answered requests don't block a new one
+    db.query(FriendRequest).update({"status": "declined"})
+    db.add(FriendRequest(sender_id=2, receiver_id=1))
+    db.commit()
+    assert db.query(FriendRequest).count() == 2
+
+
+def test_pair_lookups_use_indexes(db):
+    plans = []
+    for model in (Connection, FriendRequest):
+        statement = db.query(model).filter(same_pair(model, 3, 1), model.status == 'pending').statement
+        compiled = statement.compile(db.get_bind(), compile_kwargs={"literal_binds": True})
+        plans.append(" ".join(row[-1] for row in db.execute(text(f"EXPLAIN QUERY PLAN {compiled}"))))
+    assert "uq_connection_pair" in plans[0]
+    assert "uq_friend_request_pending_pair" in plans[1]
+
+
+def test_legacy_rows_are_deduplicated_by_migration(tmp_path, monkeypatch):
+    engine = create_engine(f"sqlite:///{tmp_path / 'legacy.db'}")
+    Base.metadata.create_all(engine)
+    with engine.begin() as conn:
+        # Recreate the pre-migration shape: no pair columns, no unique indexes
+        for index in ("uq_connection_pair", "ix_connections_high_low", "uq_friend_request_pending_pair",
+                      "ix_friend_requests_receiver_status", "ix_friend_requests_sender_status"):
+            conn.execute(text(f"DROP INDEX {index}"))
+        for table in ("connections", "friend_requests"):
+            conn.execute(text(f"ALTER TABLE {table} DROP COLUMN low_user_id"))
+            conn.execute(text(f"ALTER TABLE {table} DROP COLUMN high_user_id"))
+        conn.execute(text("INSERT INTO users (id, username, email, full_name, user_type, is_verified, is_active, "
+                          "created_at, updated_at, profile_visibility, show_email, show_phone, connections_count, "
+                          "pending_in_count, pending_out_count) VALUES "
+                          + ", ".join(f"({i}, 'u{i}', 'u{i}@x', 'U{i}', 'normal', 0, 1, '2024-01-01', '2024-01-01', "
+                                      f"'public', 0, 0, 0, 0, 0)" for i in range(1, 5))))
+        early, late = datetime.now() - timedelta(days=10), datetime.now()
+        conn.execute(
+            text("INSERT INTO connections (user_id, connected_user_id, status, accepted_at) VALUES (:a, :b, :s, :t)"),
+            [
+                {"a": 1, "b": 2, "s": "accepted", "t": early},
+                {"a": 2, "b": 1, "s": "accepted", "t": late},   # mirrored double write
+                {"a": 1, "b": 3, "s": "removed", "t": early},
+                {"a": 3, "b": 1, "s": "accepted", "t": late},   # reconnected with a new row
+                {"a": 4, "b": 2, "s": "pending", "t": None},
+            ],
+        )
+        conn.execute(
+            text("INSERT INTO friend_requests (id, sender_id, receiver_id, status) VALUES (:id, :a, :b, :s)"),
+            [
+                {"id": 1, "a": 1, "b": 4, "s": "pending"},
+                {"id": 2, "a": 4, "b": 1, "s": "pending"},
+                {"id": 3, "a": 1, "b": 4, "s": "pending"},
+                {"id": 4, "a": 2, "b": 3, "s": "declined"},
+            ],
+        )
+    monkeypatch.setattr(database_enhanced.db_manager, "engine", engine)
+
+    # Startup adds the columns but deletes nothing; the unique indexes wait for the migration
+    assert ensure_edge_schema() is True
+    assert ensure_edge_schema() is False
+    with engine.connect() as conn:
+        assert conn.execute(text("SELECT count(*) FROM connections WHERE low_user_id IS NOT NULL")).scalar() == 5
+        assert "uq_connection_pair" not in [row[1] for row in conn.execute(text("PRAGMA index_list(connections)"))]
+
+    assert migrate_edge_pairs() is True
+    assert ensure_edge_schema() is False
+
+    with engine.connect() as conn:
+        edges = conn.execute(text(
+            "SELECT low_user_id, high_user_id, status, accepted_at FROM connections ORDER BY low_user_id, high_user_id"
+        )).all()
+        assert [tuple(edge[:3]) for edge in edges] == [(1, 2, "accepted"), (1, 3, "accepted"), (2, 4, "pending")]
+        assert str(edges[0].accepted_at) == str(early)  # the earliest acceptance is kept
+        requests = dict(conn.execute(text("SELECT id, status FROM friend_requests")).all())
+        assert requests == {1: "pending", 2: "cancelled", 3: "cancelled", 4: "declined"}
+        assert conn.execute(text("SELECT connections_count, pending_in_count FROM users WHERE id = 1")).one() == (2, 0)
+        assert conn.execute(text("SELECT pending_in_count FROM users WHERE id = 4")).scalar() == 1
+    with pytest.raises(IntegrityError), engine.begin() as conn:
+        conn.execute(text("INSERT INTO connections (user_id, connected_user_id, status, low_user_id, high_user_id) "
+                          "VALUES (2, 1, 'accepted', 1, 2)"))
+
+
+def test_startup_adds_pair_columns_without_duplicates(tmp_path, monkeypatch):
+    engine = create_engine(f"sqlite:///{tmp_path / 'legacy.db'}")
+    Base.metadata.create_all(engine)
+    with engine.begin() as conn:
+        conn.execute(text("DROP INDEX uq_connection_pair"))
+        conn.execute(text("DROP INDEX ix_connections_high_low"))
+        conn.execute(text("DROP INDEX uq_friend_request_pending_pair"))
+        for table in ("connections", "friend_requests"):
+            conn.execute(text(f"ALTER TABLE {table} DROP COLUMN low_user_id"))
+            conn.execute(text(f"ALTER TABLE {table} DROP COLUMN high_user_id"))
+        conn.execute(text("INSERT INTO connections (user_id, connected_user_id, status) VALUES (2, 1, 'accepted')"))
+    monkeypatch.setattr(database_enhanced.db_manager, "engine", engine)
+
+    assert ensure_edge_schema() is True
+    assert ensure_edge_schema() is False
+    with engine.connect() as conn:
+        assert conn.execute(text("SELECT low_user_id, high_user_id FROM connections")).all() == [(1, 2)]
+        indexes = [row[1] for row in conn.execute(text("PRAGMA index_list(connections)"))]
+        assert "uq_connection_pair" in indexes
@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""
+Engagement counters test
+Checks that like/comment counters move with their rows and that reconciliation repairs drift
+"""
+
+import os
+import sys
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from models import Base, User, Post, PostLike, Comment
+from feed_service import add_like, remove_like, record_comment, read_counters, reconcile_engagement_counters
+
+
+@pytest.fixture
+def db():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    session = sessionmaker(bind=engine)()
+    session.add_all([
+        User(username="alice", email="alice@example.com", full_name="Alice"),
+        User(username="bob", email="bob@example.com", full_name="Bob"),
+    ])
+    session.flush()
+    session.add(Post(content="hello", user_id=1))
+    session.commit()
+    yield session
+    session.close()
+
+
+def test_like_toggle_is_idempotent(db):
+    assert add_like(db, 1, 1)
+    assert not add_like(db, 1, 1)
+    assert add_like(db, 1, 2)
+    db.commit()
+    assert read_counters(db, 1) == (2, 0)
+    assert db.query(PostLike).count() == 2
+
+    assert remove_like(db, 1, 1)
+    assert not remove_like(db, 1, 1)
+    db.commit()
+    assert read_counters(db, 1) == (1, 0)
+
+
+def test_counter_rolls_back_with_like(db):
+    add_like(db, 1, 1)
+    db.rollback()
+    assert read_counters(db, 1) == (0, 0)
+    assert db.query(PostLike).count() == 0
+
+
+def test_comment_counter(db):
+    db.add(Comment(post_id=1, user_id=2, content="hi"))
+    record_comment(db, 1)
+    db.commit()
+    assert read_counters(db, 1) == (0, 1)
+
+
+def test_reconcile_fixes_drift(db):
+    add_like(db, 1, 1)
+    db.add(Comment(post_id=1, user_id=2, content="untracked"))
+    db.commit()
+    db.query(Post).filter(Post.id == 1).update({"likes_count": 7})
+    db.commit()
+
+    assert reconcile_engagement_counters(db) == 1
+    assert read_counters(db, 1) == (1, 1)
+    assert reconcile_engagement_counters(db) == 0
@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+"""
+Engagement score test
+Checks the incremental time-decayed score, that it stays finite far from
+its epoch, the network top-K query, and that SQLite builds without math
+functions get ln()/exp()
+"""
+
+import os
+import sys
+import math
+import sqlite3
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import sessionmaker
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from config import settings
+from models import Base, User, Post, PostLike, Comment, Connection
+import timeline_service
+import feed_service
+from feed_service import add_like, remove_like, record_comment, rescore_engagement, decayed_log_weight
+from timeline_service import fan_out, top_network_posts
+
+
+@pytest.fixture
+def db(monkeypatch):
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    session = sessionmaker(bind=engine)()
+    session.add_all([User(username=f"u{i}", email=f"u{i}@example.com", full_name=f"U{i}") for i in range(1, 5)])
+    session.flush()
+    session.add_all([
+        Connection(user_id=1, connected_user_id=2, status='accepted'),
+        Connection(user_id=3, connected_user_id=1, status='accepted'),
+    ])
+    session.commit()
+    monkeypatch.setattr(timeline_service, "_large_authors", {"ids": set(), "checked_at": 0.0})
+    yield session
+    session.close()
+
+
+def _post(db, author_id, age_hours=0):
+    post = Post(content="p", user_id=author_id, created_at=datetime.now() - timedelta(hours=age_hours))
+    db.add(post)
+    db.flush()
+    fan_out(db, post.id)
+    db.commit()
+    return post.id
+
+
+def _score(db, post_id):
+    db.expire_all()
+    return db.get(Post, post_id).engagement_score
+
+
+def test_half_life():
+    now = datetime.now()
+    half_life = timedelta(hours=settings.FEED_SCORE_HALF_LIFE_HOURS)
+    assert decayed_log_weight(1.0, now - half_life) == pytest.approx(decayed_log_weight(1.0, now) - 1)
+    assert decayed_log_weight(2.0, now) == pytest.approx(decayed_log_weight(1.0, now) + 1)
+
+
+def test_far_future_scores_stay_finite(db):
+    # Thousands of half-lives past the epoch, where 2 ** half_lives overflows
+    far = datetime(2200, 1, 1)
+    older = Post(content="p", user_id=2, created_at=far - timedelta(days=30))
+    newer = Post(content="p", user_id=2, created_at=far)
+    db.add_all([older, newer])
+    db.commit()
+    base = _score(db, newer.id)
+    assert math.isfinite(base)
+
+    db.add(Comment(post_id=newer.id, user_id=1, content="nice", created_at=far))
+    record_comment(db, newer.id, at=far)
+    add_like(db, older.id, 3)
+    db.commit()
+    assert math.isfinite(_score(db, older.id)) and _score(db, newer.id) > base
+    remove_like(db, older.id, 3)
+    db.commit()
+
+    incremental = _score(db, newer.id)
+    rescore_engagement(db)
+    assert _score(db, newer.id) == pytest.approx(incremental, rel=1e-9)
+    assert _score(db, newer.id) > _score(db, older.id)
+
+
+def test_events_update_score_incrementally(db):
+    post_id = _post(db, 2)
+    base = _score(db, post_id)
+    assert base > 0
+
+    add_like(db, post_id, 1)
+    db.add(Comment(post_id=post_id, user_id=3, content="nice"))
+    record_comment(db, post_id)
+    db.commit()
+    assert _score(db, post_id) > base
+
+    # Incremental updates agree with a full rescore
+    incremental = _score(db, post_id)
+    rescore_engagement(db)
+    assert _score(db, post_id) == pytest.approx(incremental, rel=1e-6)
+
+
+def test_unlike_reverses_like(db):
+    post_id = _post(db, 2)
+    base = _score(db, post_id)
+    add_like(db, post_id, 3)
+    db.commit()
+    remove_like(db, post_id, 3)
+    db.commit()
+    assert _score(db, post_id) == pytest.approx(base, rel=1e-9)
+
+
+def test_top_network_posts_ranks_by_decayed_engagement(db):
+    stale = _post(db, 2, age_hours=24 * 30)
+    for user_id in (1, 3, 4):
+        db.add(PostLike(post_id=stale, user_id=user_id, created_at=datetime.now() - timedelta(days=30)))
+    db.commit()
+    fresh = _post(db, 3)
+    busy = _post(db, 2, age_hours=2)
+    add_like(db, busy, 1)
+    add_like(db, busy, 4)
+    db.commit()
+    rescore_engagement(db)
+    outsider = _post(db, 4)
+    add_like(db, outsider, 2)
+    db.commit()
+
+    ranked = [post.id for post, _ in top_network_posts(db, 1, 5)]
+    assert ranked == [busy, fresh, stale]
+
+
+def test_score_column_is_indexed(db):
+    plan = db.execute(text(
+        "EXPLAIN QUERY PLAN SELECT id FROM posts ORDER BY engagement_score DESC LIMIT 5"
+    )).all()
+    assert "ix_posts_engagement_score" in " ".join(row[-1] for row in plan)
+
+
+class _NoMathConnection(sqlite3.Connection):
+    """A SQLite build without SQLITE_ENABLE_MATH_FUNCTIONS, as far as the probe can tell"""
+    registered = []
+
+    def execute(self, sql, *args):
+        if "ln(" in sql:
+            raise sqlite3.OperationalError("no such function: ln")
+        return super().execute(sql, *args)
+
+    def create_function(self, name, *args, **kwargs):
+        self.registered.append(name)
+        return super().create_function(name, *args, **kwargs)
+
+
+def test_math_functions_added_where_sqlite_lacks_them():
+    engine = create_engine("sqlite://", creator=lambda: sqlite3.connect(":memory:", factory=_NoMathConnection))
+    Base.metadata.create_all(engine)
+    session = sessionmaker(bind=engine)()
+    session.add_all([User(username="a", email="a@example.com", full_name="A"), Post(content="p", user_id=1)])
+    session.commit()
+    before = session.get(Post, 1).engagement_score
+    add_like(session, 1, 1)
+    session.commit()
+    session.refresh(session.get(Post, 1))
+    assert {"ln", "exp"} <= set(_NoMathConnection.registered)
+    assert session.get(Post, 1).engagement_score > before
+    assert feed_service._sqlite_ln(0) is None and feed_service._sqlite_exp(1000) == math.inf
@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+Search facets test
+Checks facet counts come from one statement grouping each facet separately
+and cut to the top values in the database, are cached per search, and are returned with the first page of people and job
+search results
+"""
+
+import os
+import sys
+import asyncio
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import event
+from sqlalchemy.orm import sessionmaker
+from starlette.requests import Request
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from models import User, Job
+from graph_service import reset_graph_index
+from facet_utils import facet_counts, experience_bucket, reset_facet_cache
+from connection_routes import enhanced_search_users_and_connections
+from job_routes import search_jobs
+
+
+@pytest.fixture(autouse=True)
+def empty_facet_cache():
+    reset_facet_cache()
+    yield
+    reset_facet_cache()
+
+
+@pytest.fixture
+def db(engine):
+    session = sessionmaker(bind=engine)()
+    now = datetime.now()
+    people = [
+        ("Bangalore", "Technology", "Acme", 1), ("Bangalore", "Technology", "Initech", 4),
+        ("Bangalore", "Finance", "Acme", 12), ("Berlin", "Technology", "Acme", None), ("Berlin", None, "", 7),
+    ]
+    session.add(User(id=1, username="viewer", email="viewer@example.com", full_name="Viewer", location="Paris"))
+    for i, (location, industry, company, years) in enumerate(people, start=2):
+        session.add(User(id=i, username=f"user{i}", email=f"user{i}@example.com", full_name=f"User {i}",
+                         location=location, industry=industry, company=company, experience_years=years))
+    session.add_all([
+        Job(id=1, title="Engineer", company="Acme", location="Bangalore", job_type="full-time", posted_by=1,
+            posted_at=now - timedelta(days=2)),
+        Job(id=2, title="Analyst", company="Acme", location="Berlin", job_type="contract", posted_by=1,
+            posted_at=now - timedelta(days=1)),
+        Job(id=3, title="Designer", company="Globex", location="Bangalore", job_type="full-time", posted_by=1,
+            posted_at=now),
+    ])
+    session.commit()
+    reset_graph_index()
+    yield session
+    session.close()
+
+
+def search_people(db, **kwargs):
+    params = dict(query=None, search_type="all", location=None, industry=None, company=None, title=None,
+                  experience_min=None, experience_max=None, user_type=None, page=1, limit=2,
+                  sort_by="name", sort_order="asc")
+    params.update(kwargs)
+    return asyncio.run(enhanced_search_users_and_connections(1, db, **params))
+
+
+def test_one_statement_per_facet_groups_cached(db, engine):
+    statements = []
+    event.listen(engine, "before_cursor_execute", lambda *args: statements.append(args[2]))
+    query = db.query(User).filter(User.id != 1)
+    facets = {"location": User.location, "company": User.company, "experience": experience_bucket(User.experience_years)}
+    counts = facet_counts(query, facets)
+    assert counts["location"] == [{"value": "Bangalore", "count": 3}, {"value": "Berlin", "count": 2}]
+    # Empty and unknown values are left out
+    assert counts["company"] == [{"value": "Acme", "count": 3}, {"value": "Initech", "count": 1}]
+    assert counts["experience"] == [{"value": "0-2", "count": 1}, {"value": "10+", "count": 1},
+                                    {"value": "3-5", "count": 1}, {"value": "6-10", "count": 1}]
+    assert len(statements) == 1 and "UNION ALL" in statements[0] and statements[0].count("GROUP BY") == 3
+
+    assert facet_counts(query, facets) == counts
+    assert len(statements) == 1
+    top_one = facet_counts(query, facets, top=1)
+    # Each facet is cut to its top value in the database
+    assert top_one["location"] == [{"value": "Bangalore", "count": 3}]
+    assert all(len(values) == 1 for values in top_one.values())
+
+    # A committed profile change drops the cached counts
+    db.get(User, 6).location = "Bangalore"
+    db.commit()
+    assert facet_counts(query, facets)["location"] == [{"value": "Bangalore", "count": 4}, {"value": "Berlin", "count": 1}]
+
+
+def test_people_search_facets(db):
+    result = search_people(db, industry="Technology")
+    # Counted over every match, not just the page
+    assert len(result["results"]) == 2 and result["pagination"]["total"] == 3
+    assert result["facets"]["location"] == [{"value": "Bangalore", "count": 2}, {"value": "Berlin", "count": 1}]
+    assert result["facets"]["industry"] == [{"value": "Technology", "count": 3}]
+    assert search_people(db, industry="Technology", page=2)["facets"] is None
+    assert search_people(db, industry="Technology", cursor="")["facets"] is not None
+
+
+def test_job_search_facets(db):
+    request = Request({"type": "http", "method": "GET", "path": "/api/jobs/search", "headers": [], "query_string": b""})
+    params = dict(q=None, location=None, job_type=None, cursor=None, limit=1, include_total=False)
+    result = asyncio.run(search_jobs(request, db=db, **params))
+    assert result["facets"]["company"] == [{"value": "Acme", "count": 2}, {"value": "Globex", "count": 1}]
+    assert result["facets"]["job_type"] == [{"value": "full-time", "count": 2}, {"value": "contract", "count": 1}]
+
+    params.update(location="Bangalore")
+    result = asyncio.run(search_jobs(request, db=db, **params))
+    assert result["facets"]["location"] == [{"value": "Bangalore", "count": 2}]
+    params.update(cursor=result["pagination"]["next_cursor"])
+    assert asyncio.run(search_jobs(request, db=db, **params))["facets"] is None
@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+Feed hydration test
+Checks that /posts feeds are built in a fixed number of queries regardless of page size
+"""
+
+import os
+import sys
+import asyncio
+
+import pytest
+from fastapi import Response
+from starlette.requests import Request
+from sqlalchemy import event
+from sqlalchemy.orm import sessionmaker
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from models import User, Post, PostLike, Comment
+from feed_service import feed_query, hydrate_feed, reconcile_engagement_counters
+import api_routes
+import social_routes
+
+# ETag validator, posts+authors (with maintained counters), viewer's likes
+FEED_QUERIES = 3
+
+
+def _request():
+    return Request({"type": "http", "method": "GET", "path": "/posts", "headers": [], "query_string": b""})
+
+
+@pytest.fixture
+def db(engine):
+    session = sessionmaker(bind=engine)()
+    users = [User(username=f"user{i}", email=f"user{i}@example.com", full_name=f"User {i}") for i in range(5)]
+    session.add_all(users)
+    session.flush()
+    for i in range(40):
+        post = Post(content=f"post {i}", user_id=users[i % 5].id, is_public=True)
+        session.add(post)
+        session.flush()
+        for user in users[: i % 4]:
+            session.add(PostLike(post_id=post.id, user_id=user.id))
+        for j in range(i % 3):
+            session.add(Comment(post_id=post.id, user_id=users[j].id, content="nice"))
+    session.commit()
+    reconcile_engagement_counters(session)
+    yield session
+    session.close()
+
+
+class QueryCounter:
+    def __init__(self, engine):
+        self.engine = engine
+        self.count = 0
+
+    def _on_execute(self, *args):
+        self.count += 1
+
+    def __enter__(self):
+        event.listen(self.engine, "before_cursor_execute", self._on_execute)
+        return self
+
+    def __exit__(self, *exc):
+        event.remove(self.engine, "before_cursor_execute", self._on_execute)
+
+
+def _viewer(db):
+    viewer = db.query(User).filter(User.username == "user0").first()
+    db.expire_all()
+    return viewer.id
+
+
+def test_hydrate_feed_matches_per_post_counts(db):
+    rows = feed_query(db).order_by(Post.id).all()
+    items = hydrate_feed(db, rows, 1)
+    for item in items:
+        post = item["post"]
+        assert item["author"].id == post.user_id
+        assert item["likes_count"] == db.query(PostLike).filter(PostLike.post_id == post.id).count()
+        assert item["comments_count"] == db.query(Comment).filter(Comment.post_id == post.id).count()
+        assert item["is_liked"] == (
+            db.query(PostLike).filter(PostLike.post_id == post.id, PostLike.user_id == 1).first() is not None
+        )
+
+
+@pytest.mark.parametrize("limit", [5, 40])
+def test_social_feed_query_count_is_constant(engine, db, limit):
+    viewer = db.get(User, _viewer(db))
+    with QueryCounter(engine) as counter:
+        posts = asyncio.run(social_routes.get_posts(
+            request=_request(), response=Response(), current_user=viewer, db=db, limit=limit, offset=0, cursor=None
+        ))
+    assert len(posts) == limit
+    assert counter.count == FEED_QUERIES
+
+
+def test_api_feed_query_count_is_constant(engine, db):
+    viewer = db.get(User, _viewer(db))
+    with QueryCounter(engine) as counter:
+        result = asyncio.run(api_routes.get_posts(
+            request=_request(), response=Response(), current_user=viewer, db=db, limit=50, offset=0, cursor=None
+        ))
+    assert len(result["posts"]) == 40
+    assert counter.count == FEED_QUERIES
+    liked = {like.post_id for like in db.query(PostLike).filter(PostLike.user_id == viewer.id)}
+    assert set(result["user_liked_posts"]) == liked
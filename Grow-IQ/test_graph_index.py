@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""
+Social graph index test
+Checks array-intersection mutual counts against brute force, commit-time
+updates and the SQL stand-in served while the index is first built
+"""
+
+import os
+import sys
+import random
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import graph_service
+from graph_service import (
+    SocialGraphIndex, build_graph_index, get_graph_index, reset_graph_index, record_connection, record_disconnection,
+)
+from models import Base, User, Connection
+
+
+@pytest.fixture
+def db():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    session = sessionmaker(bind=engine)()
+    session.add_all([User(username=f"u{i}", email=f"u{i}@example.com", full_name=f"User {i}") for i in range(1, 7)])
+    session.flush()
+    session.add_all([
+        Connection(user_id=1, connected_user_id=2, status="accepted"),
+        Connection(user_id=3, connected_user_id=1, status="accepted"),
+        Connection(user_id=2, connected_user_id=3, status="accepted"),
+        Connection(user_id=4, connected_user_id=2, status="accepted"),
+        Connection(user_id=1, connected_user_id=4, status="pending"),
+    ])
+    session.commit()
+    build_graph_index(session)
+    yield session
+    session.close()
+    reset_graph_index()
+
+
+def test_built_from_accepted_rows(db):
+    index = SocialGraphIndex.from_db(db)
+    assert list(index.neighbours(1)) == [2, 3]
+    assert list(index.neighbours(2)) == [1, 3, 4]
+    assert index.edge_count == 4
+    assert index.is_connected(3, 2) and not index.is_connected(1, 4)
+    assert index.mutual_counts(1, [2, 3, 4, 99]) == {2: 1, 3: 1, 4: 1, 99: 0}
+    assert index.mutual_ids(1, 4) == [2]
+
+
+def test_matches_brute_force():
+    rng = random.Random(7)
+    edges = [(rng.randrange(300), rng.randrange(300)) for _ in range(3000)]
+    # A hub forces the bisection path
+    edges += [(0, i) for i in range(1, 300)]
+    index = SocialGraphIndex.from_edges(edges)
+    sets = {u: set(index.neighbours(u)) for u in range(300)}
+    for user_id in (0, 5, 17, 250):
+        counts = index.mutual_counts(user_id, range(300))
+        for other in range(300):
+            assert counts[other] == len(sets[user_id] & sets[other])
+            assert index.mutual_ids(user_id, other) == sorted(sets[user_id] & sets[other])
+    assert index.mutual_ids(0, 5, limit=2) == sorted(sets[0] & sets[5])[:2]
+
+
+def test_incremental_updates():
+    index = SocialGraphIndex.from_edges([(1, 2), (2, 3)])
+    before = index.neighbours(2)
+    index.add_edge(2, 0)
+    index.add_edge(2, 0)
+    assert list(index.neighbours(2)) == [0, 1, 3]
+    assert list(before) == [1, 3]  # readers holding the old array are unaffected
+    index.remove_edge(3, 2)
+    assert list(index.neighbours(2)) == [0, 1] and list(index.neighbours(3)) == []
+    assert index.mutual_count(0, 1) == 1
+
+
+def test_changes_apply_on_commit_only(db):
+    index = get_graph_index(db)
+    assert index.mutual_count(1, 5) == 0
+
+    record_connection(db, 5, 2)
+    assert not index.is_connected(5, 2)
+    db.commit()
+    assert get_graph_index(db).is_connected(2, 5)
+    assert get_graph_index(db).mutual_count(1, 5) == 1
+
+    record_disconnection(db, 1, 2)
+    db.rollback()
+    db.commit()
+    assert get_graph_index(db).is_connected(1, 2)
+
+    record_disconnection(db, 1, 2)
+    db.commit()
+    assert not get_graph_index(db).is_connected(1, 2)
+
+
+def test_stale_index_is_rebuilt_in_background(db, monkeypatch):
+    monkeypatch.setattr(graph_service.settings, "GRAPH_INDEX_REFRESH_SECONDS", 0)
+    index = get_graph_index(db)
+    built = {}
+
+    def fake_rebuild(bind):
+        built["called"] = True
+
+    monkeypatch.setattr(graph_service, "_rebuild_in_background", fake_rebuild)
+    assert get_graph_index(db) is index  # stale reads keep being served
+    assert built == {"called": True}
+
+
+def test_requests_never_wait_for_first_build(db, monkeypatch):
+    reset_graph_index()
+    started = []
+    monkeypatch.setattr(graph_service, "_rebuild_in_background", started.append)
+    view = get_graph_index(db)
+    assert not isinstance(view, SocialGraphIndex)
+    assert started == [db.get_bind()]
+    # Same answers as the index, read from the connections table
+    assert list(view.neighbours(2)) == [1, 3, 4]
+    assert view.mutual_counts(1, [2, 3, 4, 99]) == {2: 1, 3: 1, 4: 1, 99: 0}
+    assert view.mutual_ids(1, 4) == [2]
+    assert view.is_connected(3, 2) and not view.is_connected(1, 4)
+
+    # Background jobs build it in their own thread
+    assert isinstance(get_graph_index(db, wait=True), SocialGraphIndex)
+    assert get_graph_index(db).mutual_count(1, 4) == 1
@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+"""
+Conditional GET test
+Checks ETag matching, that a current feed poll is answered with a 304 before
+the page is built, that likes and edits on the page change its ETag, and the
+in-memory gzipped static pages
+"""
+
+import os
+import sys
+import gzip
+import asyncio
+
+import pytest
+from fastapi import Response
+from starlette.requests import Request
+from sqlalchemy import event
+from sqlalchemy.orm import sessionmaker
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from models import User, Post
+from feed_service import add_like, remove_like
+from http_cache_utils import make_etag, is_not_modified
+import social_routes
+import connection_routes
+
+
+def _request(if_none_match=None, accept_encoding=None, path="/social/posts"):
+    headers = [(b"if-none-match", if_none_match.encode())] if if_none_match else []
+    if accept_encoding:
+        headers.append((b"accept-encoding", accept_encoding.encode()))
+    return Request({"type": "http", "method": "GET", "path": path, "headers": headers, "query_string": b""})
+
+
+@pytest.fixture
+def db(engine):
+    session = sessionmaker(bind=engine)()
+    session.add_all([
+        User(username="alice", email="alice@example.com", full_name="Alice"),
+        User(username="bob", email="bob@example.com", full_name="Bob"),
+    ])
+    session.flush()
+    for i in range(5):
+        session.add(Post(content=f"post {i}", user_id=1 + i % 2, is_public=True))
+    session.commit()
+    yield session
+    session.close()
+
+
+def _get_posts(db, viewer, request):
+    response = Response()
+    result = asyncio.run(social_routes.get_posts(
+        request=request, response=response, current_user=viewer, db=db, limit=20, offset=0, cursor=None
+    ))
+    return result, response
+
+
+def test_if_none_match_parsing():
+    etag = make_etag(1, "a")
+    assert etag.startswith('W/"')
+    assert is_not_modified(_request(etag), etag)
+    assert is_not_modified(_request(f'"other", {etag[2:]}'), etag)
+    assert is_not_modified(_request("*"), etag)
+    assert not is_not_modified(_request('"other"'), etag)
+    assert not is_not_modified(_request(), etag)
+
+
+def test_feed_poll_returns_304_without_building_page(engine, db):
+    viewer = db.get(User, 1)
+    posts, response = _get_posts(db, viewer, _request())
+    assert len(posts) == 5
+    etag = response.headers["ETag"]
+    assert response.headers["Cache-Control"].startswith("private")
+
+    queries = []
+    listener = lambda *args: queries.append(args[2])
+    event.listen(engine, "before_cursor_execute", listener)
+    try:
+        result, _ = _get_posts(db, viewer, _request(etag))
+    finally:
+        event.remove(engine, "before_cursor_execute", listener)
+    assert result.status_code == 304
+    assert result.headers["ETag"] == etag
+    assert len(queries) == 1
+
+
+def test_feed_etag_is_per_viewer(db):
+    # Same posts, but is_liked differs per viewer
+    _, alice = _get_posts(db, db.get(User, 1), _request())
+    result, bob = _get_posts(db, db.get(User, 2), _request(alice.headers["ETag"]))
+    assert isinstance(result, list)
+    assert bob.headers["ETag"] != alice.headers["ETag"]
+
+
+def test_feed_etag_changes_on_like(db):
+    viewer = db.get(User, 1)
+    _, response = _get_posts(db, viewer, _request())
+    etag = response.headers["ETag"]
+
+    add_like(db, 3, 2)
+    db.commit()
+    result, response = _get_posts(db, viewer, _request(etag))
+    assert isinstance(result, list)
+    assert response.headers["ETag"] != etag
+
+
+def test_feed_etag_changes_on_like_and_unlike_or_edit(db):
+    viewer = db.get(User, 1)
+    _, response = _get_posts(db, viewer, _request())
+    etag = response.headers["ETag"]
+
+    # Counters end where they started, but the posts were touched
+    add_like(db, 3, 1)
+    add_like(db, 4, 2)
+    db.commit()
+    remove_like(db, 3, 1)
+    remove_like(db, 4, 2)
+    db.commit()
+    _, response = _get_posts(db, viewer, _request(etag))
+    assert response.headers["ETag"] != etag
+    etag = response.headers["ETag"]
+
+    db.get(Post, 2).content = "edited"
+    db.commit()
+    _, response = _get_posts(db, viewer, _request(etag))
+    assert response.headers["ETag"] != etag
+
+
+def test_static_page_is_gzipped_and_revalidated():
+    page = connection_routes.search_page
+    with open(page.path, "rb") as f:
+        html = f.read()
+
+    plain = page.response(_request(path="/connections/search"))
+    assert plain.status_code == 200
+    assert plain.body == html
+    etag = plain.headers["ETag"]
+    assert not etag.startswith("W/")
+    assert "max-age" in plain.headers["Cache-Control"]
+
+    compressed = page.response(_request(accept_encoding="gzip, br", path="/connections/search"))
+    assert compressed.headers["Content-Encoding"] == "gzip"
+    assert compressed.headers["Vary"] == "Accept-Encoding"
+    assert gzip.decompress(compressed.body) == html
+    assert len(compressed.body) < len(html) // 3
+    # Each encoding is its own representation with its own strong tag
+    gz_etag = compressed.headers["ETag"]
+    assert gz_etag != etag and not gz_etag.startswith("W/")
+
+    current = page.response(_request(gz_etag, "gzip", path="/connections/search"))
+    assert current.status_code == 304
+    assert current.body == b""
+    assert page.response(_request(etag, path="/connections/search")).status_code == 304
+    assert page.response(_request(etag, "gzip", path="/connections/search")).status_code == 200
+
+
+def test_connection_pages_registered_once():
+    paths = [route.path for route in connection_routes.router.routes]
+    for path in ("/connections/search", "/connections/find-connections"):
+        assert paths.count(path) == 1
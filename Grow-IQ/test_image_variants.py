@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Responsive image variants test
+Checks resizing, content-hashed names, srcset lookup and immutable caching of variants
+"""
+
+import io
+import os
+import sys
+
+import pytest
+from PIL import Image
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from starlette.applications import Starlette
+from starlette.routing import Mount
+from starlette.testclient import TestClient
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from models import Base, User, Post
+from media_service import generate_variants, store_variants, load_image_variants, VARIANT_WIDTHS
+from feed_service import feed_query, hydrate_feed
+from http_cache_utils import ImmutableStaticFiles, IMMUTABLE_CACHE_CONTROL
+
+
+def _image(path, size, fmt="JPEG", mode="RGB"):
+    Image.new(mode, size, (200, 30, 30)).save(path, fmt)
+    return str(path)
+
+
+@pytest.fixture
+def db():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    session = sessionmaker(bind=engine)()
+    session.add(User(username="alice", email="alice@example.com", full_name="Alice"))
+    session.flush()
+    session.add_all([Post(content="photo", user_id=1, image_path="photo.jpg"), Post(content="text", user_id=1)])
+    session.commit()
+    yield session
+    session.close()
+
+
+def test_variants_are_resized_and_hashed(tmp_path):
+    source = _image(tmp_path / "photo.jpg", (2400, 1200))
+    out = tmp_path / "variants"
+    variants = generate_variants(source, str(out))
+    assert {(v["kind"], v["format"]) for v in variants} == {
+        (kind, fmt) for kind in VARIANT_WIDTHS for fmt in ("webp", "jpeg")
+    }
+    for v in variants:
+        assert v["width"] == VARIANT_WIDTHS[v["kind"]]
+        assert v["height"] == v["width"] // 2
+        with Image.open(out / v["filename"]) as img:
+            assert img.size == (v["width"], v["height"])
+            assert img.format == {"webp": "WEBP", "jpeg": "JPEG"}[v["format"]]
+    # Same input, same names: regenerating writes nothing new
+    assert [v["filename"] for v in generate_variants(source, str(out))] == [v["filename"] for v in variants]
+    assert len(os.listdir(out)) == len(variants)
+
+
+def test_small_and_transparent_images(tmp_path):
+    source = _image(tmp_path / "small.png", (500, 250), "PNG", "RGBA")
+    variants = generate_variants(source, str(tmp_path))
+    by_kind = {(v["kind"], v["format"]): v for v in variants}
+    assert by_kind[("thumb", "jpeg")]["width"] == 320
+    # Never upscaled: feed and full share the original-width file
+    assert by_kind[("feed", "webp")]["width"] == by_kind[("full", "webp")]["width"] == 500
+    assert by_kind[("feed", "webp")]["filename"] == by_kind[("full", "webp")]["filename"]
+    assert generate_variants(_image(tmp_path / "anim.gif", (10, 10), "GIF"), str(tmp_path)) == []
+
+
+def test_feed_items_carry_srcset(db, tmp_path):
+    store_variants(db, "photo.jpg", generate_variants(_image(tmp_path / "photo.jpg", (1000, 500)), str(tmp_path)))
+    db.commit()
+
+    lookup = load_image_variants(db, ["photo.jpg", "missing.jpg", None])
+    assert list(lookup) == ["photo.jpg"]
+    srcset = lookup["photo.jpg"]["webp"]["srcset"]
+    assert srcset.startswith("/static/uploads/variants/") and srcset.endswith(" 1000w")
+    assert [part.split()[1] for part in srcset.split(", ")] == ["320w", "720w", "1000w"]
+
+    items = hydrate_feed(db, feed_query(db).order_by(Post.id).all(), 1)
+    assert items[0]["image_variants"]["jpeg"]["thumb"].endswith(".jpg")
+    assert items[1]["image_variants"] is None
+
+
+def test_variants_are_served_immutable(tmp_path):
+    (tmp_path / "abc-320w.webp").write_bytes(b"RIFF0000WEBP")
+    app = Starlette(routes=[Mount("/static/uploads/variants", ImmutableStaticFiles(directory=str(tmp_path)))])
+    response = TestClient(app).get("/static/uploads/variants/abc-320w.webp")
+    assert response.status_code == 200
+    assert response.headers["cache-control"] == IMMUTABLE_CACHE_CONTROL
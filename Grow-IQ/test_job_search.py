@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""
+Job full-text search test
+Checks bm25 ranking combined with the user's skills, cursor pagination, that
+result rows leave out the description and that the index follows job edits
+"""
+
+import os
+import sys
+import asyncio
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import event
+from sqlalchemy.orm import sessionmaker
+from starlette.requests import Request
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from models import User, Job, Session as SessionModel
+from search_service import ensure_job_search_index
+from job_routes import search_jobs, get_job
+
+
+@pytest.fixture
+def engine(engine):
+    ensure_job_search_index(engine)
+    return engine
+
+
+@pytest.fixture
+def db(engine):
+    session = sessionmaker(bind=engine)()
+    now = datetime.now()
+    session.add_all([
+        User(id=1, username="hr", email="hr@example.com", full_name="Hiring Manager"),
+        User(id=2, username="dev", email="dev@example.com", full_name="Dev Eloper", skills="python, sql"),
+        SessionModel(token="dev-token", user_id=2, expires_at=now + timedelta(days=1)),
+        Job(id=1, title="Python Developer", company="Acme", description="Build APIs in python and sql. " * 20,
+            posted_by=1, posted_at=now - timedelta(days=3)),
+        Job(id=2, title="Backend Engineer", company="Initech", description="Some python scripting",
+            posted_by=1, posted_at=now - timedelta(days=2)),
+        Job(id=3, title="Graphic Designer", company="Acme", description="Figma all day",
+            posted_by=1, posted_at=now - timedelta(days=1)),
+        Job(id=4, title="Python Lead", company="Globex", description="python", posted_by=1,
+            posted_at=now, is_active=False),
+    ])
+    session.commit()
+    yield session
+    session.close()
+
+
+def _request(token=None):
+    headers = [(b"cookie", f"session_token={token}".encode())] if token else []
+    return Request({"type": "http", "method": "GET", "path": "/api/jobs/search", "headers": headers, "query_string": b""})
+
+
+def search(db, q=None, token=None, **kwargs):
+    params = dict(location=None, job_type=None, cursor=None, limit=20, include_total=False)
+    params.update(kwargs)
+    return asyncio.run(search_jobs(_request(token), q=q, db=db, **params))
+
+
+def test_anonymous_newest_first(db):
+    result = search(db)
+    assert [job["id"] for job in result["jobs"]] == [3, 2, 1]
+    assert all(job["match_score"] == 0.0 for job in result["jobs"])
+
+
+def test_query_ranked_by_bm25(db, engine):
+    # Enough unrelated jobs for "python" to be a rare, informative term
+    db.add_all([Job(title=f"Chef {i}", company="Bistro", description="Cooking", posted_by=1) for i in range(10)])
+    db.commit()
+    statements = []
+    event.listen(engine, "before_cursor_execute", lambda *args: statements.append(args[2]))
+    result = search(db, "python")
+    # Title match outranks a description mention; the inactive job is left out
+    assert [job["id"] for job in result["jobs"]] == [1, 2]
+    assert result["jobs"][0]["match_score"] > result["jobs"][1]["match_score"] > 0
+    assert not any("LIKE" in statement.upper() for statement in statements)
+    assert search(db, "acme designer")["jobs"][0]["id"] == 3
+
+
+def test_skills_filter_and_rank(db):
+    result = search(db, token="dev-token")
+    assert [job["id"] for job in result["jobs"]] == [1, 2]
+    assert search(db, "acme", token="dev-token")["jobs"][0]["id"] == 1
+
+
+def test_lean_rows_and_cursor_pages(db):
+    first = search(db, limit=2, include_total=True)
+    assert [job["id"] for job in first["jobs"]] == [3, 2]
+    assert first["pagination"]["total"] == 3
+    assert "description" not in first["jobs"][0]
+    second = search(db, limit=2, cursor=first["pagination"]["next_cursor"])
+    assert [job["id"] for job in second["jobs"]] == [1]
+    assert len(second["jobs"][0]["snippet"]) == 200
+    assert second["pagination"]["next_cursor"] is None
+
+    ranked = search(db, "python", limit=1)
+    rest = search(db, "python", limit=1, cursor=ranked["pagination"]["next_cursor"])
+    assert [ranked["jobs"][0]["id"], rest["jobs"][0]["id"]] == [1, 2]
+
+    assert asyncio.run(get_job(1, db))["description"].startswith("Build APIs")
+
+
+def test_index_follows_job_edits(db):
+    job = db.get(Job, 3)
+    job.title = "Python Designer"
+    db.add(Job(id=5, title="Rust Engineer", company="Hooli", posted_by=1))
+    db.commit()
+    assert 3 in [job["id"] for job in search(db, "python")["jobs"]]
+    assert [job["id"] for job in search(db, "rust")["jobs"]] == [5]
+
+    db.delete(db.get(Job, 5))
+    db.commit()
+    assert search(db, "rust")["jobs"] == []
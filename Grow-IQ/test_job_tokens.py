@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+Job token index test
+Checks job tokens are indexed once on create and edit, that recommendations
+only read jobs sharing a token with the user, and that both recommendation
+endpoints rank through the index
+"""
+
+import os
+import sys
+import asyncio
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import select
+from sqlalchemy.orm import sessionmaker
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from models import User, Job, JobToken
+from job_token_service import normalize_tokens, ensure_job_token_index, top_matching_jobs
+from job_routes import recommend_jobs, _score_job
+
+
+@pytest.fixture
+def db(engine):
+    session = sessionmaker(bind=engine)()
+    now = datetime.now()
+    session.add_all([
+        User(id=1, username="hr", email="hr@example.com", full_name="Hiring Manager"),
+        User(id=2, username="dev", email="dev@example.com", full_name="Dev", skills="Python, Django"),
+        Job(id=1, title="Python Developer", company="Acme", description="Django and SQL", posted_by=1,
+            posted_at=now - timedelta(days=2)),
+        Job(id=2, title="Data Engineer", company="Initech", description="Python pipelines, Spark, Airflow, Kafka",
+            posted_by=1, posted_at=now - timedelta(days=1)),
+        Job(id=3, title="Chef", company="Bistro", description="Cooking", posted_by=1, posted_at=now),
+        Job(id=4, title="Python Lead", company="Globex", description="Django", posted_by=1, is_active=False),
+    ])
+    session.commit()
+    yield session
+    session.close()
+
+
+def tokens_of(db, job_id):
+    return set(db.scalars(select(JobToken.token).where(JobToken.job_id == job_id)))
+
+
+def test_normalize_tokens():
+    assert normalize_tokens("Senior C++ / C# developer, Node.js and the experience") == \
+        {"senior", "c++", "c#", "developer", "node.js"}
+    assert normalize_tokens(None) == set()
+
+
+def test_index_follows_job_edits(db):
+    assert tokens_of(db, 1) == {"python", "developer", "django", "sql"}
+    job = db.get(Job, 3)
+    job.description = "Cooking with python"
+    db.commit()
+    assert "python" in tokens_of(db, 3)
+    db.delete(db.get(Job, 3))
+    db.commit()
+    assert tokens_of(db, 3) == set()
+
+
+def test_backfill_existing_jobs(engine, db):
+    db.execute(JobToken.__table__.delete())
+    db.commit()
+    assert ensure_job_token_index(engine)
+    assert not ensure_job_token_index(engine)
+    assert tokens_of(db, 2) == {"data", "engineer", "python", "pipelines", "spark", "airflow", "kafka"}
+
+
+def test_only_matching_jobs_scored(db):
+    seen = []
+    score = lambda overlap, user_count, job_count: seen.append(job_count) or _score_job(overlap, user_count, job_count)
+    top = top_matching_jobs(db, {"python", "django"}, score, 10)
+    # The chef job shares no token and the inactive one is skipped; fewer extra tokens ranks higher
+    assert [job.id for _, job in top] == [1, 2]
+    assert sorted(seen) == [4, 7]
+    assert top_matching_jobs(db, {"rust"}, score, 10) == []
+
+
+def test_recommend_endpoint(db):
+    result = asyncio.run(recommend_jobs(limit=1, current_user=db.get(User, 2), db=db))
+    assert [job["id"] for job in result["jobs"]] == [1]
+    assert result["jobs"][0]["score"] > 0
+
+    no_skills = asyncio.run(recommend_jobs(limit=2, current_user=db.get(User, 1), db=db))
+    assert [job["id"] for job in no_skills["jobs"]] == [3, 2]
@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Keyset pagination test
+Walks a listing page by page with opaque cursors and compares it to the full ordering
+"""
+
+import os
+import sys
+from datetime import datetime, timedelta
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from models import Base, User, Post
+from pagination_utils import keyset_paginate, cached_count, encode_cursor, decode_cursor
+
+
+@pytest.fixture
+def db():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    session = sessionmaker(bind=engine)()
+    author = User(username="author", email="author@example.com", full_name="Author")
+    session.add(author)
+    session.flush()
+    base = datetime(2025, 1, 1)
+    # Several posts share a timestamp so the id tie-breaker matters
+    for i in range(23):
+        session.add(Post(content=f"post {i}", user_id=author.id, created_at=base + timedelta(minutes=i // 3)))
+    session.commit()
+    yield session
+    session.close()
+
+
+def test_cursor_walk_matches_full_ordering(db):
+    keys = [(Post.created_at, True), (Post.id, True)]
+    expected = [p.id for p in db.query(Post).order_by(Post.created_at.desc(), Post.id.desc()).all()]
+
+    seen, cursor = [], None
+    while True:
+        page, cursor = keyset_paginate(db.query(Post), keys, 5, cursor)
+        seen.extend(p.id for p in page)
+        if cursor is None:
+            break
+
+    assert seen == expected
+
+
+def test_ascending_keys(db):
+    keys = [(Post.created_at, False), (Post.id, False)]
+    first, cursor = keyset_paginate(db.query(Post), keys, 10)
+    second, _ = keyset_paginate(db.query(Post), keys, 10, cursor)
+    ids = [p.id for p in first + second]
+    assert ids == sorted(ids)
+    assert len(set(ids)) == 20
+
+
+def test_cursor_round_trip():
+    values = [datetime(2025, 5, 6, 7, 8, 9), 42]
+    assert decode_cursor(encode_cursor(values), 2) == values
+
+
+def test_invalid_cursor_is_rejected():
+    with pytest.raises(HTTPException) as exc:
+        decode_cursor("not-a-cursor", 2)
+    assert exc.value.status_code == 400
+    with pytest.raises(HTTPException):
+        decode_cursor(encode_cursor([1]), 2)
+
+
+def test_cached_count_reuses_total(db):
+    query = db.query(Post).filter(Post.content.like("post%"))
+    assert cached_count(query) == 23
+    db.add(Post(content="post late", user_id=1))
+    db.commit()
+    # Served from the cache until the TTL expires
+    assert cached_count(query) == 23
+    assert cached_count(query, ttl=0) == 24
+
+
+def test_cached_count_is_per_database(db):
+    other_engine = create_engine("sqlite://")
+    Base.metadata.create_all(other_engine)
+    other = sessionmaker(bind=other_engine)()
+    assert cached_count(db.query(Post).filter(Post.content.like("post%"))) == 23
+    # Same SQL against another database is counted there
+    assert cached_count(other.query(Post).filter(Post.content.like("post%"))) == 0
+    other.close()
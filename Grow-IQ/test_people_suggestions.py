@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+Precomputed people-you-may-know test
+Checks attribute blocking, the single-query read, filtering of since-connected
+or requested candidates, TTL staleness and invalidation on profile edits
+"""
+
+import os
+import sys
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import event
+from sqlalchemy.orm import sessionmaker
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from models import User, Connection, FriendRequest, PeopleSuggestion
+from graph_service import build_graph_index, record_connection, reset_graph_index
+from suggestion_service import (
+    STALE_AT, blocking_keys, people_you_may_know, refresh_people_suggestions, stale_suggestion_user_ids,
+)
+
+
+@pytest.fixture
+def db(engine):
+    session = sessionmaker(bind=engine)()
+    profiles = {
+        1: ("Acme", "Software", "Berlin", "Backend Engineer"),
+        2: ("Globex", "Finance", "Paris", "Analyst"),
+        3: ("ACME ", "Retail", "Rome", "Buyer"),          # same company, no shared friends
+        4: ("Initech", "Software", "Oslo", "Designer"),   # same industry
+        5: ("Hooli", "Media", "Lima", "Senior Engineer"),  # shared title word
+        6: ("Umbrella", "Pharma", "Kyiv", "Chemist"),     # nothing in common
+        7: ("Acme", "Software", "Berlin", "Engineer"),    # inactive
+    }
+    session.add_all([
+        User(id=i, username=f"u{i}", email=f"u{i}@example.com", full_name=f"User {i}",
+             company=company, industry=industry, location=location, title=title, is_active=(i != 7))
+        for i, (company, industry, location, title) in profiles.items()
+    ])
+    session.add_all([
+        User(id=8, username="u8", email="u8@example.com", full_name="User 8", company="Vandelay", industry="Import"),
+        Connection(user_id=1, connected_user_id=2, status="accepted"),
+        Connection(user_id=2, connected_user_id=8, status="accepted"),
+    ])
+    session.commit()
+    build_graph_index(session)
+    yield session
+    session.close()
+    reset_graph_index()
+
+
+def _ids(items):
+    return [item["user"].id for item in items]
+
+
+def test_blocking_keys_normalize_values():
+    user = User(company=" ACME  Corp. ", industry="Software", location="Company", title="Senior Engineer")
+    assert blocking_keys(user) == {"company:acme corp", "industry:software", "title:senior", "title:engineer"}
+
+
+def test_refresh_finds_candidates_by_blocking(db):
+    assert refresh_people_suggestions(db) == 7
+    ids = _ids(people_you_may_know(db, 1))
+    # 8 is a friend of a friend; 3, 4 and 5 share an attribute; 6 shares nothing
+    assert ids[0] == 8
+    assert set(ids) == {8, 3, 4, 5}
+    assert db.query(PeopleSuggestion).filter_by(user_id=7).count() == 0
+
+
+def test_read_is_single_query(db, engine):
+    refresh_people_suggestions(db)
+    people_you_may_know(db, 1)  # build the graph index
+    statements = []
+    event.listen(engine, "before_cursor_execute", lambda *args: statements.append(args[2]))
+    items = people_you_may_know(db, 1)
+    assert len(items) == 4
+    assert len(statements) == 1
+
+
+def test_read_drops_since_connected_and_requested(db):
+    refresh_people_suggestions(db)
+    people_you_may_know(db, 1)
+    db.add(FriendRequest(sender_id=4, receiver_id=1, status="pending"))
+    db.add(Connection(user_id=1, connected_user_id=3, status="accepted"))
+    record_connection(db, 1, 3)
+    db.commit()
+    assert set(_ids(people_you_may_know(db, 1))) == {8, 5}
+
+
+def test_missing_list_falls_back_and_is_stored(db):
+    items = people_you_may_know(db, 1)
+    assert _ids(items) == [8]
+    assert db.query(PeopleSuggestion).filter_by(user_id=1).count() == 1
+
+
+def test_profile_change_invalidates_lists(db):
+    refresh_people_suggestions(db)
+    assert stale_suggestion_user_ids(db) == []
+
+    user = db.get(User, 3)
+    user.full_name = "Renamed"
+    db.commit()
+    assert stale_suggestion_user_ids(db) == []
+
+    user.company = "Globex"
+    db.commit()
+    # 3's own list and the lists that contain 3
+    listing_3 = {row.user_id for row in db.query(PeopleSuggestion).filter_by(candidate_id=3)}
+    assert set(stale_suggestion_user_ids(db)) == listing_3 | {3}
+    assert db.query(PeopleSuggestion).filter_by(user_id=3).first().computed_at == STALE_AT
+
+    refresh_people_suggestions(db, stale_suggestion_user_ids(db))
+    assert stale_suggestion_user_ids(db) == []
+    assert 2 in _ids(people_you_may_know(db, 3))
+
+
+def test_expired_lists_are_stale(db):
+    refresh_people_suggestions(db)
+    db.query(PeopleSuggestion).filter_by(user_id=1).update({"computed_at": datetime.now() - timedelta(days=2)})
+    db.commit()
+    assert stale_suggestion_user_ids(db) == [1]
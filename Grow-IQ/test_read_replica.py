@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Read replica routing test
+Checks the SQLite snapshot stand-in and the lag-aware fallback to the primary
+"""
+
+import os
+import sys
+import sqlite3
+
+from sqlalchemy import text
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from config import settings
+from database_enhanced import DatabaseManager
+
+
+def _make_manager(tmp_path, monkeypatch):
+    db_path = tmp_path / "primary.db"
+    conn = sqlite3.connect(db_path)
+    conn.execute("CREATE TABLE items (id INTEGER PRIMARY KEY, name TEXT)")
+    conn.execute("INSERT INTO items (name) VALUES ('first')")
+    conn.commit()
+    conn.close()
+
+    monkeypatch.setattr(settings, "DATABASE_URL", f"sqlite:///{db_path}")
+    monkeypatch.setattr(settings, "DATABASE_REPLICA_URL", "")
+    monkeypatch.setattr(settings, "SQLITE_READ_SNAPSHOT", True)
+    monkeypatch.setattr(settings, "REPLICA_LAG_CHECK_SECONDS", 0)
+    monkeypatch.setattr(settings, "REPLICA_MAX_LAG_SECONDS", 60)
+    return DatabaseManager()
+
+
+def test_reads_use_snapshot(tmp_path, monkeypatch):
+    """Read sessions are bound to the snapshot engine while it is fresh"""
+    manager = _make_manager(tmp_path, monkeypatch)
+    try:
+        assert manager.read_engine is not None
+        session = manager.get_read_session()
+        try:
+            assert session.get_bind() is manager.read_engine
+            assert session.execute(text("SELECT COUNT(*) FROM items")).scalar() == 1
+        finally:
+            session.close()
+    finally:
+        manager.cleanup()
+
+
+def test_snapshot_refresh_picks_up_writes(tmp_path, monkeypatch):
+    """Writes to the primary become visible after a snapshot refresh"""
+    manager = _make_manager(tmp_path, monkeypatch)
+    try:
+        with manager.engine.begin() as conn:
+            conn.execute(text("INSERT INTO items (name) VALUES ('second')"))
+
+        session = manager.get_read_session()
+        assert session.execute(text("SELECT COUNT(*) FROM items")).scalar() == 1
+        session.close()
+
+        assert manager.refresh_sqlite_snapshot()
+        session = manager.get_read_session()
+        assert session.execute(text("SELECT COUNT(*) FROM items")).scalar() == 2
+        session.close()
+    finally:
+        manager.cleanup()
+
+
+def test_stale_snapshot_falls_back_to_primary(tmp_path, monkeypatch):
+    """A snapshot older than REPLICA_MAX_LAG_SECONDS is not used for reads"""
+    manager = _make_manager(tmp_path, monkeypatch)
+    try:
+        manager._snapshot_refreshed_at -= settings.REPLICA_MAX_LAG_SECONDS + 1
+        session = manager.get_read_session()
+        try:
+            assert session.get_bind() is manager.engine
+        finally:
+            session.close()
+    finally:
+        manager.cleanup()
+
+
+def test_no_replica_configured(tmp_path, monkeypatch):
+    """Without a replica every read goes to the primary"""
+    manager = _make_manager(tmp_path, monkeypatch)
+    manager.cleanup()
+    monkeypatch.setattr(settings, "SQLITE_READ_SNAPSHOT", False)
+    manager = DatabaseManager()
+    try:
+        assert manager.read_engine is None
+        assert manager.replica_lag() is None
+        session = manager.get_read_session()
+        try:
+            assert session.get_bind() is manager.engine
+        finally:
+            session.close()
+    finally:
+        manager.cleanup()
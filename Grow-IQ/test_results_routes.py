@@ -7,8 +7,9 @@ from fastapi.responses import JSONResponse
 from sqlalchemy.orm import Session
 from sqlalchemy import desc, and_
 
-from database import get_db
+from database_enhanced import get_read_db
 from auth_utils import get_current_user
+from pagination_utils import keyset_paginate, cached_count, cursor_pagination_info
 from models import User, MockInterviewSession, ResumeTestResult
 
 # Configure logging
@@ -16,6 +17,7 @@ logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 # Initialize router
+# Every handler here is a read-only GET, so they are served from the read replica
 router = APIRouter(prefix="/test-results", tags=["Test Results"])
 
 # ========== MOCK INTERVIEW RESULTS ==========
@@ -23,7 +25,7 @@ router = APIRouter(prefix="/test-results", tags=["Test Results"])
 @router.get("/mock-interviews/{user_id}")
 async def get_user_mock_interviews(
     user_id: int,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     current_user: User = Depends(get_current_user)
 ):
     """Get all mock interview results for a specific user"""
@@ -49,7 +51,7 @@ async def get_user_mock_interviews(
 @router.get("/mock-interviews/session/{session_uuid}")
 async def get_mock_interview_session(
     session_uuid: str,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     current_user: User = Depends(get_current_user)
 ):
     """Get detailed results for a specific mock interview session"""
@@ -79,7 +81,7 @@ async def get_mock_interview_session(
 @router.get("/mock-interviews/analytics/{user_id}")
 async def get_mock_interview_analytics(
     user_id: int,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     current_user: User = Depends(get_current_user)
 ):
     """Get analytics and statistics for mock interviews"""
@@ -146,7 +148,7 @@ async def get_mock_interview_analytics(
 @router.get("/resume-tests/{user_id}")
 async def get_user_resume_tests(
     user_id: int,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     current_user: User = Depends(get_current_user)
 ):
     """Get all resume test results for a specific user"""
@@ -172,7 +174,7 @@ async def get_user_resume_tests(
 @router.get("/resume-tests/result/{result_id}")
 async def get_resume_test_result(
     result_id: int,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     current_user: User = Depends(get_current_user)
 ):
     """Get detailed results for a specific resume test"""
@@ -202,7 +204,7 @@ async def get_resume_test_result(
 @router.get("/resume-tests/analytics/{user_id}")
 async def get_resume_test_analytics(
     user_id: int,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     current_user: User = Depends(get_current_user)
 ):
     """Get analytics and statistics for resume tests"""
@@ -294,7 +296,7 @@ async def get_resume_test_analytics(
 @router.get("/combined-analytics/{user_id}")
 async def get_combined_test_analytics(
     user_id: int,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     current_user: User = Depends(get_current_user)
 ):
     """Get combined analytics for both mock interviews and resume tests"""
@@ -361,33 +363,44 @@ async def get_combined_test_analytics(
 
 @router.get("/hr/all-mock-interviews")
 async def get_all_mock_interviews_hr(
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     current_user: User = Depends(get_current_user),
     page: int = Query(1, ge=1),
-    limit: int = Query(20, ge=1, le=100)
+    limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = Query(None, description="Opaque cursor from pagination.next_cursor; pass an empty value for the first page"),
+    include_total: bool = Query(False, description="Include an approximate (cached) total in cursor mode")
 ):
     """Get all mock interview results (HR access only)"""
     try:
         if not current_user.is_hr_user():
             raise HTTPException(status_code=403, detail="HR access required")
         
-        offset = (page - 1) * limit
-        
-        interviews = db.query(MockInterviewSession).order_by(
-            desc(MockInterviewSession.started_at)
-        ).offset(offset).limit(limit).all()
-        
-        total_count = db.query(MockInterviewSession).count()
-        
-        return JSONResponse(content={
-            "success": True,
-            "data": [interview.to_dict() for interview in interviews],
-            "pagination": {
+        query = db.query(MockInterviewSession)
+        
+        if cursor is not None:
+            interviews, next_cursor = keyset_paginate(
+                query, [(MockInterviewSession.started_at, True), (MockInterviewSession.id, True)], limit, cursor or None
+            )
+            pagination = cursor_pagination_info(limit, next_cursor, cached_count(query) if include_total else None)
+        else:
+            offset = (page - 1) * limit
+            
+            interviews = query.order_by(
+                desc(MockInterviewSession.started_at), desc(MockInterviewSession.id)
+            ).offset(offset).limit(limit).all()
+            
+            total_count = query.count()
+            pagination = {
                 "page": page,
                 "limit": limit,
                 "total": total_count,
                 "pages": (total_count + limit - 1) // limit
             }
+        
+        return JSONResponse(content={
+            "success": True,
+            "data": [interview.to_dict() for interview in interviews],
+            "pagination": pagination
         })
         
     except HTTPException:
@@ -398,33 +411,44 @@ async def get_all_mock_interviews_hr(
 
 @router.get("/hr/all-resume-tests")
 async def get_all_resume_tests_hr(
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     current_user: User = Depends(get_current_user),
     page: int = Query(1, ge=1),
-    limit: int = Query(20, ge=1, le=100)
+    limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = Query(None, description="Opaque cursor from pagination.next_cursor; pass an empty value for the first page"),
+    include_total: bool = Query(False, description="Include an approximate (cached) total in cursor mode")
 ):
     """Get all resume test results (HR access only)"""
     try:
         if not current_user.is_hr_user():
             raise HTTPException(status_code=403, detail="HR access required")
         
-        offset = (page - 1) * limit
-        
-        resume_tests = db.query(ResumeTestResult).order_by(
-            desc(ResumeTestResult.analysis_timestamp)
-        ).offset(offset).limit(limit).all()
-        
-        total_count = db.query(ResumeTestResult).count()
-        
-        return JSONResponse(content={
-            "success": True,
-            "data": [test.to_dict() for test in resume_tests],
-            "pagination": {
+        query = db.query(ResumeTestResult)
+        
+        if cursor is not None:
+            resume_tests, next_cursor = keyset_paginate(
+                query, [(ResumeTestResult.analysis_timestamp, True), (ResumeTestResult.id, True)], limit, cursor or None
+            )
+            pagination = cursor_pagination_info(limit, next_cursor, cached_count(query) if include_total else None)
+        else:
+            offset = (page - 1) * limit
+            
+            resume_tests = query.order_by(
+                desc(ResumeTestResult.analysis_timestamp), desc(ResumeTestResult.id)
+            ).offset(offset).limit(limit).all()
+            
+            total_count = query.count()
+            pagination = {
                 "page": page,
                 "limit": limit,
                 "total": total_count,
                 "pages": (total_count + limit - 1) // limit
             }
+        
+        return JSONResponse(content={
+            "success": True,
+            "data": [test.to_dict() for test in resume_tests],
+            "pagination": pagination
         })
         
     except HTTPException:
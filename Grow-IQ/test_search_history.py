@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""
+Search history test
+Checks the decayed top-K sketch and per-user recent rings stay bounded, that
+searches reach the search log only through the batch flush, and that the
+snapshot restores both after a restart
+"""
+
+import os
+import sys
+import json
+import asyncio
+from datetime import datetime, timedelta
+from unittest.mock import patch
+
+import pytest
+from sqlalchemy import event, select, func
+from sqlalchemy.orm import sessionmaker
+from starlette.requests import Request
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import search_history_service as history
+from models import User, SearchLog, Session as SessionModel
+from search_history_service import DecayedTopK, RecentSearches, normalize_query
+from connection_routes import get_popular_searches, get_recent_searches
+
+
+@pytest.fixture
+def db(engine):
+    session = sessionmaker(bind=engine)()
+    session.add_all([
+        User(id=1, username="pat", email="pat@example.com", full_name="Pat"),
+        SessionModel(token="pat-token", user_id=1, expires_at=datetime.now() + timedelta(days=1)),
+    ])
+    session.commit()
+    history.reset_search_history()
+    yield session
+    history.reset_search_history()
+    session.close()
+
+
+def _request(token):
+    headers = [(b"cookie", f"session_token={token}".encode())]
+    return Request({"type": "http", "method": "GET", "path": "/", "headers": headers, "query_string": b""})
+
+
+def test_normalize_query():
+    assert normalize_query("  Data   Scientist ") == "data scientist"
+    assert len(normalize_query("x" * 500)) == history.MAX_QUERY_LENGTH
+    assert normalize_query(None) == ""
+
+
+def test_top_k_bounded_and_decayed():
+    sketch = DecayedTopK(capacity=5, half_life_seconds=3600, base=0)
+    for i in range(200):
+        sketch.add("python", now=i)
+        sketch.add(f"rare {i}", now=i)
+        if i % 2:
+            sketch.add("design", now=i)
+    assert len(sketch) == 5
+    assert [term for term, _ in sketch.top(2)] == ["python", "design"]
+
+    # Hits a day later outweigh many more hits from a week ago
+    for _ in range(100):
+        sketch.add("old", now=1000)
+    for _ in range(10):
+        sketch.add("new", now=1000 + 7 * 86400)
+    assert sketch.top(1)[0][0] == "new"
+    # Rebasing kept counts relative to each other
+    assert sketch.base == 1000 + 7 * 86400
+
+
+def test_top_k_ranks_by_guaranteed_count():
+    sketch = DecayedTopK(capacity=2, half_life_seconds=3600, base=0)
+    for _ in range(5):
+        sketch.add("python", now=0)
+    for _ in range(4):
+        sketch.add("design", now=0)
+    # Takes over design's counter: count 5, but only 1 guaranteed
+    sketch.add("jane doe", now=0)
+    with patch.object(history.time, "time", return_value=0):
+        assert sketch.top(2) == [("python", 5.0), ("jane doe", 1.0)]
+        assert sketch.top(2, min_count=3) == [("python", 5.0)]
+
+
+def test_recent_rings_bounded():
+    recent = RecentSearches(per_user=3, max_users=2)
+    for i, query in enumerate(["a1", "a2", "a3", "a1", "a4"]):
+        recent.add(1, query, i)
+    assert [query for query, _ in recent.get(1)] == ["a4", "a1", "a3"]
+    recent.add(2, "b", 0)
+    recent.get(1)
+    recent.add(3, "c", 0)
+    assert recent.get(2) == [] and recent.get(1)
+
+
+def test_batched_log_and_recent_fallback(db, engine):
+    statements = []
+    event.listen(engine, "before_cursor_execute", lambda *args: statements.append(args[2]))
+    for query in ["Engineer", "designer", "x", "engineer "]:
+        history.record_search(1, query, "people")
+    history.record_search(None, "python", "jobs")
+    assert statements == []
+
+    assert history.flush_search_log(db) == 4
+    assert db.scalar(select(func.count()).select_from(SearchLog)) == 4
+    assert history.flush_search_log(db) == 0
+
+    assert history.recent_searches(db, 1) == ["engineer", "designer"]
+    # A restart without a snapshot reads the user's history back from the log once
+    history.reset_search_history()
+    assert history.recent_searches(db, 1, limit=1) == ["engineer"]
+    history.record_search(1, "manager", "people")
+    assert history.recent_searches(db, 1) == ["manager", "engineer", "designer"]
+
+    # Flushed by another worker: shows up although this worker already has a ring for the user
+    db.add(SearchLog(user_id=1, query="analyst", search_type="people", searched_at=datetime.now() + timedelta(seconds=1)))
+    db.commit()
+    assert history.recent_searches(db, 1) == ["analyst", "manager", "engineer", "designer"]
+
+
+def test_snapshot_survives_restart(db, tmp_path):
+    for _ in range(5):
+        history.record_search(1, "data scientist", "people")
+    for _ in range(4):
+        history.record_search(1, "chef", "jobs")
+    # Searched once: below SEARCH_POPULAR_MIN_COUNT, so never shown to others
+    history.record_search(1, "pat@example.com", "people")
+    path = str(tmp_path / "search_stats.json")
+    history.save_search_snapshot(path)
+
+    history.reset_search_history()
+    assert history.load_search_snapshot(path)
+    popular = asyncio.run(get_popular_searches(_request("pat-token"), db, limit=4))
+    assert json.loads(popular.body)["popular_searches"][:3] == ["data scientist", "chef", "software engineer"]
+    recent = asyncio.run(get_recent_searches(_request("pat-token"), db, limit=10))
+    assert json.loads(recent.body)["recent_searches"] == ["pat@example.com", "chef", "data scientist"]
+
+    assert not history.load_search_snapshot(str(tmp_path / "missing.json"))
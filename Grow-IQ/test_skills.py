@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""
+Skills catalog test
+Checks parsing and synonym resolution, the backfill from existing profiles and
+jobs, that the join tables follow profile and job edits (also when another
+save adds the same new skill first), and that skill
+filters and suggestions go through the catalog instead of ILIKE
+"""
+
+import os
+import sys
+import json
+
+import pytest
+from sqlalchemy import event, select
+from sqlalchemy.orm import sessionmaker
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from models import User, Job, Skill, UserSkill, JobSkill
+from skill_service import (
+    parse_skills, parse_job_skills, ensure_skill_catalog, user_skill_names,
+    users_with_skills, skill_suggestions, COMMON_SKILLS, SUGGESTION_DEFAULTS
+)
+
+
+@pytest.fixture
+def db(engine):
+    session = sessionmaker(bind=engine)()
+    session.add_all([
+        User(id=1, username="hr", email="hr@example.com", full_name="Hiring Manager"),
+        User(id=2, username="ada", email="ada@example.com", full_name="Ada", skills=json.dumps(["Python", "K8s", "js"])),
+        User(id=3, username="sam", email="sam@example.com", full_name="Sam", skills="React Native, SQL"),
+        Job(id=1, title="Platform Engineer", company="Acme", posted_by=1,
+            requirements="Ship things\n[SKILLS] Kubernetes, Postgres"),
+    ])
+    session.commit()
+    # Rows written before the catalog existed are filled in when it is seeded
+    assert ensure_skill_catalog(engine)
+    assert not ensure_skill_catalog(engine)
+    yield session
+    session.close()
+
+
+def user_ids(db, skills):
+    return list(db.scalars(select(User.id).where(users_with_skills(User.id, skills)).order_by(User.id)))
+
+
+def job_skill_names(db, job_id):
+    return list(db.scalars(select(Skill.name).join(JobSkill, JobSkill.skill_id == Skill.id)
+                           .where(JobSkill.job_id == job_id).order_by(Skill.name)))
+
+
+def test_parse_skills():
+    assert parse_skills('["Python", " Machine   Learning ", 3]') == ["Python", "Machine Learning"]
+    assert parse_skills('{"Go": true, "Rust": false}') == ["Go"]
+    assert parse_skills("sql; excel\nseo") == ["sql", "excel", "seo"]
+    assert parse_job_skills("Do things\n[SKILLS] AWS, Docker") == ["AWS", "Docker"]
+    assert parse_skills(None) == [] and parse_job_skills("no skills line") == []
+
+
+def test_backfill_resolves_synonyms(db):
+    assert user_skill_names(db, 2) == ["JavaScript", "Kubernetes", "Python"]
+    assert user_skill_names(db, 3) == ["React Native", "SQL"]
+    assert job_skill_names(db, 1) == ["Kubernetes", "PostgreSQL"]
+    assert user_ids(db, "kubernetes") == [2]
+    assert user_ids(db, "javascript, python") == [2]
+    assert user_ids(db, "react") == [3]
+    assert user_ids(db, "python, react") == []
+
+
+def test_join_tables_follow_edits(db):
+    ada = db.get(User, 2)
+    ada.skills = "Go"
+    db.add(User(id=4, username="kim", email="kim@example.com", full_name="Kim", skills="Golang, Postgres"))
+    db.commit()
+    assert user_skill_names(db, 2) == ["Go"]
+    assert user_ids(db, "go") == [2, 4]
+    assert user_ids(db, "postgresql") == [4]
+
+    job = db.get(Job, 1)
+    job.requirements = "[SKILLS] Rust"
+    db.commit()
+    assert job_skill_names(db, 1) == ["Rust"]
+
+    db.delete(db.get(User, 4))
+    db.commit()
+    assert db.scalars(select(UserSkill).where(UserSkill.user_id == 4)).all() == []
+
+
+def test_concurrently_added_skill_is_reused(db, engine):
+    raced = []
+
+    def other_writer_first(conn, cursor, statement, parameters, context, executemany):
+        # Another profile save adds the same new skill between our lookup and insert
+        if statement.startswith("INSERT INTO skills") and not raced:
+            raced.append(statement)
+            cursor.execute("INSERT INTO skills (name, normalized) VALUES ('Zig', 'zig')")
+
+    event.listen(engine, "before_cursor_execute", other_writer_first)
+    db.get(User, 3).skills = "Zig"
+    db.commit()
+    event.remove(engine, "before_cursor_execute", other_writer_first)
+    assert raced
+    assert user_skill_names(db, 3) == ["Zig"]
+    assert len(db.scalars(select(Skill).where(Skill.normalized == "zig")).all()) == 1
+
+
+def test_suggestions_by_prefix(db, engine):
+    statements = []
+    event.listen(engine, "before_cursor_execute", lambda *args: statements.append(args[2]))
+    # Most used first
+    assert skill_suggestions(db, "java") == ["JavaScript", "Java"]
+    # A synonym suggests its canonical skill, once
+    assert skill_suggestions(db, "k8") == ["Kubernetes"]
+    assert skill_suggestions(db, "js") == ["JavaScript"]
+    assert not any("LIKE" in statement.upper() for statement in statements)
+    assert skill_suggestions(db, "") == COMMON_SKILLS[:SUGGESTION_DEFAULTS]
+    assert skill_suggestions(db, "zzz") == []
+
+
+def test_free_text_skills_need_enough_uses(db):
+    # Typed in by one user only: not offered to everyone else (SKILL_SUGGESTION_MIN_USES is 3)
+    assert skill_suggestions(db, "react") == ["React"]
+    db.add_all([
+        User(id=10 + i, username=f"dev{i}", email=f"dev{i}@example.com", full_name=f"Dev {i}", skills="React Native")
+        for i in range(2)
+    ])
+    db.commit()
+    assert skill_suggestions(db, "react") == ["React Native", "React"]
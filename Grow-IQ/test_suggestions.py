@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+Friends-of-friends suggestion test
+Checks mutual-count ranking, exclusions, attribute boosts and bounded user reads
+"""
+
+import os
+import sys
+
+import pytest
+from sqlalchemy import event
+from sqlalchemy.orm import sessionmaker
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from models import User, Connection, FriendRequest
+from graph_service import SocialGraphIndex, build_graph_index, reset_graph_index
+from suggestion_service import suggest_connections, friends_of_friends
+
+
+@pytest.fixture
+def db(engine):
+    session = sessionmaker(bind=engine)()
+    companies = {1: "Acme", 6: "Acme", 8: "Acme"}
+    session.add_all([
+        User(username=f"u{i}", email=f"u{i}@example.com", full_name=f"User {i}",
+             company=companies.get(i, "Company"), is_active=(i != 9))
+        for i in range(1, 12)
+    ])
+    session.flush()
+
+    def connect(a, b):
+        session.add(Connection(user_id=a, connected_user_id=b, status="accepted"))
+
+    # 1 knows 2, 3, 4
+    for friend in (2, 3, 4):
+        connect(1, friend)
+    # 5 shares three of them, 6 two, 7 and 9 one each; 8 shares one and works at Acme
+    for friend in (2, 3, 4):
+        connect(friend, 5)
+    connect(6, 2)
+    connect(3, 6)
+    connect(4, 7)
+    connect(2, 8)
+    connect(9, 2)
+    # 10 shares two but has a pending request from 1
+    connect(10, 2)
+    connect(10, 3)
+    session.add(FriendRequest(sender_id=1, receiver_id=10, status="pending"))
+    session.commit()
+    build_graph_index(session)
+    yield session
+    session.close()
+    reset_graph_index()
+
+
+def test_ranked_by_mutual_count_with_boosts(db):
+    ranked = suggest_connections(db, 1, 10)
+    assert [item["user"].id for item in ranked] == [5, 6, 8, 7]
+    top = ranked[0]
+    assert top["mutual_count"] == 3 and top["reasons"][0] == "3 mutual connections"
+    acme = ranked[1]
+    assert acme["score"] == 2.5 and "Same company: Acme" in acme["reasons"]
+    # Placeholder company values are not treated as shared
+    assert ranked[3]["reasons"] == ["1 mutual connection"]
+
+
+def test_excludes_self_connections_pending_and_inactive(db):
+    ids = {item["user"].id for item in suggest_connections(db, 1, 50)}
+    assert ids.isdisjoint({1, 2, 3, 4, 9, 10})
+
+
+def test_top_k_reads_only_shortlist(engine, db):
+    suggest_connections(db, 1, 1)  # build the graph index outside the count
+    statements = []
+    listener = lambda conn, cursor, statement, *args: statements.append(statement)
+    event.listen(engine, "before_cursor_execute", listener)
+    try:
+        ranked = suggest_connections(db, 1, 1)
+    finally:
+        event.remove(engine, "before_cursor_execute", listener)
+    assert [item["user"].id for item in ranked] == [5]
+    # viewer, pending requests, shortlisted candidates
+    assert len(statements) <= 3
+
+
+def test_hubs_are_skipped():
+    index = SocialGraphIndex.from_edges([(1, 2), (2, 3), (1, 4)] + [(4, n) for n in range(10, 30)])
+    assert set(friends_of_friends(index, 1, set(), max_hub_degree=5)) == {3}
+    assert len(friends_of_friends(index, 1, set(), max_hub_degree=100)) == 21
+
+
+def test_cold_start_uses_shared_attributes(db):
+    db.add(User(username="new", email="new@example.com", full_name="Newcomer", company="Acme"))
+    db.commit()
+    new_id = db.query(User).filter_by(username="new").one().id
+    ranked = suggest_connections(db, new_id, 5)
+    assert {item["user"].id for item in ranked} == {1, 6, 8}
+    assert all(item["reasons"] == ["Same company: Acme"] for item in ranked)
@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+Network timeline test
+Checks fan-out on write, fan-in for large authors, backfill on connect and cursor paging
+"""
+
+import os
+import sys
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import sessionmaker
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from config import settings
+from models import Base, User, Post, Connection, TimelineEntry
+import timeline_service
+from timeline_service import fan_out, link_timelines, unlink_timelines, timeline_page, timeline_feed
+
+BASE = datetime(2025, 1, 1)
+
+
+@pytest.fixture
+def db(monkeypatch):
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    session = sessionmaker(bind=engine)()
+    for i in range(1, 7):
+        session.add(User(username=f"user{i}", email=f"user{i}@example.com", full_name=f"User {i}"))
+    session.flush()
+    # 1 - 2 - 3 chain, plus 4 who is connected to 1, 5 and 6
+    for a, b in ((1, 2), (2, 3), (4, 1), (4, 5), (6, 4)):
+        session.add(Connection(user_id=a, connected_user_id=b, status='accepted'))
+    session.commit()
+    monkeypatch.setattr(timeline_service, "_large_authors", {"ids": set(), "checked_at": 0.0})
+    yield session
+    session.close()
+
+
+def _post(db, author_id, minutes):
+    post = Post(content=f"by {author_id}", user_id=author_id, created_at=BASE + timedelta(minutes=minutes))
+    db.add(post)
+    db.flush()
+    fan_out(db, post.id)
+    db.commit()
+    return post.id
+
+
+def _readers(db, post_id):
+    return {row.user_id for row in db.query(TimelineEntry).filter(TimelineEntry.post_id == post_id)}
+
+
+def test_fan_out_reaches_author_and_connections(db):
+    post_id = _post(db, 2, 0)
+    assert _readers(db, post_id) == {1, 2, 3}
+
+
+def test_large_author_is_fanned_in_on_read(db, monkeypatch):
+    monkeypatch.setattr(settings, "TIMELINE_FANOUT_MAX_CONNECTIONS", 2)
+    large_post = _post(db, 4, 5)
+    small_post = _post(db, 2, 1)
+    assert _readers(db, large_post) == {4}
+
+    post_ids, _ = timeline_page(db, 1, 10)
+    assert post_ids == [large_post, small_post]
+
+
+def test_cursor_walk(db):
+    expected = [_post(db, author, minute) for minute, author in enumerate([1, 2, 4, 1, 2, 4, 1])][::-1]
+    seen, cursor = [], None
+    while True:
+        page, cursor = timeline_page(db, 1, 3, cursor)
+        seen.extend(page)
+        if cursor is None:
+            break
+    assert seen == expected
+
+
+def test_link_and_unlink(db):
+    post_id = _post(db, 5, 0)
+    assert 3 not in _readers(db, post_id)
+    db.add(Connection(user_id=3, connected_user_id=5, status='accepted'))
+    link_timelines(db, 3, 5)
+    db.commit()
+    assert 3 in _readers(db, post_id)
+
+    unlink_timelines(db, 3, 5)
+    db.commit()
+    assert 3 not in _readers(db, post_id)
+
+
+def test_empty_timeline_is_rebuilt(db):
+    db.add_all([Post(content="old", user_id=2, created_at=BASE), Post(content="mine", user_id=1, created_at=BASE)])
+    db.commit()
+    items, _ = timeline_feed(db, 1, 10)
+    assert {item["author"].id for item in items} == {1, 2}
+    assert db.query(TimelineEntry).filter(TimelineEntry.user_id == 1).count() == 2
+
+
+def test_page_read_uses_timeline_index(db):
+    plan = db.execute(text(
+        "EXPLAIN QUERY PLAN SELECT post_id, created_at FROM timeline_entries "
+        "WHERE user_id = 1 ORDER BY created_at DESC, post_id DESC LIMIT 21"
+    )).all()
+    detail = " ".join(row[-1] for row in plan)
+    assert "ix_timeline_user_created_post" in detail
+    assert "TEMP B-TREE" not in detail
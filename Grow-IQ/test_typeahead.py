@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+Typeahead index test
+Checks prefix lookups from the mapped index file, that they run no SQL, and
+that committed profile edits show up through the overlay until a rebuild
+"""
+
+import os
+import sys
+import time
+
+import pytest
+from sqlalchemy import event
+from sqlalchemy.orm import sessionmaker
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import typeahead_service
+from config import settings
+from models import User
+from typeahead_service import (
+    KEY_BYTES, Suggestion, build_typeahead_index, reset_typeahead, typeahead, write_typeahead_index,
+)
+
+
+@pytest.fixture
+def db(engine, tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "TYPEAHEAD_INDEX_PATH", str(tmp_path / "typeahead.idx"))
+    reset_typeahead()
+    session = sessionmaker(bind=engine)()
+    session.add_all([
+        User(id=1, username="viewer", email="viewer@example.com", full_name="Viewer Person"),
+        User(id=2, username="zoe", email="zoe@example.com", full_name="Zoë Martin", title="Data Engineer", company="Acme"),
+        User(id=3, username="sam", email="sam@example.com", full_name="Sam Mart", title="Designer", company="Martech"),
+        User(id=4, username="lee", email="lee@example.com", full_name="Lee Jones", title="Data Analyst"),
+        User(id=5, username="gone", email="gone@example.com", full_name="Mark Gone", is_active=False),
+    ])
+    session.commit()
+    yield session
+    session.close()
+    reset_typeahead()
+
+
+def ids(suggestions):
+    return [suggestion.id for suggestion in suggestions]
+
+
+def test_not_built_returns_none(db):
+    assert typeahead("za") is None
+
+
+def test_prefix_lookup(db):
+    assert build_typeahead_index(db) > 0
+    assert ids(typeahead("zo")) == [2]       # username and accent-free name
+    assert ids(typeahead("Mart")) == [3, 2]  # second word of the names, and a company
+    assert ids(typeahead("data ")) == [4, 2]  # titles, ordered by the matched text
+    assert ids(typeahead("ma")) == [3, 2]    # inactive "Mark Gone" is not indexed
+    assert ids(typeahead("vi")) == [1]
+    assert typeahead("vi", exclude_id=1) == []
+    assert ids(typeahead("mart", limit=1)) == [3]
+    assert typeahead("sam")[0] == Suggestion(3, "Sam Mart", "Designer", "Martech", "sam")
+
+
+def test_lookup_runs_no_sql(db, engine):
+    build_typeahead_index(db)
+    statements = []
+    event.listen(engine, "before_cursor_execute", lambda *args: statements.append(args[2]))
+    assert ids(typeahead("mar")) == [3, 2]
+    assert statements == []
+
+
+def test_long_prefix_checked_against_full_text(tmp_path):
+    path = str(tmp_path / "long.idx")
+    title = "Principal Software Engineer, Payments"
+    write_typeahead_index([
+        Suggestion(1, "A", title, None, "a"),
+        Suggestion(2, "B", "Principal Software Engineer, Platform", None, "b"),
+    ], path)
+    index = typeahead_service.TypeaheadIndex(path)
+    assert len(title) > KEY_BYTES
+    assert [s.id for _, s in index.search("principal software engineer", 10)] == [1, 2]
+    assert [s.id for _, s in index.search("principal software engineer, pay", 10)] == [1]
+
+
+def test_overlay_until_rebuild(db):
+    build_typeahead_index(db)
+
+    lee = db.get(User, 4)
+    lee.full_name = "Lee Marten"
+    db.add(User(id=6, username="mara", email="mara@example.com", full_name="Mara Quinn"))
+    db.get(User, 3).is_active = False
+    db.commit()
+    assert ids(typeahead("mar")) == [6, 4, 2]
+    assert typeahead("sam") == []
+
+    # Rolled back edits never reach the overlay
+    db.get(User, 2).full_name = "Someone Else"
+    db.flush()
+    db.rollback()
+    assert ids(typeahead("zo")) == [2]
+
+    # A rebuild that includes the edits replaces the overlay
+    time.sleep(0.01)
+    build_typeahead_index(db)
+    typeahead_service._checked_at = 0.0
+    assert ids(typeahead("mar")) == [6, 4, 2]
+    assert typeahead_service._overlay == {}
+    assert typeahead("sam") == []
@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+Streaming upload test
+Checks content sniffing, chunked writes, early size rejection, cleanup of
+partial files and of a request's earlier files, and the request body limit
+"""
+
+import io
+import os
+import sys
+import asyncio
+
+import pytest
+from fastapi import FastAPI, File, HTTPException, UploadFile
+from fastapi.testclient import TestClient
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import upload_utils
+from upload_utils import (
+    save_upload, save_uploads, sniff_content_type, RequestBodyLimitMiddleware,
+    IMAGE_TYPES, VIDEO_TYPES, CERTIFICATE_TYPES,
+)
+
+PNG = b"\x89PNG\r\n\x1a\n" + b"\x00" * 64
+MP4 = b"\x00\x00\x00\x18ftypisom" + b"\x00" * 64
+
+
+class CountingFile(io.BytesIO):
+    """BytesIO that records how many bytes were handed out"""
+    def __init__(self, data):
+        super().__init__(data)
+        self.bytes_read = 0
+
+    def read(self, size=-1):
+        data = super().read(size)
+        self.bytes_read += len(data)
+        return data
+
+
+def _upload(data, filename="file.bin"):
+    return UploadFile(file=CountingFile(data), filename=filename)
+
+
+def test_sniffing():
+    assert sniff_content_type(PNG) == "image/png"
+    assert sniff_content_type(b"\xff\xd8\xff\xe0rest") == "image/jpeg"
+    assert sniff_content_type(MP4) == "video/mp4"
+    assert sniff_content_type(b"%PDF-1.7") == "application/pdf"
+    assert sniff_content_type(b'<?xml version="1.0"?><svg xmlns="x"/>') == "image/svg+xml"
+    assert sniff_content_type(b"MZ\x90\x00") is None
+
+
+def test_streams_in_chunks_and_renames(tmp_path, monkeypatch):
+    monkeypatch.setattr(upload_utils, "UPLOAD_CHUNK_SIZE", 16)
+    data = PNG + b"x" * 1000
+    filename = asyncio.run(save_upload(_upload(data, "photo.exe"), str(tmp_path), IMAGE_TYPES, max_size=4096))
+    assert filename.endswith(".png")
+    assert (tmp_path / filename).read_bytes() == data
+    assert [p.name for p in tmp_path.iterdir()] == [filename]
+
+
+def test_oversize_is_rejected_early(tmp_path, monkeypatch):
+    monkeypatch.setattr(upload_utils, "UPLOAD_CHUNK_SIZE", 16)
+    upload = _upload(MP4 + b"x" * 100_000)
+    with pytest.raises(HTTPException) as exc:
+        asyncio.run(save_upload(upload, str(tmp_path), VIDEO_TYPES, max_size=256))
+    assert exc.value.status_code == 413
+    # Reading stopped right after the limit instead of consuming the whole body
+    assert upload.file.bytes_read <= 256 + 16
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_spoofed_type_is_rejected(tmp_path):
+    with pytest.raises(HTTPException) as exc:
+        asyncio.run(save_upload(_upload(b"MZ\x90\x00" * 10, "cert.pdf"), str(tmp_path), CERTIFICATE_TYPES))
+    assert exc.value.status_code == 400
+    with pytest.raises(HTTPException):
+        asyncio.run(save_upload(_upload(MP4, "clip.png"), str(tmp_path), IMAGE_TYPES))
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_earlier_files_removed_when_a_later_one_fails(tmp_path):
+    uploads = {
+        "image": (_upload(PNG), IMAGE_TYPES),
+        "video": (None, VIDEO_TYPES),
+        "certificate": (_upload(b"MZ\x90\x00" * 10), CERTIFICATE_TYPES),
+    }
+    with pytest.raises(HTTPException):
+        asyncio.run(save_uploads(str(tmp_path), uploads))
+    assert list(tmp_path.iterdir()) == []
+
+    saved = asyncio.run(save_uploads(str(tmp_path), {"image": (_upload(PNG), IMAGE_TYPES), "video": (None, VIDEO_TYPES)}))
+    assert saved["video"] is None and (tmp_path / saved["image"]).exists()
+
+
+def test_body_limit_before_reading():
+    app = FastAPI()
+    app.add_middleware(RequestBodyLimitMiddleware, max_size=1024)
+    reached = []
+
+    @app.post("/upload")
+    async def upload(file: UploadFile = File(...)):
+        reached.append(file.filename)
+        return {"ok": True}
+
+    client = TestClient(app)
+    assert client.post("/upload", files={"file": ("a.png", PNG)}).status_code == 200
+    assert client.post("/upload", files={"file": ("b.png", PNG + b"x" * 4096)}).status_code == 413
+
+    # Without a Content-Length the body is cut off as it streams in
+    def chunks():
+        yield b"--x\r\nContent-Disposition: form-data; name=\"file\"; filename=\"c.png\"\r\n\r\n"
+        for _ in range(8):
+            yield b"x" * 512
+        yield b"\r\n--x--\r\n"
+
+    response = client.post("/upload", content=chunks(), headers={"Content-Type": "multipart/form-data; boundary=x"})
+    assert response.status_code == 413
+    assert reached == ["a.png"]
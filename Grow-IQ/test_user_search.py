@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+User full-text search test
+Checks bm25 ranking, that the FTS index follows inserts, profile edits and
+deletes, and that the search route matches through the index instead of ILIKE
+"""
+
+import os
+import sys
+import asyncio
+
+import pytest
+from sqlalchemy import event, select
+from sqlalchemy.orm import sessionmaker
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from models import User
+from graph_service import reset_graph_index
+from search_service import ensure_user_search_index, search_terms, user_search_matches
+from connection_routes import enhanced_search_users_and_connections
+
+
+@pytest.fixture
+def db(engine):
+    session = sessionmaker(bind=engine)()
+    session.add_all([
+        User(id=1, username="viewer", email="viewer@example.com", full_name="Viewer"),
+        User(id=2, username="pat", email="pat@example.com", full_name="Pat Engineer",
+             title="Designer", company="Acme"),
+        User(id=3, username="sam", email="sam@example.com", full_name="Sam Smith",
+             title="Software Engineer", company="Initech"),
+        User(id=4, username="lee", email="lee@example.com", full_name="Lee Jones",
+             title="Manager", bio="Worked with an engineer once"),
+        User(id=5, username="kim", email="kim@example.com", full_name="Kim Park", title="Chef"),
+    ])
+    session.commit()
+    # Rows written before the index existed are filled in when it is created
+    assert ensure_user_search_index(engine)
+    reset_graph_index()
+    yield session
+    session.close()
+
+
+def matching_ids(db, query):
+    matches = user_search_matches(db, query)
+    return [row.id for row in db.execute(select(matches).order_by(matches.c.rank, matches.c.id))]
+
+
+def search(db, query, **kwargs):
+    params = dict(location=None, industry=None, company=None, title=None, experience_min=None,
+                  experience_max=None, user_type=None, page=1, limit=10, sort_by="relevance", sort_order="desc")
+    params.update(kwargs)
+    return asyncio.run(enhanced_search_users_and_connections(1, db, query, "all", **params))
+
+
+def test_search_terms():
+    assert search_terms('  Senior "C++" engineer*! ') == ["senior", "c", "engineer"]
+    assert search_terms("") == []
+    assert user_search_matches(None, "  ") is None
+
+
+def test_ranked_by_weighted_field(db):
+    # Name beats title beats bio, whatever the id order
+    assert matching_ids(db, "engineer") == [2, 3, 4]
+    assert matching_ids(db, "eng") == [2, 3, 4]
+    assert matching_ids(db, "software eng") == [3]
+    assert matching_ids(db, "nobody") == []
+
+
+def test_index_follows_profile_changes(db):
+    db.add(User(id=6, username="ada", email="ada@example.com", full_name="Ada Lovelace", title="Engineer"))
+    db.commit()
+    assert 6 in matching_ids(db, "lovelace")
+
+    kim = db.get(User, 5)
+    kim.title = "Platform Engineer"
+    db.commit()
+    assert matching_ids(db, "chef") == []
+    assert 5 in matching_ids(db, "platform engineer")
+
+    # Edits outside the indexed columns leave the index alone
+    kim.connections_count = 3
+    db.commit()
+    assert matching_ids(db, "platform") == [5]
+
+    db.delete(db.get(User, 6))
+    db.commit()
+    assert matching_ids(db, "lovelace") == []
+
+
+def test_route_uses_index_and_relevance_order(db, engine):
+    statements = []
+    event.listen(engine, "before_cursor_execute", lambda *args: statements.append(args[2]))
+
+    result = search(db, "engineer")
+    assert [user["id"] for user in result["results"]] == [2, 3, 4]
+    assert result["pagination"]["total"] == 3
+    assert any("MATCH" in statement for statement in statements)
+    assert not any("LIKE" in statement.upper() for statement in statements)
+
+    by_name = search(db, "engineer", sort_by="name", sort_order="asc")
+    assert [user["id"] for user in by_name["results"]] == [4, 2, 3]
+
+
+def test_route_cursor_pages_by_rank(db):
+    first = search(db, "engineer", limit=2, cursor="")
+    assert [user["id"] for user in first["results"]] == [2, 3]
+    second = search(db, "engineer", limit=2, cursor=first["pagination"]["next_cursor"])
+    assert [user["id"] for user in second["results"]] == [4]
+    assert second["pagination"]["next_cursor"] is None
@@ -0,0 +1,247 @@
+"""
+Timeline service for Qrow IQ
+Fan-out-on-write network feeds: a new post is copied into the timeline of every
+connection of its author, so reading a feed page is one index range scan.
+Authors with very large networks are not fanned out; their posts are pulled in
+at read time (fan-in) and merged with the materialized timeline.
+"""
+
+import time
+import logging
+import threading
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from sqlalchemy import DateTime, Integer, and_, delete, exists, func, insert, literal, or_, select, union, union_all
+from sqlalchemy.orm import Session
+
+from config import settings
+from models import Post, Connection, TimelineEntry
+from feed_service import feed_query, hydrate_feed
+from pagination_utils import keyset_paginate, encode_cursor
+
+logger = logging.getLogger(__name__)
+
+# How long the set of large (fan-in) authors is cached (seconds)
+LARGE_AUTHOR_CACHE_TTL = 300
+
+_large_authors: Dict[str, Any] = {"ids": set(), "checked_at": 0.0}
+_large_authors_lock = threading.Lock()
+
+_TIMELINE_COLUMNS = ["user_id", "post_id", "author_id", "created_at"]
+
+
+def _network_selects(user_id: int):
+    """SELECTs of the user's accepted connection IDs (connections may be stored in either direction)"""
+    return [
+        select(Connection.connected_user_id.label("uid")).where(
+            Connection.user_id == user_id, Connection.status == 'accepted'
+        ),
+        select(Connection.user_id.label("uid")).where(
+            Connection.connected_user_id == user_id, Connection.status == 'accepted'
+        ),
+    ]
+
+
+def _network_select(user_id: int):
+    return union(*_network_selects(user_id))
+
+
+def _not_in_timeline(reader_id, post_id):
+    return ~exists().where(TimelineEntry.user_id == reader_id, TimelineEntry.post_id == post_id)
+
+
+def large_author_ids(db: Session) -> Set[int]:
+    """Users whose network exceeds TIMELINE_FANOUT_MAX_CONNECTIONS (cached)"""
+    now = time.time()
+    with _large_authors_lock:
+        if now - _large_authors["checked_at"] < LARGE_AUTHOR_CACHE_TTL:
+            return _large_authors["ids"]
+
+    edges = union_all(
+        select(Connection.user_id.label("uid"), Connection.connected_user_id.label("other"))
+        .where(Connection.status == 'accepted'),
+        select(Connection.connected_user_id.label("uid"), Connection.user_id.label("other"))
+        .where(Connection.status == 'accepted'),
+    ).subquery()
+    ids = set(db.execute(
+        select(edges.c.uid)
+        .group_by(edges.c.uid)
+        .having(func.count(func.distinct(edges.c.other)) > settings.TIMELINE_FANOUT_MAX_CONNECTIONS)
+    ).scalars())
+
+    with _large_authors_lock:
+        _large_authors.update(ids=ids, checked_at=now)
+    return ids
+
+
+def fan_out(db: Session, post_id: int) -> int:
+    """Copy a post into its author's timeline and, unless the author is a large
+    (fan-in) author, into every connection's timeline. The caller commits.
+
+    Returns the number of timeline rows written.
+    """
+    post = db.execute(select(Post.id, Post.user_id, Post.created_at).where(Post.id == post_id)).first()
+    if not post:
+        return 0
+
+    if post.user_id in large_author_ids(db):
+        recipients = select(literal(post.user_id, Integer).label("uid")).subquery()
+    else:
+        recipients = union(
+            select(literal(post.user_id, Integer).label("uid")),
+            *_network_selects(post.user_id),
+        ).subquery()
+
+    result = db.execute(
+        insert(TimelineEntry).from_select(
+            _TIMELINE_COLUMNS,
+            select(
+                recipients.c.uid,
+                literal(post.id, Integer),
+                literal(post.user_id, Integer),
+                literal(post.created_at, DateTime),
+            ).where(_not_in_timeline(recipients.c.uid, post.id)),
+        )
+    )
+    return result.rowcount
+
+
+def fan_out_post(post_id: int):
+    """Background task run after a post is created"""
+    from database_enhanced import get_db_context
+    try:
+        with get_db_context() as db:
+            written = fan_out(db, post_id)
+        logger.info(f"Fanned out post {post_id} to {written} timelines")
+    except Exception as e:
+        logger.error(f"Timeline fan-out failed for post {post_id}: {e}")
+
+
+def _copy_recent_posts(db: Session, reader_id: int, author_filter) -> int:
+    recent = (
+        select(Post.id, Post.user_id, Post.created_at)
+        .where(author_filter)
+        .order_by(Post.created_at.desc(), Post.id.desc())
+        .limit(settings.TIMELINE_BACKFILL_POSTS)
+        .subquery()
+    )
+    result = db.execute(
+        insert(TimelineEntry).from_select(
+            _TIMELINE_COLUMNS,
+            select(literal(reader_id, Integer), recent.c.id, recent.c.user_id, recent.c.created_at)
+            .where(_not_in_timeline(reader_id, recent.c.id)),
+        )
+    )
+    return result.rowcount
+
+
+def link_timelines(db: Session, user_id: int, other_id: int):
+    """Backfill each user's timeline with the other's recent posts when they connect.
+    The caller commits."""
+    large = large_author_ids(db)
+    for reader_id, author_id in ((user_id, other_id), (other_id, user_id)):
+        if author_id not in large:
+            _copy_recent_posts(db, reader_id, Post.user_id == author_id)
+
+
+def unlink_timelines(db: Session, user_id: int, other_id: int):
+    """Drop each user's posts from the other's timeline when a connection is removed.
+    The caller commits."""
+    db.execute(delete(TimelineEntry).where(or_(
+        and_(TimelineEntry.user_id == user_id, TimelineEntry.author_id == other_id),
+        and_(TimelineEntry.user_id == other_id, TimelineEntry.author_id == user_id),
+    )))
+
+
+def rebuild_timeline(db: Session, user_id: int) -> int:
+    """Build a timeline from the user's own and network's recent posts. The caller commits."""
+    return _copy_recent_posts(
+        db, user_id, or_(Post.user_id == user_id, Post.user_id.in_(_network_select(user_id)))
+    )
+
+
+def _followed_large_authors(db: Session, user_id: int) -> Set[int]:
+    """Large (fan-in) authors the user is connected to"""
+    large = large_author_ids(db) - {user_id}
+    if not large:
+        return set()
+    network = _network_select(user_id).subquery()
+    return set(db.execute(select(network.c.uid).where(network.c.uid.in_(large))).scalars())
+
+
+def timeline_page(
+    db: Session,
+    user_id: int,
+    limit: int,
+    cursor: Optional[str] = None,
+    rebuild_if_empty: bool = True,
+) -> Tuple[List[int], Optional[str]]:
+    """One page of the user's network feed as post IDs, newest first.
+
+    Materialized entries are merged with posts pulled from large authors the
+    user is connected to. Returns (post_ids, next_cursor).
+    """
+    entries_query = db.query(TimelineEntry.post_id, TimelineEntry.created_at).filter(
+        TimelineEntry.user_id == user_id
+    )
+    if rebuild_if_empty and cursor is None and entries_query.first() is None:
+        if rebuild_timeline(db, user_id):
+            db.commit()
+
+    entries, entries_cursor = keyset_paginate(
+        entries_query, [(TimelineEntry.created_at, True), (TimelineEntry.post_id, True)], limit, cursor
+    )
+    candidates = {row.post_id: row.created_at for row in entries}
+    has_more = entries_cursor is not None
+
+    followed_large = _followed_large_authors(db, user_id)
+    if followed_large:
+        pulled, pulled_cursor = keyset_paginate(
+            db.query(Post.id, Post.created_at).filter(Post.user_id.in_(followed_large)),
+            [(Post.created_at, True), (Post.id, True)], limit, cursor
+        )
+        candidates.update((row.id, row.created_at) for row in pulled)
+        has_more = has_more or pulled_cursor is not None
+
+    ordered = sorted(candidates.items(), key=lambda item: (item[1], item[0]), reverse=True)
+    has_more = has_more or len(ordered) > limit
+    ordered = ordered[:limit]
+    next_cursor = None
+    if has_more and ordered:
+        last_id, last_created_at = ordered[-1]
+        next_cursor = encode_cursor([last_created_at, last_id])
+    return [post_id for post_id, _ in ordered], next_cursor
+
+
+def timeline_feed(
+    db: Session,
+    user_id: int,
+    limit: int,
+    cursor: Optional[str] = None,
+) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+    """Hydrated network feed page (see feed_service.hydrate_feed)"""
+    post_ids, next_cursor = timeline_page(db, user_id, limit, cursor)
+    if not post_ids:
+        return [], next_cursor
+    rows = {post.id: (post, author) for post, author in feed_query(db).filter(Post.id.in_(post_ids)).all()}
+    ordered_rows = [rows[post_id] for post_id in post_ids if post_id in rows]
+    return hydrate_feed(db, ordered_rows, user_id), next_cursor
+
+
+def top_network_posts(db: Session, user_id: int, limit: int = 5) -> List[Tuple[Post, Any]]:
+    """Highest engagement_score posts in the user's network as (Post, User) rows.
+
+    A top-K over the posts.engagement_score index restricted to the user's
+    timeline (plus followed large authors), instead of scoring loaded posts.
+    """
+    in_network = Post.id.in_(select(TimelineEntry.post_id).where(TimelineEntry.user_id == user_id))
+    followed_large = _followed_large_authors(db, user_id)
+    if followed_large:
+        in_network = or_(in_network, Post.user_id.in_(followed_large))
+    return (
+        feed_query(db)
+        .filter(in_network)
+        .order_by(Post.engagement_score.desc(), Post.id.desc())
+        .limit(limit)
+        .all()
+    )
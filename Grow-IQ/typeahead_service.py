@@ -0,0 +1,350 @@
+"""
+Typeahead service for Qrow IQ
+Prefix index over user names, titles, companies and usernames, written as one
+sorted fixed-width file that every worker process memory-maps. Lookups are a
+binary search over the mapped keys, so suggestions need no database query.
+Edits committed in a process are overlaid on the file immediately, and the
+file is rebuilt in the background and swapped in atomically for all workers.
+"""
+
+import os
+import mmap
+import time
+import struct
+import logging
+import threading
+import unicodedata
+from bisect import bisect_left, insort
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+from sqlalchemy import event, inspect, select
+from sqlalchemy.orm import Session
+
+from config import settings
+from models import User
+
+logger = logging.getLogger(__name__)
+
+# File layout: header, sorted entries (key, user slot), user slots
+# (user_id, payload offset, payload length), then the payload blob
+_MAGIC = b"QTYPEAH1"
+_HEADER = struct.Struct("<8sdII")  # magic, built_at, entry count, user count
+_HEADER_SIZE = 32
+KEY_BYTES = 24  # keys are truncated to this; longer queries are checked against the full text
+_ENTRY = struct.Struct(f"<{KEY_BYTES}sI")
+_SLOT = struct.Struct("<III")
+_FIELD_SEPARATOR = "\x1f"
+
+_INDEXED_FIELDS = ("full_name", "title", "company", "username")
+
+# session.info key holding profile changes that reach the overlay on commit
+_CHANGES_KEY = "typeahead_changes"
+
+
+class Suggestion(NamedTuple):
+    id: int
+    full_name: Optional[str]
+    title: Optional[str]
+    company: Optional[str]
+    username: Optional[str]
+
+
+def normalize(text: Optional[str]) -> str:
+    """Lowercase without accents, so "Zoë" is found by typing "zoe" """
+    decomposed = unicodedata.normalize("NFKD", text or "")
+    return "".join(c for c in decomposed if not unicodedata.combining(c)).casefold().strip()
+
+
+def suggestion_keys(suggestion: Suggestion) -> List[bytes]:
+    """Index keys of one user: each indexed field, plus each later word of the name"""
+    texts = [suggestion.full_name, suggestion.title, suggestion.company, suggestion.username]
+    words = normalize(suggestion.full_name).split()
+    keys = {normalize(text) for text in texts} | {" ".join(words[i:]) for i in range(1, len(words))}
+    keys.discard("")
+    return sorted({key.encode("utf-8")[:KEY_BYTES] for key in keys})
+
+
+def _matches(suggestion: Suggestion, prefix: str) -> bool:
+    texts = [suggestion.full_name, suggestion.title, suggestion.company, suggestion.username]
+    words = normalize(suggestion.full_name).split()
+    candidates = [normalize(text) for text in texts] + [" ".join(words[i:]) for i in range(1, len(words))]
+    return any(candidate.startswith(prefix) for candidate in candidates)
+
+
+# ==================== INDEX FILE ====================
+
+def write_typeahead_index(suggestions: List[Suggestion], path: str, built_at: Optional[float] = None) -> int:
+    """Write the index file for suggestions, replacing path atomically. Returns the entry count."""
+    entries: List[Tuple[bytes, int]] = []
+    slots, blob = [], bytearray()
+    for slot, suggestion in enumerate(suggestions):
+        payload = _FIELD_SEPARATOR.join(value or "" for value in suggestion[1:]).encode("utf-8")
+        slots.append(_SLOT.pack(suggestion.id, len(blob), len(payload)))
+        blob += payload
+        entries.extend((key, slot) for key in suggestion_keys(suggestion))
+    entries.sort()
+
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    tmp_path = f"{path}.tmp.{os.getpid()}"
+    with open(tmp_path, "wb") as out:
+        out.write(_HEADER.pack(_MAGIC, built_at or time.time(), len(entries), len(slots)).ljust(_HEADER_SIZE, b"\0"))
+        out.writelines(_ENTRY.pack(key, slot) for key, slot in entries)
+        out.writelines(slots)
+        out.write(blob)
+    # Workers that mapped the old file keep reading it until they reload
+    os.replace(tmp_path, path)
+    return len(entries)
+
+
+class _MappedKeys:
+    """The entry keys of a mapped file as a sequence bisect can search"""
+
+    def __init__(self, buffer, count: int):
+        self._buffer = buffer
+        self._count = count
+
+    def __len__(self):
+        return self._count
+
+    def __getitem__(self, i: int) -> bytes:
+        offset = _HEADER_SIZE + i * _ENTRY.size
+        return self._buffer[offset:offset + KEY_BYTES]
+
+
+class TypeaheadIndex:
+    """Read-only view of an index file through a shared memory map"""
+
+    def __init__(self, path: str):
+        with open(path, "rb") as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            self.mtime_ns = os.fstat(f.fileno()).st_mtime_ns
+        magic, self.built_at, self.entry_count, self.user_count = _HEADER.unpack_from(self._mm)
+        if magic != _MAGIC:
+            raise ValueError(f"{path} is not a typeahead index")
+        self._keys = _MappedKeys(self._mm, self.entry_count)
+        self._slots_at = _HEADER_SIZE + self.entry_count * _ENTRY.size
+        self._blob_at = self._slots_at + self.user_count * _SLOT.size
+
+    def suggestion(self, slot: int) -> Suggestion:
+        user_id, offset, length = _SLOT.unpack_from(self._mm, self._slots_at + slot * _SLOT.size)
+        start = self._blob_at + offset
+        fields = self._mm[start:start + length].decode("utf-8").split(_FIELD_SEPARATOR)
+        return Suggestion(user_id, *[value or None for value in fields])
+
+    def search(self, prefix: str, limit: int, skip=frozenset()) -> List[Tuple[bytes, Suggestion]]:
+        """(key, suggestion) for up to limit users with a key starting with prefix, in key order"""
+        needle = prefix.encode("utf-8")
+        truncated = len(needle) > KEY_BYTES
+        needle = needle[:KEY_BYTES]
+        results, seen = [], set()
+        i = bisect_left(self._keys, needle)
+        while i < self.entry_count and len(results) < limit:
+            key = self._keys[i]
+            if not key.startswith(needle):
+                break
+            (slot,) = struct.unpack_from("<I", self._mm, _HEADER_SIZE + i * _ENTRY.size + KEY_BYTES)
+            i += 1
+            if slot in seen:
+                continue
+            seen.add(slot)
+            suggestion = self.suggestion(slot)
+            if suggestion.id in skip or (truncated and not _matches(suggestion, prefix)):
+                continue
+            results.append((key.rstrip(b"\0"), suggestion))
+        return results
+
+
+# ==================== SHARED STATE ====================
+# The mapped file is re-checked at most once a second; edits committed in
+# this process since the file was built are kept in an overlay, which the
+# file replaces once a rebuild that includes them is loaded.
+
+_lock = threading.Lock()
+_index: Optional[TypeaheadIndex] = None
+_checked_at = 0.0
+_overlay: Dict[int, Tuple[float, Optional[Suggestion]]] = {}  # user_id -> (committed_at, suggestion or None if gone)
+_overlay_keys: List[Tuple[bytes, int]] = []
+_dirty = threading.Event()
+_builder_thread: Optional[threading.Thread] = None
+_builder_stop = threading.Event()
+
+
+def _load(path: str) -> Optional[TypeaheadIndex]:
+    global _index, _checked_at
+    now = time.monotonic()
+    if _index is not None and now - _checked_at < 1.0:
+        return _index
+    _checked_at = now
+    try:
+        mtime_ns = os.stat(path).st_mtime_ns
+    except FileNotFoundError:
+        return _index
+    if _index is None or mtime_ns != _index.mtime_ns:
+        try:
+            fresh = TypeaheadIndex(path)
+        except (OSError, ValueError) as e:
+            logger.error(f"Could not load typeahead index {path}: {e}")
+            return _index
+        with _lock:
+            _index = fresh
+            # Overlay edits the new file already contains
+            for user_id, (committed_at, _) in list(_overlay.items()):
+                if committed_at < fresh.built_at:
+                    _drop_overlay(user_id)
+        logger.info(f"Loaded typeahead index: {fresh.user_count} users, {fresh.entry_count} keys")
+    return _index
+
+
+def _drop_overlay(user_id: int):
+    _, previous = _overlay.pop(user_id, (0, None))
+    if previous is not None:
+        for key in suggestion_keys(previous):
+            _overlay_keys.remove((key, user_id))
+
+
+def apply_profile_changes(changes: Dict[int, Optional[Suggestion]], committed_at: Optional[float] = None):
+    """Overlay committed profile changes on the mapped index (None removes the user)"""
+    committed_at = committed_at or time.time()
+    with _lock:
+        for user_id, suggestion in changes.items():
+            _drop_overlay(user_id)
+            _overlay[user_id] = (committed_at, suggestion)
+            if suggestion is not None:
+                for key in suggestion_keys(suggestion):
+                    insort(_overlay_keys, (key, user_id))
+    _dirty.set()
+
+
+def typeahead(prefix: str, limit: int = 10, exclude_id: Optional[int] = None) -> Optional[List[Suggestion]]:
+    """Users with a name, title, company or username starting with prefix, in key order.
+
+    Returns None when no index file has been built yet.
+    """
+    index = _load(settings.TYPEAHEAD_INDEX_PATH)
+    if index is None:
+        return None
+    needle = normalize(prefix)
+    key_prefix = needle.encode("utf-8")[:KEY_BYTES]
+    with _lock:
+        overlay = dict(_overlay)
+        overlay_hits = []
+        for key, user_id in _overlay_keys[bisect_left(_overlay_keys, (key_prefix,)):]:
+            if not key.startswith(key_prefix):
+                break
+            overlay_hits.append((key, overlay[user_id][1]))
+    skip = set(overlay)
+    if exclude_id is not None:
+        skip.add(exclude_id)
+
+    hits = index.search(needle, limit, skip) + [
+        hit for hit in overlay_hits if hit[1].id != exclude_id and _matches(hit[1], needle)
+    ]
+    hits.sort(key=lambda hit: (hit[0], hit[1].id))
+    results, seen = [], set()
+    for _, suggestion in hits:
+        if suggestion.id not in seen:
+            seen.add(suggestion.id)
+            results.append(suggestion)
+    return results[:limit]
+
+
+def build_typeahead_index(db: Session, path: Optional[str] = None) -> int:
+    """Write the index file from the active users in db. Returns the entry count."""
+    path = path or settings.TYPEAHEAD_INDEX_PATH
+    built_at = time.time()
+    rows = db.execute(
+        select(User.id, User.full_name, User.title, User.company, User.username)
+        .where(User.is_active == True)
+        .order_by(User.id)
+        .execution_options(yield_per=50_000)
+    )
+    count = write_typeahead_index([Suggestion(*row) for row in rows], path, built_at)
+    logger.info(f"Built typeahead index {path}: {count} keys")
+    return count
+
+
+def reset_typeahead():
+    """Forget the mapped file and overlay; the next lookup maps the file again"""
+    global _index, _checked_at
+    with _lock:
+        _index = None
+        _checked_at = 0.0
+        _overlay.clear()
+        _overlay_keys.clear()
+    _dirty.clear()
+
+
+# ==================== CHANGE TRACKING ====================
+
+@event.listens_for(Session, "after_flush")
+def _record_profile_changes(session, flush_context):
+    changes = None
+    for user in session.new | session.dirty | session.deleted:
+        if not isinstance(user, User):
+            continue
+        if user in session.dirty:
+            state = inspect(user)
+            if not any(state.attrs[field].history.has_changes() for field in _INDEXED_FIELDS + ("is_active",)):
+                continue
+        if changes is None:
+            changes = session.info.setdefault(_CHANGES_KEY, {})
+        if user in session.deleted or not user.is_active:
+            changes[user.id] = None
+        else:
+            changes[user.id] = Suggestion(user.id, user.full_name, user.title, user.company, user.username)
+
+
+@event.listens_for(Session, "after_commit")
+def _apply_committed_profiles(session):
+    changes = session.info.pop(_CHANGES_KEY, None)
+    if changes:
+        apply_profile_changes(changes)
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def _discard_rolled_back_profiles(session, previous_transaction):
+    if previous_transaction.parent is None:
+        session.info.pop(_CHANGES_KEY, None)
+
+
+# ==================== BACKGROUND BUILDER ====================
+
+def _file_age(path: str) -> float:
+    try:
+        return time.time() - os.stat(path).st_mtime
+    except FileNotFoundError:
+        return float("inf")
+
+
+def start_typeahead_builder():
+    """Build the index file if missing and rebuild it in a daemon thread when profiles change"""
+    global _builder_thread
+    interval = settings.TYPEAHEAD_REBUILD_SECONDS
+    if interval <= 0 or (_builder_thread and _builder_thread.is_alive()):
+        return
+    _builder_stop.clear()
+
+    def _run():
+        from database_enhanced import get_db_context
+        path = settings.TYPEAHEAD_INDEX_PATH
+        wait = 0  # first pass right away, in case the file is missing
+        while not _builder_stop.wait(wait):
+            wait = interval
+            # Other workers' rebuilds refresh the file too, so only stale or locally edited files are rebuilt
+            if not _dirty.is_set() and _file_age(path) < settings.TYPEAHEAD_MAX_AGE_SECONDS:
+                continue
+            _dirty.clear()
+            try:
+                with get_db_context() as db:
+                    build_typeahead_index(db, path)
+            except Exception as e:
+                logger.error(f"Typeahead index rebuild failed: {e}")
+                _dirty.set()
+
+    _builder_thread = threading.Thread(target=_run, name="typeahead-builder", daemon=True)
+    _builder_thread.start()
+    logger.info(f"Typeahead index builder started (every {interval}s when profiles change)")
+
+
+def stop_typeahead_builder():
+    _builder_stop.set()
@@ -0,0 +1,211 @@
+"""
+Upload utilities for Qrow IQ
+Streams uploaded files to disk in bounded chunks with async I/O, enforcing the
+size limit as bytes arrive and identifying the type from the file's own magic
+bytes rather than the client-supplied name or Content-Type. Request bodies
+over the overall limit are refused before they are read.
+"""
+
+import os
+import uuid
+import logging
+from typing import Dict, Iterable, Optional, Tuple
+
+import aiofiles
+from fastapi import HTTPException, UploadFile
+from starlette.exceptions import HTTPException as StarletteHTTPException
+from starlette.responses import JSONResponse
+
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+# Bytes read from the upload per iteration; also the window used for sniffing
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+
+# Extension written for each sniffed content type
+EXTENSIONS = {
+    "image/jpeg": "jpg",
+    "image/png": "png",
+    "image/gif": "gif",
+    "image/webp": "webp",
+    "image/svg+xml": "svg",
+    "video/mp4": "mp4",
+    "video/quicktime": "mov",
+    "video/webm": "webm",
+    "video/x-matroska": "mkv",
+    "video/ogg": "ogv",
+    "video/x-msvideo": "avi",
+    "video/mpeg": "mpeg",
+    "application/pdf": "pdf",
+    "application/msword": "doc",
+    "application/vnd.openxmlformats-officedocument.wordprocessingml.document": "docx",
+}
+
+IMAGE_TYPES = {"image/jpeg", "image/png", "image/gif", "image/webp", "image/svg+xml"}
+VIDEO_TYPES = {t for t in EXTENSIONS if t.startswith("video/")}
+CERTIFICATE_TYPES = {
+    "application/pdf",
+    "application/msword",
+    "application/vnd.openxmlformats-officedocument.wordprocessingml.document",
+    "image/jpeg",
+    "image/png",
+    "image/gif",
+}
+
+
+def sniff_content_type(head: bytes) -> Optional[str]:
+    """Identify a file from its leading bytes; None when unrecognised"""
+    if head.startswith(b"\xff\xd8\xff"):
+        return "image/jpeg"
+    if head.startswith(b"\x89PNG\r\n\x1a\n"):
+        return "image/png"
+    if head[:6] in (b"GIF87a", b"GIF89a"):
+        return "image/gif"
+    if head[:4] == b"RIFF" and head[8:12] == b"WEBP":
+        return "image/webp"
+    if head[:4] == b"RIFF" and head[8:12] == b"AVI ":
+        return "video/x-msvideo"
+    if head[4:8] == b"ftyp":
+        return "video/quicktime" if head[8:12] == b"qt  " else "video/mp4"
+    if head.startswith(b"\x1a\x45\xdf\xa3"):
+        return "video/webm" if b"webm" in head[:64] else "video/x-matroska"
+    if head.startswith(b"OggS"):
+        return "video/ogg"
+    if head[:4] in (b"\x00\x00\x01\xba", b"\x00\x00\x01\xb3"):
+        return "video/mpeg"
+    if head.startswith(b"%PDF-"):
+        return "application/pdf"
+    if head.startswith(b"\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1"):
+        return "application/msword"
+    if head.startswith(b"PK\x03\x04") and (b"word/" in head or b"[Content_Types].xml" in head):
+        return "application/vnd.openxmlformats-officedocument.wordprocessingml.document"
+    text_head = head[:512].lstrip(b"\xef\xbb\xbf \t\r\n").lower()
+    if text_head.startswith(b"<svg") or (text_head.startswith(b"<?xml") and b"<svg" in text_head):
+        return "image/svg+xml"
+    return None
+
+
+async def save_upload(
+    upload: UploadFile,
+    dest_dir: str,
+    allowed_types: Iterable[str],
+    max_size: Optional[int] = None,
+) -> str:
+    """Stream an upload into dest_dir and return the stored filename.
+
+    Raises 413 as soon as more than max_size (default settings.MAX_FILE_SIZE)
+    bytes have arrived and 400 when the sniffed type is not allowed. The file
+    is written to a temporary name and renamed into place only once complete.
+    """
+    max_size = settings.MAX_FILE_SIZE if max_size is None else max_size
+    if upload.size is not None and upload.size > max_size:
+        raise HTTPException(status_code=413, detail=f"File too large (max {max_size // (1024 * 1024)}MB)")
+
+    os.makedirs(dest_dir, exist_ok=True)
+    tmp_path = os.path.join(dest_dir, f".{uuid.uuid4().hex}.part")
+    try:
+        head = await upload.read(UPLOAD_CHUNK_SIZE)
+        content_type = sniff_content_type(head)
+        if content_type not in allowed_types:
+            logger.warning(f"Rejected upload {upload.filename!r}: sniffed type {content_type}")
+            raise HTTPException(status_code=400, detail="Unsupported or unrecognised file type")
+
+        written = 0
+        async with aiofiles.open(tmp_path, "wb") as out:
+            chunk = head
+            while chunk:
+                written += len(chunk)
+                if written > max_size:
+                    raise HTTPException(status_code=413, detail=f"File too large (max {max_size // (1024 * 1024)}MB)")
+                await out.write(chunk)
+                chunk = await upload.read(UPLOAD_CHUNK_SIZE)
+
+        filename = f"{uuid.uuid4()}.{EXTENSIONS[content_type]}"
+        os.replace(tmp_path, os.path.join(dest_dir, filename))
+        return filename
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+async def save_uploads(
+    dest_dir: str,
+    uploads: Dict[str, Tuple[Optional[UploadFile], Iterable[str]]],
+) -> Dict[str, Optional[str]]:
+    """Save the files of one request with save_upload(); {name: (upload or None, allowed types)} -> {name: filename}.
+
+    If any file is rejected, the ones already saved for this request are
+    deleted before the error propagates.
+    """
+    saved: Dict[str, Optional[str]] = {}
+    try:
+        for name, (upload, allowed_types) in uploads.items():
+            saved[name] = await save_upload(upload, dest_dir, allowed_types) if upload is not None else None
+    except BaseException:
+        discard_uploads(dest_dir, saved.values())
+        raise
+    return saved
+
+
+def discard_uploads(dest_dir: str, filenames: Iterable[Optional[str]]):
+    """Delete saved uploads whose request failed afterwards"""
+    for filename in filenames:
+        if filename:
+            try:
+                os.remove(os.path.join(dest_dir, filename))
+            except FileNotFoundError:
+                pass
+
+
+# ==================== REQUEST BODY LIMIT ====================
+
+class RequestBodyLimitMiddleware:
+    """Refuse request bodies over max_size (default settings.MAX_REQUEST_BODY_SIZE) with a 413.
+
+    A declared Content-Length over the limit is refused before any of the
+    body is read; chunked bodies are cut off as soon as they pass it, before
+    the form parser spools them to disk.
+    """
+
+    def __init__(self, app, max_size: Optional[int] = None):
+        self.app = app
+        self.max_size = max_size
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        max_size = settings.MAX_REQUEST_BODY_SIZE if self.max_size is None else self.max_size
+        detail = f"Request body too large (max {max_size // (1024 * 1024)}MB)"
+        length = dict(scope["headers"]).get(b"content-length")
+        if length is not None and length.isdigit() and int(length) > max_size:
+            logger.warning(f"Refused {scope['method']} {scope['path']}: Content-Length {int(length)}")
+            await JSONResponse({"detail": detail}, status_code=413)(scope, receive, send)
+            return
+
+        received = 0
+        started = False
+
+        async def limited_receive():
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > max_size:
+                    raise HTTPException(status_code=413, detail=detail)
+            return message
+
+        async def tracking_send(message):
+            nonlocal started
+            if message["type"] == "http.response.start":
+                started = True
+            await send(message)
+
+        try:
+            await self.app(scope, limited_receive, tracking_send)
+        except StarletteHTTPException as e:
+            # Raised while a middleware read the body, outside the route's exception handlers
+            if e.status_code != 413 or started:
+                raise
+            await JSONResponse({"detail": e.detail}, status_code=413)(scope, receive, send)
@@ -11,6 +11,7 @@ from pydantic import BaseModel
 
 from database import get_db
 from auth_utils import get_current_user
+from pagination_utils import keyset_paginate, cached_count
 from models import User, Workshop, WorkshopRegistration
 
 # Configure logging
@@ -84,10 +85,16 @@ async def get_workshops(
     status: Optional[str] = "published",
     limit: int = 20,
     offset: int = 0,
+    cursor: Optional[str] = None,
+    include_total: bool = False,
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
-    """Get all workshops with optional filtering"""
+    """Get all workshops with optional filtering
+
+    Pass `cursor` (empty for the first page, then `next_cursor`) for keyset
+    pagination; offset/limit remains as the compatibility mode.
+    """
     try:
         query = db.query(Workshop)
         
@@ -105,18 +112,25 @@ async def get_workshops(
             query = query.filter(Workshop.approval_status == 'approved')
         
         # Order by start date
-        query = query.order_by(asc(Workshop.start_date))
-        
-        # Apply pagination
-        workshops = query.offset(offset).limit(limit).all()
-        total_count = query.count()
+        sort_keys = [(Workshop.start_date, False), (Workshop.id, False)]
+        next_cursor = None
+        if cursor is not None:
+            workshops, next_cursor = keyset_paginate(query, sort_keys, limit, cursor or None)
+            total_count = cached_count(query) if include_total else None
+        else:
+            # Apply pagination
+            workshops = query.order_by(asc(Workshop.start_date), asc(Workshop.id)).offset(offset).limit(limit).all()
+            total_count = query.count()
         
         return {
             "workshops": [workshop.to_dict() for workshop in workshops],
             "total_count": total_count,
             "limit": limit,
-            "offset": offset
+            "offset": offset if cursor is None else None,
+            "next_cursor": next_cursor
         }
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error fetching workshops: {e}")
         raise HTTPException(status_code=500, detail="Failed to fetch workshops")